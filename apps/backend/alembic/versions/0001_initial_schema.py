@@ -0,0 +1,63 @@
+"""Initial schema: events and incidents
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created by the old `create_all` at startup already have these
+tables; they are left untouched so `upgrade head` can adopt them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "incidents" not in existing:
+        op.create_table(
+            "incidents",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("service", sa.String(100), nullable=False),
+            sa.Column("category", sa.String(50), nullable=True),
+            sa.Column("severity", sa.String(10), nullable=True),
+            sa.Column("summary", sa.Text(), nullable=True),
+            sa.Column("recommended_actions", sa.JSON(), nullable=True),
+            sa.Column(
+                "status",
+                sa.Enum("OPEN", "INVESTIGATING", "RESOLVED", "CLOSED", name="incidentstatus"),
+                nullable=True,
+            ),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_incidents_id", "incidents", ["id"])
+        op.create_index("ix_incidents_service", "incidents", ["service"])
+        op.create_index("ix_incidents_status", "incidents", ["status"])
+        op.create_index("ix_incidents_created_at", "incidents", ["created_at"])
+
+    if "events" not in existing:
+        op.create_table(
+            "events",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("service", sa.String(100), nullable=False),
+            sa.Column("level", sa.String(20), nullable=False),
+            sa.Column("message", sa.Text(), nullable=False),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+            sa.Column("incident_id", sa.Integer(), sa.ForeignKey("incidents.id"), nullable=True),
+        )
+        op.create_index("ix_events_id", "events", ["id"])
+        op.create_index("ix_events_service", "events", ["service"])
+        op.create_index("ix_events_timestamp", "events", ["timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_table("events")
+    op.drop_table("incidents")
+    sa.Enum(name="incidentstatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,60 @@
+"""Full-text search index on event messages, index on events.incident_id
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Frozen copy of src/models/event.py EVENT_SEARCH_DDL as of this revision
+SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', message)) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+        "message, content='events', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+        "INSERT INTO events_fts(rowid, message) VALUES (new.id, new.message); END",
+        "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, message) VALUES ('delete', old.id, old.message); END",
+        "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF message ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, message) VALUES ('delete', old.id, old.message); "
+        "INSERT INTO events_fts(rowid, message) VALUES (new.id, new.message); END",
+    ],
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    indexes = {ix["name"] for ix in sa.inspect(bind).get_indexes("events")}
+    if "ix_events_incident_id" not in indexes:
+        op.create_index("ix_events_incident_id", "events", ["incident_id"])
+
+    for statement in SEARCH_DDL.get(bind.dialect.name, []):
+        op.execute(statement)
+
+    # Index rows that existed before the FTS table was created
+    if bind.dialect.name == "sqlite":
+        op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for trigger in ("events_fts_ai", "events_fts_ad", "events_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS events_fts")
+    elif bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_events_search_vector")
+        op.execute("ALTER TABLE events DROP COLUMN IF EXISTS search_vector")
+    op.drop_index("ix_events_incident_id", table_name="events")
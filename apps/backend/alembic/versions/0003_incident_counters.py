@@ -0,0 +1,43 @@
+"""Incident counters for the dashboard summary
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "incident_counters",
+        sa.Column("dimension", sa.String(20), primary_key=True),
+        sa.Column("key", sa.String(100), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Seed from existing incidents (status values are stored as enum names)
+    op.execute(
+        "INSERT INTO incident_counters (dimension, key, count) "
+        "SELECT 'status', LOWER(CAST(status AS VARCHAR(20))), COUNT(*) FROM incidents "
+        "WHERE status IS NOT NULL GROUP BY status"
+    )
+    op.execute(
+        "INSERT INTO incident_counters (dimension, key, count) "
+        "SELECT 'severity', COALESCE(severity, 'unassigned'), COUNT(*) FROM incidents "
+        "GROUP BY COALESCE(severity, 'unassigned')"
+    )
+    op.execute(
+        "INSERT INTO incident_counters (dimension, key, count) "
+        "SELECT 'service', service, COUNT(*) FROM incidents GROUP BY service"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("incident_counters")
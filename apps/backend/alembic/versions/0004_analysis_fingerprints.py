@@ -0,0 +1,83 @@
+"""Event fingerprints and per-incident analysis snapshot
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import hashlib
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+_BACKFILL_BATCH = 5000
+
+# Frozen copy of src/services/fingerprint.py as of this revision
+_PATTERNS = [
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"), "<uuid>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{6,}\b"), "<hex>"),
+    (re.compile(r"\"[^\"]*\"|'[^']*'"), "<str>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<num>"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def fingerprint(message: str) -> str:
+    template = message.lower()
+    for pattern, placeholder in _PATTERNS:
+        template = pattern.sub(placeholder, template)
+    return hashlib.blake2b(template.strip().encode("utf-8"), digest_size=8).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column("events", sa.Column("fingerprint", sa.String(16), nullable=True))
+    op.create_index("ix_events_incident_fingerprint", "events", ["incident_id", "fingerprint"])
+
+    op.add_column("incidents", sa.Column("analyzed_at", sa.DateTime(), nullable=True))
+    op.add_column("incidents", sa.Column("analyzed_event_count", sa.Integer(), nullable=True))
+    op.add_column("incidents", sa.Column("analyzed_fingerprints", sa.JSON(), nullable=True))
+
+    # Fingerprint events already linked to incidents; unlinked history is
+    # left NULL (it never takes part in re-analysis decisions)
+    if op.get_context().as_sql:
+        return
+    bind = op.get_bind()
+    events = sa.table(
+        "events",
+        sa.column("id", sa.Integer),
+        sa.column("message", sa.Text),
+        sa.column("incident_id", sa.Integer),
+        sa.column("fingerprint", sa.String),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(events.c.id, events.c.message)
+            .where(events.c.incident_id.isnot(None), events.c.id > last_id)
+            .order_by(events.c.id)
+            .limit(_BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            events.update()
+            .where(events.c.id == sa.bindparam("event_id"))
+            .values(fingerprint=sa.bindparam("fp")),
+            [{"event_id": row.id, "fp": fingerprint(row.message)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_column("incidents", "analyzed_fingerprints")
+    op.drop_column("incidents", "analyzed_event_count")
+    op.drop_column("incidents", "analyzed_at")
+    op.drop_index("ix_events_incident_fingerprint", table_name="events")
+    op.drop_column("events", "fingerprint")
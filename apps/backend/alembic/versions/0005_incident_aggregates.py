@@ -0,0 +1,34 @@
+"""Debounced incident aggregates: last_seen_at and event_count
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("incidents", sa.Column("last_seen_at", sa.DateTime(), nullable=True))
+    op.add_column(
+        "incidents",
+        sa.Column("event_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Seed from the events already linked to each incident
+    op.execute(
+        "UPDATE incidents SET "
+        "event_count = (SELECT COUNT(*) FROM events WHERE events.incident_id = incidents.id), "
+        "last_seen_at = (SELECT MAX(timestamp) FROM events WHERE events.incident_id = incidents.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("incidents", "event_count")
+    op.drop_column("incidents", "last_seen_at")
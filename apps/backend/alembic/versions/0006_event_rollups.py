@@ -0,0 +1,44 @@
+"""Per-minute event rollups for rate limiting and sampling
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+MINUTE = {
+    "postgresql": "date_trunc('minute', timestamp)",
+    "sqlite": "strftime('%Y-%m-%d %H:%M:00.000000', timestamp)",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_rollups",
+        sa.Column("service", sa.String(100), primary_key=True),
+        sa.Column("level", sa.String(20), primary_key=True),
+        sa.Column("minute", sa.DateTime(), primary_key=True),
+        sa.Column("received", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("stored", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("dropped", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Seed from the events already stored (everything was stored before sampling)
+    minute = MINUTE.get(op.get_context().dialect.name)
+    if minute is not None:
+        op.execute(
+            "INSERT INTO event_rollups (service, level, minute, received, stored, dropped) "
+            f"SELECT service, level, {minute}, COUNT(*), COUNT(*), 0 FROM events "
+            f"WHERE timestamp IS NOT NULL GROUP BY service, level, {minute}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("event_rollups")
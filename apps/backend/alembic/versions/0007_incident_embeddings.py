@@ -0,0 +1,120 @@
+"""Incident similarity vectors
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Dict
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+_BACKFILL_BATCH = 1000
+
+# Frozen copies of src/services/fingerprint.py normalize_message and
+# src/services/similarity.py embed_templates as of this revision. Vectors of
+# another size than the app's SIMILAR_INDEX_DIM are ignored and recomputed.
+_DIM = int(os.environ.get("SIMILAR_INDEX_DIM", 256))
+_PATTERNS = [
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"), "<uuid>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{6,}\b"), "<hex>"),
+    (re.compile(r"\"[^\"]*\"|'[^']*'"), "<str>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<num>"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize_message(message: str) -> str:
+    template = message.lower()
+    for pattern, placeholder in _PATTERNS:
+        template = pattern.sub(placeholder, template)
+    return template.strip()
+
+
+def _features(template: str):
+    tokens = template.split()
+    for token in tokens:
+        if not (token.startswith("<") and token.endswith(">")):
+            yield token
+    for first, second in zip(tokens, tokens[1:]):
+        yield f"{first} {second}"
+
+
+def embed_templates(service: str, templates: Dict[str, int]) -> bytes:
+    vector = np.zeros(_DIM, dtype=np.float32)
+    weighted = [(f"service={service}", 1.0)]
+    for template, count in templates.items():
+        weight = math.log1p(count)
+        weighted.extend((feature, weight) for feature in _features(template))
+    for feature, weight in weighted:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % _DIM] += weight if h & 0x80000000 else -weight
+    return vector.tobytes()
+
+
+def upgrade() -> None:
+    op.add_column("incidents", sa.Column("embedding", sa.LargeBinary(), nullable=True))
+
+    # Embed incidents that already have an analysis, so they can be reused
+    if op.get_context().as_sql:
+        return
+    bind = op.get_bind()
+    incidents = sa.table(
+        "incidents",
+        sa.column("id", sa.Integer),
+        sa.column("service", sa.String),
+        sa.column("category", sa.String),
+        sa.column("embedding", sa.LargeBinary),
+    )
+    events = sa.table(
+        "events",
+        sa.column("id", sa.Integer),
+        sa.column("message", sa.Text),
+        sa.column("incident_id", sa.Integer),
+        sa.column("fingerprint", sa.String),
+    )
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(incidents.c.id, incidents.c.service)
+            .where(incidents.c.category.isnot(None), incidents.c.id > last_id)
+            .order_by(incidents.c.id)
+            .limit(_BACKFILL_BATCH)
+        ).all()
+        if not batch:
+            break
+        templates = {row.id: Counter() for row in batch}
+        rows = bind.execute(
+            sa.select(events.c.incident_id, sa.func.min(events.c.message), sa.func.count(events.c.id))
+            .where(events.c.incident_id.in_(list(templates)))
+            .group_by(events.c.incident_id, events.c.fingerprint)
+        ).all()
+        for incident_id, message, count in rows:
+            templates[incident_id][normalize_message(message)] += count
+        bind.execute(
+            incidents.update()
+            .where(incidents.c.id == sa.bindparam("incident_id"))
+            .values(embedding=sa.bindparam("vector")),
+            [
+                {"incident_id": row.id, "vector": embed_templates(row.service, templates[row.id])}
+                for row in batch
+            ],
+        )
+        last_id = batch[-1].id
+
+
+def downgrade() -> None:
+    op.drop_column("incidents", "embedding")
@@ -0,0 +1,119 @@
+"""Compact events: services dictionary and small-int levels
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+`events.service` (VARCHAR) becomes `events.service_id` (a key into the new
+`services` table) and `events.level` (VARCHAR) becomes `events.level_id`
+(SMALLINT, see src/models/level.py). Levels are normalized on the way;
+stored levels that aren't recognized at all become INFO.
+
+The single-column index on service is replaced by a composite
+(service_id, level_id, timestamp) index. On SQLite the events table is
+rebuilt, so the full-text search triggers are recreated afterwards.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+# Frozen copies of src/models/level.py and the SQLite part of
+# src/models/event.py EVENT_SEARCH_DDL as of this revision
+LEVEL_CODES = {"TRACE": 1, "DEBUG": 2, "INFO": 3, "WARN": 4, "ERROR": 5}
+LEVEL_NAMES = {code: name for name, code in LEVEL_CODES.items()}
+LEVEL_ALIASES = {
+    "WARNING": "WARN",
+    "ERR": "ERROR",
+    "FATAL": "ERROR",
+    "CRITICAL": "ERROR",
+    "CRIT": "ERROR",
+    "SEVERE": "ERROR",
+    "ALERT": "ERROR",
+    "EMERG": "ERROR",
+    "PANIC": "ERROR",
+    "NOTICE": "INFO",
+    "INFORMATION": "INFO",
+    "FINE": "DEBUG",
+    "VERBOSE": "DEBUG",
+}
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+    "message, content='events', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+    "INSERT INTO events_fts(rowid, message) VALUES (new.id, new.message); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, message) VALUES ('delete', old.id, old.message); END",
+    "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF message ON events BEGIN "
+    "INSERT INTO events_fts(events_fts, rowid, message) VALUES ('delete', old.id, old.message); "
+    "INSERT INTO events_fts(rowid, message) VALUES (new.id, new.message); END",
+]
+
+
+def _level_code_sql() -> str:
+    names = {**{name: name for name in LEVEL_CODES}, **LEVEL_ALIASES}
+    cases = " ".join(f"WHEN '{alias}' THEN {LEVEL_CODES[name]}" for alias, name in names.items())
+    return f"CASE UPPER(TRIM(level)) {cases} ELSE {LEVEL_CODES['INFO']} END"
+
+
+def _level_name_sql() -> str:
+    cases = " ".join(f"WHEN {code} THEN '{name}'" for code, name in LEVEL_NAMES.items())
+    return f"CASE level_id {cases} ELSE 'INFO' END"
+
+
+def _restore_search_triggers() -> None:
+    if op.get_context().dialect.name == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "services",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+    )
+    op.execute("INSERT INTO services (name) SELECT DISTINCT service FROM events ORDER BY service")
+
+    op.add_column("events", sa.Column("service_id", sa.Integer(), nullable=True))
+    op.add_column("events", sa.Column("level_id", sa.SmallInteger(), nullable=True))
+    op.execute(
+        "UPDATE events SET "
+        "service_id = (SELECT services.id FROM services WHERE services.name = events.service), "
+        f"level_id = {_level_code_sql()}"
+    )
+
+    with op.batch_alter_table("events") as batch:
+        batch.drop_index("ix_events_service")
+        batch.drop_column("service")
+        batch.drop_column("level")
+        batch.alter_column("service_id", existing_type=sa.Integer(), nullable=False)
+        batch.alter_column("level_id", existing_type=sa.SmallInteger(), nullable=False)
+        batch.create_foreign_key("fk_events_service_id_services", "services", ["service_id"], ["id"])
+        batch.create_index("ix_events_service_level_time", ["service_id", "level_id", "timestamp"])
+    _restore_search_triggers()
+
+
+def downgrade() -> None:
+    op.add_column("events", sa.Column("service", sa.String(100), nullable=True))
+    op.add_column("events", sa.Column("level", sa.String(20), nullable=True))
+    op.execute(
+        "UPDATE events SET "
+        "service = (SELECT services.name FROM services WHERE services.id = events.service_id), "
+        f"level = {_level_name_sql()}"
+    )
+
+    with op.batch_alter_table("events") as batch:
+        batch.drop_index("ix_events_service_level_time")
+        batch.drop_constraint("fk_events_service_id_services", type_="foreignkey")
+        batch.drop_column("service_id")
+        batch.drop_column("level_id")
+        batch.alter_column("service", existing_type=sa.String(100), nullable=False)
+        batch.alter_column("level", existing_type=sa.String(20), nullable=False)
+        batch.create_index("ix_events_service", ["service"])
+    _restore_search_triggers()
+    op.drop_table("services")
@@ -0,0 +1,29 @@
+"""Idempotency keys for event ingest
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_keys",
+        sa.Column("digest", sa.String(32), primary_key=True),
+        sa.Column("event_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_ingest_keys_created_at", "ingest_keys", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingest_keys_created_at", table_name="ingest_keys")
+    op.drop_table("ingest_keys")
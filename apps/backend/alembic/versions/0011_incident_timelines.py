@@ -0,0 +1,83 @@
+"""Per-incident timeline histograms
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+_BACKFILL_BATCH = 500
+
+# Frozen copy of the src/services/incident_timeline.py bucketing as of this
+# revision, with the app's defaults for TIMELINE_BUCKET_SECONDS and
+# TIMELINE_MAX_BUCKETS
+EPOCH = datetime(1970, 1, 1)
+_BUCKET_SECONDS = int(os.environ.get("TIMELINE_BUCKET_SECONDS", 60))
+_MAX_BUCKETS = max(int(os.environ.get("TIMELINE_MAX_BUCKETS", 120)), 1)
+
+
+def _timeline(buckets: Dict[int, int]) -> dict:
+    """Row values for a timeline of {bucket start (epoch seconds): events}."""
+    lo, hi = min(buckets), max(buckets)
+    width = _BUCKET_SECONDS
+    while hi // width - lo // width >= _MAX_BUCKETS:
+        width *= 2
+    start = lo // width * width
+    counts = [0] * (hi // width - lo // width + 1)
+    for at, n in buckets.items():
+        counts[(at - start) // width] += n
+    return {"start": EPOCH + timedelta(seconds=start), "bucket_seconds": width, "counts": counts}
+
+
+def upgrade() -> None:
+    timelines = op.create_table(
+        "incident_timelines",
+        sa.Column("incident_id", sa.Integer(), sa.ForeignKey("incidents.id"), primary_key=True),
+        sa.Column("start", sa.DateTime(), nullable=False),
+        sa.Column("bucket_seconds", sa.Integer(), nullable=False),
+        sa.Column("counts", sa.JSON(), nullable=False),
+    )
+
+    # Build timelines for existing incidents from their linked events
+    if op.get_context().as_sql:
+        return
+    events = sa.table(
+        "events",
+        sa.column("incident_id", sa.Integer),
+        sa.column("timestamp", sa.DateTime),
+    )
+    rows = op.get_bind().execute(
+        sa.select(events.c.incident_id, events.c.timestamp)
+        .where(events.c.incident_id.isnot(None), events.c.timestamp.isnot(None))
+        .order_by(events.c.incident_id)
+    )
+    width = timedelta(seconds=_BUCKET_SECONDS)
+    counted = {}
+    for incident_id, timestamp in rows:
+        buckets = counted.setdefault(incident_id, {})
+        at = (timestamp - EPOCH) // width * _BUCKET_SECONDS
+        buckets[at] = buckets.get(at, 0) + 1
+
+    batch = []
+    for incident_id, buckets in counted.items():
+        batch.append({"incident_id": incident_id, **_timeline(buckets)})
+        if len(batch) >= _BACKFILL_BATCH:
+            op.bulk_insert(timelines, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(timelines, batch)
+
+
+def downgrade() -> None:
+    op.drop_table("incident_timelines")
@@ -0,0 +1,43 @@
+"""Bulk re-analysis jobs
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analysis_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("filters", sa.JSON(), nullable=True),
+        sa.Column("force", sa.Boolean(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("processed", sa.Integer(), nullable=False),
+        sa.Column("skipped", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("cursor", sa.Integer(), nullable=False),
+        sa.Column("cancel_requested", sa.Boolean(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_analysis_jobs_id", "analysis_jobs", ["id"])
+    op.create_index("ix_analysis_jobs_status", "analysis_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analysis_jobs_status", table_name="analysis_jobs")
+    op.drop_index("ix_analysis_jobs_id", table_name="analysis_jobs")
+    op.drop_table("analysis_jobs")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cold archive (services/archive_service.py) against the
+events table for a long-range analytical question: "which services had the
+most database errors last quarter?".
+
+Seeds a throwaway SQLite database with N events spread over 120 days,
+times the question as SQL on the events table, archives everything, then
+times the same question over the Parquet archive (services/analytics_service.py).
+Also reports the database and archive sizes.
+
+Each (day, service) partition is at least one file, and opening a file
+costs roughly half a millisecond, so the archive pays off once partitions
+hold thousands of rows or more (the defaults give ~8k per partition).
+
+Usage:
+    python benchmarks/bench_archive.py --events 1000000
+    python benchmarks/bench_archive.py --events 5000000 --compression snappy
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MESSAGES = [
+    "Database connection timeout after {n}ms",
+    "Request {n} failed with status 503 from upstream payments",
+    "Token expired for user {n}",
+    "Disk /var/lib/data is {n}% full",
+]
+
+
+def timed(fn, runs):
+    timings, result = [], None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--services", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--compression", default="zstd")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ops_assist_archive_")
+    db_path = os.path.join(workdir, "events.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["ARCHIVE_DIR"] = os.path.join(workdir, "archive")
+    os.environ["ARCHIVE_COMPRESSION"] = args.compression
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+    from sqlalchemy import func, select
+    from src.cli.migrate import upgrade_database
+    from src.core.database import create_session
+    from src.models.event import Event
+    from src.services.analytics_service import AnalyticsService
+    from src.services.archive_service import ArchiveService
+
+    upgrade_database()
+    end = datetime(2024, 6, 30)
+    start = end - timedelta(days=120)
+    step = (end - start) / args.events
+    rng = random.Random(7)
+    with create_session() as db:
+        t0 = time.perf_counter()
+        for offset in range(0, args.events, args.batch):
+            rows = []
+            for i in range(offset, min(offset + args.batch, args.events)):
+                level = "ERROR" if rng.random() < 0.1 else rng.choice(("INFO", "INFO", "WARN"))
+                rows.append({
+                    "service": f"service-{rng.randrange(args.services)}",
+                    "level": level,
+                    "message": rng.choice(MESSAGES).format(n=rng.randrange(10000)),
+                    "timestamp": start + step * i,
+                })
+            db.execute(Event.__table__.insert(), rows)
+            db.commit()
+        print(f"seeded {args.events:,} events in {time.perf_counter() - t0:.1f}s")
+        db_bytes = os.path.getsize(db_path)
+
+        quarter_start = end - timedelta(days=91)
+
+        def sql_query():
+            return db.execute(
+                select(Event.service, func.count(Event.id))
+                .where(Event.level == "ERROR", Event.timestamp >= quarter_start, Event.timestamp < end,
+                       Event.message.ilike("%database%"))
+                .group_by(Event.service)
+                .order_by(func.count(Event.id).desc())
+                .limit(10)
+            ).all()
+
+        sql_ms, sql_rows = timed(sql_query, args.runs)
+
+        t0 = time.perf_counter()
+        archived = ArchiveService(db, batch_size=args.batch).archive_events(end)
+        print(f"archived {archived:,} events in {time.perf_counter() - t0:.1f}s")
+
+    analytics = AnalyticsService()
+    status = analytics.status()["events"]
+    parquet_ms, parquet_rows = timed(
+        lambda: analytics.top_services(level="ERROR", since=quarter_start, until=end, contains="database"),
+        args.runs,
+    )
+    assert [tuple(r) for r in sql_rows] == [(r["service"], r["count"]) for r in parquet_rows]
+
+    print(f"\nsize:  database {db_bytes / 2**20:,.0f} MiB, "
+          f"archive {status['bytes'] / 2**20:,.0f} MiB in {status['files']:,} files ({args.compression})")
+    print(f"top services with database errors last quarter (p50 of {args.runs}):")
+    print(f"  events table  {sql_ms:8.1f} ms")
+    print(f"  archive       {parquet_ms:8.1f} ms")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark the log backfill CLI (src/cli/backfill.py).
+
+Generates a synthetic log file (plain text, or gzip JSON lines), then times
+a dry run (parse + detection replay) and a full load into a throwaway
+database.
+
+Usage:
+    python benchmarks/bench_backfill.py --lines 2000000 --workers 8
+    python benchmarks/bench_backfill.py --lines 1000000 --gzip-jsonl
+    DATABASE_URL=postgresql://... python benchmarks/bench_backfill.py --skip-load
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SERVICES = [f"service-{i}" for i in range(50)]
+MESSAGES = [
+    "Database connection timeout after {n}ms to 10.0.{a}.{b}:5432",
+    "Request {n} completed in {a}ms",
+    "Token expired for user {n}",
+    "Cache miss for key session:{n}",
+]
+
+
+def generate(path: str, lines: int, gzip_jsonl: bool) -> None:
+    rng = random.Random(7)
+    start = datetime(2024, 1, 15)
+    opener = gzip.open(path, "wt") if gzip_jsonl else open(path, "w")
+    with opener as f:
+        for i in range(lines):
+            timestamp = (start + timedelta(milliseconds=i * 50)).isoformat() + "Z"
+            service = rng.choice(SERVICES)
+            level = "ERROR" if rng.random() < 0.05 else rng.choice(("INFO", "WARN"))
+            message = rng.choice(MESSAGES).format(n=rng.getrandbits(20), a=rng.randint(0, 255), b=rng.randint(0, 255))
+            if gzip_jsonl:
+                f.write(json.dumps({"timestamp": timestamp, "service": service, "level": level, "message": message}) + "\n")
+            else:
+                f.write(f"{timestamp} {level} {service} {message}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch", type=int, default=20000)
+    parser.add_argument("--gzip-jsonl", action="store_true", help="Generate gzip JSON lines instead of plain text")
+    parser.add_argument("--skip-load", action="store_true", help="Only time the dry run")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="ops_assist_backfill_"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+    from src.cli.backfill import run_backfill
+    from src.cli.migrate import upgrade_database
+
+    suffix = ".jsonl.gz" if args.gzip_jsonl else ".log"
+    log_path = os.path.join(tempfile.gettempdir(), f"ops_assist_backfill_{args.lines}{suffix}")
+    if not os.path.exists(log_path):
+        t0 = time.perf_counter()
+        generate(log_path, args.lines, args.gzip_jsonl)
+        print(f"Generated {args.lines:,} lines in {time.perf_counter() - t0:.1f}s ({os.path.getsize(log_path) / 1e6:.0f} MB)")
+
+    runs = [("dry run", True)] + ([] if args.skip_load else [("load", False)])
+    if not args.skip_load:
+        upgrade_database()
+
+    print(f"\n{'mode':<10}{'workers':>8}{'seconds':>10}{'lines/min':>14}{'incidents':>11}")
+    for name, dry_run in runs:
+        report = run_backfill([log_path], workers=args.workers, batch_size=args.batch, dry_run=dry_run)
+        print(f"{name:<10}{args.workers:>8}{report.elapsed:>10.1f}{report.lines_per_minute:>14,.0f}{len(report.incidents):>11}")
+
+
+if __name__ == "__main__":
+    main()
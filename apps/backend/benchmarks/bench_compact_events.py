@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Compare the legacy events layout (service and level as VARCHAR on every
+row) with the compact one (services dictionary key + SMALLINT level).
+
+Builds two throwaway SQLite databases with the same N synthetic events,
+both indexed on (service, level, timestamp), then reports table and index
+sizes (from dbstat) and the latency of the queries that hit that index:
+detection's "recent unlinked errors for a service" and per-service error
+counts over a time range.
+
+Usage:
+    python benchmarks/bench_compact_events.py --events 10000000
+    python benchmarks/bench_compact_events.py --events 1000000 --services 500
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.level import LEVEL_CODES  # noqa: E402
+
+START = "2024-01-01 00:00:00"
+LEVEL_MIX = ["INFO"] * 14 + ["WARN"] * 4 + ["ERROR"] * 2  # 10% errors
+
+LAYOUTS = {
+    "legacy": [
+        "CREATE TABLE events (id INTEGER PRIMARY KEY, service VARCHAR(100) NOT NULL, "
+        "level VARCHAR(20) NOT NULL, message TEXT NOT NULL, timestamp DATETIME, "
+        "incident_id INTEGER, fingerprint VARCHAR(16))",
+    ],
+    "compact": [
+        "CREATE TABLE services (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL UNIQUE)",
+        "CREATE TABLE events (id INTEGER PRIMARY KEY, service_id INTEGER NOT NULL REFERENCES services(id), "
+        "level_id SMALLINT NOT NULL, message TEXT NOT NULL, timestamp DATETIME, "
+        "incident_id INTEGER, fingerprint VARCHAR(16))",
+    ],
+}
+INDEXES = {
+    "legacy": "CREATE INDEX ix_events_service_level_time ON events (service, level, timestamp)",
+    "compact": "CREATE INDEX ix_events_service_level_time ON events (service_id, level_id, timestamp)",
+}
+QUERIES = {
+    "detection window (5 min)": (
+        "SELECT id, timestamp FROM events WHERE {service} = ? AND {level} = ? AND timestamp >= ? "
+        "AND incident_id IS NULL ORDER BY timestamp, id",
+        300,
+    ),
+    "error count (1 day)": (
+        "SELECT COUNT(*) FROM events WHERE {service} = ? AND {level} = ? AND timestamp >= ?",
+        86400,
+    ),
+    "error count (30 days)": (
+        "SELECT COUNT(*) FROM events WHERE {service} = ? AND {level} = ? AND timestamp >= ?",
+        30 * 86400,
+    ),
+    "counts per service and level (all)": (
+        "SELECT {service}, {level}, COUNT(*) FROM events GROUP BY {service}, {level}",
+        None,
+    ),
+}
+
+
+def build(path: str, layout: str, events: int, services: int) -> float:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    for statement in LAYOUTS[layout]:
+        conn.execute(statement)
+    names = [f"payment-service-{i:03d}" for i in range(services)]
+    levels = [LEVEL_CODES[level] for level in LEVEL_MIX] if layout == "compact" else LEVEL_MIX
+    conn.create_function("pick_level", 1, lambda i: levels[i % len(levels)])
+    if layout == "compact":
+        conn.executemany("INSERT INTO services (id, name) VALUES (?, ?)", enumerate(names, 1))
+        conn.create_function("pick_service", 1, lambda i: i % services + 1, deterministic=True)
+        columns = "service_id, level_id"
+    else:
+        conn.create_function("pick_service", 1, lambda i: names[i % services], deterministic=True)
+        columns = "service, level"
+
+    t0 = time.perf_counter()
+    # One event per second across all services, ~60 bytes of message each
+    conn.execute(
+        f"INSERT INTO events (id, {columns}, message, timestamp, fingerprint) "
+        "WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < ?) "
+        "SELECT i + 1, pick_service(i), pick_level(abs(random())), "
+        "'Database connection timeout after ' || (i % 9000) || 'ms to 10.0.0.' || (i % 255), "
+        f"datetime('{START}', '+' || i || ' seconds'), printf('%016x', i % 4096) FROM n",
+        (events - 1,),
+    )
+    conn.execute(INDEXES[layout])
+    conn.execute("CREATE INDEX ix_events_timestamp ON events (timestamp)")
+    conn.commit()
+    elapsed = time.perf_counter() - t0
+    conn.execute("ANALYZE")
+    conn.close()
+    return elapsed
+
+
+def sizes(conn) -> dict:
+    return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+
+
+def time_query(conn, sql: str, params, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--services", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--dir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    paths = {}
+    for layout in LAYOUTS:
+        paths[layout] = os.path.join(args.dir, f"ops_assist_{layout}_{args.events}.db")
+        if os.path.exists(paths[layout]):
+            os.remove(paths[layout])
+        elapsed = build(paths[layout], layout, args.events, args.services)
+        print(f"{layout:>8}: loaded {args.events:,} events in {elapsed:.1f}s")
+
+    print(f"\n{'':<36}{'legacy':>12}{'compact':>12}{'ratio':>8}")
+    conns = {layout: sqlite3.connect(path) for layout, path in paths.items()}
+    stats = {layout: sizes(conn) for layout, conn in conns.items()}
+    for name in ("events", "ix_events_service_level_time", "ix_events_timestamp"):
+        legacy, compact = stats["legacy"][name] / 2**20, stats["compact"][name] / 2**20
+        print(f"{name + ' (MiB)':<36}{legacy:>12.1f}{compact:>12.1f}{compact / legacy:>8.2f}")
+    legacy, compact = (os.path.getsize(paths[layout]) / 2**20 for layout in LAYOUTS)
+    print(f"{'file (MiB)':<36}{legacy:>12.1f}{compact:>12.1f}{compact / legacy:>8.2f}")
+
+    # Newest event time, so the windows below end at "now"
+    newest = conns["legacy"].execute("SELECT MAX(timestamp) FROM events").fetchone()[0]
+    service = args.services // 2
+    print(f"\n{'p50 latency (ms)':<36}")
+    for label, (sql, seconds) in QUERIES.items():
+        legacy_params, compact_params = (), ()
+        if seconds is not None:
+            since = conns["legacy"].execute("SELECT datetime(?, ?)", (newest, f"-{seconds} seconds")).fetchone()[0]
+            legacy_params = (f"payment-service-{service:03d}", "ERROR", since)
+            compact_params = (service + 1, LEVEL_CODES["ERROR"], since)
+        runs = args.runs if seconds is not None else max(3, args.runs // 10)
+        legacy = time_query(conns["legacy"], sql.format(service="service", level="level"), legacy_params, runs)
+        compact = time_query(conns["compact"], sql.format(service="service_id", level="level_id"), compact_params, runs)
+        print(f"{label:<36}{legacy:>12.2f}{compact:>12.2f}{compact / legacy:>8.2f}")
+
+    for conn in conns.values():
+        conn.close()
+    for path in paths.values():
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark ingest throughput when every ERROR event joins one hot incident.
+
+Opens an incident for a fresh service, then sends ERROR events for that
+service from many threads. Compares write-through incident updates
+(INCIDENT_TOUCH_INTERVAL=0, every event also updates the incident row) with
+debounced updates (events only; the incident row is flushed once per
+interval by a background flusher).
+
+Usage:
+    python benchmarks/bench_hot_incident.py --concurrency 1 8 32
+    DATABASE_URL=postgresql://... python benchmarks/bench_hot_incident.py --events 5000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--events", type=int, default=2000, help="ERROR events per run")
+    parser.add_argument("--interval", type=float, default=1.0, help="Debounced flush interval (seconds)")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'ops_assist_hot.db')}"
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+    from src.cli.migrate import upgrade_database
+    from src.core.config import get_settings
+    from src.core.database import create_session
+    from src.models.incident import Incident
+    from src.schemas.event import EventCreate
+    from src.services.incident_service import IncidentService
+    from src.services.incident_touch import flush_incident_touches
+    from src.services.ingest_service import IngestService
+
+    upgrade_database()
+    settings = get_settings()
+
+    print(f"{'mode':<14}{'workers':>8}{'events/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'count ok':>10}")
+    for mode, interval in (("write-through", 0), ("debounced", args.interval)):
+        settings.incident_touch_interval = interval
+        for workers in args.concurrency:
+            service = f"hot-{uuid.uuid4().hex[:8]}"
+            with create_session() as db:
+                incident_id = IncidentService(db).create_incident(service, []).id
+
+            stop = threading.Event()
+
+            def flusher():
+                while not stop.wait(interval):
+                    flush_incident_touches()
+
+            def one_event(i):
+                t0 = time.perf_counter()
+                with create_session() as db:
+                    IngestService(db).ingest(EventCreate(service=service, level="ERROR", message=f"timeout {i}"))
+                return (time.perf_counter() - t0) * 1000
+
+            if interval:
+                threading.Thread(target=flusher, daemon=True).start()
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                latencies = sorted(pool.map(one_event, range(args.events)))
+            elapsed = time.perf_counter() - t0
+            stop.set()
+            flush_incident_touches()
+
+            with create_session() as db:
+                counted = db.get(Incident, incident_id).event_count
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            print(
+                f"{mode:<14}{workers:>8}{args.events / elapsed:>10.0f}"
+                f"{statistics.median(latencies):>10.2f}{p95:>10.2f}{str(counted == args.events):>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
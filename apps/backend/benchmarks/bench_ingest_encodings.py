@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark ingest body encodings for POST /api/v1/events/batch.
+
+For each encoding reports bytes on the wire per event and how many events
+per second one core decodes (decompress + parse + build EventCreate), both
+with full validation and on the trusted-agent fast path. With --end-to-end
+it also posts every encoding through the app into a throwaway database.
+
+Usage:
+    python benchmarks/bench_ingest_encodings.py --events 100000
+    python benchmarks/bench_ingest_encodings.py --events 20000 --end-to-end
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNK = 64 * 1024  # what a server typically receives per read
+SERVICES = [f"service-{i}" for i in range(50)]
+MESSAGES = [
+    "Database connection timeout after {n}ms to 10.0.{a}.{b}:5432",
+    "Request {n} completed in {a}ms",
+    "Token expired for user {n}",
+    "Cache miss for key session:{n}",
+]
+
+
+def generate(count):
+    rng = random.Random(7)
+    start = datetime(2024, 1, 15)
+    return [
+        {
+            "service": rng.choice(SERVICES),
+            "level": "ERROR" if rng.random() < 0.05 else rng.choice(("INFO", "WARN")),
+            "message": rng.choice(MESSAGES).format(n=rng.getrandbits(20), a=rng.randint(0, 255), b=rng.randint(0, 255)),
+            "timestamp": (start + timedelta(milliseconds=i * 50)).isoformat() + "Z",
+        }
+        for i in range(count)
+    ]
+
+
+def encodings(records):
+    """(name, content-type, content-encoding, body) for every available encoding."""
+    as_json = json.dumps(records, separators=(",", ":")).encode()
+    as_ndjson = b"\n".join(json.dumps(r, separators=(",", ":")).encode() for r in records)
+    bodies = [
+        ("json", "application/json", None, as_json),
+        ("json+gzip", "application/json", "gzip", gzip.compress(as_json, 6)),
+        ("ndjson+gzip", "application/x-ndjson", "gzip", gzip.compress(as_ndjson, 6)),
+    ]
+    try:
+        import zstandard
+        zstd = zstandard.ZstdCompressor(level=3)
+        bodies.append(("json+zstd", "application/json", "zstd", zstd.compress(as_json)))
+        bodies.append(("ndjson+zstd", "application/x-ndjson", "zstd", zstd.compress(as_ndjson)))
+    except ImportError:
+        zstd = None
+        print("(zstandard not installed: skipping zstd)")
+    try:
+        import msgpack
+        packed = b"".join(msgpack.packb(r) for r in records)
+        bodies.append(("msgpack", "application/msgpack", None, packed))
+        if zstd is not None:
+            bodies.append(("msgpack+zstd", "application/msgpack", "zstd", zstd.compress(packed)))
+    except ImportError:
+        print("(msgpack not installed: skipping msgpack)")
+    return bodies
+
+
+def decode_rate(content_type, content_encoding, body, trusted):
+    """Events/sec through the real decoding path (no HTTP, no database)."""
+    from pydantic import ValidationError
+    from starlette.requests import Request
+
+    from src.core.decoding import iter_records
+    from src.schemas.event import EventCreate, trusted_event
+
+    headers = [(b"content-type", content_type.encode())]
+    if content_encoding:
+        headers.append((b"content-encoding", content_encoding.encode()))
+    chunks = [body[i:i + CHUNK] for i in range(0, len(body), CHUNK)]
+
+    async def receive_all():
+        pending = list(chunks)
+
+        async def receive():
+            chunk = pending.pop(0) if pending else b""
+            return {"type": "http.request", "body": chunk, "more_body": bool(pending)}
+
+        request = Request({"type": "http", "method": "POST", "headers": headers}, receive)
+        build = trusted_event if trusted else EventCreate.model_validate
+        count = 0
+        async for record in iter_records(request):
+            try:
+                build(record)
+                count += 1
+            except (ValidationError, ValueError):
+                pass
+        return count
+
+    t0 = time.perf_counter()
+    count = asyncio.run(receive_all())
+    return count / (time.perf_counter() - t0)
+
+
+def end_to_end(bodies, count):
+    from fastapi.testclient import TestClient
+
+    from src.cli.migrate import upgrade_database
+    from src.main import app
+
+    upgrade_database()
+    print(f"\n{'end to end':<14}{'events/s':>10}")
+    with TestClient(app) as client:
+        for name, content_type, content_encoding, body in bodies:
+            headers = {"content-type": content_type}
+            if content_encoding:
+                headers["content-encoding"] = content_encoding
+            t0 = time.perf_counter()
+            response = client.post("/api/v1/events/batch", content=body, headers=headers)
+            elapsed = time.perf_counter() - t0
+            assert response.json()["accepted"] == count, response.text
+            print(f"{name:<14}{count / elapsed:>10,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--end-to-end", action="store_true", help="Also post each body through the app")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="ops_assist_encodings_"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+    os.environ.setdefault("INGEST_MAX_BODY_BYTES", str(1 << 30))
+
+    records = generate(args.events)
+    bodies = encodings(records)
+
+    print(f"{args.events:,} events\n")
+    print(f"{'encoding':<14}{'bytes':>12}{'B/event':>9}{'validated/s':>13}{'trusted/s':>11}")
+    for name, content_type, content_encoding, body in bodies:
+        validated = decode_rate(content_type, content_encoding, body, trusted=False)
+        trusted = decode_rate(content_type, content_encoding, body, trusted=True)
+        print(f"{name:<14}{len(body):>12,}{len(body) / args.events:>9.1f}{validated:>13,.0f}{trusted:>11,.0f}")
+
+    if args.end_to_end:
+        end_to_end(bodies, args.events)
+
+
+if __name__ == "__main__":
+    main()
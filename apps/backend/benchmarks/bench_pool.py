@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark connection-pool behaviour at increasing concurrency.
+
+Each worker thread repeatedly runs a list_events-style query through a fresh
+session. Reports throughput, latency and peak pool saturation per level, so
+DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_PRE_PING can be compared.
+
+Usage:
+    python benchmarks/bench_pool.py --concurrency 1 4 16 64
+    DB_POOL_PRE_PING=true python benchmarks/bench_pool.py
+    DATABASE_URL=postgresql://... DB_POOL_SIZE=20 python benchmarks/bench_pool.py
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000, help="Queries per concurrency level")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'ops_assist_pool.db')}"
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+    from src.cli.migrate import upgrade_database
+    from src.core.database import create_session, get_engine
+    from src.core.metrics import metrics
+    from src.models.event import Event
+
+    upgrade_database()
+    with create_session() as db:
+        if db.query(Event).count() < 1000:
+            db.execute(Event.__table__.insert(), [
+                {"service": f"svc-{i % 10}", "level": "INFO", "message": f"event {i}"}
+                for i in range(1000)
+            ])
+            db.commit()
+
+    print(f"pool_size={get_engine().pool.size()} pre_ping={get_engine().pool._pre_ping}")
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'peak sat':>10}")
+
+    for workers in args.concurrency:
+        latencies = []
+        peak = [0.0]
+        done = threading.Event()
+
+        def sample_saturation():
+            while not done.is_set():
+                peak[0] = max(peak[0], metrics.snapshot().get("db_pool_primary_saturation", 0))
+                time.sleep(0.005)
+
+        def one_request(_):
+            t0 = time.perf_counter()
+            with create_session() as db:
+                db.query(Event).filter(Event.service == "svc-3").order_by(Event.timestamp.desc()).limit(50).all()
+            return (time.perf_counter() - t0) * 1000
+
+        sampler = threading.Thread(target=sample_saturation, daemon=True)
+        sampler.start()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = sorted(pool.map(one_request, range(args.requests)))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        sampler.join()
+
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{workers:>8}{args.requests / elapsed:>10.0f}{statistics.median(latencies):>10.2f}{p95:>10.2f}{peak[0]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-text search latency over a large events table.
+
+Seeds a throwaway database with synthetic log messages, then times
+`GET /api/v1/events?q=...`-equivalent queries through SearchService.
+
+Usage:
+    python benchmarks/bench_search.py --events 10000000
+    DATABASE_URL=postgresql://... python benchmarks/bench_search.py --events 1000000 --keep
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    "connection refused timeout database pool exhausted upstream gateway "
+    "memory heap allocation failed disk quota exceeded token expired "
+    "unauthorized request retry backoff socket reset tls handshake"
+).split()
+SERVICES = [f"service-{i}" for i in range(50)]
+QUERIES = [
+    "refused",
+    '"connection refused"',
+    "pool* exhausted",
+    '"tls handshake" failed',
+    "quota",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--keep", action="store_true", help="Reuse an existing seeded database")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.gettempdir(), f"ops_assist_search_{args.events}.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+    from src.cli.migrate import upgrade_database
+    from src.core.database import create_session
+    from src.models.event import Event
+    from src.services.search_service import SearchService
+
+    upgrade_database()
+
+    with create_session() as db:
+        existing = db.query(Event).count()
+        if existing < args.events:
+            rng = random.Random(42)
+            start = datetime.utcnow() - timedelta(days=30)
+            seeded = existing
+            t0 = time.perf_counter()
+            while seeded < args.events:
+                n = min(args.batch, args.events - seeded)
+                rows = [
+                    {
+                        "service": rng.choice(SERVICES),
+                        "level": rng.choice(("ERROR", "WARN", "INFO")),
+                        "message": " ".join(rng.choices(WORDS, k=8)) + f" req={rng.getrandbits(32):x}",
+                        "timestamp": start + timedelta(seconds=seeded + i),
+                    }
+                    for i in range(n)
+                ]
+                db.execute(Event.__table__.insert(), rows)
+                db.commit()
+                seeded += n
+                print(f"  seeded {seeded:,}/{args.events:,}", end="\r", flush=True)
+            print(f"\nSeeded {args.events - existing:,} events in {time.perf_counter() - t0:.1f}s")
+
+        search = SearchService(db)
+        print(f"\n{'query':<28}{'p50 ms':>10}{'p95 ms':>10}{'rows':>8}")
+        for q in QUERIES:
+            timings = []
+            rows = []
+            for _ in range(args.runs):
+                matches = search.match_events(q)
+                t0 = time.perf_counter()
+                rows = (
+                    db.query(Event)
+                    .join(matches, matches.c.event_id == Event.id)
+                    .order_by(matches.c.rank, Event.timestamp.desc())
+                    .limit(args.limit)
+                    .all()
+                )
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{q:<28}{statistics.median(timings):>10.1f}{p95:>10.1f}{len(rows):>8}")
+
+
+if __name__ == "__main__":
+    main()
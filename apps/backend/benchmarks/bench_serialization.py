@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark list-endpoint serialization: items/sec before and after.
+
+- before: ORM-like object → Pydantic model per item → response_model
+  validation → JSON (what FastAPI did for list_events / list_incidents)
+- after: column tuples → dict → ORJSONResponse.render
+
+Usage:
+    python benchmarks/bench_serialization.py --items 1000 --rounds 50
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from src.core.responses import ORJSONResponse
+from src.schemas.event import EventResponse
+from src.schemas.incident import IncidentResponse
+
+EVENT_KEYS = ("id", "service", "level", "message", "timestamp", "incident_id")
+INCIDENT_KEYS = ("id", "service", "category", "severity", "summary", "status", "created_at", "updated_at", "event_count")
+
+
+def make_rows(n):
+    now = datetime.utcnow()
+    events = [
+        (i, f"service-{i % 20}", "ERROR", f"Database connection timeout after 30s (attempt {i})", now - timedelta(seconds=i), i // 10 or None)
+        for i in range(n)
+    ]
+    incidents = [
+        (i, f"service-{i % 20}", "database_issue", "P1", "Database connection issues detected", "open", now, now, 12)
+        for i in range(n)
+    ]
+    return events, incidents
+
+
+def bench(label, fn, items, rounds):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        body = fn()
+    elapsed = time.perf_counter() - t0
+    rate = items * rounds / elapsed
+    print(f"{label:<34}{rate:>14,.0f}{len(body):>12,}")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    events, incidents = make_rows(args.items)
+    event_objs = [SimpleNamespace(**dict(zip(EVENT_KEYS, row))) for row in events]
+    event_adapter = TypeAdapter(List[EventResponse])
+    incident_adapter = TypeAdapter(List[IncidentResponse])
+
+    def events_before():
+        models = [EventResponse.model_validate(obj) for obj in event_objs]
+        validated = event_adapter.validate_python(models, from_attributes=True)
+        return JSONResponse(event_adapter.dump_python(validated, mode="json")).body
+
+    def events_after():
+        return ORJSONResponse([dict(zip(EVENT_KEYS, row)) for row in events]).body
+
+    def incidents_before():
+        models = [IncidentResponse(**dict(zip(INCIDENT_KEYS, row))) for row in incidents]
+        validated = incident_adapter.validate_python(models, from_attributes=True)
+        return JSONResponse(incident_adapter.dump_python(validated, mode="json")).body
+
+    def incidents_after():
+        return ORJSONResponse([dict(zip(INCIDENT_KEYS, row)) for row in incidents]).body
+
+    print(f"{'path':<34}{'items/sec':>14}{'bytes':>12}")
+    before = bench("list_events (pydantic)", events_before, args.items, args.rounds)
+    after = bench("list_events (tuples + orjson)", events_after, args.items, args.rounds)
+    print(f"  speedup: {after / before:.1f}x")
+    before = bench("list_incidents (pydantic)", incidents_before, args.items, args.rounds)
+    after = bench("list_incidents (tuples + orjson)", incidents_after, args.items, args.rounds)
+    print(f"  speedup: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark the similar-incidents index (src/services/vector_index.py).
+
+Fills a VectorIndex with N synthetic incident vectors (sparse hashed
+n-gram style: a few dozen non-zero buckets each), then times single and
+batched cosine top-k queries. Also reports how fast incidents are embedded
+from message templates.
+
+Usage:
+    python benchmarks/bench_similarity.py --incidents 1000000
+    python benchmarks/bench_similarity.py --incidents 1000000 --dim 128
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MESSAGES = [
+    "Database connection timeout after {n}ms to 10.0.{a}.{b}:5432",
+    "Request {n} failed with status 503 from upstream payments",
+    "Token expired for user {n}",
+    "OutOfMemoryError: Java heap space in worker {a}",
+    "Disk /var/lib/data is {a}% full",
+]
+
+
+def synthetic_vectors(count: int, dim: int, rng) -> np.ndarray:
+    vectors = np.zeros((count, dim), dtype=np.float32)
+    nonzero = 24
+    rows = np.repeat(np.arange(count), nonzero)
+    cols = rng.integers(0, dim, size=count * nonzero)
+    vectors[rows, cols] = rng.normal(size=count * nonzero).astype(np.float32)
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--incidents", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=64)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SIMILAR_INDEX_DIM", str(args.dim))
+    from src.services.fingerprint import normalize_message
+    from src.services.similarity import embed_templates
+    from src.services.vector_index import VectorIndex
+
+    rng = np.random.default_rng(11)
+
+    samples = 20000
+    templates = [
+        {normalize_message(MESSAGES[i % len(MESSAGES)].format(n=i, a=i % 250, b=i % 7)): 5,
+         normalize_message(MESSAGES[(i + 1) % len(MESSAGES)].format(n=i, a=i % 9, b=1)): 2}
+        for i in range(samples)
+    ]
+    t0 = time.perf_counter()
+    for i, counts in enumerate(templates):
+        embed_templates(f"service-{i % 50}", counts, args.dim)
+    print(f"embed: {samples / (time.perf_counter() - t0):,.0f} incidents/s")
+
+    index = VectorIndex(args.dim)
+    chunk = 100_000
+    t0 = time.perf_counter()
+    for start in range(0, args.incidents, chunk):
+        count = min(chunk, args.incidents - start)
+        index.add(list(range(start, start + count)), synthetic_vectors(count, args.dim, rng))
+    elapsed = time.perf_counter() - t0
+    print(f"add:   {args.incidents:,} vectors in {elapsed:.1f}s "
+          f"({args.incidents / elapsed:,.0f}/s, {args.incidents * args.dim * 4 / 2**20:,.0f} MiB)")
+
+    queries = synthetic_vectors(args.queries, args.dim, rng)
+    index.search(queries[:1], args.k)  # warm up
+
+    t0 = time.perf_counter()
+    for query in queries[:8]:
+        index.search(query, args.k)
+    single = (time.perf_counter() - t0) / 8
+    print(f"query: {single * 1000:.1f} ms (one at a time)")
+
+    for batch in (8, args.queries):
+        t0 = time.perf_counter()
+        index.search(queries[:batch], args.k)
+        elapsed = time.perf_counter() - t0
+        print(f"query: {elapsed * 1000 / batch:.1f} ms each in batches of {batch} ({elapsed * 1000:.0f} ms per batch)")
+
+
+if __name__ == "__main__":
+    main()
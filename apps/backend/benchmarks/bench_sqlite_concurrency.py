@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent ingest plus dashboard reads on a SQLite file database.
+
+Writer threads POST /api/v1/events (about 10% ERROR, so detection runs)
+while reader threads poll the dashboard queries (GET /incidents/summary and
+GET /events?limit=50), all through the ASGI app in one process. Reports
+ingest throughput, failed writes ("database is locked"), and write and read
+latency.
+
+Each mode runs in its own process on a fresh database, since the pragmas
+are applied when the engine connects:
+
+    rollback     SQLITE_JOURNAL_MODE=delete, SQLITE_SYNCHRONOUS=full, no writer
+                 (SQLite's own defaults; a request thread stores its event)
+    wal          WAL + synchronous=normal, request threads still write
+    wal+writer   WAL + synchronous=normal + the single event writer (default)
+
+Usage:
+    python benchmarks/bench_sqlite_concurrency.py
+    python benchmarks/bench_sqlite_concurrency.py --writers 16 --readers 4 --seconds 10
+    python benchmarks/bench_sqlite_concurrency.py --modes wal+writer
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = {
+    "rollback": {"SQLITE_JOURNAL_MODE": "delete", "SQLITE_SYNCHRONOUS": "full", "SQLITE_SINGLE_WRITER": "false"},
+    "wal": {"SQLITE_JOURNAL_MODE": "wal", "SQLITE_SYNCHRONOUS": "normal", "SQLITE_SINGLE_WRITER": "false"},
+    "wal+writer": {"SQLITE_JOURNAL_MODE": "wal", "SQLITE_SYNCHRONOUS": "normal", "SQLITE_SINGLE_WRITER": "true"},
+}
+SERVICES = [f"edge-{i}" for i in range(20)]
+
+
+def p95(values):
+    values = sorted(values)
+    return values[max(int(len(values) * 0.95) - 1, 0)] if values else 0.0
+
+
+def run(args) -> dict:
+    """One mode, in this process (settings come from the environment)."""
+    from fastapi.testclient import TestClient
+
+    from src.cli.migrate import upgrade_database
+    from src.main import app
+
+    upgrade_database()
+    client = TestClient(app)
+    stop = threading.Event()
+    lock = threading.Lock()
+    writes, reads, failures = [], [], []
+
+    def writer(n):
+        i = 0
+        while not stop.is_set():
+            i += 1
+            level = "ERROR" if i % 10 == 0 else "INFO"
+            body = {"service": SERVICES[(n + i) % len(SERVICES)], "level": level,
+                    "message": f"Request {uuid.uuid4().hex[:8]} timed out after {i}ms"}
+            t0 = time.perf_counter()
+            try:
+                ok = client.post("/api/v1/events", json=body).status_code == 201
+            except Exception:
+                ok = False
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                (writes if ok else failures).append(elapsed)
+
+    def reader(n):
+        paths = ("/api/v1/incidents/summary", "/api/v1/events?limit=50")
+        i = n
+        while not stop.is_set():
+            i += 1
+            t0 = time.perf_counter()
+            client.get(paths[i % 2])
+            with lock:
+                reads.append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    from src.services.event_writer import stop_event_writer
+    stop_event_writer()
+
+    return {
+        "writes_per_s": len(writes) / args.seconds,
+        "failed": len(failures),
+        "write_p50": statistics.median(writes) if writes else 0.0,
+        "write_p95": p95(writes),
+        "reads_per_s": len(reads) / args.seconds,
+        "read_p50": statistics.median(reads) if reads else 0.0,
+        "read_p95": p95(reads),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--writers", type=int, default=8, help="Threads posting events")
+    parser.add_argument("--readers", type=int, default=4, help="Threads polling dashboard queries")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per mode")
+    parser.add_argument("--child", metavar="RESULT_FILE", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with open(args.child, "w") as f:
+            json.dump(run(args), f)
+        return
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:g}s per mode")
+    print(f"{'mode':<12}{'writes/s':>10}{'failed':>8}{'w p50':>9}{'w p95':>9}"
+          f"{'reads/s':>9}{'r p50':>9}{'r p95':>9}")
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, **MODES[mode])
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            env.setdefault("ENVIRONMENT", "benchmark")
+            result_file = os.path.join(tmp, "result.json")
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", result_file,
+                 "--writers", str(args.writers), "--readers", str(args.readers), "--seconds", str(args.seconds)],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+            )
+            with open(result_file) as f:
+                r = json.load(f)
+        print(f"{mode:<12}{r['writes_per_s']:>10.0f}{r['failed']:>8}{r['write_p50']:>9.1f}{r['write_p95']:>9.1f}"
+              f"{r['reads_per_s']:>9.0f}{r['read_p50']:>9.1f}{r['read_p95']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold-start time of an API worker.
+
+Measures, in fresh interpreter processes:
+- import: `import src.main` (what every worker, test and CLI pays)
+- ready: import + lifespan startup + first GET /health
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import time
+t0 = time.perf_counter()
+import src.main
+t_import = time.perf_counter() - t0
+from fastapi.testclient import TestClient
+with TestClient(src.main.app) as client:
+    client.get("/health")
+t_ready = time.perf_counter() - t0
+print(f"{t_import} {t_ready}")
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'ops_assist_startup.db')}")
+    env.setdefault("ENVIRONMENT", "benchmark")
+
+    imports, readies = [], []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        imports.append(float(out[-2]) * 1000)
+        readies.append(float(out[-1]) * 1000)
+
+    print(f"{'phase':<10}{'p50 ms':>10}{'min ms':>10}{'max ms':>10}")
+    for label, values in (("import", imports), ("ready", readies)):
+        print(f"{label:<10}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
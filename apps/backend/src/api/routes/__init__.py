@@ -1,4 +1,4 @@
 # API routes
-from . import events, incidents
+from . import analysis_jobs, analytics, debug, events, incidents, limits, otlp
 
-__all__ = ["events", "incidents"]
\ No newline at end of file
+__all__ = ["analysis_jobs", "analytics", "debug", "events", "incidents", "limits", "otlp"]
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Bulk re-analysis API endpoints.
+Re-run AI analysis over many incidents at once (see
+services/analysis_jobs.py), e.g. after the analysis prompt changed.
+"""
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from ...core.database import get_db, get_read_db
+from ...models.analysis_job import AnalysisJob
+from ...schemas.analysis_job import AnalysisJobCreate, AnalysisJobResponse
+from ...services.analysis_jobs import JobNotFound, JobStateError, get_analysis_job_runner
+
+router = APIRouter()
+
+
+def _not_found(job_id: int) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Analysis job with id {job_id} not found")
+
+
+@router.post("/analysis-jobs", response_model=AnalysisJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_analysis_job(job: AnalysisJobCreate, db: Session = Depends(get_db)):
+    """
+    Start re-analyzing every incident matching a filter.
+
+    The job runs in the background: incidents are loaded in batches,
+    analyzed `ANALYSIS_JOB_CONCURRENCY` at a time and written back a batch
+    per transaction. Poll `GET /analysis-jobs/{id}` for progress.
+
+    **Request Body (all optional):**
+    ```json
+    {
+        "service": "auth-api",
+        "status": "open",
+        "category": "database_issue",
+        "severity": "P1",
+        "created_since": "2026-01-01T00:00:00",
+        "created_until": "2026-04-01T00:00:00",
+        "analyzed_before": "2026-10-01T00:00:00",
+        "force": true
+    }
+    ```
+
+    `force: false` skips incidents whose stored analysis is still current
+    (see `REANALYSIS_*` settings).
+    """
+    runner = get_analysis_job_runner()
+    created = runner.create(db, job.model_dump(mode="json", exclude={"force"}), force=job.force)
+    runner.start(created.id)
+    return created
+
+
+@router.get("/analysis-jobs", response_model=List[AnalysisJobResponse])
+def list_analysis_jobs(limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_read_db)):
+    """
+    List bulk re-analysis jobs, newest first.
+    """
+    return db.query(AnalysisJob).order_by(AnalysisJob.id.desc()).limit(limit).all()
+
+
+@router.get("/analysis-jobs/{job_id}", response_model=AnalysisJobResponse)
+def get_analysis_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Get a job's status and progress (`processed`, `skipped`, `failed` of `total`).
+
+    **Example:** `GET /api/v1/analysis-jobs/1`
+    """
+    job = db.get(AnalysisJob, job_id)
+    if job is None:
+        raise _not_found(job_id)
+    return job
+
+
+@router.post("/analysis-jobs/{job_id}/cancel", response_model=AnalysisJobResponse)
+def cancel_analysis_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Cancel a job. Analyses already running finish and are stored; the job
+    can be resumed later.
+    """
+    try:
+        return get_analysis_job_runner().cancel(db, job_id)
+    except JobNotFound:
+        raise _not_found(job_id)
+    except JobStateError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.post("/analysis-jobs/{job_id}/resume", response_model=AnalysisJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def resume_analysis_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Resume a cancelled, interrupted (server restart) or failed job from
+    where it stopped.
+    """
+    try:
+        return get_analysis_job_runner().resume(db, job_id)
+    except JobNotFound:
+        raise _not_found(job_id)
+    except JobStateError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -1,22 +1,108 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
+"""
+Analytics API endpoints.
+Historical questions answered from the cold archive (see
+services/analytics_service.py); events still in the database are not
+included.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ...models.level import normalize_level
+from ...schemas.analytics import ArchivedIncident, ArchiveStatus, DailyEventCount, IncidentBreakdown, ServiceCount
+from ...services.analytics_service import AnalyticsService
+from ...services.archive_service import archive_available
 
 router = APIRouter()
 
-@router.get("/analytics", response_model=List[Dict])
-async def get_analytics():
-    # Placeholder for analytics data retrieval logic
-    analytics_data = [
-        {"incident_id": 1, "count": 5},
-        {"incident_id": 2, "count": 3},
-    ]
-    return analytics_data
-
-@router.get("/analytics/{incident_id}", response_model=Dict)
-async def get_analytics_by_incident(incident_id: int):
-    # Placeholder for specific incident analytics retrieval logic
-    if incident_id not in [1, 2]:
-        raise HTTPException(status_code=404, detail="Incident not found")
-    
-    analytics_data = {"incident_id": incident_id, "count": 5}
-    return analytics_data
\ No newline at end of file
+
+def _analytics() -> AnalyticsService:
+    if not archive_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analytics needs pyarrow installed on the server"
+        )
+    return AnalyticsService()
+
+
+def _level(level: Optional[str]) -> Optional[str]:
+    if level is None:
+        return None
+    normalized = normalize_level(level)
+    if normalized is None:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Unknown level: {level}")
+    return normalized
+
+
+@router.get("/analytics", response_model=ArchiveStatus)
+def get_archive_status():
+    """
+    What the archive holds: files, bytes and day range for events and incidents.
+    """
+    return _analytics().status()
+
+
+@router.get("/analytics/events/top-services", response_model=List[ServiceCount])
+def top_services(
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    contains: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=1000),
+):
+    """
+    Services with the most archived events.
+
+    **Query Parameters:**
+    - `level`: Only this level (e.g. ERROR)
+    - `since`, `until`: Event time range (naive UTC; `until` is exclusive)
+    - `contains`: Only messages containing this text (case-insensitive)
+    - `limit`: Maximum number of services
+
+    **Example:** `GET /api/v1/analytics/events/top-services?level=ERROR&contains=database&since=2024-01-01&until=2024-04-01`
+    """
+    return _analytics().top_services(_level(level), since, until, contains, limit)
+
+
+@router.get("/analytics/events/daily", response_model=List[DailyEventCount])
+def daily_event_counts(
+    service: Optional[str] = None,
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Archived events per day and level.
+
+    **Example:** `GET /api/v1/analytics/events/daily?service=auth-api&since=2024-01-01`
+    """
+    return _analytics().daily_event_counts(service, _level(level), since, until)
+
+
+@router.get("/analytics/incidents", response_model=List[IncidentBreakdown])
+def incident_breakdown(
+    service: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Archived incidents per category and severity, with their event counts.
+
+    **Example:** `GET /api/v1/analytics/incidents?since=2024-01-01&until=2024-04-01`
+    """
+    return _analytics().incident_breakdown(service, since, until)
+
+
+@router.get("/analytics/incidents/{incident_id}", response_model=ArchivedIncident)
+def get_archived_incident(incident_id: int):
+    """
+    An archived incident, with its archived events counted per level.
+    """
+    incident = _analytics().archived_incident(incident_id)
+    if incident is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident {incident_id} is not in the archive"
+        )
+    return incident
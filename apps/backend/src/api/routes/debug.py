@@ -0,0 +1,68 @@
+"""
+Diagnostics API endpoints.
+Slow queries, slow requests and request profiles recorded by
+core/diagnostics.py. Every endpoint needs `X-Debug-Token`; they don't exist
+(404) while DEBUG_TOKEN is unset.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from ...core.config import get_settings
+from ...core.diagnostics import debug_token_valid, get_profile, list_profiles, slow_queries, slow_requests
+from ...schemas.debug import ProfileInfo, SlowQuery, SlowRequest
+
+settings = get_settings()
+
+
+def _require_debug_token(x_debug_token: Optional[str] = Header(None)) -> None:
+    if not settings.debug_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not debug_token_valid(x_debug_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or missing X-Debug-Token")
+
+
+router = APIRouter(prefix="/debug", dependencies=[Depends(_require_debug_token)])
+
+
+@router.get("/slow-queries", response_model=List[SlowQuery])
+def get_slow_queries(limit: int = Query(100, ge=1, le=1000)):
+    """
+    Statements slower than SLOW_QUERY_MS, newest first, with the route that ran them.
+    """
+    return slow_queries.recent(limit)
+
+
+@router.get("/slow-requests", response_model=List[SlowRequest])
+def get_slow_requests(limit: int = Query(100, ge=1, le=1000)):
+    """
+    Requests slower than SLOW_REQUEST_MS, newest first, with their statement
+    count and database time.
+    """
+    return slow_requests.recent(limit)
+
+
+@router.get("/profiles", response_model=List[ProfileInfo])
+def get_profiles():
+    """
+    Recent request profiles, newest first.
+
+    Profile a request by sending `X-Debug-Token` with `X-Profile: 1` (or
+    `?profile=1`); its id comes back in the `X-Profile-Id` response header.
+    """
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile_stacks(profile_id: str):
+    """
+    A profile's sampled stacks in folded format (`frame;frame;frame count`).
+
+    **Example:** `curl -H "X-Debug-Token: ..." .../debug/profiles/3 | flamegraph.pl > profile.svg`
+    (or load the file in https://www.speedscope.app)
+    """
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Profile {profile_id} not found")
+    return profile["folded"]
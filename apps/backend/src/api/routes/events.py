@@ -2,21 +2,58 @@
 Events API endpoints.
 Handles receiving and querying log/error events.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import hmac
+import math
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
 from datetime import datetime
+from typing import List, Optional, Union
 
-from ...core.database import get_db
+from ...core.config import get_settings
+from ...core.database import create_session, get_db, get_read_db
+from ...core.decoding import DecompressingRoute, iter_records
+from ...core.metrics import metrics
+from ...core.responses import ORJSONResponse, select_fields
 from ...models.event import Event
-from ...schemas.event import EventCreate, EventResponse
-from ...services.incident_service import IncidentService
+from ...models.event_rollup import EventRollup
+from ...models.level import normalize_level
+from ...schemas.event import EventBatchResponse, EventCreate, EventRecord, EventResponse, trusted_event
+from ...schemas.limits import EventRollupResponse
+from ...services.event_writer import get_event_writer
+from ...services.ingest_limits import DROPPED, STORE, get_ingest_limiter
+from ...services.ingest_service import IngestService
+from ...services.search_service import SearchService
+
+settings = get_settings()
+
+router = APIRouter(route_class=DecompressingRoute)
+
+# Rejected records reported back per batch request
+MAX_BATCH_ERRORS = 20
 
-router = APIRouter()
+# Columns selected for list responses (must match EventResponse fields)
+EVENT_LIST_COLUMNS = (
+    Event.id,
+    Event.service,
+    Event.level,
+    Event.message,
+    Event.timestamp,
+    Event.incident_id,
+)
 
 
 @router.post("/events", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
-def create_event(event: EventCreate, db: Session = Depends(get_db)):
+def create_event(
+    event: EventCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    db: Session = Depends(get_db)
+):
     """
     Receive a new log/error event from an application.
     
@@ -35,37 +72,150 @@ def create_event(event: EventCreate, db: Session = Depends(get_db)):
     ```
     
     **Response:** The created event with ID and timestamp
+    
+    Bodies may be sent with `Content-Encoding: gzip` or `zstd`.
+    
+    **Ingest limits:** a service over its rate limit gets **429** with
+    `Retry-After` for non-ERROR events; a non-ERROR event that sampling
+    leaves out is counted in the rollups and answered with **202** and
+    `{"sampled": true}` (no event row). ERROR events are always stored.
+    
+    **Retries:** send an `Idempotency-Key` header (or `idempotency_key` in
+    the body). A retry with a key already used for the service within
+    `IDEMPOTENCY_WINDOW` is not stored again; it is answered with **200**,
+    `Idempotent-Replayed: true` and the event stored the first time.
+    
+    On a SQLite database (with `SQLITE_SINGLE_WRITER`), concurrent requests
+    are stored together by one writer thread, a group per transaction.
     """
-    # Create event
-    db_event = Event(
-        service=event.service,
-        level=event.level,
-        message=event.message,
-        timestamp=datetime.utcnow()
+    decision = get_ingest_limiter().admit(event.service, event.level, event.timestamp)
+    if decision == DROPPED:
+        retry_after = get_ingest_limiter().retry_after(event.service)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Ingest rate limit exceeded for service {event.service}",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    if decision != STORE:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"service": event.service, "level": event.level, "sampled": True},
+        )
+    if idempotency_key and not event.idempotency_key:
+        event.idempotency_key = idempotency_key
+    writer = get_event_writer()
+    if writer is not None:
+        stored, duplicate = writer.store(event)
+    else:
+        ingest = IngestService(db)
+        stored = ingest.ingest(event)
+        duplicate = ingest.duplicates > 0
+    if duplicate:
+        content = (
+            jsonable_encoder(EventResponse.model_validate(stored)) if stored is not None
+            else {"service": event.service, "level": event.level, "duplicate": True}
+        )
+        return JSONResponse(status_code=status.HTTP_200_OK, content=content, headers={"Idempotent-Replayed": "true"})
+    return stored
+
+
+def _is_trusted(request: Request) -> bool:
+    token = request.headers.get("x-ingest-token")
+    if not token or not settings.ingest_trusted_tokens:
+        return False
+    return any(
+        hmac.compare_digest(token, trusted.strip())
+        for trusted in settings.ingest_trusted_tokens.split(",")
+        if trusted.strip()
     )
-    db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
-    
-    # Initialize incident service
-    incident_service = IncidentService(db)
-    
-    # Only process ERROR events for incident detection
-    if event.level == "ERROR":
-        # Check if there's an open incident for this service
-        open_incident = incident_service.get_open_incident_for_service(event.service)
-        
-        if open_incident:
-            # Add to existing incident
-            incident_service.add_event_to_incident(db_event, open_incident)
-        else:
-            # Check if we should create a new incident
-            new_incident = incident_service.detect_and_group_incident(event.service)
-            if new_incident:
-                print(f"🚨 New incident created: ID={new_incident.id} for service={new_incident.service}")
-    
-    db.refresh(db_event)
-    return db_event
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+
+def _store_batch(events: List[Union[EventCreate, EventRecord]]) -> int:
+    """Store a batch; returns how many were duplicates."""
+    with create_session() as db:
+        ingest = IngestService(db)
+        ingest.ingest_many(events)
+        return ingest.duplicates
+
+
+@router.post("/events/batch", response_model=EventBatchResponse)
+async def create_events_batch(request: Request):
+    """
+    Receive many events in one request.
+    
+    Events are stored in batched inserts of up to `INGEST_BATCH_SIZE` as the
+    body is decoded, then run through incident detection like single events.
+    Invalid records are skipped and reported; the rest are stored, subject
+    to the service's ingest limits (`sampled` / `dropped` in the response;
+    ERROR events are never sampled or dropped). Records whose
+    `idempotency_key` was already used within `IDEMPOTENCY_WINDOW` are
+    counted in `duplicates` and not stored again.
+    
+    **Body formats** (`Content-Type`):
+    - `application/json`: an array of events, or `{"events": [...]}`
+    - `application/x-ndjson`: one event per line (decoded as it streams in)
+    - `application/msgpack`: concatenated event maps or one array
+      (streamed; needs the `msgpack` package)
+    
+    **Compression** (`Content-Encoding`): `gzip`, `zstd`
+    
+    Agents presenting a token listed in `INGEST_TRUSTED_TOKENS` in the
+    `X-Ingest-Token` header skip full schema validation (only the checks
+    the insert needs are made and no Pydantic model is built per event).
+    
+    Note: a body that turns out to be malformed part-way through is
+    answered with 400, but batches decoded before that point are kept.
+    """
+    build = trusted_event if _is_trusted(request) else EventCreate.model_validate
+    limiter = get_ingest_limiter()
+    accepted = rejected = sampled = dropped = duplicates = 0
+    errors = []
+    pending: List[Union[EventCreate, EventRecord]] = []
+    index = -1
+    
+    async for record in iter_records(request):
+        index += 1
+        try:
+            event = build(record)
+        except (ValidationError, ValueError) as e:
+            rejected += 1
+            if len(errors) < MAX_BATCH_ERRORS:
+                errors.append({"index": index, "error": _error_message(e)})
+            continue
+        decision = limiter.admit(event.service, event.level, event.timestamp)
+        if decision == DROPPED:
+            dropped += 1
+            continue
+        accepted += 1
+        if decision != STORE:
+            sampled += 1
+            continue
+        pending.append(event)
+        if len(pending) >= settings.ingest_batch_size:
+            duplicates += await run_in_threadpool(_store_batch, pending)
+            pending = []
+    
+    if pending:
+        duplicates += await run_in_threadpool(_store_batch, pending)
+    
+    metrics.inc("ingest_batch_requests_total")
+    metrics.inc("ingest_batch_rejected_total", rejected)
+    return {
+        "accepted": accepted,
+        "rejected": rejected,
+        "sampled": sampled,
+        "dropped": dropped,
+        "duplicates": duplicates,
+        "errors": errors,
+    }
 
 
 @router.get("/events", response_model=List[EventResponse])
@@ -74,28 +224,84 @@ def list_events(
     limit: int = 100,
     service: str = None,
     level: str = None,
-    db: Session = Depends(get_db)
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """
-    List events with optional filtering.
+    List events with optional filtering and full-text search.
     
     **Query Parameters:**
     - `skip`: Number of records to skip (pagination)
     - `limit`: Maximum number of records to return
     - `service`: Filter by service name
-    - `level`: Filter by log level (ERROR, WARN, INFO)
+    - `level`: Filter by log level (ERROR, WARN, INFO, ...; case-insensitive)
+    - `q`: Full-text search over messages. Words are ANDed,
+      `"quoted phrases"` match exactly and `prefix*` matches word prefixes.
+      Results are ordered by relevance.
+    - `fields`: Comma-separated fields to return (default: all); only
+      those columns are read. `id` is always included.
     
     **Example:** `GET /api/v1/events?service=auth-api&level=ERROR&limit=50`
+    
+    **Projection example:** `GET /api/v1/events?fields=level,timestamp,incident_id`
+    
+    **Search example:** `GET /api/v1/events?q="connection refused" pool*`
     """
-    query = db.query(Event)
+    # Select plain column tuples and serialize them directly; the rows already
+    # match EventResponse, so skip building and validating a model per event.
+    columns = select_fields(fields, EVENT_LIST_COLUMNS)
+    query = select(*columns)
     
     if service:
-        query = query.filter(Event.service == service)
+        query = query.where(Event.service == service)
     if level:
-        query = query.filter(Event.level == level)
+        query = query.where(Event.level == level)
     
-    events = query.order_by(Event.timestamp.desc()).offset(skip).limit(limit).all()
-    return events
+    matches = SearchService(db).match_events(q) if q else None
+    if matches is not None:
+        query = (
+            query
+            .join(matches, matches.c.event_id == Event.id)
+            .order_by(matches.c.rank, Event.timestamp.desc())
+        )
+    else:
+        query = query.order_by(Event.timestamp.desc())
+    
+    rows = db.execute(query.offset(skip).limit(limit)).all()
+    keys = [column.key for column in columns]
+    return ORJSONResponse([dict(zip(keys, row)) for row in rows])
+
+
+@router.get("/events/rollups", response_model=List[EventRollupResponse])
+def list_event_rollups(
+    service: Optional[str] = None,
+    level: Optional[str] = None,
+    since: Optional[datetime] = None,
+    limit: int = 1440,
+    db: Session = Depends(get_db)
+):
+    """
+    Exact per-minute event counts, including events that sampling kept out
+    of the events table and events dropped by rate limits.
+    
+    **Query Parameters:**
+    - `service`, `level`: Filters
+    - `since`: Only minutes at or after this time (naive UTC)
+    - `limit`: Maximum number of rows (newest first)
+    
+    **Example:** `GET /api/v1/events/rollups?service=auth-api&since=2024-01-15T10:00:00`
+    """
+    get_ingest_limiter().flush(db)
+    query = select(EventRollup)
+    if service:
+        query = query.where(EventRollup.service == service)
+    if level:
+        query = query.where(EventRollup.level == (normalize_level(level) or level))
+    if since:
+        query = query.where(EventRollup.minute >= since)
+    query = query.order_by(EventRollup.minute.desc(), EventRollup.service, EventRollup.level)
+    return db.execute(query.limit(limit)).scalars().all()
 
 
 @router.get("/events/{event_id}", response_model=EventResponse)
@@ -2,15 +2,25 @@
 Incidents API endpoints.
 Handles querying and managing incidents.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from ...core.database import get_db
-from ...models.incident import Incident
-from ...schemas.incident import IncidentResponse, IncidentDetail
-from ...services.incident_service import IncidentService
-from ...services.ai_service import AIService
+from ...core.config import get_settings
+from ...core.database import get_db, get_read_db
+from ...core.metrics import metrics
+from ...core.responses import ORJSONResponse, select_fields
+from ...models.incident import Incident, IncidentStatus
+from ...schemas.incident import IncidentResponse, IncidentDetail, IncidentSummary, IncidentTimeline, SimilarIncident
+from ...services.incident_service import INCIDENT_LIST_COLUMNS, IncidentService
+from ...services.analysis_coordinator import AnalysisQueueFull, IncidentNotFound, get_analysis_coordinator
+from ...services.incident_timeline import get_timeline
+from ...services.similarity import similar_incidents
+from ...services.summary_service import IncidentSummaryService
+
+settings = get_settings()
 
 router = APIRouter()
 
@@ -20,7 +30,9 @@ def list_incidents(
     skip: int = 0,
     limit: int = 100,
     status_filter: Optional[str] = None,
-    db: Session = Depends(get_db)
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
     """
     List all incidents with pagination and optional status filtering.
@@ -29,35 +41,52 @@ def list_incidents(
     - `skip`: Number of records to skip (default: 0)
     - `limit`: Maximum records to return (default: 100)
     - `status_filter`: Filter by status (open, investigating, resolved, closed)
+    - `q`: Full-text search over the messages of each incident's events
+      (same syntax as `GET /events?q=`); results are ordered by relevance
+    - `fields`: Comma-separated fields to return (default: all); only
+      those columns are read. `id` is always included.
     
     **Example:** `GET /api/v1/incidents?status_filter=open&limit=20`
     
+    **Dashboard example:** `GET /api/v1/incidents?fields=service,severity,status,event_count,created_at`
+    
     **Response:** List of incidents with event counts
     """
+    columns = select_fields(fields, INCIDENT_LIST_COLUMNS)
     incident_service = IncidentService(db)
     incidents = incident_service.list_incidents(
         skip=skip,
         limit=limit,
-        status=status_filter
+        status=status_filter,
+        q=q,
+        columns=columns
     )
     
-    # Add event count to each incident
-    result = []
-    for incident in incidents:
-        incident_dict = {
-            "id": incident.id,
-            "service": incident.service,
-            "category": incident.category,
-            "severity": incident.severity,
-            "summary": incident.summary,
-            "status": incident.status.value,
-            "created_at": incident.created_at,
-            "updated_at": incident.updated_at,
-            "event_count": len(incident.events) if incident.events else 0
-        }
-        result.append(IncidentResponse(**incident_dict))
+    # Rows are already shaped like IncidentResponse; serialize them directly
+    return ORJSONResponse(incidents)
+
+
+@router.get("/incidents/summary", response_model=IncidentSummary)
+def get_incident_summary(db: Session = Depends(get_read_db)):
+    """
+    Get incident counts by status, severity, and service.
     
-    return result
+    Served from counters that are updated whenever an incident is created,
+    changes status, or is (re-)analyzed, so the cost doesn't depend on how
+    many incidents exist. Counters are reconciled against the incidents
+    table every `SUMMARY_RECONCILE_INTERVAL` seconds.
+    
+    **Example Response:**
+    ```json
+    {
+        "total": 12,
+        "by_status": {"open": 3, "investigating": 1, "resolved": 8},
+        "by_severity": {"P1": 4, "P2": 6, "unassigned": 2},
+        "by_service": {"payment-service": 5, "auth-api": 7}
+    }
+    ```
+    """
+    return IncidentSummaryService(db).get_summary()
 
 
 @router.get("/incidents/{incident_id}", response_model=IncidentDetail)
@@ -96,6 +125,42 @@ def get_incident(incident_id: int, db: Session = Depends(get_db)):
     return incident
 
 
+@router.get("/incidents/{incident_id}/timeline", response_model=IncidentTimeline)
+def get_incident_timeline(
+    incident_id: int,
+    max_buckets: Optional[int] = Query(None, ge=1, le=10000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Events per time bucket for an incident, by event time.
+    
+    Served from a precomputed histogram (one small row, whatever the number
+    of events). Buckets are a minute wide (`TIMELINE_BUCKET_SECONDS`) and
+    widen as the incident grows longer; counts may lag by
+    INCIDENT_TOUCH_INTERVAL, like `event_count`.
+    
+    **Query Parameters:**
+    - `max_buckets`: Merge buckets until there are at most this many (e.g. the chart width)
+    
+    **Example:** `GET /api/v1/incidents/42/timeline?max_buckets=60`
+    """
+    timeline = get_timeline(db, incident_id)
+    if not timeline.counts and db.get(Incident, incident_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident with id {incident_id} not found"
+        )
+    if max_buckets:
+        timeline = timeline.downsample(max_buckets)
+    return {
+        "incident_id": incident_id,
+        "start": timeline.start,
+        "bucket_seconds": timeline.bucket_seconds,
+        "counts": timeline.counts,
+        "total": timeline.total,
+    }
+
+
 @router.patch("/incidents/{incident_id}/status")
 def update_incident_status(
     incident_id: int,
@@ -143,10 +208,8 @@ def update_incident_status(
             detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}"
         )
     
-    # Update status
-    from ...models.incident import IncidentStatus
-    incident.status = IncidentStatus(new_status)
-    db.commit()
+    # Update status (and the summary counters)
+    IncidentService(db).update_status(incident, IncidentStatus(new_status))
     
     return {
         "message": "Incident status updated successfully",
@@ -155,8 +218,18 @@ def update_incident_status(
     }
 
 
+def _analysis_accepted(incident_id: int) -> JSONResponse:
+    """202 response pointing at the analysis status endpoint."""
+    status_url = f"/api/v1/incidents/{incident_id}/analysis"
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"incident_id": incident_id, "status": "queued", "status_url": status_url},
+        headers={"Location": status_url},
+    )
+
+
 @router.post("/incidents/{incident_id}/analyze")
-def analyze_incident(incident_id: int, db: Session = Depends(get_db)):
+def analyze_incident(incident_id: int, force: bool = False):
     """
     Trigger AI analysis for an incident.
     
@@ -166,9 +239,23 @@ def analyze_incident(incident_id: int, db: Session = Depends(get_db)):
     - Generate a human-readable summary
     - Recommend remediation actions
     
+    If the incident hasn't materially changed since its last analysis (see
+    `REANALYSIS_*` settings), the stored result is returned with
+    `"cached": true` and no LLM call is made; pass `?force=true` to
+    re-analyze anyway.
+    
+    Concurrent requests for the same incident share one analysis run.
+    If every LLM slot is taken (or the run takes longer than
+    `ANALYSIS_WAIT_TIMEOUT`), the request is accepted with **202** and a
+    `status_url` to poll instead. If `LLM_MAX_QUEUE` analyses are already
+    waiting for a slot, it is refused with **503** and `Retry-After`.
+    
     **Path Parameter:**
     - `incident_id`: The incident ID
     
+    **Query Parameter:**
+    - `force`: Re-analyze even if nothing has changed (default: false)
+    
     **Example Response:**
     ```json
     {
@@ -177,40 +264,108 @@ def analyze_incident(incident_id: int, db: Session = Depends(get_db)):
         "severity": "P1",
         "summary": "Database connection pool exhausted...",
         "recommended_actions": ["restart_db_service", "scale_db"],
-        "analysis_completed": true
+        "analysis_completed": true,
+        "cached": false
     }
     ```
     """
-    # Get incident with events
-    incident_service = IncidentService(db)
-    incident = incident_service.get_incident_with_events(incident_id)
+    coordinator = get_analysis_coordinator()
     
-    if not incident:
+    if not force and not coordinator.in_flight(incident_id):
+        try:
+            cached = coordinator.cached_result(incident_id)
+        except IncidentNotFound:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Incident with id {incident_id} not found"
+            )
+        if cached is not None:
+            return cached
+    
+    # Slots taken: accept the work but don't tie up this worker waiting for it
+    saturated = coordinator.is_saturated() and not coordinator.in_flight(incident_id)
+    try:
+        future = coordinator.submit(incident_id)
+    except AnalysisQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis queue is full, retry later",
+            headers={"Retry-After": "5"},  # analyses take seconds
+        )
+    if saturated:
+        metrics.inc("analysis_accepted_202_total")
+        return _analysis_accepted(incident_id)
+    
+    try:
+        return future.result(timeout=settings.analysis_wait_timeout)
+    except FutureTimeoutError:
+        metrics.inc("analysis_accepted_202_total")
+        return _analysis_accepted(incident_id)
+    except IncidentNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Incident with id {incident_id} not found"
         )
+
+
+@router.get("/incidents/{incident_id}/analysis")
+def get_analysis_status(incident_id: int, db: Session = Depends(get_read_db)):
+    """
+    Get the state of the latest analysis run for an incident.
     
-    # Initialize AI service
-    ai_service = AIService()
+    **States:** `queued`, `running`, `completed` (with `result`), `failed`
+    (with `error`), or `idle` when no run is known to this worker.
     
-    # Analyze the incident
-    analysis = ai_service.analyze_incident(incident)
+    **Example:** `GET /api/v1/incidents/1/analysis`
+    """
+    if db.get(Incident, incident_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident with id {incident_id} not found"
+        )
     
-    # Update incident with AI analysis
-    incident.category = analysis.get("category")
-    incident.severity = analysis.get("severity")
-    incident.summary = analysis.get("summary")
-    incident.recommended_actions = analysis.get("recommended_actions")
+    state = get_analysis_coordinator().get_state(incident_id) or {"state": "idle"}
+    return {"incident_id": incident_id, **state}
+
+
+@router.get("/incidents/{incident_id}/similar", response_model=List[SimilarIncident])
+def get_similar_incidents(
+    incident_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    min_score: float = Query(0.0, ge=-1.0, le=1.0),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Find past analyzed incidents with similar error messages.
     
-    db.commit()
-    db.refresh(incident)
+    Incidents are compared as hashed n-gram vectors of their message
+    templates (computed locally, see services/similarity.py), so their
+    category, severity and recommended actions can be reused.
     
-    return {
-        "incident_id": incident.id,
-        "category": incident.category,
-        "severity": incident.severity,
-        "summary": incident.summary,
-        "recommended_actions": incident.recommended_actions,
-        "analysis_completed": True
-    }
\ No newline at end of file
+    **Query Parameters:**
+    - `limit`: Maximum results (default: 10)
+    - `min_score`: Minimum cosine similarity, 0-1 (default: 0)
+    
+    **Example:** `GET /api/v1/incidents/42/similar?limit=5&min_score=0.5`
+    """
+    incident = db.get(Incident, incident_id)
+    if incident is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Incident with id {incident_id} not found"
+        )
+    
+    return [
+        {
+            "incident_id": similar.id,
+            "score": round(score, 4),
+            "service": similar.service,
+            "category": similar.category,
+            "severity": similar.severity,
+            "summary": similar.summary,
+            "recommended_actions": similar.recommended_actions,
+            "status": similar.status.value if similar.status else "open",
+            "created_at": similar.created_at,
+        }
+        for similar, score in similar_incidents(db, incident, k=limit, min_score=min_score)
+    ]
@@ -0,0 +1,72 @@
+"""
+Ingest limits API endpoints.
+Runtime per-service rate limits and sampling (see services/ingest_limits.py).
+"""
+from dataclasses import asdict
+from typing import List
+
+from fastapi import APIRouter, HTTPException, status
+
+from ...schemas.limits import ServiceLimitResponse, ServiceLimitUpdate
+from ...services.ingest_limits import ServiceLimit, get_ingest_limiter
+
+router = APIRouter()
+
+
+def _limit_response(service: str) -> dict:
+    limiter = get_ingest_limiter()
+    overrides = limiter.overrides()
+    limit = overrides.get(service, limiter.default)
+    return {
+        "service": service,
+        "overridden": service in overrides,
+        **asdict(limit),
+        **limiter.stats().get(service, {}),
+    }
+
+
+@router.get("/limits", response_model=List[ServiceLimitResponse])
+def list_limits():
+    """
+    Limits and counts for every service seen since startup or given an override.
+    
+    `received` counts accepted events (stored + sampled out); `dropped`
+    counts events rejected by the rate limit. Exact per-minute history is
+    in `GET /api/v1/events/rollups`.
+    """
+    limiter = get_ingest_limiter()
+    services = sorted(set(limiter.overrides()) | set(limiter.stats()))
+    return [_limit_response(service) for service in services]
+
+
+@router.get("/limits/{service}", response_model=ServiceLimitResponse)
+def get_limit(service: str):
+    """Effective limits and counts for one service."""
+    return _limit_response(service)
+
+
+@router.put("/limits/{service}", response_model=ServiceLimitResponse)
+def set_limit(service: str, update: ServiceLimitUpdate):
+    """
+    Set a service's rate limit and sampling target (takes effect immediately).
+    
+    **Request Body:**
+    ```json
+    {"rate": 200, "burst": 400, "sample_target": 20}
+    ```
+    
+    ERROR events are never dropped or sampled.
+    """
+    get_ingest_limiter().set_limit(service, ServiceLimit(**update.model_dump()))
+    return _limit_response(service)
+
+
+@router.delete("/limits/{service}", response_model=ServiceLimitResponse)
+def clear_limit(service: str):
+    """Return a service to the configured default limits."""
+    if not get_ingest_limiter().clear_limit(service):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No limit override for service {service}"
+        )
+    return _limit_response(service)
@@ -0,0 +1,166 @@
+"""
+OTLP/HTTP logs receiver.
+Accepts OpenTelemetry log exports at the standard `POST /v1/logs` path so
+collectors and SDK exporters can ship straight to Ops-Assist.
+
+OTLP/JSON is always accepted; OTLP/protobuf needs the
+`opentelemetry-proto` package (in requirements.txt; without it protobuf
+bodies are answered with 415).
+"""
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from pydantic import ValidationError
+
+from ...core.decoding import loads_json, read_body
+from ...core.metrics import metrics
+from ...schemas.event import EventCreate
+from ...services.batch_ingestor import get_batch_ingestor
+
+try:
+    from google.protobuf.json_format import MessageToDict
+    from opentelemetry.proto.collector.logs.v1.logs_service_pb2 import (
+        ExportLogsServiceRequest,
+        ExportLogsServiceResponse,
+    )
+except ImportError:  # pragma: no cover - optional dependency
+    ExportLogsServiceRequest = None
+
+router = APIRouter()
+
+PROTOBUF = "application/x-protobuf"
+DEFAULT_SERVICE = "unknown_service"
+TEXT_LEVELS = {"WARNING": "WARN", "FATAL": "ERROR", "CRITICAL": "ERROR"}
+
+
+def severity_to_level(number: int, text: Optional[str]) -> str:
+    """Map an OTLP severity (number 1-24, or text) to an event level."""
+    if number >= 17:  # ERROR, FATAL
+        return "ERROR"
+    if number >= 13:  # WARN
+        return "WARN"
+    if number == 0 and text:
+        text = text.upper()
+        return TEXT_LEVELS.get(text, text if text in ("ERROR", "WARN") else "INFO")
+    return "INFO"
+
+
+def _any_value(value: Dict[str, Any]) -> Any:
+    """Unwrap an OTLP AnyValue."""
+    if "stringValue" in value:
+        return value["stringValue"]
+    if "kvlistValue" in value:
+        return {kv["key"]: _any_value(kv.get("value", {})) for kv in value["kvlistValue"].get("values", [])}
+    if "arrayValue" in value:
+        return [_any_value(item) for item in value["arrayValue"].get("values", [])]
+    for key in ("intValue", "doubleValue", "boolValue", "bytesValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def _timestamp(record: Dict[str, Any]) -> Optional[datetime]:
+    # int64 fields arrive as strings in OTLP/JSON; 0 means unset
+    nanos = int(record.get("timeUnixNano") or 0) or int(record.get("observedTimeUnixNano") or 0)
+    if not nanos:
+        return None
+    return datetime.fromtimestamp(nanos / 1e9, tz=timezone.utc).replace(tzinfo=None)
+
+
+def otlp_to_events(payload: Dict[str, Any]) -> Tuple[List[EventCreate], int]:
+    """
+    Map an ExportLogsServiceRequest (OTLP/JSON shape) onto events.
+
+    Args:
+        payload: Decoded request
+
+    Returns:
+        (events, number of log records rejected as unusable)
+    """
+    events: List[EventCreate] = []
+    rejected = 0
+    for resource_logs in payload.get("resourceLogs", []):
+        attributes = {
+            kv["key"]: _any_value(kv.get("value", {}))
+            for kv in resource_logs.get("resource", {}).get("attributes", [])
+        }
+        service = str(attributes.get("service.name") or DEFAULT_SERVICE)
+        for scope_logs in resource_logs.get("scopeLogs", []):
+            for record in scope_logs.get("logRecords", []):
+                body = _any_value(record.get("body", {}))
+                message = body if isinstance(body, str) else json.dumps(body, default=str) if body else ""
+                try:
+                    events.append(EventCreate(
+                        service=service[:100],
+                        level=severity_to_level(int(record.get("severityNumber") or 0), record.get("severityText")),
+                        message=message,
+                        timestamp=_timestamp(record),
+                    ))
+                except (ValidationError, ValueError):
+                    rejected += 1
+    return events, rejected
+
+
+@router.post("/v1/logs")
+async def export_logs(request: Request):
+    """
+    Receive logs from an OpenTelemetry exporter (OTLP/HTTP).
+
+    - `service.name` resource attribute → event service
+    - severity (number or text) → ERROR / WARN / INFO
+    - body → message; `timeUnixNano` (or `observedTimeUnixNano`) → event time
+
+    Records are queued for batched insert and incident detection. When the
+    ingest queue is full the whole export is refused with **503** and
+    `Retry-After`, which OTLP exporters retry.
+
+    **Content types:** `application/json`, `application/x-protobuf`
+    (protobuf requires `pip install opentelemetry-proto`);
+    `Content-Encoding: gzip` / `zstd` accepted
+    """
+    content_type = request.headers.get("content-type", "application/json").split(";")[0].strip()
+    body = await read_body(request)  # exporters usually gzip
+
+    if content_type == PROTOBUF:
+        if ExportLogsServiceRequest is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="OTLP/protobuf needs the opentelemetry-proto package; send application/json instead"
+            )
+        message = ExportLogsServiceRequest()
+        try:
+            message.ParseFromString(body)
+        except Exception:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTLP protobuf payload")
+        payload = MessageToDict(message, use_integers_for_enums=True)
+    elif content_type == "application/json":
+        try:
+            payload = loads_json(body)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTLP JSON payload")
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported content type: {content_type}"
+        )
+
+    events, rejected = otlp_to_events(payload)
+    metrics.inc("otlp_log_records_total", len(events) + rejected)
+    if events and not get_batch_ingestor().offer_many(events):
+        return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+
+    result: Dict[str, Any] = {}
+    if rejected:
+        result["partialSuccess"] = {
+            "rejectedLogRecords": rejected,
+            "errorMessage": "log records without a usable body were rejected",
+        }
+    if content_type == PROTOBUF:
+        response = ExportLogsServiceResponse()
+        if rejected:
+            response.partial_success.rejected_log_records = rejected
+            response.partial_success.error_message = result["partialSuccess"]["errorMessage"]
+        return Response(content=response.SerializeToString(), media_type=PROTOBUF)
+    return result
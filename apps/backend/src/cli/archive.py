@@ -0,0 +1,37 @@
+"""
+Move aged events (and resolved incidents) into the Parquet cold archive.
+
+Runs the same job as the ARCHIVE_INTERVAL background task (see
+services/archive_service.py), on demand. Historical analytics then read
+the archive through /api/v1/analytics without touching the database.
+
+Usage (from apps/backend):
+    python -m src.cli.archive                      # older than ARCHIVE_AFTER_DAYS
+    python -m src.cli.archive --older-than 90      # override the age in days
+"""
+import argparse
+
+from ..core.config import get_settings
+from ..services.archive_service import archive_available, run_archive
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Move aged events into the Parquet cold archive")
+    parser.add_argument("--older-than", type=float, default=None,
+                        help=f"Age in days (default: ARCHIVE_AFTER_DAYS={settings.archive_after_days})")
+    args = parser.parse_args()
+
+    if not archive_available():
+        parser.error("the archive needs pyarrow (pip install pyarrow)")
+    days = settings.archive_after_days if args.older_than is None else args.older_than
+    if days <= 0:
+        parser.error("set ARCHIVE_AFTER_DAYS or pass --older-than")
+
+    report = run_archive(days)
+    print(f"Archived {report.events:,} events and {report.incidents:,} incidents "
+          f"to {settings.archive_dir} in {report.elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
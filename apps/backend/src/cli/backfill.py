@@ -0,0 +1,502 @@
+"""
+Backfill or replay historical log files.
+
+Reads plain-text, JSON-lines and gzip-compressed log files, parses them in a
+process pool, bulk-inserts the events through the `Event` model and then
+replays incident detection over the ERROR events in event-time order, with
+the same thresholds and windows as live ingest (services/detection.py).
+
+Plain files are memory-mapped and split into newline-aligned byte ranges,
+one per task; gzip files are decompressed as a stream and handed to the
+pool in chunks.
+
+Line formats:
+    JSON lines:  {"timestamp": "2024-01-15T10:30:00Z", "service": "auth-api",
+                  "level": "ERROR", "message": "..."}
+    Plain text:  2024-01-15T10:30:00Z ERROR auth-api Database connection timeout
+                 (service may also be written as [auth-api] or auth-api:)
+
+Replayed incidents are independent of incidents already open in the
+database. By default they stay OPEN, like live ones; `--resolve-after N`
+resolves a replayed incident once its service has had no errors for N
+seconds of event time (a later burst then opens a new incident).
+
+Usage (from apps/backend):
+    python -m src.cli.backfill logs/2024-01-15.log.gz logs/app.jsonl
+    python -m src.cli.backfill outage.log --dry-run          # report only, no writes
+    python -m src.cli.backfill huge.log --workers 8 --batch 20000
+"""
+import argparse
+import gzip
+import json
+import mmap
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# One parsed line: (timestamp, service, level, message, fingerprint)
+ParsedEvent = Tuple[datetime, str, str, str, str]
+
+GZIP_MAGIC = b"\x1f\x8b"
+CHUNK_BYTES = 8 * 1024 * 1024  # target bytes per parse task
+
+_TEXT_LINE = re.compile(
+    rb"^(?P<ts>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)\s+"
+    rb"\[?(?P<level>[A-Za-z]+)\]?\s+"
+    rb"(?:\[(?P<bracketed>[^\]]+)\]|(?P<service>[\w.\-/]+):?)\s+"
+    rb"(?P<message>.*?)\s*$"
+)
+
+
+# ---------------------------------------------------------------------------
+# Parsing (runs in worker processes)
+# ---------------------------------------------------------------------------
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """ISO 8601 string or epoch seconds to naive UTC."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace(",", "."))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_json_line(line: bytes, default_service: Optional[str]) -> Optional[Tuple[Any, str, str, str]]:
+    try:
+        record = orjson.loads(line) if orjson is not None else json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    timestamp = record.get("timestamp", record.get("@timestamp", record.get("time", record.get("ts"))))
+    service = record.get("service") or default_service
+    level = record.get("level", record.get("severity"))
+    message = record.get("message", record.get("msg"))
+    if not (service and level and message):
+        return None
+    return timestamp, str(service), str(level), str(message)
+
+
+def _parse_text_line(line: bytes, default_service: Optional[str]) -> Optional[Tuple[Any, str, str, str]]:
+    match = _TEXT_LINE.match(line)
+    if match is None:
+        return None
+    service = match.group("bracketed") or match.group("service")
+    return (
+        match.group("ts").decode("ascii"),
+        service.decode("utf-8", "replace") if service else default_service,
+        match.group("level").decode("ascii"),
+        match.group("message").decode("utf-8", "replace"),
+    )
+
+
+def parse_lines(
+    lines: Iterable[bytes],
+    fmt: str,
+    default_service: Optional[str] = None
+) -> Tuple[List[ParsedEvent], int]:
+    """
+    Parse raw log lines.
+
+    Args:
+        lines: Lines without trailing newlines
+        fmt: "jsonl" or "text"
+        default_service: Service for lines that don't name one
+
+    Returns:
+        (parsed events, number of non-empty lines that could not be parsed)
+    """
+    from ..models.level import normalize_level
+    from ..services.fingerprint import fingerprint
+
+    parse_line = _parse_json_line if fmt == "jsonl" else _parse_text_line
+    events: List[ParsedEvent] = []
+    skipped = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        fields = parse_line(line, default_service)
+        timestamp = _parse_timestamp(fields[0]) if fields else None
+        level = normalize_level(fields[2]) if fields else None
+        if timestamp is None or not fields[1] or level is None:
+            skipped += 1
+            continue
+        _, service, _, message = fields
+        events.append((timestamp, service[:100], level, message, fingerprint(message)))
+    return events, skipped
+
+
+def _parse_range(path: str, start: int, end: int, fmt: str, default_service: Optional[str]):
+    """Parse the lines that start inside [start, end) of a plain file."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start > 0:
+            newline = mm.find(b"\n", start - 1)
+            if newline == -1:
+                return [], 0
+            start = newline + 1
+
+        def lines() -> Iterator[bytes]:
+            pos = start
+            while pos < end:
+                newline = mm.find(b"\n", pos)
+                if newline == -1:
+                    newline = len(mm)
+                yield mm[pos:newline]
+                pos = newline + 1
+
+        return parse_lines(lines(), fmt, default_service)
+
+
+def _parse_chunk(data: bytes, fmt: str, default_service: Optional[str]):
+    """Parse a newline-terminated chunk of a decompressed stream."""
+    return parse_lines(data.split(b"\n"), fmt, default_service)
+
+
+# ---------------------------------------------------------------------------
+# Reading (main process)
+# ---------------------------------------------------------------------------
+
+def _is_gzip(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+def _open_stream(path: str):
+    return gzip.open(path, "rb") if _is_gzip(path) else open(path, "rb")
+
+
+def detect_format(path: str) -> str:
+    """Guess "jsonl" or "text" from the first non-empty line of a file."""
+    with _open_stream(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                return "jsonl" if line.startswith(b"{") else "text"
+    return "text"
+
+
+def _tasks_for(path: str, fmt: str, default_service: Optional[str]) -> Iterator[Tuple[Callable, tuple]]:
+    """Split one file into parse tasks (function, args)."""
+    if _is_gzip(path):
+        with gzip.open(path, "rb") as f:
+            carry = b""
+            while True:
+                block = f.read(CHUNK_BYTES)
+                if not block:
+                    break
+                block = carry + block
+                cut = block.rfind(b"\n") + 1
+                carry = block[cut:]
+                if cut:
+                    yield _parse_chunk, (block[:cut], fmt, default_service)
+            if carry:
+                yield _parse_chunk, (carry, fmt, default_service)
+        return
+
+    size = os.path.getsize(path)
+    for start in range(0, size, CHUNK_BYTES):
+        yield _parse_range, (path, start, min(start + CHUNK_BYTES, size), fmt, default_service)
+
+
+def _ordered_results(pool: Optional[Executor], tasks: Iterable[Tuple[Callable, tuple]], window: int) -> Iterator:
+    """Run tasks on the pool (or inline) and yield results in order, at most `window` in flight."""
+    if pool is None:
+        for fn, args in tasks:
+            yield fn(*args)
+        return
+    pending: Deque[Future] = deque()
+    for fn, args in tasks:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# ---------------------------------------------------------------------------
+# Detection replay
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ReplayIncident:
+    """An incident opened while replaying."""
+    service: str
+    opened_at: datetime
+    last_seen_at: datetime
+    event_ids: List[int] = field(default_factory=list)
+    resolved: bool = False
+
+
+def replay_detection(
+    errors: Sequence[Tuple[datetime, int, str]],
+    resolve_after: Optional[float] = None
+) -> List[ReplayIncident]:
+    """
+    Replay incident detection over ERROR events in event-time order.
+
+    Args:
+        errors: (event time, event ID, service) for every ERROR event
+        resolve_after: Resolve a service's incident after this many seconds
+            without errors (default: incidents stay open)
+
+    Returns:
+        Incidents that would have opened, in opening order
+    """
+    from ..services.detection import ServiceWindow
+
+    quiet = timedelta(seconds=resolve_after) if resolve_after else None
+    windows: Dict[str, ServiceWindow] = {}
+    open_incidents: Dict[str, ReplayIncident] = {}
+    incidents: List[ReplayIncident] = []
+
+    for timestamp, event_id, service in sorted(errors):
+        incident = open_incidents.get(service)
+        if incident is not None and quiet is not None and timestamp - incident.last_seen_at > quiet:
+            incident.resolved = True
+            del open_incidents[service]
+            incident = None
+
+        if incident is not None:
+            incident.event_ids.append(event_id)
+            incident.last_seen_at = timestamp
+            continue
+
+        window = windows.setdefault(service, ServiceWindow())
+        window.add(timestamp, event_id)
+        window.prune()
+        if window.has_burst():
+            incident = ReplayIncident(service, opened_at=timestamp, last_seen_at=timestamp, event_ids=window.take())
+            open_incidents[service] = incident
+            incidents.append(incident)
+
+    # Incidents that went quiet before the replayed logs end
+    if quiet is not None and errors:
+        replay_end = max(timestamp for timestamp, _, _ in errors)
+        for incident in open_incidents.values():
+            incident.resolved = replay_end - incident.last_seen_at > quiet
+
+    return incidents
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+@dataclass
+class BackfillReport:
+    """Outcome of a backfill run."""
+    lines_parsed: int = 0
+    lines_skipped: int = 0
+    events_inserted: int = 0
+    errors: int = 0
+    incidents: List[ReplayIncident] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def lines_per_minute(self) -> float:
+        return (self.lines_parsed + self.lines_skipped) / self.elapsed * 60 if self.elapsed else 0.0
+
+
+def _insert_batch(db, events: List[ParsedEvent]) -> List[int]:
+    """Bulk-insert parsed events and return their IDs in input order."""
+    from sqlalchemy import insert
+    from ..models.event import Event
+    from ..models.service import get_service_dictionary
+    from ..services.ingest_service import event_time
+
+    get_service_dictionary().intern({event[1] for event in events})  # one round trip for new names
+    now = datetime.utcnow()
+    rows = [
+        {
+            "timestamp": event_time(timestamp, now),
+            "service": service,
+            "level": level,
+            "message": message,
+            "fingerprint": fp,
+        }
+        for timestamp, service, level, message, fp in events
+    ]
+    events_table = Event.__table__  # Core insert: skips per-row ORM bookkeeping
+    ids = db.scalars(
+        insert(events_table).returning(events_table.c.id, sort_by_parameter_order=True), rows
+    ).all()
+    db.commit()
+    return ids
+
+
+def _store_incidents(db, incidents: List[ReplayIncident], link_batch: int) -> None:
+    """Create replayed incidents and link their events."""
+    from sqlalchemy import update
+    from ..models.event import Event
+    from ..models.incident import Incident, IncidentStatus
+    from ..services.incident_service import IncidentService
+    from ..services.incident_timeline import rebuild_timeline
+
+    incident_service = IncidentService(db)
+    for replayed in incidents:
+        incident = incident_service.create_incident(replayed.service, [], opened_at=replayed.opened_at)
+        for start in range(0, len(replayed.event_ids), link_batch):
+            db.execute(
+                update(Event)
+                .where(Event.id.in_(replayed.event_ids[start:start + link_batch]))
+                .values(incident_id=incident.id)
+                .execution_options(synchronize_session=False)
+            )
+        db.execute(
+            update(Incident)
+            .where(Incident.id == incident.id)
+            .values(
+                event_count=len(replayed.event_ids),
+                last_seen_at=replayed.last_seen_at,
+                updated_at=replayed.last_seen_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rebuild_timeline(db, incident.id)
+        db.commit()
+        if replayed.resolved:
+            db.refresh(incident)
+            incident_service.update_status(incident, IncidentStatus.RESOLVED)
+
+
+def run_backfill(
+    paths: Sequence[str],
+    fmt: str = "auto",
+    workers: Optional[int] = None,
+    batch_size: int = 10000,
+    dry_run: bool = False,
+    default_service: Optional[str] = None,
+    resolve_after: Optional[float] = None,
+    progress: bool = False,
+) -> BackfillReport:
+    """
+    Parse, load and replay detection for a set of log files.
+
+    Args:
+        paths: Files to read (plain or gzip; JSON lines or text)
+        fmt: "auto", "jsonl" or "text"
+        workers: Parser processes (default: CPU count; 0 parses in this process)
+        batch_size: Rows per INSERT batch
+        dry_run: Parse and replay detection without writing anything
+        default_service: Service for lines that don't name one
+        resolve_after: Resolve replayed incidents after this many quiet seconds
+        progress: Print progress while loading
+
+    Returns:
+        BackfillReport
+    """
+    report = BackfillReport()
+    errors: List[Tuple[datetime, int, str]] = []
+    started = time.perf_counter()
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    db = None
+    if not dry_run:
+        from ..core.database import create_session
+        db = create_session()
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+    try:
+        pending: List[ParsedEvent] = []
+
+        def flush() -> None:
+            if dry_run:
+                ids = range(report.events_inserted, report.events_inserted + len(pending))
+            else:
+                ids = _insert_batch(db, pending)
+            for event_id, (timestamp, service, level, _, _) in zip(ids, pending):
+                if level == "ERROR":
+                    errors.append((timestamp, event_id, service))
+            report.events_inserted += len(pending)
+            pending.clear()
+            if progress:
+                print(f"  loaded {report.events_inserted:,} events", end="\r", flush=True)
+
+        for path in paths:
+            file_format = detect_format(path) if fmt == "auto" else fmt
+            tasks = _tasks_for(path, file_format, default_service)
+            for events, skipped in _ordered_results(pool, tasks, window=max(2, workers * 2)):
+                report.lines_parsed += len(events)
+                report.lines_skipped += skipped
+                pending.extend(events)
+                while len(pending) >= batch_size:
+                    overflow = pending[batch_size:]
+                    del pending[batch_size:]
+                    flush()
+                    pending.extend(overflow)
+        if pending:
+            flush()
+        if progress:
+            print()
+
+        report.errors = len(errors)
+        report.incidents = replay_detection(errors, resolve_after)
+        if not dry_run:
+            _store_incidents(db, report.incidents, link_batch=batch_size)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if db is not None:
+            db.close()
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill or replay historical log files")
+    parser.add_argument("paths", nargs="+", help="Log files (plain or .gz; JSON lines or text)")
+    parser.add_argument("--format", choices=["auto", "jsonl", "text"], default="auto")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--batch", type=int, default=10000, help="Rows per INSERT batch")
+    parser.add_argument("--service", default=None, help="Service for lines that don't name one")
+    parser.add_argument("--resolve-after", type=float, default=None,
+                        help="Resolve replayed incidents after N seconds without errors")
+    parser.add_argument("--dry-run", action="store_true", help="Report incidents without writing anything")
+    args = parser.parse_args()
+
+    report = run_backfill(
+        args.paths,
+        fmt=args.format,
+        workers=args.workers,
+        batch_size=args.batch,
+        dry_run=args.dry_run,
+        default_service=args.service,
+        resolve_after=args.resolve_after,
+        progress=True,
+    )
+
+    verb = "Would load" if args.dry_run else "Loaded"
+    print(f"{verb} {report.events_inserted:,} events ({report.errors:,} ERROR) "
+          f"in {report.elapsed:.1f}s — {report.lines_per_minute:,.0f} lines/min")
+    if report.lines_skipped:
+        print(f"⚠️  Skipped {report.lines_skipped:,} unparseable lines")
+
+    verb = "would open" if args.dry_run else "opened"
+    print(f"🚨 Replay {verb} {len(report.incidents)} incident(s)")
+    for incident in report.incidents:
+        state = "resolved" if incident.resolved else "open"
+        print(f"   {incident.opened_at.isoformat()}  {incident.service:<30} "
+              f"{len(incident.event_ids):>8} events  {state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Apply database schema migrations.
+
+The API no longer creates tables on startup; run this once per deploy,
+before starting the workers.
+
+Usage (from apps/backend):
+    python -m src.cli.migrate              # upgrade to the latest revision
+    python -m src.cli.migrate --revision 0001
+    python -m src.cli.migrate --sql        # print the SQL instead of running it
+"""
+import argparse
+import os
+from typing import Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def upgrade_database(
+    revision: str = "head",
+    database_url: Optional[str] = None,
+    sql: bool = False
+) -> None:
+    """
+    Upgrade the database schema with Alembic.
+    
+    Args:
+        revision: Target revision (default: latest)
+        database_url: Override DATABASE_URL (tests, one-off tooling)
+        sql: Print the migration SQL instead of executing it
+    """
+    from alembic import command
+    from alembic.config import Config
+    
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    if database_url:
+        config.attributes["database_url"] = database_url
+    
+    command.upgrade(config, revision, sql=sql)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--revision", default="head", help="Target revision (default: head)")
+    parser.add_argument("--sql", action="store_true", help="Print SQL instead of executing")
+    args = parser.parse_args()
+    
+    upgrade_database(revision=args.revision, sql=args.sql)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Re-analyze incidents in bulk, in the foreground.
+
+Runs the same job as POST /api/v1/analysis-jobs (see
+services/analysis_jobs.py) and reports throughput when it ends. Ctrl-C
+interrupts the job; `--resume ID` continues it from where it stopped.
+
+Without an OpenAI key the mock analyzer is used; `--stub-latency` makes
+each mock analysis hold an LLM slot for that long, which is enough to
+benchmark concurrency and batch sizes without calling the API.
+
+Usage (from apps/backend):
+    python -m src.cli.reanalyze --service auth-api --since 2026-01-01
+    python -m src.cli.reanalyze --analyzed-before 2026-10-01 --concurrency 8
+    python -m src.cli.reanalyze --resume 3
+    LLM_MAX_CONCURRENT=16 python -m src.cli.reanalyze --stub-latency 0.5 --concurrency 16
+"""
+import argparse
+import time
+from datetime import datetime
+
+from ..core.config import get_settings
+from ..core.database import create_session
+from ..models.analysis_job import AnalysisJob
+from ..services.analysis_jobs import AnalysisJobRunner, JobNotFound, JobStateError
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Re-analyze incidents in bulk")
+    parser.add_argument("--service")
+    parser.add_argument("--status", choices=["open", "investigating", "resolved", "closed"])
+    parser.add_argument("--category")
+    parser.add_argument("--severity")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Created at or after (ISO date/time)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Created before (ISO date/time)")
+    parser.add_argument("--analyzed-before", type=datetime.fromisoformat,
+                        help="Only incidents analyzed before this time (or never)")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Skip incidents whose stored analysis is still current")
+    parser.add_argument("--resume", type=int, metavar="JOB_ID", help="Continue a stopped job")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"Parallel analyses (default: ANALYSIS_JOB_CONCURRENCY={settings.analysis_job_concurrency})")
+    parser.add_argument("--batch", type=int, default=None,
+                        help=f"Incidents per load/write (default: ANALYSIS_JOB_BATCH_SIZE={settings.analysis_job_batch_size})")
+    parser.add_argument("--stub-latency", type=float, default=None,
+                        help="Mock mode: simulated seconds per LLM call")
+    args = parser.parse_args()
+
+    if args.stub_latency is not None:
+        settings.llm_stub_latency = args.stub_latency
+    runner = AnalysisJobRunner(concurrency=args.concurrency, batch_size=args.batch)
+
+    with create_session() as db:
+        if args.resume is not None:
+            try:
+                job = runner.resume(db, args.resume)
+            except JobNotFound:
+                parser.error(f"no analysis job {args.resume}")
+            except JobStateError as e:
+                parser.error(str(e))
+        else:
+            job = runner.create(db, {
+                "service": args.service,
+                "status": args.status,
+                "category": args.category,
+                "severity": args.severity,
+                "created_since": args.since and args.since.isoformat(),
+                "created_until": args.until and args.until.isoformat(),
+                "analyzed_before": args.analyzed_before and args.analyzed_before.isoformat(),
+            }, force=not args.changed_only)
+            runner.start(job.id)
+        job_id, done_before = job.id, job.processed + job.skipped + job.failed
+        print(f"Analysis job #{job_id}: {job.total:,} incidents "
+              f"(concurrency {runner.concurrency}, batch {runner.batch_size})")
+
+    started = time.perf_counter()
+    try:
+        while runner.running(job_id):
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        print("Interrupting: waiting for in-flight analyses to be stored...")
+        runner.shutdown()
+    elapsed = time.perf_counter() - started
+
+    with create_session() as db:
+        job = db.get(AnalysisJob, job_id)
+        status, done = job.status, job.processed + job.skipped + job.failed - done_before
+    print(f"Job #{job_id} {status}: {done:,} incidents in {elapsed:.1f}s "
+          f"({done / elapsed if elapsed else 0:.1f}/s)")
+    if status != "completed":
+        print(f"Resume with: python -m src.cli.reanalyze --resume {job_id}")
+
+
+if __name__ == "__main__":
+    main()
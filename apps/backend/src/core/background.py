@@ -0,0 +1,38 @@
+"""
+Periodic background jobs run inside the API process.
+Started and cancelled by the FastAPI lifespan handler in main.py.
+"""
+import asyncio
+from typing import Callable, List
+
+
+def start_periodic(name: str, interval: float, job: Callable[[], object]) -> asyncio.Task:
+    """
+    Run a blocking job every `interval` seconds in a worker thread.
+    
+    Failures are logged and the job keeps its schedule.
+    
+    Args:
+        name: Job name (for logs)
+        interval: Seconds between runs
+        job: Blocking callable (runs via asyncio.to_thread)
+        
+    Returns:
+        The asyncio task driving the schedule
+    """
+    async def loop():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(job)
+            except Exception as e:
+                print(f"⚠️  Background job '{name}' failed: {e}")
+    
+    return asyncio.create_task(loop(), name=name)
+
+
+async def stop_periodic(tasks: List[asyncio.Task]) -> None:
+    """Cancel periodic jobs and wait for them to exit."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
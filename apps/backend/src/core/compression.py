@@ -0,0 +1,186 @@
+"""
+Negotiated response compression.
+
+Responses are compressed with the best encoding the client accepts
+(`Accept-Encoding`, q-values respected): `br`, then `zstd`, then `gzip`.
+Bodies smaller than COMPRESS_MIN_SIZE are sent as they are, since the
+framing overhead and CPU cost outweigh the bytes saved; so are responses
+that are already encoded or aren't text-like (JSON, NDJSON, text/*).
+
+Streaming responses are compressed chunk by chunk and flushed after every
+chunk, so clients still see records as they are produced.
+
+br and zstd use the optional `brotli` and `zstandard` packages; without
+them only gzip is offered.
+"""
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+from .config import get_settings
+from .metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+settings = get_settings()
+
+# Server preference when the client accepts several with the same q-value
+ENCODINGS = tuple(
+    name for name, available in (("br", brotli), ("zstd", zstandard), ("gzip", zlib)) if available
+)
+
+_COMPRESSIBLE = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the response encoding for an `Accept-Encoding` header.
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, deflate, br;q=0.9"
+
+    Returns:
+        One of ENCODINGS, or None to send the body as it is
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        name = name.strip()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            accepted[name] = q
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in ENCODINGS:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _compressor(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """(compress-and-flush a chunk, finish the stream) for an encoding."""
+    if encoding == "br":
+        c = brotli.Compressor(quality=settings.compress_brotli_quality)
+        return (lambda data: c.process(data) + c.flush()), c.finish
+    if encoding == "zstd":
+        c = zstandard.ZstdCompressor(level=settings.compress_zstd_level).compressobj()
+        return (lambda data: c.compress(data) + c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), c.flush
+    c = zlib.compressobj(settings.compress_gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+    return (lambda data: c.compress(data) + c.flush(zlib.Z_SYNC_FLUSH)), c.flush
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress a whole body."""
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.compress_brotli_quality)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.compress_zstd_level).compress(data)
+    return zlib.compress(data, settings.compress_gzip_level, wbits=31)
+
+
+def _compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    content_type = b""
+    for name, value in headers:
+        name = name.lower()
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    content_type = content_type.decode("latin-1").lower()
+    return content_type.startswith(_COMPRESSIBLE) or "+json" in content_type
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies of COMPRESS_MIN_SIZE bytes
+    or more with the encoding negotiated from `Accept-Encoding`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or settings.compress_min_size <= 0 or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = b""
+        for name, value in scope.get("headers") or []:
+            if name == b"accept-encoding":
+                accept = value
+                break
+        encoding = negotiate(accept.decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        streaming = None  # (compress, finish) once a streamed body is being compressed
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, streaming, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                if message["status"] < 200 or message["status"] in (204, 304) or not _compressible(headers):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = {**message, "headers": headers}
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if streaming is not None:
+                compress_chunk, finish = streaming
+                out = compress_chunk(body) if body else b""
+                if not more_body:
+                    out += finish()
+                metrics.inc("http_compressed_bytes_in_total", len(body))
+                metrics.inc("http_compressed_bytes_out_total", len(out))
+                await send({"type": "http.response.body", "body": out, "more_body": more_body})
+                return
+
+            # First body message: decide based on its size (a streamed body is
+            # compressed whenever it has more to come)
+            if not more_body and len(body) < settings.compress_min_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            headers = [(k, v) for k, v in start["headers"] if k.lower() != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+            metrics.inc("http_compressed_responses_total")
+            if more_body:
+                streaming = _compressor(encoding)
+                out = streaming[0](body) if body else b""
+            else:
+                out = compress(body, encoding)
+                headers.append((b"content-length", str(len(out)).encode()))
+            metrics.inc("http_compressed_bytes_in_total", len(body))
+            metrics.inc("http_compressed_bytes_out_total", len(out))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": out, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -4,6 +4,7 @@ Reads environment variables from .env file.
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -11,9 +12,47 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./test.db"
+    database_read_url: str = ""  # Optional read replica for list/analytics queries
+    
+    # Database Connection Pool
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Recycle connections older than this (seconds, -1 = never)
+    db_pool_pre_ping: bool = False  # Ping on every checkout (extra round trip)
+    db_echo: bool = False  # Log every SQL statement
+    
+    # SQLite file databases (single-node installs; see core/database.py)
+    sqlite_journal_mode: Literal["wal", "delete", "truncate", "persist"] = "wal"  # WAL: reads don't block the writer
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] = "normal"  # NORMAL + WAL: fsync at checkpoints, not per commit
+    sqlite_busy_timeout: int = 15000  # Milliseconds a writer waits for the write lock before "database is locked"
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # Bytes of the file read through mmap (0 = off)
+    sqlite_single_writer: bool = True  # POST /events stored by one writer thread, a batch per transaction
     
     # OpenAI
     openai_api_key: str = ""
+    openai_base_url: str = ""  # Override the API endpoint (proxies, local stubs)
+    openai_timeout: float = 10.0  # Seconds per LLM request before falling back
+    llm_breaker_failure_threshold: int = 3  # Consecutive failures that open the circuit
+    llm_breaker_reset_timeout: int = 30  # Seconds before a half-open probe is allowed
+    llm_max_concurrent: int = 4  # Outstanding LLM calls per process
+    llm_max_queue: int = 16  # Analyses waiting for an LLM slot before /analyze answers 503
+    analysis_wait_timeout: int = 60  # Seconds /analyze waits before answering 202
+    llm_stub_latency: float = 0  # Mock mode only: seconds each analysis holds an LLM slot, like a real call (benchmarks)
+    
+    # Bulk Re-analysis Jobs (see services/analysis_jobs.py)
+    analysis_job_concurrency: int = 4  # Parallel analyses per job (each LLM call still needs an LLM_MAX_CONCURRENT slot)
+    analysis_job_batch_size: int = 50  # Incidents loaded per query / results written per commit
+    
+    # Re-analysis Settings (an incident is re-analyzed when either threshold is crossed)
+    reanalysis_min_new_events: int = 20  # New events since the last analysis (0 = off)
+    reanalysis_growth_ratio: float = 0.5  # ...and at least this fraction of the analyzed count
+    reanalysis_new_fingerprints: int = 1  # New distinct message fingerprints (0 = off)
+    
+    # Similar Incidents (see services/similarity.py)
+    similar_index_dim: int = 256  # Hashed n-gram vector size (changing it needs a re-embed)
+    similar_reuse_threshold: float = 0.9  # Reuse a neighbour's analysis at this cosine similarity (0 = never)
+    similar_index_refresh_interval: int = 60  # Seconds between loads of other processes' analyses (0 = off)
     
     # Application
     environment: str = "development"
@@ -22,6 +61,70 @@ class Settings(BaseSettings):
     # Incident Detection Settings
     incident_threshold: int = 5  # Number of errors to trigger incident
     incident_time_window: int = 300  # 5 minutes in seconds
+    ingest_shards: int = 0  # >0: run detection on N service-sharded single-writer threads
+    detection_allowed_lateness: int = 60  # Seconds an ERROR may arrive out of event-time order and still count
+    event_max_clock_skew: int = 300  # Client timestamps further in the future are replaced by arrival time
+    incident_touch_interval: float = 2.0  # Seconds between incident aggregate flushes (0 = write-through)
+    timeline_bucket_seconds: int = 60  # Width of a new incident's timeline buckets
+    timeline_max_buckets: int = 120  # Buckets per timeline before their width doubles
+    
+    # Batched Ingest / Log Receivers
+    ingest_batch_size: int = 500  # Max events per batched insert
+    ingest_batch_delay: float = 0.05  # Max seconds to wait while filling a batch
+    ingest_queue_size: int = 10000  # Queued events before receivers push back / shed load
+    ingest_max_body_bytes: int = 64 * 1024 * 1024  # Decompressed request body limit
+    ingest_trusted_tokens: str = ""  # Comma-separated X-Ingest-Token values that skip full validation
+    
+    # Idempotent Ingest (see services/idempotency.py)
+    idempotency_window: int = 86400  # Seconds an event's idempotency_key is remembered (0 = keys ignored)
+    idempotency_bloom_capacity: int = 1000000  # Keys expected per window (~1.8 MB of Bloom filter per generation)
+    idempotency_bloom_error_rate: float = 0.001  # Share of new keys that still need a lookup
+    
+    # Per-service Ingest Limits (see services/ingest_limits.py)
+    ingest_rate_limit: float = 0  # Events/second per service (0 = unlimited); ERROR events are never dropped
+    ingest_rate_burst: int = 0  # Token bucket capacity (0 = one second of ingest_rate_limit)
+    ingest_sample_target: float = 0  # Non-ERROR rows/second stored per service before sampling (0 = store all)
+    ingest_service_limits: str = ""  # JSON overrides, e.g. {"chatty-svc": {"rate": 100, "sample_target": 10}}
+    rollup_flush_interval: float = 5.0  # Seconds between event rollup flushes
+    
+    # Receivers (see receivers/syslog.py)
+    syslog_host: str = "0.0.0.0"
+    syslog_udp_port: int = 0  # Syslog over UDP (0 = disabled; 514 is the standard port)
+    syslog_tcp_port: int = 0  # Syslog over TCP (0 = disabled; 601 is the standard port)
+    
+    # Dashboard Summary Settings
+    summary_reconcile_interval: int = 300  # Seconds between counter reconciliations (0 = off)
+    
+    # Cold Archive (see services/archive_service.py)
+    archive_dir: str = "data/archive"  # Parquet files, partitioned by day and service
+    archive_after_days: int = 0  # Move events older than this out of the database (0 = off)
+    archive_interval: int = 3600  # Seconds between archive runs when archiving is on
+    archive_batch_size: int = 200000  # Rows per archive write (bigger batches, fewer files per partition)
+    archive_compression: str = "zstd"  # Parquet codec: zstd, snappy, gzip or none
+    archive_compact_max_rows: int = 5000000  # Merge a partition's files into one after a run while it holds at most this many rows (0 = never)
+    
+    # Diagnostics (see core/diagnostics.py)
+    debug_token: str = ""  # X-Debug-Token for /debug endpoints and per-request profiles (empty = off)
+    slow_query_ms: float = 200  # Record statements slower than this (0 = off)
+    slow_request_ms: float = 1000  # Record requests slower than this (0 = off)
+    debug_ring_size: int = 100  # Slow queries / slow requests kept for /debug
+    profile_sample_interval: float = 0.005  # Seconds between stack samples of a profiled request
+
+    # Response Compression (see core/compression.py)
+    compress_min_size: int = 1024  # Compress response bodies of at least this many bytes (0 = off)
+    compress_gzip_level: int = 6
+    compress_brotli_quality: int = 4  # br needs the brotli package
+    compress_zstd_level: int = 3
+
+    # Shared State between workers (see core/state.py)
+    state_backend: str = "local"  # local (one process), sqlite (workers on one host) or package.module:Class
+    state_url: str = ""  # sqlite: state file (default data/state.db); external backends: their connection URL
+    state_poll_interval: float = 0.05  # Seconds between pub/sub polls (sqlite)
+    open_incident_cache_ttl: float = 300  # Seconds a service's open-incident lookup is cached (0 = off)
+    detection_lock_lease: float = 30  # Seconds a cross-worker detection lock is held at most (non-PostgreSQL, see services/detection.py)
+
+    # Full-text Search Settings
+    search_rank_window: int = 10000  # Rank only the N most recent matches; older ones follow unranked (0 = rank all)
     
     class Config:
         env_file = ".env"
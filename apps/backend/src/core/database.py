@@ -1,39 +1,207 @@
 """
 Database setup using SQLAlchemy.
-Creates engine, session factory, and base model class.
+Provides lazily created engines, the session factory, and base model class.
+
+Writes always go to the primary (`DATABASE_URL`). Read-heavy endpoints can use
+`get_read_db`, which is routed to `DATABASE_READ_URL` when a replica is configured.
+
+SQLite file databases (single-node installs) are set up for concurrent use:
+- every connection gets WAL journaling, SQLITE_SYNCHRONOUS, a busy timeout
+  and a memory-mapped read window
+- the driver starts a transaction at its first write, so a writer only
+  ever waits for the write lock (up to SQLITE_BUSY_TIMEOUT), never for
+  readers
+- without DATABASE_READ_URL, reads get their own pool of query-only
+  connections on the same file; under WAL they run alongside the writer
+  and never take the write lock
 """
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from functools import lru_cache
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from .config import get_settings
+from .diagnostics import install_query_log
+from .metrics import metrics
 
 settings = get_settings()
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,  # Verify connections before using
-    echo=settings.environment == "development"  # Log SQL in dev mode
-)
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _engine_options(database_url: str) -> Dict[str, Any]:
+    """
+    Build create_engine keyword arguments from settings.
+
+    Args:
+        database_url: The database URL the engine will connect to
+
+    Returns:
+        Keyword arguments for create_engine
+    """
+    url = make_url(database_url)
+    options: Dict[str, Any] = {
+        "echo": settings.db_echo,
+        # Liveness check on every checkout costs a round trip; prefer pool_recycle
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+    # In-memory SQLite uses a single shared connection; pool sizing doesn't apply
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+
+    return options
+
+
+def is_sqlite_file(database_url: str) -> bool:
+    """True for a SQLite database stored in a file (not in memory)."""
+    url = make_url(database_url)
+    return (
+        url.get_backend_name() == "sqlite"
+        and url.database not in (None, "", ":memory:")
+        and url.query.get("mode") != "memory"
+    )
+
+
+def _configure_sqlite(sqlite_engine: Engine, read_only: bool) -> None:
+    """
+    Connection pragmas for a SQLite file engine.
+
+    Args:
+        sqlite_engine: Engine to configure
+        read_only: Query-only connections (the read pool)
+    """
+
+    @event.listens_for(sqlite_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout)}")
+        cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+
+def _pool_metrics(name: str, pool_engine: Engine):
+    """Build a metrics collector reporting pool usage and saturation."""
+    def collect() -> Dict[str, float]:
+        pool = pool_engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {}
+        checked_out = pool.checkedout()
+        capacity = pool.size() + max(settings.db_max_overflow, 0)
+        return {
+            f"db_pool_{name}_checked_out": checked_out,
+            f"db_pool_{name}_capacity": capacity,
+            f"db_pool_{name}_saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        }
+
+    @event.listens_for(pool_engine, "checkout")
+    def count_checkout(*args):
+        metrics.inc(f"db_pool_{name}_checkouts_total")
+
+    return collect
+
+
+# Session factory; each session is bound to the primary or read engine on creation
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Base class for all models
 Base = declarative_base()
 
 
+@lru_cache()
+def get_engine() -> Engine:
+    """
+    Get the primary database engine (all writes), creating it on first use.
+    Created lazily so importing the app doesn't open a connection pool.
+    """
+    primary = create_engine(settings.database_url, **_engine_options(settings.database_url))
+    if is_sqlite_file(settings.database_url):
+        _configure_sqlite(primary, read_only=False)
+    metrics.register_collector("db_pool_primary", _pool_metrics("primary", primary))
+    install_query_log(primary, "primary")
+    return primary
+
+
+@lru_cache()
+def get_read_engine() -> Engine:
+    """
+    Get the read replica engine, creating it on first use.
+    Falls back to the primary engine when DATABASE_READ_URL is not set
+    (for a SQLite file: a separate query-only pool on the same file).
+    """
+    if not settings.database_read_url:
+        if not is_sqlite_file(settings.database_url):
+            return get_engine()
+        reader = create_engine(settings.database_url, **_engine_options(settings.database_url))
+        _configure_sqlite(reader, read_only=True)
+        metrics.register_collector("db_pool_read", _pool_metrics("read", reader))
+        install_query_log(reader, "read")
+        return reader
+    replica = create_engine(
+        settings.database_read_url, **_engine_options(settings.database_read_url)
+    )
+    if is_sqlite_file(settings.database_read_url):
+        _configure_sqlite(replica, read_only=True)
+    metrics.register_collector("db_pool_replica", _pool_metrics("replica", replica))
+    install_query_log(replica, "replica")
+    return replica
+
+
+def dispose_engines() -> None:
+    """Close all pooled connections and forget the engines (app shutdown)."""
+    for factory in (get_read_engine, get_engine):
+        if factory.cache_info().currsize:
+            factory().dispose()
+        factory.cache_clear()
+
+
+def create_session(read_only: bool = False) -> Session:
+    """
+    Open a new session.
+
+    Args:
+        read_only: Bind to the read replica instead of the primary
+
+    Returns:
+        A new Session (caller is responsible for closing it)
+    """
+    return SessionLocal(bind=get_read_engine() if read_only else get_engine())
+
+
 def get_db():
     """
     Dependency for FastAPI routes.
     Yields a database session and ensures it's closed after use.
-    
+
     Usage in routes:
         @app.get("/items")
         def read_items(db: Session = Depends(get_db)):
             return db.query(Item).all()
     """
-    db = SessionLocal()
+    db = create_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db():
+    """
+    Dependency for read-only routes.
+    Yields a session bound to the read replica (or the primary if none is
+    configured). Replicas may lag slightly behind the primary.
+    """
+    db = create_session(read_only=True)
     try:
         yield db
     finally:
@@ -0,0 +1,265 @@
+"""
+Request body decoding for the ingest endpoints.
+
+- `Content-Encoding: gzip` / `zstd` bodies are decompressed incrementally
+  as they arrive, with a cap on the decompressed size. Each chunk is only
+  inflated up to what is left of the cap, so a small, highly compressed
+  body can't make the server allocate more than INGEST_MAX_BODY_BYTES.
+- Batches can be JSON (an array, or `{"events": [...]}`), newline-delimited
+  JSON (`application/x-ndjson`) or MessagePack (`application/msgpack`,
+  concatenated maps or one array). NDJSON and MessagePack streams are
+  decoded record by record, so a large batch never has to sit in memory
+  as a whole.
+
+zstd and MessagePack use the optional `zstandard` and `msgpack` packages;
+without them those encodings are answered with 415.
+"""
+import json
+import zlib
+from typing import Any, AsyncIterator, Callable, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.routing import APIRoute
+
+from .config import get_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+settings = get_settings()
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MSGPACK = "application/msgpack"
+CONTENT_TYPES = {
+    JSON: JSON,
+    NDJSON: NDJSON,
+    "application/jsonl": NDJSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+}
+
+
+def _unsupported(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=detail)
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class _BodyTooLarge(Exception):
+    """Decompressed output went past the remaining body budget."""
+
+
+_ZSTD_WRITE_SIZE = 64 * 1024  # bytes of zstd output produced per step
+
+
+class _BoundedSink:
+    """Write target for a zstd stream writer that stops at a byte budget."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+        self.budget = 0
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.budget:
+            raise _BodyTooLarge()
+        self.parts.append(data)
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts, self.size = [], 0
+        return data
+
+
+def loads_json(data: bytes) -> Any:
+    """Parse JSON with orjson when installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _zlib_decompressor(wbits: int) -> Callable[[bytes, int], bytes]:
+    decompressor = zlib.decompressobj(wbits=wbits)
+
+    def decompress(data: bytes, budget: int) -> bytes:
+        # One byte over the budget tells "exactly at the cap" from "past it"
+        out = decompressor.decompress(data, budget + 1)
+        if len(out) > budget:
+            raise _BodyTooLarge()
+        return out
+
+    return decompress
+
+
+def _zstd_decompressor() -> Callable[[bytes, int], bytes]:
+    sink = _BoundedSink()
+    writer = zstandard.ZstdDecompressor().stream_writer(sink, write_size=_ZSTD_WRITE_SIZE)
+
+    def decompress(data: bytes, budget: int) -> bytes:
+        sink.budget = budget
+        writer.write(data)
+        return sink.take()
+
+    return decompress
+
+
+def _decompressor(encoding: str) -> Optional[Callable[[bytes, int], bytes]]:
+    """
+    Return an incremental decompress function for a Content-Encoding
+    (None = identity). It is called with a chunk and the number of bytes
+    it may produce, and raises `_BodyTooLarge` as soon as it would
+    produce more.
+    """
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    if encoding in ("gzip", "x-gzip"):
+        return _zlib_decompressor(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _zlib_decompressor(zlib.MAX_WBITS)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise _unsupported("zstd bodies need the zstandard package")
+        return _zstd_decompressor()
+    raise _unsupported(f"Unsupported Content-Encoding: {encoding}")
+
+
+async def iter_body(request: Request) -> AsyncIterator[bytes]:
+    """
+    Yield the decompressed request body chunk by chunk.
+
+    Raises:
+        HTTPException: 415 for unknown encodings, 400 for corrupt data,
+            413 past INGEST_MAX_BODY_BYTES decompressed
+    """
+    decompress = _decompressor(request.headers.get("content-encoding", ""))
+    limit = settings.ingest_max_body_bytes
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Decompressed body exceeds {limit} bytes"
+    )
+    total = 0
+    async for chunk in request.stream():
+        if decompress is not None and chunk:
+            try:
+                chunk = decompress(chunk, limit - total)
+            except _BodyTooLarge:
+                raise too_large
+            except Exception:
+                raise _bad_request("Corrupt compressed body")
+        total += len(chunk)
+        if total > limit:
+            raise too_large
+        if chunk:
+            yield chunk
+
+
+async def read_body(request: Request) -> bytes:
+    """Read the whole decompressed request body."""
+    return b"".join([chunk async for chunk in iter_body(request)])
+
+
+def content_type(request: Request) -> str:
+    """Normalized batch content type (JSON when the header is missing)."""
+    value = request.headers.get("content-type", JSON).split(";")[0].strip().lower()
+    if value not in CONTENT_TYPES:
+        raise _unsupported(f"Unsupported content type: {value}")
+    return CONTENT_TYPES[value]
+
+
+async def iter_records(request: Request) -> AsyncIterator[Any]:
+    """
+    Yield the records of a batch body, decoding streams incrementally.
+
+    Raises:
+        HTTPException: 400 for malformed bodies, 415 for unsupported formats
+    """
+    kind = content_type(request)
+
+    if kind == JSON:
+        try:
+            payload = loads_json(await read_body(request))
+        except ValueError:
+            raise _bad_request("Invalid JSON body")
+        if isinstance(payload, dict):
+            payload = payload.get("events", [payload])
+        if not isinstance(payload, list):
+            raise _bad_request("Expected an array of events")
+        for record in payload:
+            yield record
+
+    elif kind == NDJSON:
+        pending = b""
+        async for chunk in iter_body(request):
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield _ndjson_line(line)
+        if pending.strip():
+            yield _ndjson_line(pending)
+
+    else:
+        if msgpack is None:
+            raise _unsupported("MessagePack bodies need the msgpack package")
+        unpacker = msgpack.Unpacker(raw=False, timestamp=3, max_buffer_size=settings.ingest_max_body_bytes)
+        fed = 0
+        async for chunk in iter_body(request):
+            unpacker.feed(chunk)
+            fed += len(chunk)
+            try:
+                for obj in unpacker:
+                    if isinstance(obj, list):
+                        for record in obj:
+                            yield record
+                    else:
+                        yield obj
+            except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError):
+                raise _bad_request("Invalid MessagePack body")
+        if unpacker.tell() < fed:  # bytes left over: an incomplete object
+            raise _bad_request("Truncated MessagePack body")
+
+
+def _ndjson_line(line: bytes) -> Any:
+    try:
+        return loads_json(line)
+    except ValueError:
+        raise _bad_request("Invalid JSON line")
+
+
+class _DecompressedRequest(Request):
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            self._body = await read_body(self)
+        return self._body
+
+
+class DecompressingRoute(APIRoute):
+    """
+    Route class that transparently decompresses gzip/zstd request bodies,
+    so ordinary `EventCreate` body parameters accept compressed requests.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request):
+            return await handler(_DecompressedRequest(request.scope, request.receive))
+
+        return route_handler
@@ -0,0 +1,276 @@
+"""
+Opt-in production diagnostics: slow-query log, slow-request log and
+per-request profiles, readable at /debug/* (see api/routes/debug.py).
+
+- Every statement slower than SLOW_QUERY_MS is recorded with its SQL, the
+  shape of its parameters (names and types, never values), its duration
+  and the route that issued it.
+- Every request slower than SLOW_REQUEST_MS is recorded with its route,
+  status, duration and how many statements / how much database time it used.
+- A request carrying a valid `X-Debug-Token` plus `X-Profile: 1` (or
+  `?profile=1`) is sampled by core/profiling.py; the response gets an
+  `X-Profile-Id` header and the folded stacks are served at
+  /debug/profiles/{id}.
+
+Records are kept in fixed-size in-process ring buffers (DEBUG_RING_SIZE).
+"""
+import hmac
+import inspect
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import get_settings
+from .metrics import metrics
+from .profiling import SamplingProfiler
+
+settings = get_settings()
+
+_MAX_STATEMENT = 2000  # characters of SQL kept per slow query
+_MAX_PROFILES = 20  # profiles kept for /debug/profiles
+
+
+class RingBuffer:
+    """Thread-safe buffer of the most recent records."""
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._items = deque(maxlen=max(size, 1))
+
+    def append(self, item: Dict) -> None:
+        with self._lock:
+            self._items.append(item)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict]:
+        """Records, newest first."""
+        with self._lock:
+            items = list(self._items)
+        items.reverse()
+        return items[:limit] if limit else items
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+slow_queries = RingBuffer(settings.debug_ring_size)
+slow_requests = RingBuffer(settings.debug_ring_size)
+
+_profiles: "OrderedDict[str, Dict]" = OrderedDict()
+_profiles_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+
+
+class RequestStats:
+    """What one request has done so far (shared with the threadpool through a ContextVar)."""
+
+    __slots__ = ("scope", "queries", "db_ms")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_ms = 0.0
+
+    @property
+    def route(self) -> str:
+        """Method and path template, e.g. "GET /api/v1/incidents/{incident_id}"."""
+        return f"{self.scope.get('method', '')} {_path_template(self.scope)}"
+
+
+def _path_template(scope) -> str:
+    path = scope.get("path", "")
+    template = getattr(scope.get("route"), "path_format", None)
+    if not template:
+        return path
+    # Depending on the FastAPI version the matched route's template may be
+    # relative to its router's prefix, so put the (static) prefix back
+    try:
+        concrete = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    return path[:len(path) - len(concrete)] + template if path.endswith(concrete) else template
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def debug_token_valid(token: Optional[str]) -> bool:
+    """Whether a token grants access to profiles and /debug (never, when DEBUG_TOKEN is unset)."""
+    if not token or not settings.debug_token:
+        return False
+    return hmac.compare_digest(token, settings.debug_token)
+
+
+def get_profile(profile_id: str) -> Optional[Dict]:
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def list_profiles() -> List[Dict]:
+    """Stored profiles without their stacks, newest first."""
+    with _profiles_lock:
+        profiles = list(_profiles.values())
+    return [{k: v for k, v in p.items() if k != "folded"} for p in reversed(profiles)]
+
+
+def _keep_profile(profile: Dict) -> None:
+    with _profiles_lock:
+        _profiles[profile["id"]] = profile
+        while len(_profiles) > _MAX_PROFILES:
+            _profiles.popitem(last=False)
+
+
+# ---------------------------------------------------------------------------
+# Slow-query log
+# ---------------------------------------------------------------------------
+
+def install_query_log(engine: Engine, name: str) -> None:
+    """
+    Time every statement on an engine, counting it against the current
+    request and recording it when it is slower than SLOW_QUERY_MS.
+
+    Args:
+        engine: Engine to instrument
+        name: Engine name in the records ("primary", "replica")
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        _finished(name, statement, parameters, executemany, (time.perf_counter() - started) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def failed(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def _finished(engine: str, statement: str, parameters, executemany: bool, ms: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_ms += ms
+    if settings.slow_query_ms <= 0 or ms < settings.slow_query_ms:
+        return
+    metrics.inc("db_slow_queries_total")
+    route = stats.route if stats is not None else "background"
+    slow_queries.append({
+        "at": datetime.utcnow().isoformat(),
+        "duration_ms": round(ms, 2),
+        "engine": engine,
+        "route": route,
+        "statement": statement[:_MAX_STATEMENT],
+        "parameters": _parameter_shape(parameters, executemany),
+    })
+    print(f"🐢 Slow query ({ms:.0f} ms, {route}): {' '.join(statement.split())[:200]}")
+
+
+def _parameter_shape(parameters, executemany: bool) -> str:
+    """Parameter names and types, e.g. "500 x (service_id: int, message: str)"."""
+    if executemany and isinstance(parameters, (list, tuple)) and parameters:
+        return f"{len(parameters)} x ({_shape(parameters[0])})"
+    return f"({_shape(parameters)})"
+
+
+def _shape(params: Any) -> str:
+    if isinstance(params, dict):
+        return ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items())
+    if isinstance(params, (list, tuple)):
+        return ", ".join(type(value).__name__ for value in params)
+    return "" if params is None else type(params).__name__
+
+
+# ---------------------------------------------------------------------------
+# Request middleware
+# ---------------------------------------------------------------------------
+
+class DiagnosticsMiddleware:
+    """
+    ASGI middleware timing requests and starting per-request profiles.
+
+    Pure ASGI rather than BaseHTTPMiddleware, so the request's ContextVar
+    is the one the endpoint (and its threadpool call) sees.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        profiler = profile_id = None
+        if _profile_requested(scope):
+            profile_id = str(next(_profile_ids))
+            profiler = SamplingProfiler(lambda: _endpoint_code(scope), settings.profile_sample_interval).start()
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if profile_id is not None:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            _current.reset(token)
+            if profiler is not None:
+                profiler.stop()
+                _keep_profile({
+                    "id": profile_id,
+                    "at": datetime.utcnow().isoformat(),
+                    "route": stats.route,
+                    "status": status_code,
+                    "duration_ms": round(ms, 2),
+                    "samples": profiler.samples,
+                    "interval_ms": settings.profile_sample_interval * 1000,
+                    "folded": profiler.folded(),
+                })
+            if settings.slow_request_ms > 0 and ms >= settings.slow_request_ms:
+                metrics.inc("http_slow_requests_total")
+                slow_requests.append({
+                    "at": datetime.utcnow().isoformat(),
+                    "route": stats.route,
+                    "path": scope.get("path"),
+                    "status": status_code,
+                    "duration_ms": round(ms, 2),
+                    "db_queries": stats.queries,
+                    "db_ms": round(stats.db_ms, 2),
+                    "profile_id": profile_id,
+                })
+
+
+def _profile_requested(scope) -> bool:
+    if not settings.debug_token:
+        return False
+    headers = dict(scope.get("headers") or [])
+    flag = headers.get(b"x-profile", b"").decode() == "1" or b"profile=1" in scope.get("query_string", b"").split(b"&")
+    return flag and debug_token_valid(headers.get(b"x-debug-token", b"").decode())
+
+
+def _endpoint_code(scope):
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return None
+    return getattr(inspect.unwrap(endpoint), "__code__", None)
@@ -0,0 +1,58 @@
+"""
+Lightweight in-process metrics registry.
+Counters, gauges and on-demand collectors, exposed as JSON at GET /metrics.
+"""
+import threading
+from typing import Callable, Dict
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of named numeric metrics.
+
+    - Counters only go up (`inc`)
+    - Gauges hold the latest value (`set_gauge`)
+    - Collectors are callables evaluated on every snapshot, for values
+      that are cheaper to read on demand (e.g. connection pool state)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, float]]) -> None:
+        """
+        Register a callable returning a dict of metric name → value.
+        Re-registering under the same name replaces the previous collector.
+        """
+        with self._lock:
+            self._collectors[name] = collector
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return all metrics as a flat, name-sorted dict."""
+        with self._lock:
+            values = {**self._counters, **self._gauges}
+            collectors = list(self._collectors.values())
+
+        for collector in collectors:
+            try:
+                values.update(collector())
+            except Exception as e:
+                print(f"⚠️  Metrics collector failed: {e}")
+
+        return dict(sorted(values.items()))
+
+
+metrics = MetricsRegistry()
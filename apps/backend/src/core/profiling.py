@@ -0,0 +1,91 @@
+"""
+Sampling profiler for a single request.
+
+A background thread snapshots the Python stacks of the threads running the
+request's endpoint every PROFILE_SAMPLE_INTERVAL seconds and counts them in
+"folded" form (one `frame;frame;frame count` line per distinct stack), the
+input format of flamegraph.pl, speedscope and most flame graph viewers.
+
+Sync endpoints run on the threadpool and async ones on the event loop, so
+the profiler doesn't pick a thread up front: a thread's stack is sampled
+while it contains the endpoint's own frame, and only from that frame down.
+Concurrent calls to the same endpoint land in the same profile.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+_SRC_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks running one function until stopped.
+
+    Args:
+        target: Returns the code object to look for (called on every sample,
+            so it can be resolved after routing); None means nothing to sample yet
+        interval: Seconds between samples
+    """
+
+    def __init__(self, target: Callable[[], Optional[object]], interval: float):
+        self.target = target
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.elapsed = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def folded(self) -> str:
+        """Sampled stacks in folded format, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            code = self.target()
+            if code is None:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own:
+                    self._sample(frame, code)
+
+    def _sample(self, frame, code) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            if frame.f_code is code:
+                break
+            frame = frame.f_back
+        else:
+            return  # not running the endpoint
+        self.samples += 1
+        self._stacks[";".join(_label(c) for c in reversed(stack))] += 1
+
+
+def _label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_SRC_ROOT):
+        path = os.path.relpath(path, _SRC_ROOT)
+    else:
+        # Library frames: keep the package-relative part of the path
+        parts = path.replace(os.sep, "/").rsplit("site-packages/", 1)
+        path = parts[-1]
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
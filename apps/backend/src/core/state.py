@@ -0,0 +1,488 @@
+"""
+Shared state for coordination between API workers.
+
+A small key/value store with TTLs, atomic counters, compare-and-set and
+pub/sub, behind one interface (`StateBackend`) so that detection and caches
+can use it the same way whether the API runs as one process or as many
+workers:
+
+- `LocalStateBackend` (STATE_BACKEND=local, the default): a dict in this
+  process. Fast, and correct as long as one process serves the API.
+- `SQLiteStateBackend` (STATE_BACKEND=sqlite): a SQLite file in WAL mode
+  (STATE_URL), shared by every worker on the host, and only on that host.
+  Pub/sub messages are rows that each process polls for every
+  STATE_POLL_INTERVAL seconds.
+- Anything else, e.g. a Redis adapter: STATE_BACKEND=package.module:Class
+  names a `StateBackend` subclass, constructed with STATE_URL.
+
+Each backend declares its `scope` (PROCESS, HOST or CLUSTER): who sees
+what it stores. Callers only rely on another worker's writes when the
+scope covers that worker.
+
+Values are strings; callers encode anything richer. TTLs are in seconds,
+and expired keys read as absent.
+"""
+import importlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import get_settings
+
+settings = get_settings()
+
+Subscriber = Callable[[str], None]
+
+# StateBackend.scope: which workers see the same state
+PROCESS = "process"
+HOST = "host"
+CLUSTER = "cluster"
+
+_SWEEP_EVERY = 1000  # writes between purges of expired keys
+_MESSAGE_RETENTION = 60.0  # seconds a published message is kept for pollers
+
+
+class StateBackend(ABC):
+    """
+    Interface every state backend implements (the adapter interface for
+    external stores).
+
+    `scope` says which workers see the same state: this process only
+    (PROCESS), every process on this host (HOST) or every worker of the
+    deployment (CLUSTER, the default for external stores).
+    """
+
+    scope: str = CLUSTER
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """The key's value, or None if it is absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Set a key, expiring after `ttl` seconds (None = never)."""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove a key. Returns False if it was absent."""
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """
+        Atomically add to an integer counter, creating it at 0.
+
+        Args:
+            key: Counter key
+            amount: Added to the counter (may be negative)
+            ttl: Expiry set when the counter is created (an existing
+                counter keeps its expiry)
+
+        Returns:
+            The new value
+
+        Raises:
+            ValueError: If the key holds a non-integer value
+        """
+
+    @abstractmethod
+    def compare_and_set(
+        self, key: str, expected: Optional[str], value: Optional[str], ttl: Optional[float] = None
+    ) -> bool:
+        """
+        Atomically replace a key's value if it currently equals `expected`.
+
+        Args:
+            key: The key
+            expected: Current value required (None = the key must be absent)
+            value: New value (None = delete the key)
+            ttl: Expiry for the new value
+
+        Returns:
+            True if the value was replaced
+        """
+
+    @abstractmethod
+    def publish(self, channel: str, message: str) -> None:
+        """Send a message to every subscriber of a channel, in every worker."""
+
+    @abstractmethod
+    def subscribe(self, channel: str, callback: Subscriber) -> Callable[[], None]:
+        """
+        Call `callback(message)` for each message published on a channel
+        from now on (including by this process).
+
+        Returns:
+            A function that cancels the subscription
+        """
+
+    def close(self) -> None:
+        """Release connections and stop background threads."""
+
+
+class _Subscriptions:
+    """Callbacks per channel; a failing callback doesn't affect the others."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: Dict[str, List[Subscriber]] = defaultdict(list)
+
+    def add(self, channel: str, callback: Subscriber) -> Callable[[], None]:
+        with self._lock:
+            self._callbacks[channel].append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._callbacks[channel]:
+                    self._callbacks[channel].remove(callback)
+        return unsubscribe
+
+    def channels(self) -> List[str]:
+        with self._lock:
+            return [channel for channel, callbacks in self._callbacks.items() if callbacks]
+
+    def deliver(self, channel: str, message: str) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"⚠️  State subscriber for '{channel}' failed: {e}")
+
+
+class LocalStateBackend(StateBackend):
+    """
+    State in this process only. Subscribers are called synchronously by
+    `publish`.
+    """
+
+    scope = PROCESS
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._writes = 0
+        self._subscriptions = _Subscriptions()
+
+    def _live(self, key: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def _write(self, key: str, value: str, expires_at: Optional[float], now: float) -> None:
+        self._data[key] = (value, expires_at)
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            expired = [k for k, (_, at) in self._data.items() if at is not None and at <= now]
+            for k in expired:
+                del self._data[k]
+
+    def _expiry(self, ttl: Optional[float], now: float) -> Optional[float]:
+        return now + ttl if ttl is not None else None
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._live(key, self._clock())
+        return item[0] if item else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            now = self._clock()
+            self._write(key, value, self._expiry(ttl, now), now)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            found = self._live(key, self._clock()) is not None
+            self._data.pop(key, None)
+        return found
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            now = self._clock()
+            item = self._live(key, now)
+            if item is None:
+                value, expires_at = amount, self._expiry(ttl, now)
+            else:
+                value, expires_at = int(item[0]) + amount, item[1]
+            self._write(key, str(value), expires_at, now)
+        return value
+
+    def compare_and_set(
+        self, key: str, expected: Optional[str], value: Optional[str], ttl: Optional[float] = None
+    ) -> bool:
+        with self._lock:
+            now = self._clock()
+            item = self._live(key, now)
+            if (item[0] if item else None) != expected:
+                return False
+            if value is None:
+                self._data.pop(key, None)
+            else:
+                self._write(key, value, self._expiry(ttl, now), now)
+        return True
+
+    def publish(self, channel: str, message: str) -> None:
+        self._subscriptions.deliver(channel, message)
+
+    def subscribe(self, channel: str, callback: Subscriber) -> Callable[[], None]:
+        return self._subscriptions.add(channel, callback)
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    State in a SQLite file, shared by every process that opens it.
+
+    Compound operations run in `BEGIN IMMEDIATE` transactions, so they are
+    atomic across processes. Expiry uses wall-clock time, which all
+    processes on the host share. Workers on other hosts don't see it.
+
+    Args:
+        path: Database file (created if missing)
+        poll_interval: Seconds between checks for published messages
+    """
+
+    scope = HOST
+
+    def __init__(self, path: str, poll_interval: float = 0.05):
+        self.path = path
+        self.poll_interval = poll_interval
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._writes = 0
+        self._subscriptions = _Subscriptions()
+        self._poller: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_message_id = 0
+
+        db = self._db()
+        db.execute("PRAGMA journal_mode = WAL")
+        db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS state_keys (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS state_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                message TEXT NOT NULL,
+                published_at REAL NOT NULL
+            );
+            """
+        )
+
+    def _db(self) -> sqlite3.Connection:
+        """This thread's connection (autocommit; transactions are explicit)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA synchronous = NORMAL")
+            self._local.db = db
+            with self._connections_lock:
+                self._connections.append(db)
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @staticmethod
+    def _current(db: sqlite3.Connection, key: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+        return db.execute(
+            "SELECT value, expires_at FROM state_keys WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, now),
+        ).fetchone()
+
+    def _upsert(self, db: sqlite3.Connection, key: str, value: str, expires_at: Optional[float], now: float) -> None:
+        db.execute(
+            "INSERT INTO state_keys (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, expires_at),
+        )
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            db.execute("DELETE FROM state_keys WHERE expires_at <= ?", (now,))
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._current(self._db(), key, time.time())
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        self._upsert(self._db(), key, value, now + ttl if ttl is not None else None, now)
+
+    def delete(self, key: str) -> bool:
+        with self._transaction() as db:
+            found = self._current(db, key, time.time()) is not None
+            db.execute("DELETE FROM state_keys WHERE key = ?", (key,))
+        return found
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        now = time.time()
+        with self._transaction() as db:
+            row = self._current(db, key, now)
+            if row is None:
+                value, expires_at = amount, now + ttl if ttl is not None else None
+            else:
+                value, expires_at = int(row[0]) + amount, row[1]
+            self._upsert(db, key, str(value), expires_at, now)
+        return value
+
+    def compare_and_set(
+        self, key: str, expected: Optional[str], value: Optional[str], ttl: Optional[float] = None
+    ) -> bool:
+        now = time.time()
+        with self._transaction() as db:
+            row = self._current(db, key, now)
+            if (row[0] if row else None) != expected:
+                return False
+            if value is None:
+                db.execute("DELETE FROM state_keys WHERE key = ?", (key,))
+            else:
+                self._upsert(db, key, value, now + ttl if ttl is not None else None, now)
+        return True
+
+    def publish(self, channel: str, message: str) -> None:
+        now = time.time()
+        db = self._db()
+        db.execute(
+            "INSERT INTO state_messages (channel, message, published_at) VALUES (?, ?, ?)",
+            (channel, message, now),
+        )
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            db.execute("DELETE FROM state_messages WHERE published_at < ?", (now - _MESSAGE_RETENTION,))
+
+    def subscribe(self, channel: str, callback: Subscriber) -> Callable[[], None]:
+        unsubscribe = self._subscriptions.add(channel, callback)
+        with self._connections_lock:
+            if self._poller is None:
+                # Deliver messages published from now on, not the backlog
+                self._last_message_id = self._db().execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM state_messages"
+                ).fetchone()[0]
+                self._poller = threading.Thread(target=self._poll, name="state-subscriber", daemon=True)
+                self._poller.start()
+        return unsubscribe
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            channels = self._subscriptions.channels()
+            if not channels:
+                continue
+            try:
+                rows = self._db().execute(
+                    f"SELECT id, channel, message FROM state_messages WHERE id > ? "
+                    f"AND channel IN ({', '.join('?' * len(channels))}) ORDER BY id",
+                    (self._last_message_id, *channels),
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"⚠️  State subscriber poll failed: {e}")
+                continue
+            for message_id, channel, message in rows:
+                self._last_message_id = message_id
+                self._subscriptions.deliver(channel, message)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for db in connections:
+            db.close()
+
+
+def load_backend(name: str, url: str = "") -> StateBackend:
+    """
+    Build a state backend from its STATE_BACKEND / STATE_URL settings.
+
+    Args:
+        name: "local", "sqlite", or "package.module:Class" for an external
+            `StateBackend` subclass
+        url: SQLite file for "sqlite" (default data/state.db); passed to
+            external backends as their only argument
+
+    Raises:
+        ValueError: If the backend can't be loaded
+    """
+    if name == "local":
+        return LocalStateBackend()
+    if name == "sqlite":
+        return SQLiteStateBackend(url or "data/state.db", settings.state_poll_interval)
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown STATE_BACKEND {name!r} (local, sqlite or package.module:Class)")
+    try:
+        backend_class = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"Cannot load STATE_BACKEND {name!r}: {e}") from e
+    if not (isinstance(backend_class, type) and issubclass(backend_class, StateBackend)):
+        raise ValueError(f"STATE_BACKEND {name!r} is not a StateBackend subclass")
+    return backend_class(url)
+
+
+@contextmanager
+def state_lock(state: StateBackend, key: str, lease: float, timeout: Optional[float] = None) -> Iterator[None]:
+    """
+    Hold a lock shared by every worker using `state` for the block.
+
+    The lock is a key set by compare-and-set, leased for `lease` seconds
+    so that a crashed holder can't block others for longer than that.
+    Keep the block shorter than the lease.
+
+    Args:
+        state: Backend holding the lock
+        key: Lock key
+        lease: Seconds until the lock expires if not released
+        timeout: Seconds to wait for the lock (None = forever)
+
+    Raises:
+        TimeoutError: If the lock wasn't acquired within `timeout`
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    delay = 0.001
+    while not state.compare_and_set(key, None, token, ttl=lease):
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"State lock {key!r} not acquired within {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+    try:
+        yield
+    finally:
+        state.compare_and_set(key, token, None)
+
+
+@lru_cache()
+def get_state() -> StateBackend:
+    """Get the process-wide state backend (STATE_BACKEND)."""
+    return load_backend(settings.state_backend, settings.state_url)
+
+
+def close_state() -> None:
+    """Close the state backend if it was opened (app shutdown)."""
+    if get_state.cache_info().currsize:
+        get_state().close()
+    get_state.cache_clear()
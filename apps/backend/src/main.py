@@ -1,16 +1,108 @@
 """
 Main FastAPI application entry point.
 """
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import get_settings
-from .core.database import engine, Base
-from .api.routes import events, incidents
+from .core.background import start_periodic, stop_periodic
+from .core.compression import CompressionMiddleware
+from .core.database import get_engine, get_read_engine, dispose_engines
+from .core.diagnostics import DiagnosticsMiddleware
+from .core.metrics import metrics
+from .core.state import close_state
+from .api.routes import analysis_jobs, analytics, debug, events, incidents, limits, otlp
+from .receivers import start_syslog_servers
+from .services.batch_ingestor import get_batch_ingestor
+from .services.ai_service import get_ai_service, llm_breaker
+from .services.analysis_coordinator import stop_analysis_coordinator
+from .services.analysis_jobs import stop_analysis_jobs
+from .services.archive_service import archive_available, run_archive
+from .services.detection import stop_detector
+from .services.event_writer import stop_event_writer
+from .services.idempotency import purge_ingest_keys
+from .services.incident_touch import flush_incident_touches
+from .services.ingest_limits import flush_event_rollups
+from .services.similarity import refresh_similarity_index
+from .services.summary_service import reconcile_counters
 
 settings = get_settings()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create process-wide resources on startup and release them on shutdown.
+    
+    Nothing connects to the database at import time. The schema is managed
+    by migrations (`python -m src.cli.migrate`), not created here.
+    """
+    get_engine()
+    get_read_engine()
+    get_ai_service()
+    
+    tasks = []
+    if settings.summary_reconcile_interval > 0:
+        tasks.append(start_periodic(
+            "reconcile-incident-counters", settings.summary_reconcile_interval, reconcile_counters
+        ))
+    if settings.incident_touch_interval > 0:
+        tasks.append(start_periodic(
+            "flush-incident-touches", settings.incident_touch_interval, flush_incident_touches
+        ))
+    if settings.similar_index_refresh_interval > 0:
+        tasks.append(start_periodic(
+            "refresh-similarity-index", settings.similar_index_refresh_interval, refresh_similarity_index
+        ))
+    # Load the similar-incidents index in the background (lookups see a partial index until then)
+    tasks.append(asyncio.create_task(asyncio.to_thread(refresh_similarity_index), name="load-similarity-index"))
+    if settings.rollup_flush_interval > 0:
+        tasks.append(start_periodic(
+            "flush-event-rollups", settings.rollup_flush_interval, flush_event_rollups
+        ))
+    
+    if settings.idempotency_window > 0:
+        tasks.append(start_periodic(
+            "purge-ingest-keys", min(settings.idempotency_window, 3600), purge_ingest_keys
+        ))
+    
+    if settings.archive_after_days > 0 and settings.archive_interval > 0:
+        if archive_available():
+            tasks.append(start_periodic("archive-aged-events", settings.archive_interval, run_archive))
+        else:
+            print("⚠️  ARCHIVE_AFTER_DAYS is set but pyarrow is not installed; archiving is off")
+    
+    ingestor = get_batch_ingestor()
+    ingestor.start()
+    syslog = None
+    if settings.syslog_udp_port or settings.syslog_tcp_port:
+        try:
+            syslog = await start_syslog_servers(
+                ingestor,
+                settings.syslog_host,
+                udp_port=settings.syslog_udp_port or None,
+                tcp_port=settings.syslog_tcp_port or None,
+            )
+            print(f"📥 Syslog receiver listening (udp={syslog.udp_port}, tcp={syslog.tcp_port})")
+        except OSError as e:
+            # Without SO_REUSEPORT only the first worker can bind the ports
+            print(f"⚠️  Syslog receiver not started in this worker: {e}")
+    
+    yield
+    if syslog is not None:
+        await syslog.close()
+    await ingestor.stop()
+    await stop_periodic(tasks)
+    stop_event_writer()
+    stop_detector()
+    flush_incident_touches()
+    flush_event_rollups()
+    stop_analysis_jobs()
+    stop_analysis_coordinator()
+    dispose_engines()
+    close_state()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -18,7 +110,8 @@ app = FastAPI(
     description="Intelligent Incident Management Platform",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -34,6 +127,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/br/zstd responses above COMPRESS_MIN_SIZE (see core/compression.py)
+app.add_middleware(CompressionMiddleware)
+
+# Slow-request log and per-request profiles (see core/diagnostics.py)
+app.add_middleware(DiagnosticsMiddleware)
+
 # Health check endpoints
 @app.get("/")
 def root():
@@ -48,12 +147,28 @@ def root():
 @app.get("/health")
 def health_check():
     """Health check endpoint for monitoring."""
+    ai_service = get_ai_service()
     return {
         "status": "healthy",
-        "environment": settings.environment
+        "environment": settings.environment,
+        "llm": {
+            "mode": "mock" if ai_service.use_mock else "openai",
+            "circuit": llm_breaker.snapshot()
+        }
     }
 
 
+@app.get("/metrics")
+def get_metrics():
+    """Process-local counters and gauges (connection pool usage, etc.)."""
+    return metrics.snapshot()
+
+
 # Include API routes
 app.include_router(events.router, prefix="/api/v1", tags=["Events"])
-app.include_router(incidents.router, prefix="/api/v1", tags=["Incidents"])
\ No newline at end of file
+app.include_router(incidents.router, prefix="/api/v1", tags=["Incidents"])
+app.include_router(limits.router, prefix="/api/v1", tags=["Ingest Limits"])
+app.include_router(analytics.router, prefix="/api/v1", tags=["Analytics"])
+app.include_router(analysis_jobs.router, prefix="/api/v1", tags=["Analysis Jobs"])
+app.include_router(debug.router, tags=["Diagnostics"])  # /debug/*, needs DEBUG_TOKEN
+app.include_router(otlp.router, tags=["OTLP"])  # standard OTLP/HTTP path: /v1/logs
\ No newline at end of file
@@ -1,5 +1,11 @@
 # Import all models here for easy access
+from .analysis_job import AnalysisJob
 from .event import Event
+from .event_rollup import EventRollup
 from .incident import Incident, IncidentStatus
+from .incident_counter import IncidentCounter
+from .incident_timeline import IncidentTimeline
+from .ingest_key import IngestKey
+from .service import Service
 
-__all__ = ["Event", "Incident", "IncidentStatus"]
\ No newline at end of file
+__all__ = ["AnalysisJob", "Event", "EventRollup", "Incident", "IncidentStatus", "IncidentCounter", "IncidentTimeline", "IngestKey", "Service"]
\ No newline at end of file
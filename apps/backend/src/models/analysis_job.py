@@ -0,0 +1,60 @@
+"""
+AnalysisJob model - bulk re-analysis runs.
+"""
+from sqlalchemy import Boolean, Column, DateTime, Integer, JSON, String, Text
+from datetime import datetime
+from ..core.database import Base
+
+
+class AnalysisJob(Base):
+    """
+    A bulk re-analysis of the incidents matching a filter (see
+    services/analysis_jobs.py).
+    
+    Incidents are processed in ID order, so `cursor` is enough to resume
+    a cancelled or interrupted job where it stopped.
+    
+    Attributes:
+        id: Unique identifier
+        status: queued, running, completed, cancelled, interrupted or failed
+        filters: Incident filter (service, status, category, severity,
+            created_since, created_until, analyzed_before)
+        force: Re-analyze incidents whose stored analysis is still current
+        total: Matching incidents when the job was created
+        processed: Incidents analyzed so far
+        skipped: Incidents left alone (analysis current, or deleted meanwhile)
+        failed: Incidents whose analysis raised
+        cursor: Highest incident ID below which everything is done
+        cancel_requested: Set by the cancel endpoint, checked between batches
+        error: Why the job failed
+        created_at, started_at, finished_at: Lifecycle timestamps
+        updated_at: Last progress write (a running job that stops updating
+            was interrupted and can be resumed)
+    """
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    filters = Column(JSON, nullable=True)
+    force = Column(Boolean, nullable=False, default=True)
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    cursor = Column(Integer, nullable=False, default=0)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def progress(self) -> float:
+        """Share of the selected incidents done (0-1)."""
+        if not self.total:
+            return 1.0 if self.status == "completed" else 0.0
+        return min(1.0, ((self.processed or 0) + (self.skipped or 0) + (self.failed or 0)) / self.total)
+    
+    def __repr__(self):
+        return f"<AnalysisJob {self.id} - {self.status} - {self.processed}/{self.total}>"
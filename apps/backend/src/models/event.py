@@ -1,10 +1,12 @@
 """
 Event model - represents a single log/error event from an application.
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, Integer, Text, DDL, event
+from sqlalchemy.orm import Session, relationship
 from datetime import datetime
 from ..core.database import Base
+from .level import LogLevel
+from .service import ServiceName, get_service_dictionary
 
 
 class Event(Base):
@@ -13,23 +15,73 @@ class Event(Base):
     
     Attributes:
         id: Unique identifier
-        service: Name of the service (e.g., "auth-api", "payment-service")
-        level: Log level (ERROR, WARN, INFO)
+        service: Name of the service (e.g., "auth-api", "payment-service");
+            stored as a key into the `services` dictionary
+        level: Log level (TRACE, DEBUG, INFO, WARN, ERROR); stored as a small int
         message: The actual error/log message
         timestamp: When the event occurred
         incident_id: Foreign key to incident (if grouped)
+        fingerprint: Hash of the message template (see services/fingerprint.py)
     """
     __tablename__ = "events"
     
     id = Column(Integer, primary_key=True, index=True)
-    service = Column(String(100), nullable=False, index=True)
-    level = Column(String(20), nullable=False)  # ERROR, WARN, INFO
+    service = Column("service_id", ServiceName, ForeignKey("services.id"), key="service", nullable=False)
+    level = Column("level_id", LogLevel, key="level", nullable=False)  # see models/level.py
     message = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
-    incident_id = Column(Integer, ForeignKey("incidents.id"), nullable=True)
+    incident_id = Column(Integer, ForeignKey("incidents.id"), nullable=True, index=True)
+    fingerprint = Column(String(16), nullable=True)
     
     # Relationship to incident
     incident = relationship("Incident", back_populates="events")
     
+    __table_args__ = (
+        # Distinct fingerprints per incident without touching the table
+        Index("ix_events_incident_fingerprint", "incident_id", "fingerprint"),
+        # Detection's "recent unlinked errors for a service" and per-service listings
+        Index("ix_events_service_level_time", "service", "level", "timestamp"),
+    )
+    
     def __repr__(self):
         return f"<Event {self.id} - {self.service} - {self.level}>"
+
+
+@event.listens_for(Session, "before_flush")
+def _intern_event_services(session, flush_context, instances):
+    """Add the services of new events to the dictionary in the flushing transaction."""
+    names = {obj.service for obj in session.new if isinstance(obj, Event)}
+    names.update(obj.service for obj in session.dirty if isinstance(obj, Event))
+    if names:
+        get_service_dictionary().intern_for_flush(session, names)
+
+
+# Full-text search index over event messages.
+# PostgreSQL: generated tsvector column + GIN index (kept in sync by the database).
+# SQLite: external-content FTS5 table kept in sync by triggers on insert/update/delete.
+EVENT_SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', message)) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5("
+        "message, content='events', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN "
+        "INSERT INTO events_fts(rowid, message) VALUES (new.id, new.message); END",
+        "CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, message) VALUES ('delete', old.id, old.message); END",
+        "CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF message ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, message) VALUES ('delete', old.id, old.message); "
+        "INSERT INTO events_fts(rowid, message) VALUES (new.id, new.message); END",
+    ],
+}
+
+for _dialect, _statements in EVENT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            Event.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
@@ -0,0 +1,34 @@
+"""
+EventRollup model - exact per-minute event counts.
+"""
+from sqlalchemy import Column, DateTime, Integer, String
+from ..core.database import Base
+
+
+class EventRollup(Base):
+    """
+    Number of events per (service, level, minute of event time).
+    
+    Counts every accepted event, including non-ERROR events that sampling
+    kept out of the `events` table, so volumes stay exact while raw rows
+    are only a sample (see services/ingest_limits.py).
+    
+    Attributes:
+        service: Service name
+        level: Log level
+        minute: Event time truncated to the minute (naive UTC)
+        received: Events accepted (stored or sampled out)
+        stored: Events stored as raw rows
+        dropped: Events rejected by the service's rate limit
+    """
+    __tablename__ = "event_rollups"
+    
+    service = Column(String(100), primary_key=True)
+    level = Column(String(20), primary_key=True)
+    minute = Column(DateTime, primary_key=True)
+    received = Column(Integer, nullable=False, default=0)
+    stored = Column(Integer, nullable=False, default=0)
+    dropped = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<EventRollup {self.service}/{self.level} @ {self.minute}: {self.received}>"
@@ -1,8 +1,8 @@
 """
 Incident model - represents a group of related events.
 """
-from sqlalchemy import Column, String, DateTime, Integer, Text, JSON, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, Integer, LargeBinary, Text, JSON, Enum as SQLEnum
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import enum
 from ..core.database import Base
@@ -30,6 +30,13 @@ class Incident(Base):
         status: Current status of the incident
         created_at: When the incident was created
         updated_at: Last update timestamp
+        last_seen_at: Timestamp of the newest linked event
+        event_count: Number of linked events (maintained by services/incident_touch.py)
+        analyzed_at: When the stored analysis was produced
+        analyzed_event_count: Number of events the stored analysis saw
+        analyzed_fingerprints: Message fingerprints the stored analysis saw (JSON array)
+        embedding: Similarity vector (float32 bytes, see services/similarity.py)
+        archived_at: When the incident was copied to the cold archive (services/archive_service.py)
     """
     __tablename__ = "incidents"
     
@@ -42,6 +49,13 @@ class Incident(Base):
     status = Column(SQLEnum(IncidentStatus), default=IncidentStatus.OPEN, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_seen_at = Column(DateTime, nullable=True)
+    event_count = Column(Integer, nullable=False, default=0, server_default="0")
+    analyzed_at = Column(DateTime, nullable=True)
+    analyzed_event_count = Column(Integer, nullable=True)
+    analyzed_fingerprints = Column(JSON, nullable=True)
+    embedding = deferred(Column(LargeBinary, nullable=True))  # only loaded when needed
+    archived_at = Column(DateTime, nullable=True)
     
     # Relationship to events
     events = relationship("Event", back_populates="incident")
@@ -0,0 +1,28 @@
+"""
+IncidentCounter model - incrementally maintained incident counts.
+"""
+from sqlalchemy import Column, String, Integer
+from ..core.database import Base
+
+
+class IncidentCounter(Base):
+    """
+    Number of incidents per (dimension, key), e.g. ("status", "open") or
+    ("service", "payment-service").
+    
+    Updated in the same transaction as incident creation, status changes and
+    severity changes, and periodically reconciled against the incidents table.
+    
+    Attributes:
+        dimension: "status", "severity" or "service"
+        key: Value within the dimension
+        count: Number of incidents with that value
+    """
+    __tablename__ = "incident_counters"
+    
+    dimension = Column(String(20), primary_key=True)
+    key = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<IncidentCounter {self.dimension}={self.key}: {self.count}>"
@@ -0,0 +1,31 @@
+"""
+IncidentTimeline model - precomputed event-count histogram of an incident.
+"""
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON
+from ..core.database import Base
+
+
+class IncidentTimeline(Base):
+    """
+    Events per time bucket for one incident, kept up to date as events are
+    linked (see services/incident_timeline.py), so drawing the timeline is
+    a single-row read however many events the incident has.
+    
+    Buckets start at TIMELINE_BUCKET_SECONDS and double in width whenever
+    the incident outgrows TIMELINE_MAX_BUCKETS.
+    
+    Attributes:
+        incident_id: The incident
+        start: Start of the first bucket (naive UTC, a multiple of the width)
+        bucket_seconds: Width of every bucket
+        counts: Events per bucket (JSON array, at most TIMELINE_MAX_BUCKETS long)
+    """
+    __tablename__ = "incident_timelines"
+    
+    incident_id = Column(Integer, ForeignKey("incidents.id"), primary_key=True)
+    start = Column(DateTime, nullable=False)
+    bucket_seconds = Column(Integer, nullable=False)
+    counts = Column(JSON, nullable=False)
+    
+    def __repr__(self):
+        return f"<IncidentTimeline {self.incident_id}: {len(self.counts or [])} x {self.bucket_seconds}s>"
@@ -0,0 +1,30 @@
+"""
+IngestKey model - idempotency keys of recently stored events.
+"""
+from sqlalchemy import Column, DateTime, Integer, String
+from datetime import datetime
+from ..core.database import Base
+
+
+class IngestKey(Base):
+    """
+    An idempotency key that has been used to store an event.
+    
+    The primary key is the unique-index backstop behind the in-memory Bloom
+    filter in services/idempotency.py. Rows older than IDEMPOTENCY_WINDOW
+    are purged periodically (and are no longer treated as duplicates).
+    
+    Attributes:
+        digest: Hash of (service, idempotency key)
+        event_id: The event stored under the key (no foreign key, so
+            archiving events doesn't have to touch this table)
+        created_at: When the key was first used
+    """
+    __tablename__ = "ingest_keys"
+    
+    digest = Column(String(32), primary_key=True)
+    event_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f"<IngestKey {self.digest} -> event {self.event_id}>"
@@ -0,0 +1,66 @@
+"""
+Event log levels, stored as small integers.
+
+The API and the ORM use level names ("ERROR", "WARN", ...); the `events`
+table stores a SMALLINT code ordered by severity. Names are normalized at
+ingest (case-insensitive, common aliases folded in), so "error", "Err" and
+"FATAL" all become "ERROR" and reach incident detection.
+"""
+from typing import Optional
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+# Canonical level -> stored code (ordered by severity)
+LEVEL_CODES = {"TRACE": 1, "DEBUG": 2, "INFO": 3, "WARN": 4, "ERROR": 5}
+LEVEL_NAMES = {code: name for name, code in LEVEL_CODES.items()}
+
+LEVEL_ALIASES = {
+    "WARNING": "WARN",
+    "ERR": "ERROR",
+    "FATAL": "ERROR",
+    "CRITICAL": "ERROR",
+    "CRIT": "ERROR",
+    "SEVERE": "ERROR",
+    "ALERT": "ERROR",
+    "EMERG": "ERROR",
+    "PANIC": "ERROR",
+    "NOTICE": "INFO",
+    "INFORMATION": "INFO",
+    "FINE": "DEBUG",
+    "VERBOSE": "DEBUG",
+}
+
+
+def normalize_level(level: str) -> Optional[str]:
+    """
+    Canonical name for a log level.
+
+    Args:
+        level: Level as sent by a client, in any case
+
+    Returns:
+        One of LEVEL_CODES, or None if the level is not recognized
+    """
+    level = level.strip().upper()
+    level = LEVEL_ALIASES.get(level, level)
+    return level if level in LEVEL_CODES else None
+
+
+class LogLevel(TypeDecorator):
+    """Level name in Python, SMALLINT code in the database."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        name = normalize_level(value)
+        # Unknown names bind as NULL: no match in filters, NOT NULL error on insert
+        return LEVEL_CODES[name] if name else None
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return LEVEL_NAMES.get(value, str(value))
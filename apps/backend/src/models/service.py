@@ -0,0 +1,261 @@
+"""
+Service model - dictionary of service names referenced by events.
+
+Events store a small integer `service_id` instead of repeating the name on
+every row. The mapping is cached in process (`ServiceDictionary`) and
+applied by the `ServiceName` column type, so code keeps reading, writing
+and filtering `Event.service` as a string.
+"""
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Column, Integer, String, event, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+
+from ..core.database import Base, get_engine
+from ..core.metrics import metrics
+
+# session.info key for names interned by a session's open transaction
+_SESSION_KEY = "interned_services"
+
+_MISS_TTL = 5.0  # seconds a name or id found in no `services` row is remembered as missing
+_MAX_MISSES = 10000  # remembered misses before they are all forgotten (names come from queries)
+
+
+class Service(Base):
+    """
+    An interned service name.
+
+    Attributes:
+        id: Small integer key stored in `events.service_id`
+        name: Service name (e.g., "auth-api")
+    """
+    __tablename__ = "services"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<Service {self.id} - {self.name}>"
+
+
+class ServiceDictionary:
+    """
+    In-process cache of the `services` table (name <-> id).
+
+    Entries never change once written, so the cache only grows. A miss
+    looks up just that name or id (picking up names interned by other
+    processes), and a lookup that finds nothing is remembered for
+    _MISS_TTL seconds, so repeated filters on an unknown name don't query
+    each time. Unknown names are inserted only when a row is being written.
+
+    Names of new ORM objects are interned inside the flushing transaction
+    (`intern_for_flush`), so a session that has already written (and, on
+    SQLite, holds the write lock) never waits on a second connection. They
+    reach the shared cache when that transaction commits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._misses: Dict[Tuple[str, object], float] = {}  # ("name" | "id", key) -> expiry
+        self._flushing = threading.local()  # names interned by the flush running on this thread
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def id_for(self, name: str, create: bool = True) -> Optional[int]:
+        """
+        Key for a service name.
+
+        Args:
+            name: Service name
+            create: Insert the name if it isn't in the dictionary yet
+
+        Returns:
+            The service id, or None if the name is unknown and `create` is False
+        """
+        service_id = self._ids.get(name)
+        if service_id is None:
+            pending = getattr(self._flushing, "ids", None)
+            if pending and name in pending:
+                return pending[name]
+            if create:
+                service_id = self.intern([name])[name]
+            else:
+                self._lookup(("name", name), Service.name == name)
+                service_id = self._ids.get(name)
+        return service_id
+
+    def name_for(self, service_id: int) -> Optional[str]:
+        """Service name for a key (None if there is no such service)."""
+        name = self._names.get(service_id)
+        if name is None:
+            self._lookup(("id", service_id), Service.id == service_id)
+            name = self._names.get(service_id)
+        return name
+
+    def intern(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Keys for a set of names, inserting the missing ones.
+
+        Runs on its own short transaction, so new names are visible to other
+        processes straight away, whatever happens to the caller's transaction.
+
+        Args:
+            names: Service names
+
+        Returns:
+            Dict of name -> id
+        """
+        names = set(names)
+        missing = names.difference(self._ids)
+        if missing:
+            with self._lock:
+                missing = missing.difference(self._ids)
+                if missing:
+                    self._insert(missing)
+        return {name: self._ids[name] for name in names}
+
+    def intern_for_flush(self, session: Session, names: Iterable[str]) -> None:
+        """
+        Intern names on a session's own transaction, ahead of its flush.
+
+        The ids are used by the flush running on this thread, and shared
+        once the session commits (dropped if it rolls back).
+
+        Args:
+            session: The session about to flush
+            names: Service names of the rows it will write
+        """
+        missing = set(names).difference(self._ids)
+        pending = session.info.setdefault(_SESSION_KEY, {})
+        missing.difference_update(pending)
+        if missing:
+            pending.update(_insert_names(session.connection(), missing))
+        self._flushing.ids = pending
+
+    def flush_finished(self) -> None:
+        """Forget this thread's in-flight names (end of flush, or rollback)."""
+        self._flushing.ids = None
+
+    def committed(self, session: Session) -> None:
+        """Share the names a session interned, now that they are committed."""
+        pending = session.info.pop(_SESSION_KEY, None)
+        if pending:
+            with self._lock:
+                self._remember((service_id, name) for name, service_id in pending.items())
+            metrics.inc("services_interned_total", len(pending))
+
+    def _insert(self, names) -> None:
+        # Caller holds self._lock
+        with get_engine().begin() as conn:
+            found = _insert_names(conn, names)
+        self._remember((service_id, name) for name, service_id in found.items())
+        metrics.inc("services_interned_total", len(names))
+
+    def _lookup(self, key: Tuple[str, object], condition) -> None:
+        """Load the row matching `condition`, unless `key` was missing a moment ago."""
+        expires_at = self._misses.get(key)
+        if expires_at is not None and expires_at > time.monotonic():
+            return
+        with get_engine().connect() as conn:
+            rows = conn.execute(select(Service.id, Service.name).where(condition)).all()
+        with self._lock:
+            if rows:
+                self._remember(rows)
+            else:
+                if len(self._misses) >= _MAX_MISSES:
+                    self._misses.clear()
+                self._misses[key] = time.monotonic() + _MISS_TTL
+
+    def _remember(self, rows) -> None:
+        # Caller holds self._lock
+        for service_id, name in rows:
+            self._ids[name] = service_id
+            self._names[service_id] = name
+            self._misses.pop(("name", name), None)
+            self._misses.pop(("id", service_id), None)
+
+
+def _insert_names(conn: Connection, names) -> Dict[str, int]:
+    """Insert names that aren't in `services` yet; return name -> id for all of them."""
+    rows = [{"name": name} for name in sorted(names)]
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        module = postgresql if dialect == "postgresql" else sqlite
+        conn.execute(module.insert(Service).on_conflict_do_nothing(index_elements=[Service.name]), rows)
+    else:
+        for row in rows:
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert(Service), row)
+            except IntegrityError:
+                pass  # interned concurrently by another process
+    found = conn.execute(select(Service.id, Service.name).where(Service.name.in_(names))).all()
+    return {name: service_id for service_id, name in found}
+
+
+@lru_cache()
+def get_service_dictionary() -> ServiceDictionary:
+    """Get the process-wide service dictionary."""
+    return ServiceDictionary()
+
+
+class ServiceName(TypeDecorator):
+    """
+    Service name in Python, `services.id` in the database.
+
+    Values written to the column are interned; values compared against it
+    (`Event.service == name`, `in_`) are only looked up, so filtering by a
+    name nobody has used matches no rows instead of creating it.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def __init__(self, create: bool = True):
+        super().__init__()
+        self.create = create
+
+    def coerce_compared_value(self, op, value):
+        return ServiceName(create=False)
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return get_service_dictionary().id_for(value, create=self.create)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return get_service_dictionary().name_for(value)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _flush_finished(session, flush_context):
+    get_service_dictionary().flush_finished()
+
+
+@event.listens_for(Session, "after_commit")
+def _share_interned_names(session):
+    get_service_dictionary().committed(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_interned_names(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _abandon_flush(session, previous_transaction):
+    # A failed flush never reaches after_flush_postexec; don't let its ids
+    # (rolled back with it) leak into this thread's next flush
+    get_service_dictionary().flush_finished()
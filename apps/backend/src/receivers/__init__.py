@@ -0,0 +1,4 @@
+# Network receivers that feed the batch ingestor (syslog; OTLP lives in api/routes/otlp.py)
+from .syslog import SyslogServers, parse_syslog, start_syslog_servers
+
+__all__ = ["SyslogServers", "parse_syslog", "start_syslog_servers"]
@@ -0,0 +1,239 @@
+"""
+Syslog receiver (UDP and TCP).
+
+Accepts RFC 5424 and RFC 3164 (BSD) messages and maps them onto events:
+
+- service: APP-NAME / TAG, falling back to HOSTNAME, then "syslog"
+- level: severity 0-3 -> ERROR, 4 -> WARN, 5-7 -> INFO
+- message: MSG
+- timestamp: the message timestamp (event time), when present
+
+TCP accepts both octet-counted and newline-delimited framing (RFC 6587).
+Each TCP connection waits on the batch ingestor's queue, so a sender that
+outpaces ingest is slowed down by TCP flow control; UDP datagrams that
+arrive while the queue is full are dropped and counted.
+
+Every API worker starts the listeners. Where the platform has
+SO_REUSEPORT (Linux, BSD, macOS) they all bind the same ports and the
+kernel spreads datagrams and connections across them; elsewhere the first
+worker to bind receives everything and the others skip the receiver.
+"""
+import asyncio
+import re
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from pydantic import ValidationError
+
+from ..core.metrics import metrics
+from ..schemas.event import EventCreate
+from ..services.batch_ingestor import BatchIngestor
+
+MAX_MESSAGE_BYTES = 64 * 1024
+REUSE_PORT = hasattr(socket, "SO_REUSEPORT")
+DEFAULT_SERVICE = "syslog"
+
+_RFC5424 = re.compile(
+    r"^<(?P<pri>\d{1,3})>1 (?P<ts>\S+) (?P<host>\S+) (?P<app>\S+) \S+ \S+ "
+    r"(?:-|(?:\[(?:[^\]\\]|\\.)*\])+)(?: (?P<msg>.*))?$",
+    re.DOTALL,
+)
+_RFC3164 = re.compile(
+    r"^<(?P<pri>\d{1,3})>(?P<ts>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) "
+    r"(?P<host>\S+) (?:(?P<tag>[^\s:\[]+)(?:\[\d+\])?: ?)?(?P<msg>.*)$",
+    re.DOTALL,
+)
+_PRI_ONLY = re.compile(r"^<(?P<pri>\d{1,3})>(?P<msg>.*)$", re.DOTALL)
+
+
+def severity_to_level(severity: int) -> str:
+    """Map a syslog severity (0-7) to an event level."""
+    if severity <= 3:
+        return "ERROR"
+    if severity == 4:
+        return "WARN"
+    return "INFO"
+
+
+def _parse_5424_time(value: str) -> Optional[datetime]:
+    if value == "-":
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _parse_3164_time(value: str, now: datetime) -> Optional[datetime]:
+    # BSD timestamps carry no year or zone; assume UTC and the closest year
+    try:
+        parsed = datetime.strptime(f"{now.year} {value}", "%Y %b %d %H:%M:%S")
+    except ValueError:
+        return None
+    if (parsed - now).days > 1:
+        parsed = parsed.replace(year=now.year - 1)
+    return parsed
+
+
+def parse_syslog(line: str, now: Optional[datetime] = None) -> Optional[EventCreate]:
+    """
+    Parse one syslog message.
+
+    Args:
+        line: The message, without framing
+        now: Reference time for year-less BSD timestamps (default: UTC now)
+
+    Returns:
+        EventCreate, or None if the line is not a syslog message
+    """
+    line = line.rstrip("\r\n\x00")
+    now = now or datetime.utcnow()
+
+    match = _RFC5424.match(line)
+    if match:
+        app, host = match.group("app"), match.group("host")
+        service = app if app != "-" else host if host != "-" else DEFAULT_SERVICE
+        timestamp = _parse_5424_time(match.group("ts"))
+        message = (match.group("msg") or "").lstrip("\ufeff")
+    else:
+        match = _RFC3164.match(line)
+        if match:
+            service = match.group("tag") or match.group("host")
+            timestamp = _parse_3164_time(match.group("ts"), now)
+            message = match.group("msg")
+        else:
+            match = _PRI_ONLY.match(line)
+            if not match:
+                return None
+            service, timestamp, message = DEFAULT_SERVICE, None, match.group("msg")
+
+    pri = int(match.group("pri"))
+    if pri > 191 or not message.strip():
+        return None
+    try:
+        return EventCreate(
+            service=service[:100],
+            level=severity_to_level(pri & 7),
+            message=message.strip(),
+            timestamp=timestamp,
+        )
+    except ValidationError:
+        return None
+
+
+def _decode(data: bytes) -> Optional[EventCreate]:
+    event = parse_syslog(data.decode("utf-8", "replace"))
+    if event is None:
+        metrics.inc("syslog_parse_errors_total")
+    else:
+        metrics.inc("syslog_messages_total")
+    return event
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, ingestor: BatchIngestor):
+        self.ingestor = ingestor
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        event = _decode(data)
+        if event is not None:
+            self.ingestor.offer(event)
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Read one octet-counted or newline-delimited frame (None at EOF)."""
+    first = await reader.read(1)
+    while first in (b"\n", b"\r"):
+        first = await reader.read(1)
+    if not first:
+        return None
+    if first.isdigit():
+        prefix = first + await reader.readuntil(b" ")
+        length = int(prefix[:-1])
+        if length > MAX_MESSAGE_BYTES:
+            raise ValueError(f"frame of {length} bytes exceeds {MAX_MESSAGE_BYTES}")
+        return await reader.readexactly(length)
+    try:
+        return first + await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return first + e.partial  # last line without a trailing newline
+
+
+async def _handle_tcp(ingestor: BatchIngestor, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    metrics.inc("syslog_tcp_connections_total")
+    try:
+        while True:
+            frame = await _read_frame(reader)
+            if frame is None:
+                break
+            event = _decode(frame)
+            if event is not None:
+                # Waits while the ingest queue is full: stop reading this connection
+                await ingestor.submit(event)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError) as e:
+        metrics.inc("syslog_tcp_errors_total")
+        print(f"⚠️  Closing syslog connection: {e}")
+    finally:
+        writer.close()
+
+
+@dataclass
+class SyslogServers:
+    """Running syslog listeners (ports are the bound ones, useful with port 0)."""
+    udp_transport: Optional[asyncio.DatagramTransport] = None
+    tcp_server: Optional[asyncio.AbstractServer] = None
+    udp_port: Optional[int] = None
+    tcp_port: Optional[int] = None
+
+    async def close(self) -> None:
+        if self.udp_transport is not None:
+            self.udp_transport.close()
+        if self.tcp_server is not None:
+            self.tcp_server.close()
+            await self.tcp_server.wait_closed()
+
+
+async def start_syslog_servers(
+    ingestor: BatchIngestor,
+    host: str,
+    udp_port: Optional[int] = None,
+    tcp_port: Optional[int] = None,
+) -> SyslogServers:
+    """
+    Start syslog listeners on the running event loop.
+
+    Args:
+        ingestor: Where parsed events go
+        host: Interface to bind
+        udp_port: UDP port (None = no UDP listener; 0 = any free port)
+        tcp_port: TCP port (None = no TCP listener; 0 = any free port)
+
+    Returns:
+        SyslogServers handle (call `close()` on shutdown)
+
+    Raises:
+        OSError: If a port is taken (without SO_REUSEPORT: by another worker)
+    """
+    loop = asyncio.get_running_loop()
+    servers = SyslogServers()
+    try:
+        if udp_port is not None:
+            servers.udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _UDPProtocol(ingestor), local_addr=(host, udp_port), reuse_port=REUSE_PORT
+            )
+            servers.udp_port = servers.udp_transport.get_extra_info("sockname")[1]
+        if tcp_port is not None:
+            servers.tcp_server = await asyncio.start_server(
+                lambda r, w: _handle_tcp(ingestor, r, w), host, tcp_port,
+                limit=MAX_MESSAGE_BYTES, reuse_port=REUSE_PORT
+            )
+            servers.tcp_port = servers.tcp_server.sockets[0].getsockname()[1]
+    except BaseException:
+        await servers.close()
+        raise
+    return servers
@@ -1,5 +1,13 @@
 # Pydantic schemas for request/response validation
-from .event import EventCreate, EventResponse
-from .incident import IncidentResponse, IncidentDetail
+from .analysis_job import AnalysisJobCreate, AnalysisJobResponse
+from .analytics import ArchivedIncident, ArchiveStatus, DailyEventCount, IncidentBreakdown, ServiceCount
+from .debug import ProfileInfo, SlowQuery, SlowRequest
+from .event import EventBatchResponse, EventCreate, EventRecord, EventResponse, trusted_event
+from .incident import IncidentResponse, IncidentDetail, IncidentSummary, IncidentTimeline, SimilarIncident
+from .limits import EventRollupResponse, ServiceLimitResponse, ServiceLimitUpdate
 
-__all__ = ["EventCreate", "EventResponse", "IncidentResponse", "IncidentDetail"]
+__all__ = ["EventCreate", "EventResponse", "EventBatchResponse", "EventRecord", "trusted_event", "IncidentResponse", "IncidentDetail", "IncidentSummary", "IncidentTimeline", "SimilarIncident",
+           "EventRollupResponse", "ServiceLimitResponse", "ServiceLimitUpdate",
+           "ArchivedIncident", "ArchiveStatus", "DailyEventCount", "IncidentBreakdown", "ServiceCount",
+           "ProfileInfo", "SlowQuery", "SlowRequest",
+           "AnalysisJobCreate", "AnalysisJobResponse"]
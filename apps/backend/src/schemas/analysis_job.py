@@ -0,0 +1,47 @@
+"""
+Pydantic schemas for bulk re-analysis jobs.
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+
+class AnalysisJobCreate(BaseModel):
+    """
+    Schema for starting a bulk re-analysis.
+    Used in POST /api/v1/analysis-jobs (all filters optional, combined with AND)
+    """
+    service: Optional[str] = None
+    status: Optional[Literal["open", "investigating", "resolved", "closed"]] = None
+    category: Optional[str] = None
+    severity: Optional[str] = None
+    created_since: Optional[datetime] = None
+    created_until: Optional[datetime] = None  # exclusive
+    analyzed_before: Optional[datetime] = None  # analyzed before this time, or never
+    force: bool = True  # False: skip incidents whose analysis is still current (see REANALYSIS_*)
+
+
+class AnalysisJobResponse(BaseModel):
+    """
+    Schema for a bulk re-analysis job and its progress.
+    Used in /api/v1/analysis-jobs
+    """
+    id: int
+    status: str  # queued, running, completed, cancelled, interrupted or failed
+    filters: Dict[str, Any] = {}
+    force: bool
+    total: int
+    processed: int
+    skipped: int
+    failed: int
+    progress: float  # 0-1
+    cursor: int  # Incidents up to this ID are done (resume point)
+    cancel_requested: bool
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,62 @@
+"""
+Pydantic schemas for historical analytics over the cold archive.
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class ArchivePartitionStatus(BaseModel):
+    """Files in one part of the archive ("events" or "incidents")."""
+    files: int
+    bytes: int
+    first_day: Optional[str] = None  # YYYY-MM-DD
+    last_day: Optional[str] = None
+
+
+class ArchiveStatus(BaseModel):
+    """
+    Schema for the archive overview.
+    Used in GET /api/v1/analytics
+    """
+    events: ArchivePartitionStatus
+    incidents: ArchivePartitionStatus
+
+
+class ServiceCount(BaseModel):
+    """Archived events for one service."""
+    service: str
+    count: int
+
+
+class DailyEventCount(BaseModel):
+    """Archived events for one day and level."""
+    day: str  # YYYY-MM-DD
+    level: str
+    count: int
+
+
+class IncidentBreakdown(BaseModel):
+    """Archived incidents for one category and severity (None = not analyzed)."""
+    category: Optional[str] = None
+    severity: Optional[str] = None
+    incidents: int
+    events: int
+
+
+class ArchivedIncident(BaseModel):
+    """
+    Schema for an incident read back from the archive.
+    Used in GET /api/v1/analytics/incidents/{id}
+    """
+    id: int
+    service: str
+    status: str
+    severity: Optional[str] = None
+    category: Optional[str] = None
+    summary: Optional[str] = None
+    event_count: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    last_seen_at: Optional[datetime] = None
+    events_by_level: Dict[str, int] = {}  # Archived events linked to the incident
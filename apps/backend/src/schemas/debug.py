@@ -0,0 +1,47 @@
+"""
+Pydantic schemas for the diagnostics endpoints (/debug).
+"""
+from pydantic import BaseModel
+from typing import Optional
+
+
+class SlowQuery(BaseModel):
+    """
+    A statement slower than SLOW_QUERY_MS.
+    Used in GET /debug/slow-queries
+    """
+    at: str  # ISO timestamp (UTC)
+    duration_ms: float
+    engine: str  # "primary" or "replica"
+    route: str  # e.g. "GET /api/v1/incidents", or "background"
+    statement: str
+    parameters: str  # names and types only, e.g. "500 x (service_id: int, message: str)"
+
+
+class SlowRequest(BaseModel):
+    """
+    A request slower than SLOW_REQUEST_MS.
+    Used in GET /debug/slow-requests
+    """
+    at: str
+    route: str
+    path: str
+    status: int
+    duration_ms: float
+    db_queries: int
+    db_ms: float
+    profile_id: Optional[str] = None
+
+
+class ProfileInfo(BaseModel):
+    """
+    A stored request profile (stacks at GET /debug/profiles/{id}).
+    Used in GET /debug/profiles
+    """
+    id: str
+    at: str
+    route: str
+    status: int
+    duration_ms: float
+    samples: int
+    interval_ms: float
@@ -3,7 +3,7 @@ Pydantic schemas for Incident API responses.
 """
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from .event import EventResponse
 
 
@@ -20,7 +20,8 @@ class IncidentResponse(BaseModel):
     status: str
     created_at: datetime
     updated_at: datetime
-    event_count: int = 0  # Will be computed
+    last_seen_at: Optional[datetime] = None
+    event_count: int = 0  # Maintained on the incident row (may lag by INCIDENT_TOUCH_INTERVAL)
     
     class Config:
         from_attributes = True
@@ -41,7 +42,48 @@ class IncidentDetail(BaseModel):
     status: str
     created_at: datetime
     updated_at: datetime
+    last_seen_at: Optional[datetime] = None
+    analyzed_at: Optional[datetime] = None
     events: List[EventResponse] = []
     
     class Config:
         from_attributes = True
+
+
+class IncidentSummary(BaseModel):
+    """
+    Schema for incident counts.
+    Used in GET /api/v1/incidents/summary
+    """
+    total: int
+    by_status: Dict[str, int] = {}
+    by_severity: Dict[str, int] = {}
+    by_service: Dict[str, int] = {}
+
+
+class SimilarIncident(BaseModel):
+    """
+    Schema for a similar past incident.
+    Used in GET /api/v1/incidents/{id}/similar
+    """
+    incident_id: int
+    score: float  # Cosine similarity of the hashed n-gram vectors (1.0 = same templates)
+    service: str
+    category: Optional[str] = None
+    severity: Optional[str] = None
+    summary: Optional[str] = None
+    recommended_actions: Optional[List[str]] = None
+    status: str
+    created_at: datetime
+
+
+class IncidentTimeline(BaseModel):
+    """
+    Schema for an incident's event-count histogram.
+    Used in GET /api/v1/incidents/{id}/timeline
+    """
+    incident_id: int
+    start: Optional[datetime] = None  # Start of the first bucket (None: no linked events)
+    bucket_seconds: int
+    counts: List[int] = []  # Events per bucket, by event time
+    total: int = 0
@@ -0,0 +1,47 @@
+"""
+Pydantic schemas for ingest limits and event rollups.
+"""
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class ServiceLimitUpdate(BaseModel):
+    """
+    Schema for setting a service's ingest limits.
+    
+    Example:
+        {"rate": 200, "burst": 400, "sample_target": 20}
+    """
+    rate: float = Field(0, ge=0, description="Sustained events/second (0 = unlimited)")
+    burst: int = Field(0, ge=0, description="Token bucket capacity (0 = one second of rate)")
+    sample_target: float = Field(
+        0, ge=0, description="Non-ERROR rows/second stored before sampling starts (0 = store all)"
+    )
+
+
+class ServiceLimitResponse(ServiceLimitUpdate):
+    """
+    Effective limits for a service, with its counts since process start.
+    """
+    service: str
+    overridden: bool = False  # False = using the configured defaults
+    received: int = 0  # Accepted events (stored + sampled out)
+    stored: int = 0
+    sampled: int = 0
+    dropped: int = 0  # Rejected by the rate limit
+
+
+class EventRollupResponse(BaseModel):
+    """
+    Schema for per-minute event counts.
+    Used in GET /api/v1/events/rollups
+    """
+    service: str
+    level: str
+    minute: datetime
+    received: int
+    stored: int
+    dropped: int
+    
+    class Config:
+        from_attributes = True
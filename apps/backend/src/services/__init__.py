@@ -1,5 +1,5 @@
 # Services for business logic
 from .incident_service import IncidentService
-from .ai_service import AIService
+from .ai_service import AIService, get_ai_service
 
-__all__ = ["IncidentService", "AIService"]
\ No newline at end of file
+__all__ = ["IncidentService", "AIService", "get_ai_service"]
\ No newline at end of file
@@ -2,14 +2,29 @@
 AI service for incident analysis using OpenAI.
 Classifies incidents, assigns severity, and recommends actions.
 """
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+from functools import lru_cache
 import json
-from openai import OpenAI
+import threading
+import time
 from ..core.config import get_settings
+from ..core.metrics import metrics
 from ..models.incident import Incident
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .similarity import reusable_analysis
 
 settings = get_settings()
 
+# Process-wide cap on outstanding LLM requests; extra callers wait for a slot
+llm_slots = threading.BoundedSemaphore(settings.llm_max_concurrent)
+
+# Process-wide breaker: while the LLM API is failing, analyze locally right away
+llm_breaker = CircuitBreaker(
+    "llm",
+    failure_threshold=settings.llm_breaker_failure_threshold,
+    reset_timeout=settings.llm_breaker_reset_timeout,
+)
+
 
 class AIService:
     """
@@ -17,11 +32,34 @@ class AIService:
     Uses OpenAI API to classify and analyze incidents.
     """
     
-    def __init__(self):
-        """Initialize OpenAI client."""
+    def __init__(
+        self,
+        breaker: Optional[CircuitBreaker] = None,
+        reuse: Optional[Callable[[Incident], Optional[Dict]]] = None
+    ):
+        """
+        Initialize OpenAI client.
+        
+        Args:
+            breaker: Circuit breaker for LLM calls (default: shared `llm_breaker`)
+            reuse: Lookup of a reusable past analysis for an incident
+                (default: nearest analyzed neighbour, see services/similarity.py)
+        """
+        self.breaker = breaker or llm_breaker
+        self.reuse = reuse or reusable_analysis
+        
         # Check if we have a real API key
         if settings.openai_api_key.startswith("sk-") and len(settings.openai_api_key) > 20:
-            self.client = OpenAI(api_key=settings.openai_api_key)
+            # Imported here so mock mode never pays for loading the OpenAI SDK
+            from openai import OpenAI
+            
+            # Bounded timeout and no SDK retries: the breaker decides when to give up
+            self.client = OpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url or None,
+                timeout=settings.openai_timeout,
+                max_retries=0
+            )
             self.use_mock = False
         else:
             print("⚠️  Using mock AI service (no valid OpenAI API key)")
@@ -41,8 +79,24 @@ class AIService:
             - severity: Priority level (P1, P2, P3)
             - summary: Human-readable summary
             - recommended_actions: List of suggested actions
+            - reused_from, similarity: Only when a near-identical past
+              incident's analysis was reused instead of calling the LLM
         """
+        reused = self._reused_analysis(incident)
+        if reused is not None:
+            return reused
+        
         if self.use_mock:
+            if settings.llm_stub_latency > 0:
+                # Stand-in for the API round trip, so throughput can be measured without a key
+                with llm_slots:
+                    metrics.inc("llm_requests_total")
+                    time.sleep(settings.llm_stub_latency)
+            return self._mock_analysis(incident)
+        
+        # Circuit open: the API is known to be failing, don't wait on it
+        if self.breaker.state == CircuitBreaker.OPEN:
+            metrics.inc("llm_fallback_total")
             return self._mock_analysis(incident)
         
         # Prepare context from events
@@ -52,33 +106,73 @@ class AIService:
         prompt = self._create_analysis_prompt(incident, events_context)
         
         try:
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert DevOps engineer analyzing system incidents. "
-                                   "Provide concise, actionable insights in JSON format."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
+            # Call OpenAI API (bounded by the global LLM slot semaphore).
+            # Permission is asked right before the call, so every granted
+            # call (e.g. the half-open probe) reports its outcome below.
+            with llm_slots:
+                if not self.breaker.allow():
+                    raise CircuitOpenError(f"Circuit '{self.breaker.name}' is open")
+                response = self._complete(prompt)
             
             # Parse response
             result = json.loads(response.choices[0].message.content)
+            self.breaker.record_success()
             return result
-            
+        
+        except CircuitOpenError:
+            metrics.inc("llm_fallback_total")
+            return self._mock_analysis(incident)
         except Exception as e:
+            self.breaker.record_failure()
+            metrics.inc("llm_fallback_total")
             print(f"⚠️  OpenAI API error: {e}")
             print("Falling back to mock analysis")
             return self._mock_analysis(incident)
     
+    def _reused_analysis(self, incident: Incident) -> Optional[Dict[str, any]]:
+        """
+        Look up a reusable analysis; lookup failures just mean a normal analysis.
+        
+        Args:
+            incident: The incident (with events loaded)
+            
+        Returns:
+            The neighbour's analysis, or None
+        """
+        try:
+            return self.reuse(incident)
+        except Exception as e:
+            print(f"⚠️  Similar-incident lookup failed for incident #{incident.id}: {e}")
+            return None
+    
+    def _complete(self, prompt: str):
+        """
+        Send the analysis prompt to the chat completions API.
+        
+        Args:
+            prompt: The analysis prompt
+            
+        Returns:
+            Raw chat completion response
+        """
+        metrics.inc("llm_requests_total")
+        return self.client.chat.completions.create(
+            model="gpt-4",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert DevOps engineer analyzing system incidents. "
+                               "Provide concise, actionable insights in JSON format."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+    
     def _prepare_events_context(self, incident: Incident) -> str:
         """
         Prepare event messages for AI analysis.
@@ -212,4 +306,14 @@ Provide actionable, specific recommendations based on the error patterns.
             "severity": severity,
             "summary": summary,
             "recommended_actions": actions
-        }
\ No newline at end of file
+        }
+
+
+@lru_cache()
+def get_ai_service() -> AIService:
+    """
+    Get the shared AIService instance.
+    The OpenAI client keeps its own HTTP connection pool, so it is created
+    once per process instead of per request.
+    """
+    return AIService()
@@ -0,0 +1,210 @@
+"""
+Coordination of AI analysis runs.
+Coalesces concurrent requests for the same incident into one LLM call and
+bounds how many analyses can be outstanding at once.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import selectinload
+
+from ..core.config import get_settings
+from ..core.database import create_session
+from ..core.metrics import metrics
+from ..models.incident import Incident
+from .ai_service import get_ai_service
+from .incident_service import AnalysisSnapshot, IncidentService
+from .similarity import embed_events
+
+settings = get_settings()
+
+# How many finished analyses to remember for the status endpoint
+_MAX_TRACKED_STATES = 1000
+
+
+class IncidentNotFound(LookupError):
+    """Raised when an analysis is requested for a missing incident."""
+
+
+class AnalysisQueueFull(RuntimeError):
+    """Raised when LLM_MAX_CONCURRENT + LLM_MAX_QUEUE analyses are already outstanding."""
+
+
+class AnalysisCoordinator:
+    """
+    Single-flight analysis runner.
+
+    - One in-flight analysis per incident ID; concurrent callers (double
+      clicks, several dashboards, auto-analysis racing a manual one) share
+      the same Future.
+    - Analyses run on a dedicated pool sized LLM_MAX_CONCURRENT +
+      LLM_MAX_QUEUE; the LLM call itself is further limited by the global
+      `llm_slots` semaphore in ai_service. At most that many analyses are
+      outstanding: past it, new ones are refused (`AnalysisQueueFull`)
+      rather than piling up in the pool's queue.
+    - Each run loads the incident in a short-lived session, releases it for
+      the LLM call, then writes the result in a second short session, so no
+      DB connection is held while waiting on the model.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.capacity = max_concurrent + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.capacity, thread_name_prefix="analysis")
+        self._lock = threading.Lock()
+        self._inflight: Dict[int, Future] = {}
+        self._states: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        metrics.register_collector("analysis", lambda: {"analysis_inflight": len(self._inflight)})
+
+    def is_saturated(self) -> bool:
+        """True when new analyses would have to queue for an LLM slot."""
+        with self._lock:
+            return len(self._inflight) >= self.max_concurrent
+
+    def in_flight(self, incident_id: int) -> bool:
+        """True if an analysis for this incident is queued or running."""
+        with self._lock:
+            return incident_id in self._inflight
+
+    def submit(self, incident_id: int) -> Future:
+        """
+        Start an analysis, or join the one already in flight.
+
+        Args:
+            incident_id: The incident to analyze
+
+        Returns:
+            Future resolving to the analysis response dict
+
+        Raises:
+            AnalysisQueueFull: If no analysis for the incident is in flight
+                and the queue is full
+        """
+        with self._lock:
+            future = self._inflight.get(incident_id)
+            if future is not None:
+                metrics.inc("analysis_coalesced_total")
+                return future
+            if len(self._inflight) >= self.capacity:
+                metrics.inc("analysis_rejected_total")
+                raise AnalysisQueueFull(f"{len(self._inflight)} analyses already outstanding")
+            future = self._executor.submit(self._run, incident_id)
+            self._inflight[incident_id] = future
+            self._set_state(incident_id, {"state": "queued"})
+        future.add_done_callback(lambda done: self._finish(incident_id, done))
+        return future
+
+    def cached_result(self, incident_id: int) -> Optional[Dict[str, Any]]:
+        """
+        The stored analysis, if the incident hasn't materially changed since.
+        
+        Args:
+            incident_id: The incident
+            
+        Returns:
+            Analysis response dict (with `cached: true`), or None if the
+            incident needs a (re-)analysis
+            
+        Raises:
+            IncidentNotFound: If the incident doesn't exist
+        """
+        with create_session() as db:
+            incident = db.get(Incident, incident_id)
+            if incident is None:
+                raise IncidentNotFound(incident_id)
+            if IncidentService(db).reanalysis_reason(incident) is not None:
+                return None
+            metrics.inc("analysis_cache_hits_total")
+            return _response(incident, cached=True)
+    
+    def get_state(self, incident_id: int) -> Optional[Dict[str, Any]]:
+        """Latest known analysis state for an incident (None if never run here)."""
+        with self._lock:
+            state = self._states.get(incident_id)
+            return dict(state) if state else None
+
+    def shutdown(self) -> None:
+        """Stop accepting work; queued analyses are abandoned."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, incident_id: int) -> Dict[str, Any]:
+        with self._lock:
+            self._set_state(incident_id, {"state": "running"})
+
+        # Load the incident and its events, then release the session
+        with create_session() as db:
+            incident = (
+                db.query(Incident)
+                .options(selectinload(Incident.events))
+                .filter(Incident.id == incident_id)
+                .first()
+            )
+        if incident is None:
+            raise IncidentNotFound(incident_id)
+
+        # Events linked while the LLM call runs count as new next time
+        snapshot = AnalysisSnapshot(
+            len(incident.events),
+            {event.fingerprint for event in incident.events if event.fingerprint},
+            embed_events(incident.service, incident.events),
+        )
+        analysis = get_ai_service().analyze_incident(incident)
+
+        with create_session() as db:
+            incident = db.get(Incident, incident_id)
+            if incident is None:
+                raise IncidentNotFound(incident_id)
+            IncidentService(db).apply_analysis(incident, analysis, snapshot)
+
+            print(f"✅ AI Analysis complete for incident #{incident.id}")
+            print(f"   Category: {incident.category}, Severity: {incident.severity}")
+
+            return _response(incident, cached=False)
+
+    def _finish(self, incident_id: int, future: Future) -> None:
+        if future.cancelled():
+            state = {"state": "cancelled"}
+        elif future.exception() is not None:
+            state = {"state": "failed", "error": str(future.exception())}
+        else:
+            state = {"state": "completed", "result": future.result()}
+        with self._lock:
+            if self._inflight.get(incident_id) is future:
+                del self._inflight[incident_id]
+            self._set_state(incident_id, state)
+
+    def _set_state(self, incident_id: int, state: Dict[str, Any]) -> None:
+        # Caller holds self._lock
+        self._states[incident_id] = state
+        self._states.move_to_end(incident_id)
+        while len(self._states) > _MAX_TRACKED_STATES:
+            self._states.popitem(last=False)
+
+
+def _response(incident: Incident, cached: bool) -> Dict[str, Any]:
+    """Shape an analyzed incident as the /analyze response."""
+    return {
+        "incident_id": incident.id,
+        "category": incident.category,
+        "severity": incident.severity,
+        "summary": incident.summary,
+        "recommended_actions": incident.recommended_actions,
+        "analysis_completed": True,
+        "cached": cached,
+    }
+
+
+@lru_cache()
+def get_analysis_coordinator() -> AnalysisCoordinator:
+    """Get the process-wide analysis coordinator."""
+    return AnalysisCoordinator(settings.llm_max_concurrent, settings.llm_max_queue)
+
+
+def stop_analysis_coordinator() -> None:
+    """Shut down the coordinator's pool if it was started."""
+    if get_analysis_coordinator.cache_info().currsize:
+        get_analysis_coordinator().shutdown()
+    get_analysis_coordinator.cache_clear()
@@ -0,0 +1,416 @@
+"""
+Bulk re-analysis jobs.
+
+After a prompt or category change the backlog of incidents needs fresh
+analyses. A job selects incidents by filter and works through them in ID
+order:
+
+- incidents and their events are loaded ANALYSIS_JOB_BATCH_SIZE at a time
+  (one query for the incidents, one for their events) in a short session
+  that is closed before any LLM call
+- analyses run on a pool of ANALYSIS_JOB_CONCURRENCY threads, and the next
+  batch is loaded before the pool runs dry; every LLM call still takes one
+  of the process-wide LLM_MAX_CONCURRENT slots, so a job shares the API
+  with /analyze instead of crowding it out
+- results are written a batch at a time, together with the job's progress
+  and cursor, in one transaction
+
+The cursor only moves past incidents whose results are committed, so a
+cancelled, failed or interrupted job resumes where it stopped (re-analyzing
+at most the few incidents that finished out of order after the cursor).
+
+Similar-incident reuse is off for jobs: the neighbours' analyses predate
+the change the job is there to apply.
+"""
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from ..core.config import get_settings
+from ..core.database import create_session
+from ..core.metrics import metrics
+from ..models.analysis_job import AnalysisJob
+from ..models.incident import Incident, IncidentStatus
+from .ai_service import AIService
+from .incident_service import AnalysisSnapshot, IncidentService
+from .similarity import embed_events
+
+settings = get_settings()
+
+RESUMABLE = ("cancelled", "interrupted", "failed")
+ACTIVE = ("queued", "running")
+
+# A queued/running job whose row hasn't been updated for this long belongs
+# to a process that died, and may be resumed elsewhere
+_STALE_AFTER = timedelta(minutes=5)
+
+
+class JobNotFound(LookupError):
+    """Raised for a job ID that doesn't exist."""
+
+
+class JobStateError(ValueError):
+    """Raised when a job can't be cancelled or resumed in its current state."""
+
+
+def _no_reuse(incident: Incident) -> None:
+    return None
+
+
+def incident_filter(filters: Dict[str, Any]) -> List:
+    """
+    WHERE conditions for a job's incident filter.
+
+    Args:
+        filters: service, status, category, severity, created_since,
+            created_until, analyzed_before (times as ISO strings)
+    """
+    conditions = []
+    if filters.get("service"):
+        conditions.append(Incident.service == filters["service"])
+    if filters.get("status"):
+        conditions.append(Incident.status == IncidentStatus(filters["status"]))
+    if filters.get("category"):
+        conditions.append(Incident.category == filters["category"])
+    if filters.get("severity"):
+        conditions.append(Incident.severity == filters["severity"])
+    if filters.get("created_since"):
+        conditions.append(Incident.created_at >= datetime.fromisoformat(filters["created_since"]))
+    if filters.get("created_until"):
+        conditions.append(Incident.created_at < datetime.fromisoformat(filters["created_until"]))
+    if filters.get("analyzed_before"):
+        cutoff = datetime.fromisoformat(filters["analyzed_before"])
+        conditions.append(or_(Incident.analyzed_at.is_(None), Incident.analyzed_at < cutoff))
+    return conditions
+
+
+class AnalysisJobRunner:
+    """
+    Creates, runs, cancels and resumes bulk re-analysis jobs.
+
+    Args:
+        ai: Analyzer (default: an AIService without similar-incident reuse)
+        concurrency: Parallel analyses per job (default: ANALYSIS_JOB_CONCURRENCY)
+        batch_size: Incidents per load / results per write (default: ANALYSIS_JOB_BATCH_SIZE)
+    """
+
+    def __init__(self, ai=None, concurrency: Optional[int] = None, batch_size: Optional[int] = None):
+        self._ai = ai
+        self.concurrency = max(concurrency or settings.analysis_job_concurrency, 1)
+        self.batch_size = max(batch_size or settings.analysis_job_batch_size, 1)
+        self._lock = threading.Lock()
+        self._threads: Dict[int, threading.Thread] = {}
+        self._cancels: Dict[int, threading.Event] = {}
+        self._stopping = threading.Event()
+        metrics.register_collector("analysis_jobs", lambda: {"analysis_jobs_running": len(self._cancels)})
+
+    @property
+    def ai(self):
+        if self._ai is None:
+            self._ai = AIService(reuse=_no_reuse)
+        return self._ai
+
+    def create(self, db: Session, filters: Dict[str, Any], force: bool = True) -> AnalysisJob:
+        """
+        Record a new job (not started).
+
+        Args:
+            db: Database session
+            filters: Incident filter (see `incident_filter`); None values are dropped
+            force: Re-analyze incidents whose stored analysis is still current
+
+        Returns:
+            The queued job, with `total` counted
+        """
+        filters = {key: value for key, value in filters.items() if value is not None}
+        total = db.scalar(select(func.count(Incident.id)).where(*incident_filter(filters)))
+        job = AnalysisJob(
+            status="queued", filters=filters, force=force, total=total or 0,
+            processed=0, skipped=0, failed=0, cursor=0, cancel_requested=False,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def start(self, job_id: int) -> None:
+        """Run a job on a background thread (no-op if it already runs here)."""
+        with self._lock:
+            if job_id in self._threads:
+                return
+            thread = threading.Thread(
+                target=self._run_in_background, args=(job_id,), name=f"analysis-job-{job_id}", daemon=True
+            )
+            self._threads[job_id] = thread
+        thread.start()
+
+    def running(self, job_id: int) -> bool:
+        """True if the job runs in this process."""
+        with self._lock:
+            return job_id in self._cancels or job_id in self._threads
+
+    def cancel(self, db: Session, job_id: int) -> AnalysisJob:
+        """
+        Stop a job after its in-flight analyses; their results are kept.
+
+        Raises:
+            JobNotFound: If the job doesn't exist
+            JobStateError: If the job already completed
+        """
+        job = db.get(AnalysisJob, job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        if job.status == "completed":
+            raise JobStateError(f"Job {job_id} already completed")
+        if job.status in RESUMABLE:
+            return job
+        if job.status == "queued" and not self.running(job_id):
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow()
+        else:
+            # Whichever process runs it sees the flag at its next write
+            job.cancel_requested = True
+            with self._lock:
+                local = self._cancels.get(job_id)
+            if local is not None:
+                local.set()
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def resume(self, db: Session, job_id: int) -> AnalysisJob:
+        """
+        Continue a cancelled, interrupted or failed job from its cursor (also
+        a queued/running one whose process stopped updating it).
+
+        Raises:
+            JobNotFound: If the job doesn't exist
+            JobStateError: If the job completed or is still running
+        """
+        if self.running(job_id):
+            raise JobStateError(f"Job {job_id} is running")
+        stale = datetime.utcnow() - _STALE_AFTER
+        claimed = db.execute(
+            update(AnalysisJob)
+            .where(
+                AnalysisJob.id == job_id,
+                or_(
+                    AnalysisJob.status.in_(RESUMABLE),
+                    AnalysisJob.status.in_(ACTIVE) & (AnalysisJob.updated_at < stale),
+                ),
+            )
+            .values(status="queued", cancel_requested=False, error=None, finished_at=None,
+                    updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        job = db.get(AnalysisJob, job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        if not claimed:
+            raise JobStateError(f"Job {job_id} is {job.status}")
+        db.refresh(job)
+        self.start(job_id)
+        return job
+
+    def run(self, job_id: int) -> str:
+        """
+        Run a job to the end in the calling thread.
+
+        Returns:
+            Final status: completed, cancelled, interrupted or failed
+        """
+        with self._lock:
+            cancel = self._cancels.setdefault(job_id, threading.Event())
+        try:
+            with create_session() as db:
+                job = db.get(AnalysisJob, job_id)
+                if job is None:
+                    raise JobNotFound(job_id)
+                job.status = "running"
+                job.started_at = job.started_at or datetime.utcnow()
+                filters, force, cursor = dict(job.filters or {}), job.force, job.cursor
+                db.commit()
+            print(f"🔁 Analysis job #{job_id} running (from incident #{cursor + 1})")
+
+            try:
+                status = self._work(job_id, filters, force, cursor, cancel)
+                error = None
+            except Exception as e:
+                status, error = "failed", str(e)
+                print(f"⚠️  Analysis job #{job_id} failed: {e}")
+            self._finish(job_id, status, error)
+            return status
+        finally:
+            with self._lock:
+                self._cancels.pop(job_id, None)
+
+    def shutdown(self) -> None:
+        """Interrupt running jobs (resumable later) and wait for their in-flight analyses."""
+        self._stopping.set()
+        with self._lock:
+            threads = list(self._threads.values())
+        for thread in threads:
+            thread.join()
+
+    def _run_in_background(self, job_id: int) -> None:
+        try:
+            self.run(job_id)
+        except Exception as e:
+            print(f"⚠️  Analysis job #{job_id} could not run: {e}")
+        finally:
+            with self._lock:
+                self._threads.pop(job_id, None)
+
+    def _work(self, job_id: int, filters: Dict, force: bool, cursor: int, cancel: threading.Event) -> str:
+        order: Deque[int] = deque()  # dispatched incident IDs, ascending; the cursor trails them
+        results: Dict[int, Any] = {}  # finished, not yet written
+        written: Set[int] = set()  # written, but still after the cursor
+        inflight: Dict[Future, int] = {}
+        loaded_up_to, exhausted, stopping = cursor, False, None
+
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"analysis-job-{job_id}")
+        try:
+            while True:
+                # Load the next batch before the pool runs out of work
+                if stopping is None and not exhausted and len(inflight) <= self.concurrency:
+                    batch = self._load(filters, loaded_up_to, force)
+                    exhausted = len(batch) < self.batch_size
+                    for incident, due in batch:
+                        loaded_up_to = incident.id
+                        order.append(incident.id)
+                        if due:
+                            inflight[pool.submit(self._analyze, incident)] = incident.id
+                        else:
+                            results[incident.id] = None
+
+                if inflight:
+                    finished, _ = wait(list(inflight), timeout=1.0, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        incident_id = inflight.pop(future)
+                        if not future.cancelled():
+                            error = future.exception()
+                            results[incident_id] = error if error is not None else future.result()
+
+                if stopping is None:
+                    if self._stopping.is_set():
+                        stopping = "interrupted"
+                    elif cancel.is_set():
+                        stopping = "cancelled"
+                    if stopping is not None:
+                        # Drop what hasn't started; the cursor stays before it
+                        for future in list(inflight):
+                            if future.cancel():
+                                inflight.pop(future)
+
+                done = not inflight and (stopping is not None or exhausted)
+                if results and (len(results) >= self.batch_size or done):
+                    if self._write(job_id, order, results, written):
+                        cancel.set()  # requested through another process (or the API)
+                if done:
+                    return stopping or "completed"
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _load(self, filters: Dict, after_id: int, force: bool) -> List:
+        """
+        Next batch of matching incidents after an ID, with their events.
+
+        Returns:
+            [(incident, due)]: `due` is False for incidents to skip (stored
+            analysis still current and the job isn't forced)
+        """
+        with create_session() as db:
+            incidents = db.scalars(
+                select(Incident)
+                .options(selectinload(Incident.events))
+                .where(Incident.id > after_id, *incident_filter(filters))
+                .order_by(Incident.id)
+                .limit(self.batch_size)
+            ).all()
+            if force:
+                return [(incident, True) for incident in incidents]
+            service = IncidentService(db)
+            return [
+                (incident, service.reanalysis_reason(incident, AnalysisSnapshot(
+                    len(incident.events),
+                    {event.fingerprint for event in incident.events if event.fingerprint},
+                )) is not None)
+                for incident in incidents
+            ]
+
+    def _analyze(self, incident: Incident):
+        # Same snapshot as the coordinator: events linked meanwhile count as new next time
+        snapshot = AnalysisSnapshot(
+            len(incident.events),
+            {event.fingerprint for event in incident.events if event.fingerprint},
+            embed_events(incident.service, incident.events),
+        )
+        return self.ai.analyze_incident(incident), snapshot
+
+    def _write(self, job_id: int, order: Deque[int], results: Dict[int, Any], written: Set[int]) -> bool:
+        """
+        Store finished analyses and the job's progress in one transaction.
+
+        Returns:
+            True if the job has been asked to cancel
+        """
+        with create_session() as db:
+            job = db.get(AnalysisJob, job_id)
+            analyzed = [incident_id for incident_id, result in results.items() if isinstance(result, tuple)]
+            incidents = {
+                incident.id: incident
+                for incident in db.scalars(select(Incident).where(Incident.id.in_(analyzed)))
+            } if analyzed else {}
+
+            stored = []
+            for incident_id, result in results.items():
+                if isinstance(result, BaseException):
+                    job.failed += 1
+                    print(f"⚠️  Analysis job #{job_id}: incident #{incident_id} failed: {result}")
+                elif result is None or incident_id not in incidents:
+                    job.skipped += 1
+                else:
+                    stored.append((incidents[incident_id], *result))
+                    job.processed += 1
+
+            written.update(results)
+            results.clear()
+            while order and order[0] in written:
+                job.cursor = order.popleft()
+                written.discard(job.cursor)
+            job.updated_at = datetime.utcnow()
+
+            IncidentService(db).apply_analyses(stored)
+            metrics.inc("analysis_job_incidents_total", len(stored))
+            return job.cancel_requested
+
+    def _finish(self, job_id: int, status: str, error: Optional[str]) -> None:
+        with create_session() as db:
+            job = db.get(AnalysisJob, job_id)
+            job.status = status
+            job.error = error
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            print(f"✅ Analysis job #{job_id} {status}: {job.processed} analyzed, "
+                  f"{job.skipped} skipped, {job.failed} failed of {job.total}")
+        metrics.inc(f"analysis_jobs_{status}_total")
+
+
+@lru_cache()
+def get_analysis_job_runner() -> AnalysisJobRunner:
+    """Get the process-wide bulk analysis runner."""
+    return AnalysisJobRunner()
+
+
+def stop_analysis_jobs() -> None:
+    """Interrupt jobs running in this process (they can be resumed later)."""
+    if get_analysis_job_runner.cache_info().currsize:
+        get_analysis_job_runner().shutdown()
+    get_analysis_job_runner.cache_clear()
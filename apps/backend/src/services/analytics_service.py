@@ -0,0 +1,270 @@
+"""
+Historical analytics over the cold archive (services/archive_service.py).
+
+Queries scan the Parquet files in process with pyarrow datasets: only the
+columns a query needs are read, day/service filters prune whole partition
+directories, and time filters are pushed down to Parquet row-group
+statistics. Nothing here touches the database, so long-range questions
+don't compete with ingest; recent data (not archived yet) is only in the
+database.
+"""
+import functools
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from ..core.config import get_settings
+from .archive_service import archive_available, archive_generation, partitioning
+
+try:
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:  # pragma: no cover - optional dependency
+    pc = ds = None
+
+settings = get_settings()
+
+# Listing thousands of partition files takes a noticeable part of a query,
+# so discovered datasets are reused for a while (files archived by another
+# process show up after at most this many seconds). Files another process
+# compacted away are noticed when a scan can't open them; see
+# _rediscover_on_missing_files.
+_DATASET_TTL = 60.0
+_datasets: Dict[str, tuple] = {}
+_datasets_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
+def _rediscover_on_missing_files(query: Callable[..., T]) -> Callable[..., T]:
+    """
+    Retry a query once on freshly listed datasets if a cached dataset
+    names a file that is gone (compacted by an archiver in another worker
+    or on another host, which this process's archive generation doesn't see).
+    """
+
+    @functools.wraps(query)
+    def wrapper(self: "AnalyticsService", *args, **kwargs) -> T:
+        try:
+            return query(self, *args, **kwargs)
+        except FileNotFoundError:
+            self._forget_datasets()
+            return query(self, *args, **kwargs)
+
+    return wrapper
+
+
+class AnalyticsService:
+    """
+    Read-only queries over the archive.
+
+    Args:
+        root: Archive directory (default: ARCHIVE_DIR)
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        if not archive_available():
+            raise RuntimeError("Analytics needs pyarrow (pip install pyarrow)")
+        self.root = root or settings.archive_dir
+
+    @_rediscover_on_missing_files
+    def status(self) -> Dict:
+        """
+        What the archive holds.
+
+        Returns:
+            Per kind ("events", "incidents"): files, bytes and the first/last day
+        """
+        result = {}
+        for kind in ("events", "incidents"):
+            dataset = self._dataset(kind)
+            files = dataset.files if dataset is not None else []
+            days = sorted({_partition_value(path, "day") for path in files})
+            result[kind] = {
+                "files": len(files),
+                "bytes": sum(os.path.getsize(path) for path in files),
+                "first_day": days[0] if days else None,
+                "last_day": days[-1] if days else None,
+            }
+        return result
+
+    @_rediscover_on_missing_files
+    def top_services(
+        self,
+        level: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        contains: Optional[str] = None,
+        limit: int = 10,
+    ) -> List[Dict]:
+        """
+        Services with the most archived events, e.g. "most database errors
+        last quarter".
+
+        Args:
+            level: Only this level (e.g. "ERROR")
+            since, until: Event time range (naive UTC; until is exclusive)
+            contains: Only messages containing this text (case-insensitive)
+            limit: Maximum number of services
+
+        Returns:
+            [{"service", "count"}], most events first
+        """
+        dataset = self._dataset("events")
+        if dataset is None:
+            return []
+        condition = _time_filter("timestamp", since, until)
+        if level:
+            condition = _and(condition, ds.field("level") == level)
+        if contains:
+            condition = _and(condition, pc.match_substring(ds.field("message"), contains, ignore_case=True))
+        table = dataset.to_table(columns=["service"], filter=condition)
+        counts = table.group_by("service").aggregate([("service", "count")])
+        counts = counts.sort_by([("service_count", "descending"), ("service", "ascending")]).slice(0, limit)
+        return [{"service": row["service"], "count": row["service_count"]} for row in counts.to_pylist()]
+
+    @_rediscover_on_missing_files
+    def daily_event_counts(
+        self,
+        service: Optional[str] = None,
+        level: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """
+        Archived events per day and level.
+
+        Returns:
+            [{"day", "level", "count"}], oldest day first
+        """
+        dataset = self._dataset("events")
+        if dataset is None:
+            return []
+        condition = _time_filter("timestamp", since, until)
+        if service:
+            condition = _and(condition, ds.field("service") == service)
+        if level:
+            condition = _and(condition, ds.field("level") == level)
+        table = dataset.to_table(columns=["day", "level"], filter=condition)
+        counts = table.group_by(["day", "level"]).aggregate([("level", "count")])
+        counts = counts.sort_by([("day", "ascending"), ("level", "ascending")])
+        return [
+            {"day": row["day"], "level": row["level"], "count": row["level_count"]}
+            for row in counts.to_pylist()
+        ]
+
+    @_rediscover_on_missing_files
+    def incident_breakdown(
+        self,
+        service: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """
+        Archived incidents per category and severity.
+
+        Returns:
+            [{"category", "severity", "incidents", "events"}], most incidents first
+        """
+        dataset = self._dataset("incidents")
+        if dataset is None:
+            return []
+        condition = _time_filter("created_at", since, until)
+        if service:
+            condition = _and(condition, ds.field("service") == service)
+        table = dataset.to_table(columns=["category", "severity", "event_count"], filter=condition)
+        counts = table.group_by(["category", "severity"]).aggregate(
+            [("event_count", "count"), ("event_count", "sum")]
+        )
+        counts = counts.sort_by([("event_count_count", "descending")])
+        return [
+            {
+                "category": row["category"],
+                "severity": row["severity"],
+                "incidents": row["event_count_count"],
+                "events": row["event_count_sum"] or 0,
+            }
+            for row in counts.to_pylist()
+        ]
+
+    @_rediscover_on_missing_files
+    def archived_incident(self, incident_id: int) -> Optional[Dict]:
+        """
+        An archived incident with its archived event counts per level.
+
+        Returns:
+            The incident record plus `events_by_level`, or None if it isn't archived
+        """
+        incidents = self._dataset("incidents")
+        if incidents is None:
+            return None
+        rows = incidents.to_table(filter=ds.field("id") == incident_id).to_pylist()
+        if not rows:
+            return None
+        incident = rows[-1]  # latest copy if it was archived more than once
+        incident.pop("day", None)
+
+        events = self._dataset("events")
+        by_level = {}
+        if events is not None:
+            condition = (ds.field("service") == incident["service"]) & (ds.field("incident_id") == incident_id)
+            table = events.to_table(columns=["level"], filter=condition)
+            for row in table.group_by("level").aggregate([("level", "count")]).to_pylist():
+                by_level[row["level"]] = row["level_count"]
+        incident["events_by_level"] = by_level
+        return incident
+
+    def _dataset(self, kind: str):
+        path = os.path.join(self.root, kind)
+        now = time.monotonic()
+        with _datasets_lock:
+            cached = _datasets.get(path)
+        if cached is not None and cached[1] == archive_generation() and now - cached[2] < _DATASET_TTL:
+            return cached[0]
+        if not os.path.isdir(path):
+            return None
+        dataset = ds.dataset(path, format="parquet", partitioning=partitioning())
+        with _datasets_lock:
+            _datasets[path] = (dataset, archive_generation(), now)
+        return dataset
+
+    def _forget_datasets(self) -> None:
+        with _datasets_lock:
+            for kind in ("events", "incidents"):
+                _datasets.pop(os.path.join(self.root, kind), None)
+
+
+def _partition_value(path: str, key: str) -> str:
+    for part in path.split(os.sep):
+        if part.startswith(f"{key}="):
+            return part[len(key) + 1:]
+    return ""
+
+
+def _and(left, right):
+    return right if left is None else left & right
+
+
+def _midnight(value: datetime) -> bool:
+    return value == datetime(value.year, value.month, value.day)
+
+
+def _time_filter(column: str, since: Optional[datetime], until: Optional[datetime]):
+    """
+    Day-partition filter for a time range (prunes directories), plus a row
+    filter on the time column when a bound falls inside a day.
+    """
+    condition = None
+    if since is not None:
+        condition = _and(condition, ds.field("day") >= since.strftime("%Y-%m-%d"))
+        if not _midnight(since):
+            condition = _and(condition, ds.field(column) >= since)
+    if until is not None:
+        if _midnight(until):
+            condition = _and(condition, ds.field("day") < until.strftime("%Y-%m-%d"))
+        else:
+            condition = _and(condition, ds.field("day") <= until.strftime("%Y-%m-%d"))
+            condition = _and(condition, ds.field(column) < until)
+    return condition
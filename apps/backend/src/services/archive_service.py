@@ -0,0 +1,375 @@
+"""
+Cold archive of aged events and incidents.
+
+Events older than ARCHIVE_AFTER_DAYS are written to Parquet files under
+ARCHIVE_DIR and then deleted from the database, so the events table only
+holds what the hot paths (detection, listings, search) need. Incidents
+resolved or closed before the cutoff are copied; their rows stay, so
+incident pages, counters and similar-incident lookups keep working.
+
+Files are partitioned hive-style by day and service and compressed with
+ARCHIVE_COMPRESSION:
+
+    {ARCHIVE_DIR}/events/day=2024-01-15/service=auth-api/part-<first id>-<last id>-0.parquet
+    {ARCHIVE_DIR}/incidents/day=2024-01-15/service=auth-api/part-...
+
+Events linked to an incident that is still open stay in the database until
+it is resolved. Each batch is written before its rows are deleted; a run
+that dies in between leaves that batch in both places, and the next run
+writes the same rows to the same file names instead of adding a copy.
+
+Every batch adds a file to each partition it touches, so at the end of a
+run the partitions it wrote to are compacted: their files are merged into
+one `part-<first id>-<last id>-0.parquet` (rows ordered by id, duplicates
+dropped) and the old files removed. The merged file is written under a
+hidden name and renamed into place before the old files are deleted, so
+readers never miss rows; a run that dies in between leaves duplicates that
+the next compaction of that partition drops. Partitions holding more than
+ARCHIVE_COMPACT_MAX_ROWS rows are left as they are.
+
+Only one archiver runs at a time (archive_lock): every uvicorn worker
+schedules the periodic job, and the others skip a run while one holds the
+lock.
+
+Queries over the archive live in services/analytics_service.py.
+"""
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional, Sequence, Set
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.database import create_session
+from ..core.metrics import metrics
+from ..core.state import get_state, state_lock
+from ..models.event import Event
+from ..models.incident import Incident, IncidentStatus
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = ds = pq = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not on Windows
+    fcntl = None
+
+settings = get_settings()
+
+# Incidents in these states can be archived (and their events moved)
+ARCHIVED_STATUSES = (IncidentStatus.RESOLVED, IncidentStatus.CLOSED)
+
+_DELETE_CHUNK = 5000  # ids per DELETE ... IN (...)
+
+# Bumped on every write, so readers in this process know to rediscover files
+_generation = 0
+
+
+def archive_available() -> bool:
+    """Whether pyarrow is installed (the archive needs it)."""
+    return pa is not None
+
+
+def archive_generation() -> int:
+    """Number of archive writes made by this process (see AnalyticsService)."""
+    return _generation
+
+
+def partitioning():
+    """Hive-style day/service partitioning shared by writer and readers."""
+    return ds.partitioning(pa.schema([("day", pa.string()), ("service", pa.string())]), flavor="hive")
+
+
+def event_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("timestamp", pa.timestamp("us")),
+        ("level", pa.string()),
+        ("message", pa.string()),
+        ("fingerprint", pa.string()),
+        ("incident_id", pa.int64()),
+        ("service", pa.string()),
+    ])
+
+
+def incident_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+        ("last_seen_at", pa.timestamp("us")),
+        ("status", pa.string()),
+        ("severity", pa.string()),
+        ("category", pa.string()),
+        ("summary", pa.string()),
+        ("event_count", pa.int64()),
+        ("service", pa.string()),
+    ])
+
+
+@dataclass
+class ArchiveReport:
+    """Outcome of an archive run."""
+    events: int = 0
+    incidents: int = 0
+    elapsed: float = 0.0
+
+
+class ArchiveService:
+    """
+    Moves aged rows from the database into the Parquet archive.
+
+    Args:
+        db: Database session
+        root: Archive directory (default: ARCHIVE_DIR)
+        batch_size: Rows per write (default: ARCHIVE_BATCH_SIZE)
+    """
+
+    def __init__(self, db: Session, root: Optional[str] = None, batch_size: Optional[int] = None):
+        if not archive_available():
+            raise RuntimeError("The cold archive needs pyarrow (pip install pyarrow)")
+        self.db = db
+        self.root = root or settings.archive_dir
+        self.batch_size = batch_size or settings.archive_batch_size
+        compression = settings.archive_compression.lower()
+        self._compression = None if compression == "none" else compression
+        self._file_options = ds.ParquetFileFormat().make_write_options(compression=self._compression)
+        self._touched: Dict[str, Set[str]] = {}  # kind -> partition directories written this run
+
+    def archive_events(self, cutoff: datetime) -> int:
+        """
+        Write events older than the cutoff to the archive and delete them.
+
+        Args:
+            cutoff: Events with an earlier event time are archived (naive UTC)
+
+        Returns:
+            Number of events archived
+        """
+        archived = 0
+        last_id = 0
+        while True:
+            rows = self.db.execute(
+                select(
+                    Event.id, Event.timestamp, Event.level, Event.message,
+                    Event.fingerprint, Event.incident_id, Event.service,
+                )
+                .outerjoin(Incident, Incident.id == Event.incident_id)
+                .where(
+                    Event.id > last_id,
+                    Event.timestamp < cutoff,
+                    or_(Event.incident_id.is_(None), Incident.status.in_(ARCHIVED_STATUSES)),
+                )
+                .order_by(Event.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                break
+            table = _table(rows, event_schema())
+            self._write("events", table.append_column("day", _day(table["timestamp"])))
+
+            ids = [row[0] for row in rows]
+            for start in range(0, len(ids), _DELETE_CHUNK):
+                self.db.execute(
+                    delete(Event)
+                    .where(Event.id.in_(ids[start:start + _DELETE_CHUNK]))
+                    .execution_options(synchronize_session=False)
+                )
+            self.db.commit()
+            archived += len(rows)
+            last_id = ids[-1]
+        self.compact("events")
+        metrics.inc("archive_events_total", archived)
+        return archived
+
+    def archive_incidents(self, cutoff: datetime) -> int:
+        """
+        Copy incidents resolved or closed before the cutoff to the archive
+        (each incident is copied once; `archived_at` records when).
+
+        Args:
+            cutoff: Incidents last updated earlier than this are archived
+
+        Returns:
+            Number of incidents archived
+        """
+        archived = 0
+        while True:
+            incidents = (
+                self.db.query(Incident)
+                .filter(
+                    Incident.archived_at.is_(None),
+                    Incident.status.in_(ARCHIVED_STATUSES),
+                    Incident.updated_at < cutoff,
+                )
+                .order_by(Incident.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not incidents:
+                break
+            rows = [
+                (i.id, i.created_at, i.updated_at, i.last_seen_at, i.status.value,
+                 i.severity, i.category, i.summary, i.event_count, i.service)
+                for i in incidents
+            ]
+            table = _table(rows, incident_schema())
+            self._write("incidents", table.append_column("day", _day(table["created_at"])))
+
+            self.db.execute(
+                update(Incident)
+                .where(Incident.id.in_([i.id for i in incidents]))
+                .values(archived_at=datetime.utcnow(), updated_at=Incident.updated_at)  # not an edit
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            archived += len(incidents)
+        self.compact("incidents")
+        metrics.inc("archive_incidents_total", archived)
+        return archived
+
+    def compact(self, kind: str) -> int:
+        """
+        Merge the files of each partition written since the last compaction
+        into one file.
+
+        Args:
+            kind: "events" or "incidents"
+
+        Returns:
+            Number of files merged away
+        """
+        global _generation
+        removed = 0
+        for directory in sorted(self._touched.pop(kind, ())):
+            removed += self._compact_partition(directory)
+        if removed:
+            _generation += 1
+            metrics.inc("archive_compacted_files_total", removed)
+        return removed
+
+    def _compact_partition(self, directory: str) -> int:
+        files = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.endswith(".parquet") and not name.startswith((".", "_"))
+        )
+        if len(files) < 2:
+            return 0
+        rows = sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+        if rows > settings.archive_compact_max_rows:
+            return 0
+        table = pa.concat_tables([pq.read_table(path, partitioning=None) for path in files])
+        table = table.take(pc.sort_indices(table["id"]))
+        ids = table["id"]
+        if len(ids) > 1:  # drop rows left twice by an interrupted run
+            repeated = pc.equal(ids.slice(1), ids.slice(0, len(ids) - 1))
+            table = table.filter(pa.concat_arrays([pa.array([True]), pc.invert(repeated).combine_chunks()]))
+            ids = table["id"]
+
+        name = f"part-{ids[0].as_py()}-{ids[-1].as_py()}-0.parquet"
+        hidden = os.path.join(directory, f".compact-{uuid.uuid4().hex}.parquet")  # skipped by readers
+        pq.write_table(table, hidden, compression=self._compression or "none")
+        os.replace(hidden, os.path.join(directory, name))
+        for path in files:
+            if os.path.basename(path) != name:
+                os.remove(path)
+        return len(files) - 1
+
+    def _write(self, kind: str, table) -> None:
+        global _generation
+        ids = table["id"]
+        ds.write_dataset(
+            table,
+            os.path.join(self.root, kind),
+            format="parquet",
+            partitioning=partitioning(),
+            basename_template=f"part-{pc.min(ids).as_py()}-{pc.max(ids).as_py()}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=self._file_options,
+            file_visitor=lambda written: self._touched.setdefault(kind, set()).add(os.path.dirname(written.path)),
+        )
+        _generation += 1
+
+
+def _table(rows: Sequence[tuple], schema):
+    columns = list(zip(*rows))
+    return pa.Table.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+    )
+
+
+def _day(timestamps):
+    return pc.strftime(timestamps, format="%Y-%m-%d")
+
+
+@contextmanager
+def archive_lock(root: Optional[str] = None) -> Iterator[None]:
+    """
+    Hold the archiver lock for the block.
+
+    A lock file in the archive directory excludes every process on this
+    host whatever STATE_BACKEND is; the "archive" state lock also excludes
+    archivers on other hosts when the state backend is shared.
+
+    Args:
+        root: Archive directory (default: ARCHIVE_DIR)
+
+    Raises:
+        TimeoutError: If another archiver holds the lock
+    """
+    root = root or settings.archive_dir
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".archive.lock"), "a") as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise TimeoutError(f"Another process is archiving to {root}") from None
+        # A run can take a while on a large backlog; the lease only matters
+        # if the holder dies, so make it outlast any realistic run
+        lease = max(settings.archive_interval, 3600)
+        with state_lock(get_state(), "archive", lease=lease, timeout=0):
+            yield
+
+
+def run_archive(older_than_days: Optional[float] = None) -> ArchiveReport:
+    """
+    Archive events and incidents older than ARCHIVE_AFTER_DAYS (periodic job
+    and CLI entry point). Does nothing if another archiver is running.
+
+    Args:
+        older_than_days: Override ARCHIVE_AFTER_DAYS
+
+    Returns:
+        ArchiveReport
+    """
+    days = settings.archive_after_days if older_than_days is None else older_than_days
+    report = ArchiveReport()
+    if days <= 0:
+        return report
+    try:
+        with archive_lock():
+            started = time.perf_counter()
+            cutoff = datetime.utcnow() - timedelta(days=days)
+            with create_session() as db:
+                archive = ArchiveService(db)
+                report.events = archive.archive_events(cutoff)
+                report.incidents = archive.archive_incidents(cutoff)
+            report.elapsed = time.perf_counter() - started
+    except TimeoutError as e:
+        print(f"⏭️  Skipping archive run: {e}")
+        return report
+    if report.events or report.incidents:
+        print(f"🧊 Archived {report.events:,} events and {report.incidents:,} incidents "
+              f"older than {cutoff:%Y-%m-%d %H:%M} in {report.elapsed:.1f}s")
+    return report
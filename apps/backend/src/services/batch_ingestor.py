@@ -0,0 +1,142 @@
+"""
+Batched ingestion for high-volume sources (log receivers, OTLP).
+
+Producers hand over validated events on the event loop; a single flusher
+task groups them into batches of up to INGEST_BATCH_SIZE events (or whatever
+arrived within INGEST_BATCH_DELAY seconds) and stores each batch with
+`IngestService.ingest_many` in a worker thread, after per-service ingest
+limits (services/ingest_limits.py) have been applied.
+
+The queue is bounded (INGEST_QUEUE_SIZE). Stream producers `await submit()`
+and simply stop reading from their connection while it is full, which pushes
+back on that sender only; datagram and request/response producers use
+`offer()` / `offer_many()` and shed load instead.
+"""
+import asyncio
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+from ..core.config import get_settings
+from ..core.database import create_session
+from ..core.metrics import metrics
+from ..schemas.event import EventCreate
+from .ingest_limits import STORE, get_ingest_limiter
+from .ingest_service import IngestService
+
+settings = get_settings()
+
+
+class BatchIngestor:
+    """Bounded queue + single flusher feeding `IngestService.ingest_many`."""
+
+    def __init__(self, batch_size: int, batch_delay: float, queue_size: int):
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        metrics.register_collector("ingest_queue", self._metrics)
+
+    def start(self) -> None:
+        """Start the flusher on the running event loop (idempotent)."""
+        if (
+            self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = asyncio.create_task(self._run(), name="batch-ingestor")
+
+    async def stop(self) -> None:
+        """Flush everything queued, then stop the flusher."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def submit(self, event: EventCreate) -> None:
+        """Queue an event, waiting while the queue is full (backpressure)."""
+        self.start()
+        await self._queue.put(event)
+
+    def offer(self, event: EventCreate) -> bool:
+        """
+        Queue an event without waiting.
+
+        Returns:
+            False if the queue is full and the event was dropped
+        """
+        self.start()
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            metrics.inc("ingest_dropped_total")
+            return False
+        return True
+
+    def offer_many(self, events: Sequence[EventCreate]) -> bool:
+        """
+        Queue a group of events all-or-nothing, without waiting.
+
+        Returns:
+            False (nothing queued) if there isn't room for all of them
+        """
+        self.start()
+        if self.queue_size - self._queue.qsize() < len(events):
+            metrics.inc("ingest_rejected_batches_total")
+            return False
+        for event in events:
+            self._queue.put_nowait(event)
+        return True
+
+    async def drain(self) -> None:
+        """Wait until everything queued so far has been stored."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                getter = asyncio.ensure_future(self._queue.get())
+                await asyncio.wait({getter}, timeout=timeout)
+                getter.cancel()
+                if getter.done() and not getter.cancelled():
+                    batch.append(getter.result())
+            try:
+                await asyncio.to_thread(self._store, batch)
+            except Exception as e:
+                metrics.inc("ingest_batch_failures_total")
+                print(f"⚠️  Failed to store batch of {len(batch)} events: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _store(batch: List[EventCreate]) -> None:
+        limiter = get_ingest_limiter()
+        batch = [event for event in batch if limiter.admit(event.service, event.level, event.timestamp) == STORE]
+        if batch:
+            with create_session() as db:
+                IngestService(db).ingest_many(batch)
+        metrics.inc("ingest_batches_total")
+        metrics.inc("ingest_batched_events_total", len(batch))
+
+    def _metrics(self):
+        return {"ingest_queue_depth": self._queue.qsize() if self._queue is not None else 0}
+
+
+@lru_cache()
+def get_batch_ingestor() -> BatchIngestor:
+    """Get the process-wide batch ingestor."""
+    return BatchIngestor(settings.ingest_batch_size, settings.ingest_batch_delay, settings.ingest_queue_size)
@@ -0,0 +1,132 @@
+"""
+Circuit breaker for calls to external services (the LLM API).
+Fails fast while a dependency is down instead of waiting for every call
+to time out.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from ..core.metrics import metrics
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    States:
+    - closed: calls go through; `failure_threshold` consecutive failures open it
+    - open: calls are rejected immediately until `reset_timeout` has passed
+    - half_open: a single probe call is let through; success closes the
+      circuit, failure re-opens it for another `reset_timeout`
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        metrics.register_collector(f"circuit_{name}", self._metrics)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """
+        Ask permission for one call. Callers that get True must report the
+        outcome with `record_success` or `record_failure`.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            metrics.inc(f"circuit_{self.name}_rejected_total")
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            probe_failed = self._probe_in_flight
+            self._probe_in_flight = False
+            if probe_failed or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN or probe_failed:
+                    metrics.inc(f"circuit_{self.name}_opened_total")
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run `fn` through the breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (fn is not called)
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state for health checks."""
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(max(0.0, self._opened_at + self.reset_timeout - self._clock()), 1)
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": retry_in,
+            }
+
+    def _current_state(self) -> str:
+        # Caller holds self._lock. Open → half-open once the timeout has passed.
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def _metrics(self) -> Dict[str, float]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                f"circuit_{self.name}_state": self._STATE_VALUES[state],
+                f"circuit_{self.name}_consecutive_failures": self._failures,
+            }
@@ -0,0 +1,450 @@
+"""
+Coordination for incident detection across threads, workers and processes.
+
+Detection is check-then-insert ("is there an open incident? are there enough
+recent errors?"), so two ERROR events for the same service handled
+concurrently could both open an incident. Two mechanisms prevent that:
+
+- `detection_lock`: serializes detection per service. PostgreSQL uses a
+  transaction-scoped advisory lock, which also covers other worker processes
+  and hosts; other databases use an in-process striped lock, plus a leased
+  lock in the state backend (core/state.py) when its scope covers every
+  writer: an external store, or STATE_BACKEND=sqlite with a SQLite
+  database (both live on the one host).
+- `ShardedDetector` (INGEST_SHARDS > 0): each service hashes to one shard
+  thread, which owns the service's window, so detection for different
+  services runs in parallel while one service's events are handled one at
+  a time.
+
+Detection runs on event time (the client-supplied timestamp), not arrival
+time, so a buffered burst flushed late still looks like a burst. Each
+service's unlinked ERROR events are kept in memory in a `ServiceWindow`
+owned by a `WindowStore`, seeded from the database on first use and updated
+as events are detected, so a check doesn't query the events table. Whoever
+changes a service's window stamps a new version in the state backend
+(`detection-window:<service>`); a store whose window carries an older
+version reseeds it from the database under the detection lock, so errors
+stored by other workers and processes still count. That needs a state
+backend that every detecting worker sees (a local one is, by its contract,
+a single process); a HOST-scoped backend with a database shared between
+hosts can't be trusted for that, and windows are then rebuilt from the
+database for every event.
+A per-service watermark (newest event time minus DETECTION_ALLOWED_LATENESS)
+bounds how far out of order an event may arrive and still count toward
+opening an incident; later events are stored, can still join an open
+incident, and are counted in `detection_late_events_total`.
+"""
+import bisect
+import queue
+import threading
+import uuid
+import zlib
+from concurrent.futures import Future
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.database import create_session, is_sqlite_file
+from ..core.metrics import metrics
+from ..core.state import CLUSTER, HOST, PROCESS, StateBackend, get_state, state_lock
+from ..models.event import Event
+from .incident_service import IncidentService
+
+settings = get_settings()
+
+# First key of the two-key pg_advisory_xact_lock form, to avoid clashing
+# with advisory locks taken by other applications on the same database
+DETECTION_LOCK_NAMESPACE = 0x0A5A
+
+_LOCAL_LOCK_STRIPES = 64
+_local_locks = [threading.Lock() for _ in range(_LOCAL_LOCK_STRIPES)]
+
+
+def service_hash(service: str) -> int:
+    """Stable hash of a service name (same value in every process)."""
+    return zlib.crc32(service.encode("utf-8"))
+
+
+def _cross_worker_state() -> Optional[StateBackend]:
+    """The state backend, if every worker writing to the database sees it."""
+    state = get_state()
+    if state.scope == CLUSTER or (state.scope == HOST and is_sqlite_file(settings.database_url)):
+        return state
+    return None
+
+
+def _window_state() -> Optional[StateBackend]:
+    """The state backend holding window versions, if every detector sees it."""
+    state = get_state()
+    if state.scope == PROCESS:
+        return state  # one process serves the API
+    return _cross_worker_state()
+
+
+@contextmanager
+def detection_lock(db: Session, service: str) -> Iterator[None]:
+    """
+    Hold the per-service detection lock for the duration of the block.
+
+    On PostgreSQL the lock is a transaction-scoped advisory lock; it is
+    released by the first commit/rollback inside the block, or by the commit
+    at the end of it. Do the check and the insert before committing.
+    Elsewhere a striped in-process lock is held, plus a `state_lock` leased
+    for DETECTION_LOCK_LEASE seconds when the state backend reaches every
+    worker writing to the database (`_cross_worker_state`).
+    The session is committed on exit (rolled back on error) for every backend.
+
+    Args:
+        db: Session used for detection
+        service: The service being checked
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        key = service_hash(service) - (1 << 31)  # fit into a signed int4
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :key)"),
+            {"namespace": DETECTION_LOCK_NAMESPACE, "key": key},
+        )
+        local_lock = None
+    else:
+        local_lock = _local_locks[service_hash(service) % _LOCAL_LOCK_STRIPES]
+        local_lock.acquire()
+
+    try:
+        with ExitStack() as stack:
+            state = _cross_worker_state() if local_lock is not None else None
+            if state is not None:
+                stack.enter_context(state_lock(state, f"detection-lock:{service}", settings.detection_lock_lease))
+            try:
+                yield
+            except Exception:
+                db.rollback()
+                raise
+            else:
+                db.commit()
+    finally:
+        if local_lock is not None:
+            local_lock.release()
+
+
+class DetectionResult(NamedTuple):
+    """Outcome of detection for one ERROR event."""
+    incident_id: int
+    created: bool  # True if this event opened a new incident
+
+
+class ServiceWindow:
+    """
+    Unlinked ERROR events for one service, ordered by event time.
+    
+    Callers serialize access per service (detection lock or shard thread).
+    """
+    
+    def __init__(self):
+        self.events: List[Tuple[datetime, int]] = []
+        self.max_event_time: Optional[datetime] = None
+        self.version: Optional[str] = None  # see WindowStore
+    
+    @classmethod
+    def from_stored(cls, events: List[Tuple[datetime, int]]) -> "ServiceWindow":
+        """
+        Window over already stored events: the watermark follows the newest
+        of them, and the ones behind it are left out (they arrived late).
+        """
+        window = cls()
+        if events:
+            window.max_event_time = max(timestamp for timestamp, _ in events)
+        for timestamp, event_id in events:
+            window.add(timestamp, event_id)
+        return window
+    
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Events older than this are late and no longer counted."""
+        if self.max_event_time is None:
+            return None
+        return self.max_event_time - timedelta(seconds=settings.detection_allowed_lateness)
+    
+    def add(self, timestamp: datetime, event_id: int) -> bool:
+        """
+        Add an event in event-time order (no-op if it is already present,
+        e.g. because the window was seeded after it was committed).
+        
+        Returns:
+            False if the event is behind the watermark (late; not added)
+        """
+        if any(item[1] == event_id for item in self.events):
+            return True
+        watermark = self.watermark
+        if watermark is not None and timestamp < watermark:
+            return False
+        bisect.insort(self.events, (timestamp, event_id))
+        if self.max_event_time is None or timestamp > self.max_event_time:
+            self.max_event_time = timestamp
+        return True
+    
+    def prune(self) -> None:
+        """Drop events that can no longer share a window with an on-time event."""
+        watermark = self.watermark
+        if watermark is None:
+            return
+        cutoff = watermark - timedelta(seconds=settings.incident_time_window)
+        drop = bisect.bisect_left(self.events, (cutoff, -1))
+        if drop:
+            del self.events[:drop]
+    
+    def has_burst(self) -> bool:
+        """True if INCIDENT_THRESHOLD events fall within one INCIDENT_TIME_WINDOW."""
+        threshold = settings.incident_threshold
+        span = timedelta(seconds=settings.incident_time_window)
+        events = self.events
+        return any(
+            events[i + threshold - 1][0] - events[i][0] <= span
+            for i in range(len(events) - threshold + 1)
+        )
+    
+    def discard(self, event_id: int) -> None:
+        """Remove an event (it joined an open incident)."""
+        self.events = [item for item in self.events if item[1] != event_id]
+    
+    def take(self) -> list:
+        """Remove and return all event IDs (they are now linked to an incident)."""
+        event_ids = [event_id for _, event_id in self.events]
+        self.events.clear()
+        return event_ids
+    
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+class WindowStore:
+    """
+    The `ServiceWindow` of each service, kept between events.
+    
+    Callers serialize access per service (detection lock or shard thread).
+    A window is (re)seeded from the database when the store has none for
+    the service or when another store changed it since (its version in the
+    state backend moved on, see the module docstring).
+    """
+    
+    def __init__(self):
+        self._windows: Dict[str, ServiceWindow] = {}
+    
+    def window(self, incident_service: IncidentService, service: str, timestamp: datetime) -> ServiceWindow:
+        """
+        The current window of a service.
+        
+        Args:
+            incident_service: Service on the detecting session
+            service: The service
+            timestamp: Event time of the event being detected (seeding looks
+                back one INCIDENT_TIME_WINDOW plus the allowed lateness from it)
+        """
+        state = _window_state()
+        version = state.get(_window_key(service)) if state is not None else None
+        window = self._windows.get(service) if state is not None else None
+        if window is not None and window.version == version:
+            return window
+        
+        metrics.inc("detection_window_seeds_total")
+        lookback = timedelta(seconds=settings.incident_time_window + settings.detection_allowed_lateness)
+        window = ServiceWindow.from_stored([
+            (event.timestamp, event.id)
+            for event in incident_service.recent_unlinked_errors(service, since=timestamp - lookback)
+        ])
+        window.version = version
+        if state is not None:
+            self._windows[service] = window
+        return window
+    
+    def changed(self, service: str, window: ServiceWindow) -> None:
+        """Stamp a new version after changing a window (other stores reseed theirs)."""
+        state = _window_state()
+        if state is None:
+            return
+        window.version = uuid.uuid4().hex
+        ttl = settings.incident_time_window + settings.detection_allowed_lateness
+        state.set(_window_key(service), window.version, ttl=ttl)
+    
+    def forget(self, service: str) -> None:
+        """Drop a window whose changes may not have been stored (reseeded on next use)."""
+        self._windows.pop(service, None)
+
+
+def _window_key(service: str) -> str:
+    return f"detection-window:{service}"
+
+
+# Windows of inline detection, shared by the request threads of this process
+_inline_windows = WindowStore()
+
+
+def detect_event(
+    db: Session,
+    event_id: int,
+    service: str,
+    timestamp: datetime,
+    windows: Optional[WindowStore] = None,
+) -> Optional[DetectionResult]:
+    """
+    Run detection for one stored ERROR event against the service's window.
+    
+    Takes the service's `detection_lock` and updates its window under it
+    (see the module docstring).
+    
+    Args:
+        db: Session used for detection
+        event_id: The committed event
+        service: Its service
+        timestamp: Its event time
+        windows: Store holding the service's window (default: inline detection's)
+        
+    Returns:
+        DetectionResult, or None if the event neither joined nor opened an incident
+    """
+    incident_service = IncidentService(db)
+    windows = windows if windows is not None else _inline_windows
+    
+    try:
+        with detection_lock(db, service):
+            window = windows.window(incident_service, service, timestamp)
+            # A window seeded just now already holds the (committed) event
+            on_time = window.add(timestamp, event_id)
+            
+            if not on_time:
+                metrics.inc("detection_late_events_total")
+            
+            open_incident = incident_service.get_open_incident_for_service(service)
+            if open_incident:
+                window.discard(event_id)
+                event = db.get(Event, event_id)
+                incident_service.add_event_to_incident(event, open_incident)
+                result = DetectionResult(open_incident.id, False)
+            else:
+                window.prune()
+                result = None
+                if on_time and window.has_burst():
+                    incident = incident_service.create_incident(service, window.take())
+                    result = DetectionResult(incident.id, True)
+            windows.changed(service, window)
+    except Exception:
+        windows.forget(service)
+        raise
+    
+    return result
+
+
+class ShardedDetector:
+    """
+    Service-sharded, single-writer incident detection.
+
+    Each shard is one thread with its own queue, DB session and
+    `WindowStore`. All events for a service are processed by the same shard,
+    which alone reads and updates the service's window, so within a process
+    one service's detection never waits on another thread's.
+
+    Shards only order work inside one process. Between processes, duplicate
+    incidents are prevented by `detection_lock` alone, which spans processes
+    on PostgreSQL (advisory lock) or with a state backend whose scope
+    covers every worker, and not otherwise: several workers on one SQLite
+    database with STATE_BACKEND=local can each open an incident for the
+    same burst.
+    """
+
+    def __init__(self, shards: int, session_factory: Callable[[], Session] = create_session):
+        self.shards = shards
+        self._session_factory = session_factory
+        self._queues = [queue.Queue() for _ in range(shards)]
+        self._windows = [WindowStore() for _ in range(shards)]
+        self._threads = [
+            threading.Thread(target=self._run, args=(shard,), name=f"detect-shard-{shard}", daemon=True)
+            for shard in range(shards)
+        ]
+        for thread in self._threads:
+            thread.start()
+        metrics.register_collector("ingest_shards", self._queue_depths)
+
+    def shard_for(self, service: str) -> int:
+        """Shard index owning a service."""
+        return service_hash(service) % self.shards
+
+    def submit(self, event: Event) -> "Future[Optional[DetectionResult]]":
+        """
+        Queue detection for a stored ERROR event.
+
+        Args:
+            event: The committed event
+
+        Returns:
+            Future resolving to a DetectionResult (or None if the event
+            neither joined nor opened an incident)
+        """
+        future: Future = Future()
+        task = (event.id, event.service, event.timestamp, future)
+        self._queues[self.shard_for(event.service)].put(task)
+        return future
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Finish queued work and stop all shard threads."""
+        for shard_queue in self._queues:
+            shard_queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _queue_depths(self) -> Dict[str, float]:
+        return {
+            f"ingest_shard_{shard}_queue_depth": shard_queue.qsize()
+            for shard, shard_queue in enumerate(self._queues)
+        }
+
+    def _run(self, shard: int) -> None:
+        db = self._session_factory()
+        windows = self._windows[shard]
+        try:
+            while True:
+                task = self._queues[shard].get()
+                if task is None:
+                    return
+                event_id, service, timestamp, future = task
+                try:
+                    future.set_result(detect_event(db, event_id, service, timestamp, windows))
+                except Exception as e:
+                    db.rollback()
+                    future.set_exception(e)
+        finally:
+            db.close()
+
+
+@lru_cache()
+def get_detector() -> Optional[ShardedDetector]:
+    """
+    Get the process-wide sharded detector, or None when INGEST_SHARDS is 0
+    (detection then runs inline in the request, see `detect_inline`).
+    """
+    if settings.ingest_shards <= 0:
+        return None
+    return ShardedDetector(settings.ingest_shards)
+
+
+def detect_inline(db: Session, event: Event) -> Optional[DetectionResult]:
+    """
+    Run detection for a stored ERROR event in the calling thread.
+    
+    Args:
+        db: The caller's session
+        event: The committed ERROR event
+    """
+    return detect_event(db, event.id, event.service, event.timestamp)
+
+
+def stop_detector() -> None:
+    """Stop shard threads if the sharded detector was started."""
+    if get_detector.cache_info().currsize:
+        detector = get_detector()
+        if detector:
+            detector.stop()
+    get_detector.cache_clear()
@@ -0,0 +1,164 @@
+"""
+Single writer for event ingest on SQLite.
+
+SQLite has one write lock per database. When every request thread stores
+its own event, the threads take turns on that lock, and each event pays for
+its own transaction. With SQLITE_SINGLE_WRITER on (and a SQLite file
+database), POST /events hands the event to one writer thread instead and
+waits for the result.
+
+The writer takes whatever has queued up while it was busy, up to
+INGEST_BATCH_SIZE events, and stores it with `IngestService.ingest_each`:
+one transaction and one commit for the whole group, then detection for its
+ERROR events. Nothing waits to fill a batch, so a lone request is stored
+right away; batches only grow when requests arrive faster than commits.
+
+If a batch fails before it is committed, its events are retried one at a
+time, so one bad event only fails its own request. Once committed, each
+event is detected on its own: a detection failure fails that event's
+request only.
+"""
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from ..core.config import get_settings
+from ..core.database import create_session, is_sqlite_file
+from ..core.metrics import metrics
+from ..models.event import Event
+from ..schemas.event import EventCreate
+from .ingest_service import IngestService
+
+settings = get_settings()
+
+_LIVENESS_CHECK = 1.0  # seconds store() waits between checks that the writer is running
+
+
+class EventWriter:
+    """
+    Thread storing events for all request threads, a group per transaction.
+
+    Args:
+        batch_size: Most events stored per transaction
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = max(batch_size, 1)
+        self._queue: "queue.Queue[Optional[Tuple[EventCreate, Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        metrics.register_collector("event_writer", lambda: {"event_writer_queued": self._queue.qsize()})
+
+    def store(self, event: EventCreate) -> Tuple[Optional[Event], bool]:
+        """
+        Store an event and run detection, waiting for the writer.
+
+        Returns:
+            (event, duplicate), as in `IngestService.ingest_each`
+
+        Raises:
+            RuntimeError: If the writer thread stopped without storing it
+        """
+        future = self.submit(event)
+        while True:
+            try:
+                return future.result(timeout=_LIVENESS_CHECK)
+            except FutureTimeout:
+                with self._lock:
+                    thread = self._thread
+                if not future.done() and (thread is None or not thread.is_alive()):
+                    raise RuntimeError("Event writer stopped before storing the event")
+
+    def submit(self, event: EventCreate) -> Future:
+        """Queue an event; the Future resolves to (event, duplicate)."""
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((event, future))
+        return future
+
+    def stop(self) -> None:
+        """Store what is queued, then stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            except Exception as e:  # keep the thread alive; fail what is unanswered
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            if stopping:
+                return
+
+    def _write(self, batch: List[Tuple[EventCreate, Future]]) -> None:
+        ingest = None
+        try:
+            with create_session() as db:
+                ingest = IngestService(db)
+                results = ingest.ingest_each([event for event, _ in batch])
+        except Exception as e:
+            # Once committed the events are stored, so they aren't retried
+            if len(batch) == 1 or (ingest is not None and ingest.committed):
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            metrics.inc("event_writer_batch_retries_total")
+            for item in batch:
+                self._write([item])
+            return
+        metrics.inc("event_writer_batches_total")
+        metrics.inc("event_writer_events_total", len(batch))
+        for (_, future), (event, duplicate) in zip(batch, results):
+            error = ingest.detection_errors.get(event.id) if event is not None and not duplicate else None
+            if error is not None:
+                # Stored, but detection failed: fail this request only, as
+                # a request storing its own event would
+                metrics.inc("event_writer_detection_failures_total")
+                print(f"⚠️  Detection failed for event {event.id}: {error}")
+                future.set_exception(error)
+            else:
+                future.set_result((event, duplicate))
+
+
+@lru_cache()
+def _writer() -> EventWriter:
+    return EventWriter(settings.ingest_batch_size)
+
+
+def get_event_writer() -> Optional[EventWriter]:
+    """The process-wide event writer, or None when events are stored by the request thread."""
+    if not settings.sqlite_single_writer or not is_sqlite_file(settings.database_url):
+        return None
+    return _writer()
+
+
+def stop_event_writer() -> None:
+    """Drain and stop the writer if it was started (app shutdown)."""
+    if _writer.cache_info().currsize:
+        _writer().stop()
+    _writer.cache_clear()
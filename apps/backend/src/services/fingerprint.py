@@ -0,0 +1,53 @@
+"""
+Message fingerprints.
+Reduces a log message to its template (variable parts such as IDs, numbers
+and addresses replaced by placeholders) and hashes it, so that repeats of the
+same error share one fingerprint.
+"""
+import hashlib
+import re
+
+# Order matters: specific shapes are replaced before the generic number rule
+_PATTERNS = [
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"), "<uuid>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{6,}\b"), "<hex>"),
+    (re.compile(r"\"[^\"]*\"|'[^']*'"), "<str>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<num>"),
+    (re.compile(r"\s+"), " "),
+]
+
+FINGERPRINT_LENGTH = 16  # hex characters (64-bit digest)
+
+
+def normalize_message(message: str) -> str:
+    """
+    Reduce a message to its template.
+
+    Args:
+        message: Raw log message
+
+    Returns:
+        Lowercased message with variable parts replaced by placeholders
+
+    Example:
+        "Timeout after 3000ms to 10.0.0.12:5432" -> "timeout after <num>ms to <ip>"
+    """
+    template = message.lower()
+    for pattern, placeholder in _PATTERNS:
+        template = pattern.sub(placeholder, template)
+    return template.strip()
+
+
+def fingerprint(message: str) -> str:
+    """
+    Stable fingerprint of a message's template.
+
+    Args:
+        message: Raw log message
+
+    Returns:
+        16-character hex digest (same value in every process)
+    """
+    template = normalize_message(message)
+    return hashlib.blake2b(template.encode("utf-8"), digest_size=FINGERPRINT_LENGTH // 2).hexdigest()
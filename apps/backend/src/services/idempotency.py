@@ -0,0 +1,198 @@
+"""
+Idempotent ingest: an event sent again with the same idempotency key
+within IDEMPOTENCY_WINDOW seconds is dropped instead of stored twice.
+
+Agents that retry on timeouts send an `idempotency_key` per event (any
+string up to 128 characters, e.g. "<agent id>:<sequence number>"); keys
+are scoped to the event's service.
+
+Checks go through an in-memory Bloom filter first. A key the filter has
+never seen can't be a duplicate from this process, so the common case
+costs no lookup: the key is just inserted next to the event, in the same
+transaction. The `ingest_keys` primary key is the backstop for what the
+filter can't know (keys stored by other processes or before a restart);
+a conflicting insert drops the event then. Only keys the filter reports
+as possibly seen (repeats, plus about IDEMPOTENCY_BLOOM_ERROR_RATE of new
+keys) are looked up before inserting.
+
+The filter keeps two generations, each covering one window, so it
+remembers every key for at least IDEMPOTENCY_WINDOW seconds.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Set
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.database import create_session
+from ..core.metrics import metrics
+from ..models.ingest_key import IngestKey
+
+settings = get_settings()
+
+
+def key_digest(service: str, key: str) -> str:
+    """Stored form of an idempotency key (scoped to its service)."""
+    return hashlib.blake2b(f"{service}\n{key}".encode(), digest_size=16).hexdigest()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over key digests.
+
+    Args:
+        capacity: Expected number of keys
+        error_rate: Target false-positive rate at that capacity
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest: str) -> None:
+        for position in self._positions(digest):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    def _positions(self, digest: str):
+        # Double hashing over the two halves of the (already uniform) digest
+        h1, h2 = int(digest[:16], 16), int(digest[16:], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+
+class IdempotencyGuard:
+    """
+    Finds duplicate keys in a batch of events about to be stored.
+
+    Args:
+        window: Seconds a key is remembered
+        capacity: Keys expected per window (sizes each Bloom generation)
+        error_rate: Bloom false-positive rate at that capacity
+    """
+
+    def __init__(self, window: int, capacity: int, error_rate: float):
+        self.window = window
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated = time.monotonic()
+
+    def maybe_seen(self, digests: Iterable[str]) -> Set[str]:
+        """Digests the filter has (probably) seen; the rest are certainly new to this process."""
+        with self._lock:
+            self._rotate()
+            return {d for d in digests if d in self._current or d in self._previous}
+
+    def remember(self, digests: Iterable[str]) -> None:
+        """Add stored keys to the filter."""
+        with self._lock:
+            self._rotate()
+            for digest in digests:
+                self._current.add(digest)
+
+    def seen(self, db: Session, digests: Set[str], now: datetime) -> Dict[str, int]:
+        """
+        Keys already stored within the window.
+
+        Returns:
+            Dict of digest -> event id stored under it
+        """
+        if not digests:
+            return {}
+        rows = db.execute(
+            select(IngestKey.digest, IngestKey.event_id)
+            .where(IngestKey.digest.in_(digests), IngestKey.created_at >= self._cutoff(now))
+        ).all()
+        return dict(rows)
+
+    def claim(self, db: Session, keys: Dict[str, int], now: datetime) -> Set[str]:
+        """
+        Insert keys for events flushed in the session's transaction.
+
+        Args:
+            db: Session holding the events' transaction
+            keys: Dict of digest -> event id
+            now: Time the keys are stored at
+
+        Returns:
+            Digests that were already taken within the window (their events
+            are duplicates and must not be committed)
+        """
+        if not keys:
+            return set()
+        rows = [{"digest": d, "event_id": event_id, "created_at": now} for d, event_id in keys.items()]
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            module = postgresql if dialect == "postgresql" else sqlite
+            stmt = module.insert(IngestKey).on_conflict_do_nothing(index_elements=[IngestKey.digest])
+            inserted = set(db.scalars(stmt.returning(IngestKey.digest), rows))
+        else:
+            inserted = set()
+            for row in rows:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(IngestKey), row)
+                    inserted.add(row["digest"])
+                except IntegrityError:
+                    pass
+        taken = set(keys) - inserted
+        for digest in list(taken):
+            # A key past the window that hasn't been purged yet is free again
+            reclaimed = db.execute(
+                update(IngestKey)
+                .where(IngestKey.digest == digest, IngestKey.created_at < self._cutoff(now))
+                .values(event_id=keys[digest], created_at=now)
+            ).rowcount
+            if reclaimed:
+                taken.discard(digest)
+        return taken
+
+    def purge(self, db: Session) -> int:
+        """Delete keys older than the window."""
+        cutoff = self._cutoff(datetime.utcnow())
+        deleted = db.execute(delete(IngestKey).where(IngestKey.created_at < cutoff)).rowcount
+        db.commit()
+        return deleted
+
+    def _cutoff(self, now: datetime) -> datetime:
+        return now - timedelta(seconds=self.window)
+
+    def _rotate(self) -> None:
+        # Caller holds self._lock
+        now = time.monotonic()
+        if now - self._rotated >= self.window:
+            self._previous, self._current = self._current, BloomFilter(self.capacity, self.error_rate)
+            self._rotated = now
+
+
+@lru_cache()
+def get_idempotency_guard() -> IdempotencyGuard:
+    """Get the process-wide idempotency guard."""
+    return IdempotencyGuard(
+        settings.idempotency_window,
+        settings.idempotency_bloom_capacity,
+        settings.idempotency_bloom_error_rate,
+    )
+
+
+def purge_ingest_keys() -> int:
+    """Delete expired idempotency keys (periodic job)."""
+    with create_session() as db:
+        deleted = get_idempotency_guard().purge(db)
+    if deleted:
+        metrics.inc("ingest_keys_purged_total", deleted)
+    return deleted
@@ -2,46 +2,125 @@
 Incident detection and management service.
 Automatically groups events into incidents based on time windows.
 """
+import threading
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, select, update
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 from ..models.event import Event
 from ..models.incident import Incident, IncidentStatus
 from ..core.config import get_settings
+from ..core.metrics import metrics
+from ..core.state import get_state
+from .incident_timeline import rebuild_timeline, record_timeline_events
+from .incident_touch import get_incident_toucher
+from .search_service import SearchService
+from .similarity import get_similarity_index, incident_embedding, to_blob
+from .summary_service import IncidentSummaryService
 
 settings = get_settings()
 
+# Columns selected for list responses (must match IncidentResponse fields)
+INCIDENT_LIST_COLUMNS = (
+    Incident.id,
+    Incident.service,
+    Incident.category,
+    Incident.severity,
+    Incident.summary,
+    Incident.status,
+    Incident.created_at,
+    Incident.updated_at,
+    Incident.last_seen_at,
+    Incident.event_count,
+)
+
+
+def _open_incident_key(service: str) -> str:
+    return f"open-incident:{service}"
+
+
+def remember_open_incident(incident: Incident) -> None:
+    """Record a newly opened (or reopened) incident as its service's open incident."""
+    if settings.open_incident_cache_ttl > 0:
+        get_state().set(_open_incident_key(incident.service), str(incident.id), ttl=settings.open_incident_cache_ttl)
+
+
+def forget_open_incident(service: str) -> None:
+    """Drop the cached open incident of a service (one of its incidents left OPEN)."""
+    if settings.open_incident_cache_ttl > 0:
+        get_state().delete(_open_incident_key(service))
+
+
+class AnalysisSnapshot(NamedTuple):
+    """What an incident looked like when it was (or would be) analyzed."""
+    event_count: int
+    fingerprints: Set[str]
+    vector: Optional[Any] = None  # similarity embedding (numpy array), if already computed
+
+
+class _ChangeTracker:
+    """
+    Per-process tally of events linked to incidents since the last
+    re-analysis check, so the (index-scanning) snapshot query runs once per
+    `REANALYSIS_MIN_NEW_EVENTS` events or new fingerprint, not per event.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, int] = {}
+        self._noted_fingerprints: Dict[int, Set[str]] = {}
+    
+    def check_due(self, incident: Incident, fingerprint: Optional[str]) -> bool:
+        with self._lock:
+            pending = self._pending.get(incident.id, 0) + 1
+            due = pending >= max(1, settings.reanalysis_min_new_events)
+            self._pending[incident.id] = 0 if due else pending
+            
+            if fingerprint and fingerprint not in (incident.analyzed_fingerprints or ()):
+                noted = self._noted_fingerprints.setdefault(incident.id, set())
+                if fingerprint not in noted:
+                    noted.add(fingerprint)
+                    due = True
+            return due
+    
+    def forget(self, incident_id: int) -> None:
+        with self._lock:
+            self._pending.pop(incident_id, None)
+            self._noted_fingerprints.pop(incident_id, None)
+
+
+_change_tracker = _ChangeTracker()
+
 
 class IncidentService:
     """
-    Service for detecting and managing incidents.
+    Service for managing incidents.
     
-    Detection Logic:
-    - If ≥5 ERROR events from same service within 5 minutes → Create incident
-    - Group all those events under the new incident
+    Detection (≥ INCIDENT_THRESHOLD ERROR events from one service within
+    INCIDENT_TIME_WINDOW open an incident grouping them) runs in
+    services/detection.py on top of these methods.
     """
     
     def __init__(self, db: Session):
         self.db = db
     
-    def detect_and_group_incident(self, service: str) -> Optional[Incident]:
+    def recent_unlinked_errors(self, service: str, since: Optional[datetime] = None) -> List[Event]:
         """
-        Check if recent events should trigger a new incident.
+        Get ERROR events for a service inside the detection window that are
+        not yet part of an incident.
         
         Args:
-            service: The service name to check
+            service: The service name
+            since: Oldest event time to include (default: one detection
+                window before now)
             
         Returns:
-            New incident if threshold met, None otherwise
+            Matching events, oldest first
         """
-        # Calculate time window
-        time_threshold = datetime.utcnow() - timedelta(
+        time_threshold = since or datetime.utcnow() - timedelta(
             seconds=settings.incident_time_window
         )
-        
-        # Find ERROR events from this service in time window that are NOT in an incident
-        recent_errors = (
+        return (
             self.db.query(Event)
             .filter(
                 and_(
@@ -51,75 +130,269 @@ class IncidentService:
                     Event.incident_id.is_(None)  # Not already in an incident
                 )
             )
+            .order_by(Event.timestamp, Event.id)
             .all()
         )
+    
+    def create_incident(
+        self,
+        service: str,
+        event_ids: List[int],
+        opened_at: Optional[datetime] = None
+    ) -> Incident:
+        """
+        Create an OPEN incident and link the given events to it.
         
-        # Check if threshold met
-        if len(recent_errors) >= settings.incident_threshold:
-            # Create new incident
-            incident = Incident(
-                service=service,
-                status=IncidentStatus.OPEN,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            self.db.add(incident)
-            self.db.flush()  # Get the incident ID
-            
-            # Link all recent errors to this incident
-            for event in recent_errors:
-                event.incident_id = incident.id
-            
-            self.db.commit()
-            self.db.refresh(incident)
-            
-            # Auto-analyze the incident with AI
-            self._auto_analyze_incident(incident)
+        Args:
+            service: The affected service
+            event_ids: IDs of the events that triggered the incident
+            opened_at: Creation time (default: now; backfills pass event time)
             
-            return incident
+        Returns:
+            The new incident (committed)
+        """
+        now = opened_at or datetime.utcnow()
+        incident = Incident(
+            service=service,
+            status=IncidentStatus.OPEN,
+            created_at=now,
+            updated_at=now,
+            last_seen_at=now
+        )
+        self.db.add(incident)
+        self.db.flush()  # Get the incident ID
         
-        return None
+        # Link all triggering errors to this incident (unless grouped elsewhere meanwhile)
+        incident.event_count = self.db.query(Event).filter(
+            Event.id.in_(event_ids), Event.incident_id.is_(None)
+        ).update({Event.incident_id: incident.id}, synchronize_session=False)
+        IncidentSummaryService(self.db).record_created(incident)
+        if incident.event_count:
+            rebuild_timeline(self.db, incident.id)
+        
+        self.db.commit()
+        self.db.refresh(incident)
+        remember_open_incident(incident)
+        return incident
     
-    def _auto_analyze_incident(self, incident: Incident) -> None:
+    def auto_analyze_incident(self, incident: Incident) -> None:
         """
-        Automatically analyze incident using AI after creation.
+        Queue AI analysis for a new (or materially changed) incident.
+        
+        Runs in the background through the analysis coordinator, so ingest
+        doesn't wait on the LLM and a manual /analyze for the same incident
+        joins this run instead of starting another.
         
         Args:
-            incident: The newly created incident
+            incident: The incident to analyze
         """
         try:
-            from .ai_service import AIService
+            from .analysis_coordinator import get_analysis_coordinator
             
-            ai_service = AIService()
-            analysis = ai_service.analyze_incident(incident)
+            get_analysis_coordinator().submit(incident.id)
+            
+        except Exception as e:
+            print(f"⚠️  Auto-analysis failed for incident #{incident.id}: {e}")
+            # Don't fail the incident creation if AI analysis fails
+    
+    def apply_analysis(
+        self,
+        incident: Incident,
+        analysis: Dict[str, Any],
+        snapshot: Optional[AnalysisSnapshot] = None
+    ) -> None:
+        """
+        Store an AI analysis result on an incident and commit.
+        
+        Args:
+            incident: The analyzed incident
+            analysis: Result of AIService.analyze_incident
+            snapshot: The events the analysis was based on (default: current state)
+        
+        Also stores the incident's similarity vector and adds it to the
+        similar-incidents index.
+        """
+        self.apply_analyses([(incident, analysis, snapshot)])
+    
+    def apply_analyses(
+        self,
+        results: List[Tuple[Incident, Dict[str, Any], Optional[AnalysisSnapshot]]]
+    ) -> None:
+        """
+        Store several analysis results in one transaction (see `apply_analysis`).
+        
+        Anything else staged in the session (e.g. a bulk job's progress) is
+        committed with them.
+        
+        Args:
+            results: (incident, analysis, snapshot) tuples
+        """
+        vectors = []
+        summary = IncidentSummaryService(self.db)
+        for incident, analysis, snapshot in results:
+            if snapshot is None:
+                snapshot = self.analysis_snapshot(incident.id)
             
-            # Update incident with AI insights
+            summary.record_change("severity", incident.severity, analysis.get("severity"))
             incident.category = analysis.get("category")
             incident.severity = analysis.get("severity")
             incident.summary = analysis.get("summary")
             incident.recommended_actions = analysis.get("recommended_actions")
+            incident.analyzed_at = datetime.utcnow()
+            incident.analyzed_event_count = snapshot.event_count
+            incident.analyzed_fingerprints = sorted(snapshot.fingerprints)
+            vector = snapshot.vector if snapshot.vector is not None else incident_embedding(self.db, incident)
+            incident.embedding = to_blob(vector)
+            vectors.append((incident.id, vector))
+        self.db.commit()
+        index = get_similarity_index()
+        for incident_id, vector in vectors:
+            _change_tracker.forget(incident_id)
+            index.add(incident_id, vector)
+    
+    def analysis_snapshot(self, incident_id: int) -> AnalysisSnapshot:
+        """
+        Current event count and distinct message fingerprints of an incident.
+        
+        Args:
+            incident_id: The incident ID
             
-            self.db.commit()
+        Returns:
+            AnalysisSnapshot (both values come from index-only scans)
+        """
+        event_count = self.db.scalar(
+            select(func.count(Event.id)).where(Event.incident_id == incident_id)
+        )
+        fingerprints = self.db.scalars(
+            select(Event.fingerprint)
+            .where(Event.incident_id == incident_id, Event.fingerprint.isnot(None))
+            .distinct()
+        )
+        return AnalysisSnapshot(event_count or 0, set(fingerprints))
+    
+    def reanalysis_reason(
+        self,
+        incident: Incident,
+        snapshot: Optional[AnalysisSnapshot] = None
+    ) -> Optional[str]:
+        """
+        Decide whether an incident has materially changed since its last analysis.
+        
+        Args:
+            incident: The incident
+            snapshot: Current state (default: queried)
             
-            print(f"✅ AI Analysis complete for incident #{incident.id}")
-            print(f"   Category: {incident.category}, Severity: {incident.severity}")
+        Returns:
+            "never_analyzed", "growth" or "new_fingerprints", or None if the
+            stored analysis is still current
+        """
+        if incident.analyzed_event_count is None:
+            return "never_analyzed"
+        
+        if snapshot is None:
+            snapshot = self.analysis_snapshot(incident.id)
+        
+        if settings.reanalysis_min_new_events > 0:
+            new_events = snapshot.event_count - incident.analyzed_event_count
+            needed = max(
+                settings.reanalysis_min_new_events,
+                settings.reanalysis_growth_ratio * incident.analyzed_event_count
+            )
+            if new_events >= needed:
+                return "growth"
+        
+        if settings.reanalysis_new_fingerprints > 0:
+            new_fingerprints = snapshot.fingerprints - set(incident.analyzed_fingerprints or ())
+            if len(new_fingerprints) >= settings.reanalysis_new_fingerprints:
+                return "new_fingerprints"
+        
+        return None
+    
+    def maybe_reanalyze(self, incident: Incident, event: Event) -> bool:
+        """
+        Queue re-analysis if an event joining an already-analyzed incident
+        pushed it over a re-analysis threshold.
+        
+        Incidents whose first analysis hasn't been stored yet are left to
+        the auto-analysis queued when they were created.
+        
+        Args:
+            incident: The incident the event was linked to
+            event: The newly linked event
             
-        except Exception as e:
-            print(f"⚠️  Auto-analysis failed for incident #{incident.id}: {e}")
-            # Don't fail the incident creation if AI analysis fails
+        Returns:
+            True if a re-analysis was queued
+        """
+        if incident.analyzed_event_count is None:
+            return False
+        if not _change_tracker.check_due(incident, event.fingerprint):
+            return False
+        
+        from .analysis_coordinator import get_analysis_coordinator
+        
+        coordinator = get_analysis_coordinator()
+        if coordinator.in_flight(incident.id):
+            return False
+        
+        reason = self.reanalysis_reason(incident)
+        if reason is None:
+            return False
+        
+        print(f"🔁 Re-analyzing incident #{incident.id} ({reason})")
+        metrics.inc(f"reanalysis_{reason}_total")
+        self.auto_analyze_incident(incident)
+        return True
+    
+    def update_status(self, incident: Incident, new_status: IncidentStatus) -> None:
+        """
+        Change an incident's status and commit.
+        
+        Args:
+            incident: The incident to update
+            new_status: The new status
+        """
+        old_status = incident.status
+        IncidentSummaryService(self.db).record_change("status", old_status, new_status)
+        incident.status = new_status
+        self.db.commit()
+        if new_status == IncidentStatus.OPEN:
+            remember_open_incident(incident)
+        elif old_status == IncidentStatus.OPEN:
+            forget_open_incident(incident.service)
     
     def get_open_incident_for_service(self, service: str) -> Optional[Incident]:
         """
         Get the most recent OPEN incident for a service.
         Used to add new events to existing incidents.
         
+        The open incident's id is cached in the state backend for
+        OPEN_INCIDENT_CACHE_TTL seconds, so detection usually loads it by
+        primary key instead of searching; it is checked to still be OPEN.
+        "No open incident" is never cached: the state backend may not see
+        incidents opened by workers on other hosts, so a negative answer
+        always comes from the database. Opening an incident overwrites the
+        entry and closing one deletes it; lookups only fill an empty entry
+        (compare-and-set), so a slow lookup can't overwrite a newer answer.
+        
         Args:
             service: The service name
             
         Returns:
             Most recent open incident or None
         """
-        return (
+        state = get_state() if settings.open_incident_cache_ttl > 0 else None
+        key = _open_incident_key(service)
+        if state is not None:
+            cached = state.get(key)
+            if cached is not None:
+                incident = self.db.get(Incident, int(cached))
+                if incident is not None and incident.status == IncidentStatus.OPEN:
+                    metrics.inc("open_incident_cache_hits_total")
+                    return incident
+                state.compare_and_set(key, cached, None)
+            metrics.inc("open_incident_cache_misses_total")
+        
+        incident = (
             self.db.query(Incident)
             .filter(
                 and_(
@@ -130,18 +403,48 @@ class IncidentService:
             .order_by(Incident.created_at.desc())
             .first()
         )
+        if state is not None and incident is not None:
+            state.compare_and_set(key, None, str(incident.id), ttl=settings.open_incident_cache_ttl)
+        return incident
     
     def add_event_to_incident(self, event: Event, incident: Incident) -> None:
         """
         Add an event to an existing incident.
         
+        Only the event row is written; the incident's `updated_at`,
+        `last_seen_at` and `event_count` are batched by the incident toucher
+        so concurrent events don't all lock the same incident row
+        (written through immediately when INCIDENT_TOUCH_INTERVAL is 0).
+        
         Args:
             event: The event to add
             incident: The incident to add it to
         """
-        event.incident_id = incident.id
-        incident.updated_at = datetime.utcnow()
+        # Conditional link: the event may already have been grouped by a
+        # concurrent create_incident, and must not be counted twice
+        linked = self.db.execute(
+            update(Event)
+            .where(Event.id == event.id, Event.incident_id.is_(None))
+            .values(incident_id=incident.id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        seen_at = event.timestamp or datetime.utcnow()
+        
+        if not linked:
+            self.db.commit()
+            return
+        
+        if settings.incident_touch_interval <= 0:
+            incident.updated_at = seen_at
+            incident.last_seen_at = seen_at
+            incident.event_count = Incident.event_count + 1
+            record_timeline_events(self.db, {incident.id: {seen_at: 1}})
+            self.db.commit()
+            return
+        
+        incident_id = incident.id
         self.db.commit()
+        get_incident_toucher().touch(incident_id, seen_at)
     
     def get_incident_with_events(self, incident_id: int) -> Optional[Incident]:
         """
@@ -163,28 +466,48 @@ class IncidentService:
         self, 
         skip: int = 0, 
         limit: int = 100,
-        status: Optional[str] = None
-    ) -> list[Incident]:
+        status: Optional[str] = None,
+        q: Optional[str] = None,
+        columns: Optional[Sequence] = None
+    ) -> List[Dict[str, Any]]:
         """
         List incidents with pagination.
         
+        Selects only the columns needed for list responses; the event count
+        is read from the incident row (no per-incident event counting).
+        
         Args:
             skip: Number of records to skip
             limit: Maximum records to return
             status: Filter by status (optional)
+            q: Full-text query over event messages (optional)
+            columns: Subset of INCIDENT_LIST_COLUMNS to select (default: all)
             
         Returns:
-            List of incidents
+            List of incident rows shaped like IncidentResponse,
+            most relevant first when `q` is given
         """
-        query = self.db.query(Incident)
+        columns = columns or INCIDENT_LIST_COLUMNS
+        query = select(*columns)
         
         if status:
-            query = query.filter(Incident.status == status)
+            query = query.where(Incident.status == status)
         
-        return (
+        matches = SearchService(self.db).match_incidents(q) if q else None
+        if matches is not None:
+            query = (
+                query
+                .join(matches, matches.c.incident_id == Incident.id)
+                .order_by(matches.c.rank)
+            )
+        
+        rows = self.db.execute(
             query
             .order_by(Incident.created_at.desc())
             .offset(skip)
             .limit(limit)
-            .all()
-        )
+        ).mappings()
+        
+        if not any(column.key == "status" for column in columns):
+            return [dict(row) for row in rows]
+        return [{**row, "status": row["status"].value} for row in rows]
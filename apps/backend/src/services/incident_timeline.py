@@ -0,0 +1,197 @@
+"""
+Per-incident event-count histograms ("timelines").
+
+Every incident has one `incident_timelines` row holding the number of
+linked events per time bucket, by event time. Buckets are
+TIMELINE_BUCKET_SECONDS wide to begin with; when an incident spans more
+than TIMELINE_MAX_BUCKETS buckets their width doubles (pairs of buckets are
+merged), so the row stays small however long the incident runs.
+
+Rows are updated incrementally where events are linked:
+- `IncidentService.create_incident` (and the backfill) build the row from
+  the events they link in bulk
+- single links (`add_event_to_incident`) are accumulated by the incident
+  toucher and added with its periodic flush, in the same transaction as
+  `event_count` (written through when INCIDENT_TOUCH_INTERVAL is 0)
+
+Bucket boundaries are multiples of the width since the Unix epoch, so
+merging is exact and timelines of different incidents line up.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.event import Event
+from ..models.incident_timeline import IncidentTimeline
+
+settings = get_settings()
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(timestamp: datetime, seconds: Optional[int] = None) -> datetime:
+    """Start of the bucket of the given width (default: TIMELINE_BUCKET_SECONDS) holding a time."""
+    width = timedelta(seconds=seconds or settings.timeline_bucket_seconds)
+    return EPOCH + ((timestamp - EPOCH) // width) * width
+
+
+class Timeline:
+    """
+    An incident's histogram: `counts[i]` events in
+    [start + i * bucket_seconds, start + (i + 1) * bucket_seconds).
+
+    Args:
+        start: Start of the first bucket (None for an empty timeline)
+        bucket_seconds: Bucket width (default: TIMELINE_BUCKET_SECONDS)
+        counts: Events per bucket
+        max_buckets: Buckets before the width doubles (default: TIMELINE_MAX_BUCKETS)
+    """
+
+    def __init__(
+        self,
+        start: Optional[datetime] = None,
+        bucket_seconds: Optional[int] = None,
+        counts: Optional[List[int]] = None,
+        max_buckets: Optional[int] = None,
+    ):
+        self.start = start
+        self.bucket_seconds = bucket_seconds or settings.timeline_bucket_seconds
+        self.counts = list(counts or [])
+        self.max_buckets = max(max_buckets or settings.timeline_max_buckets, 1)
+
+    @classmethod
+    def from_row(cls, row: Optional[IncidentTimeline]) -> "Timeline":
+        if row is None:
+            return cls()
+        return cls(row.start, row.bucket_seconds, row.counts)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def add(self, events: Dict[datetime, int]) -> None:
+        """
+        Count events.
+
+        Args:
+            events: Dict of event time (any resolution) -> number of events
+        """
+        points = {_seconds(at): n for at, n in events.items() if n}
+        if not points:
+            return
+        self._fit(min(points), max(points))
+        first = _seconds(self.start)
+        for at, n in points.items():
+            self.counts[(at - first) // self.bucket_seconds] += n
+
+    def downsample(self, max_buckets: int) -> "Timeline":
+        """Copy with buckets merged (width doubled) until there are at most `max_buckets`."""
+        copy = Timeline(self.start, self.bucket_seconds, self.counts, max_buckets)
+        if copy.counts:
+            first = _seconds(copy.start)
+            copy._fit(first, first)
+        return copy
+
+    def _fit(self, lo: int, hi: int) -> None:
+        """Widen and shift the buckets so they cover [lo, hi] (epoch seconds) and what's counted."""
+        width = self.bucket_seconds
+        if self.counts:
+            first = _seconds(self.start)
+            lo, hi = min(lo, first), max(hi, first + (len(self.counts) - 1) * width)
+        while hi // width - lo // width >= self.max_buckets:
+            width *= 2
+        self._regrid(lo // width * width, width, hi // width - lo // width + 1)
+
+    def _regrid(self, start_seconds: int, width: int, size: int) -> None:
+        counts = [0] * size
+        if self.counts:
+            old_start, old_width = _seconds(self.start), self.bucket_seconds
+            for i, n in enumerate(self.counts):
+                if n:
+                    counts[(old_start + i * old_width - start_seconds) // width] += n
+        self.start = EPOCH + timedelta(seconds=start_seconds)
+        self.bucket_seconds = width
+        self.counts = counts
+
+
+def _seconds(at: datetime) -> int:
+    return int((at - EPOCH).total_seconds())
+
+
+def record_timeline_events(db: Session, events: Dict[int, Dict[datetime, int]]) -> None:
+    """
+    Add linked events to incidents' timelines (the caller commits).
+
+    Rows are locked in incident order (SELECT ... FOR UPDATE where the
+    database supports it), so concurrent flushes from several processes
+    add up instead of overwriting each other.
+
+    Args:
+        db: Session holding the linking transaction
+        events: Dict of incident id -> {event time: number of events}
+    """
+    if not events:
+        return
+    ids = sorted(events)
+    rows = {
+        row.incident_id: row
+        for row in db.scalars(
+            select(IncidentTimeline)
+            .where(IncidentTimeline.incident_id.in_(ids))
+            .order_by(IncidentTimeline.incident_id)
+            .with_for_update()
+        )
+    }
+    for incident_id in ids:
+        row = rows.get(incident_id)
+        timeline = Timeline.from_row(row)
+        timeline.add(events[incident_id])
+        _store(db, incident_id, row, timeline)
+
+
+def rebuild_timeline(db: Session, incident_id: int) -> Timeline:
+    """
+    Recompute an incident's timeline from its linked events (after bulk
+    linking; the caller commits).
+
+    Returns:
+        The stored Timeline
+    """
+    timeline = Timeline()
+    timeline.add(_counted(db.scalars(
+        select(Event.timestamp).where(Event.incident_id == incident_id, Event.timestamp.isnot(None))
+    )))
+    _store(db, incident_id, db.get(IncidentTimeline, incident_id), timeline)
+    return timeline
+
+
+def get_timeline(db: Session, incident_id: int) -> Timeline:
+    """An incident's stored timeline (empty if it has no linked events)."""
+    return Timeline.from_row(db.get(IncidentTimeline, incident_id))
+
+
+def _counted(timestamps: Iterable[datetime]) -> Dict[datetime, int]:
+    counts: Dict[datetime, int] = {}
+    for at in timestamps:
+        at = bucket_start(at)
+        counts[at] = counts.get(at, 0) + 1
+    return counts
+
+
+def _store(db: Session, incident_id: int, row: Optional[IncidentTimeline], timeline: Timeline) -> None:
+    if not timeline.counts:
+        return
+    if row is None:
+        db.add(IncidentTimeline(
+            incident_id=incident_id,
+            start=timeline.start,
+            bucket_seconds=timeline.bucket_seconds,
+            counts=timeline.counts,
+        ))
+    else:
+        row.start = timeline.start
+        row.bucket_seconds = timeline.bucket_seconds
+        row.counts = timeline.counts  # a new list, so the JSON column is marked dirty
@@ -0,0 +1,146 @@
+"""
+Debounced incident aggregate updates.
+
+Linking an ERROR event to an open incident used to also bump the incident's
+`updated_at` in the same transaction, so during an error storm every ingest
+request queued on the row lock of one hot `incidents` row. Now linking only
+writes the event; `updated_at`, `last_seen_at` and `event_count` are
+accumulated here and flushed to each incident at most once per
+INCIDENT_TOUCH_INTERVAL seconds, together with the events' buckets of the
+incident timeline (services/incident_timeline.py).
+
+With INCIDENT_TOUCH_INTERVAL=0 the aggregates are written through in the
+caller's transaction (the old behaviour).
+"""
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, case, or_, update
+from sqlalchemy.orm import Session
+
+from ..core.database import create_session
+from ..core.metrics import metrics
+from ..models.incident import Incident
+from .incident_timeline import bucket_start, record_timeline_events
+
+
+class _PendingTouch:
+    __slots__ = ("count", "last_seen", "buckets")
+
+    def __init__(self, count: int, last_seen: datetime):
+        self.count = count
+        self.last_seen = last_seen
+        self.buckets: Dict[datetime, int] = {}  # timeline bucket start -> events
+
+
+class IncidentToucher:
+    """
+    In-memory accumulator of per-incident event counts and last-seen times.
+
+    Flushes are additive (`event_count = event_count + n`) and keep the
+    later of the stored and pending timestamps, so several processes can
+    each run their own toucher against the same database.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, _PendingTouch] = {}
+        metrics.register_collector("incident_touch", lambda: {"incident_touch_pending": len(self._pending)})
+
+    def touch(
+        self,
+        incident_id: int,
+        seen_at: datetime,
+        count: int = 1,
+        buckets: Optional[Dict[datetime, int]] = None,
+    ) -> None:
+        """
+        Record events linked to an incident.
+
+        Args:
+            incident_id: The incident
+            seen_at: Timestamp of the newest linked event
+            count: Number of events linked
+            buckets: Their timeline buckets (default: all `count` at `seen_at`)
+        """
+        if buckets is None:
+            buckets = {bucket_start(seen_at): count}
+        with self._lock:
+            pending = self._pending.get(incident_id)
+            if pending is None:
+                pending = self._pending[incident_id] = _PendingTouch(0, seen_at)
+            pending.count += count
+            if seen_at > pending.last_seen:
+                pending.last_seen = seen_at
+            for at, n in buckets.items():
+                pending.buckets[at] = pending.buckets.get(at, 0) + n
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Write all pending aggregates, one UPDATE per touched incident.
+
+        Args:
+            db: Session to use (default: a new short-lived session)
+
+        Returns:
+            Number of incidents updated
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        rows = [
+            {"b_id": incident_id, "b_count": pending.count, "b_seen": pending.last_seen}
+            for incident_id, pending in batch.items()
+        ]
+        timelines = {incident_id: pending.buckets for incident_id, pending in batch.items()}
+        try:
+            if db is None:
+                with create_session() as session:
+                    _apply(session, rows, timelines)
+            else:
+                _apply(db, rows, timelines)
+        except Exception:
+            # Put the batch back so the next flush retries it
+            for row in rows:
+                self.touch(row["b_id"], row["b_seen"], row["b_count"], timelines[row["b_id"]])
+            raise
+
+        metrics.inc("incident_touch_flushes_total")
+        metrics.inc("incident_touch_rows_total", len(rows))
+        return len(rows)
+
+
+def _apply(db: Session, rows: List[dict], timelines: Dict[int, Dict[datetime, int]]) -> None:
+    incidents = Incident.__table__
+    seen = bindparam("b_seen")
+
+    def later(column):
+        return case((or_(column.is_(None), column < seen), seen), else_=column)
+
+    db.execute(
+        update(incidents)
+        .where(incidents.c.id == bindparam("b_id"))
+        .values(
+            event_count=incidents.c.event_count + bindparam("b_count"),
+            last_seen_at=later(incidents.c.last_seen_at),
+            updated_at=later(incidents.c.updated_at),
+        ),
+        rows,
+    )
+    record_timeline_events(db, timelines)
+    db.commit()
+
+
+@lru_cache()
+def get_incident_toucher() -> IncidentToucher:
+    """Get the process-wide incident toucher."""
+    return IncidentToucher()
+
+
+def flush_incident_touches() -> int:
+    """Flush pending incident aggregates (background job entry point)."""
+    return get_incident_toucher().flush()
@@ -0,0 +1,374 @@
+"""
+Per-service ingest rate limits and adaptive sampling.
+
+Every event a client sends is first admitted here:
+
+- Rate limit: each service has a token bucket (`rate` events/second,
+  `burst` capacity). Non-ERROR events that find the bucket empty are
+  dropped; ERROR events take a token when one is available but are never
+  dropped, so incident detection stays exact.
+- Adaptive sampling: once a service sends more than `sample_target`
+  non-ERROR events per second, only every Nth is stored as a raw row, with
+  N = ceil(current rate / sample_target). ERROR events are never sampled.
+
+Whatever happens to an event, it is counted in the `event_rollups` table
+(per service, level and minute), so volumes stay exact while chatty
+services only keep a sample of their INFO/WARN rows. Counts accumulate in
+memory and are flushed every ROLLUP_FLUSH_INTERVAL seconds.
+
+Defaults come from INGEST_RATE_LIMIT / INGEST_RATE_BURST /
+INGEST_SAMPLE_TARGET; per-service overrides come from INGEST_SERVICE_LIMITS
+(JSON) and can be changed at runtime through /api/v1/limits. Limits are
+enforced per process; runtime changes reach every worker that sees the
+same state backend (core/state.py: every process on the host with
+STATE_BACKEND=sqlite), and only the worker that handled the request with
+the default local backend.
+"""
+import json
+import math
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.database import create_session
+from ..core.metrics import metrics
+from ..core.state import PROCESS, StateBackend, get_state
+from ..models.event_rollup import EventRollup
+from .ingest_service import event_time
+
+settings = get_settings()
+
+STORE = "store"
+SAMPLED = "sampled"
+DROPPED = "dropped"
+_METRICS = {SAMPLED: "ingest_sampled_out_total", DROPPED: "ingest_rate_limited_total"}
+
+# State backend channel for runtime limit changes
+LIMITS_CHANNEL = "ingest-limits"
+
+
+@dataclass
+class ServiceLimit:
+    """
+    Ingest limits for one service.
+
+    Attributes:
+        rate: Sustained events/second (0 = unlimited)
+        burst: Bucket capacity (0 = one second's worth of `rate`)
+        sample_target: Non-ERROR rows/second stored before sampling starts (0 = store all)
+    """
+    rate: float = 0.0
+    burst: int = 0
+    sample_target: float = 0.0
+
+
+class TokenBucket:
+    """Classic token bucket; refills continuously at `rate` tokens/second."""
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.capacity = float(burst or max(1, math.ceil(rate)))
+        self.tokens = self.capacity
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        """Take one token if available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next token is available."""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class _ServiceState:
+    __slots__ = ("bucket", "window_start", "window_count", "last_rate", "seen",
+                 "received", "stored", "sampled", "dropped")
+
+    def __init__(self):
+        self.bucket: Optional[TokenBucket] = None
+        self.window_start = 0
+        self.window_count = 0
+        self.last_rate = 0
+        self.seen = 0
+        self.received = self.stored = self.sampled = self.dropped = 0
+
+
+class IngestLimiter:
+    """Decides per event whether to store, sample out or drop it, and keeps rollups."""
+
+    def __init__(
+        self,
+        default: Optional[ServiceLimit] = None,
+        overrides: Optional[Dict[str, ServiceLimit]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.default = default or ServiceLimit()
+        self._overrides: Dict[str, ServiceLimit] = dict(overrides or {})
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state: Dict[str, _ServiceState] = {}
+        # (service, level, minute) -> [received, stored, dropped]
+        self._rollups: Dict[Tuple[str, str, datetime], List[int]] = {}
+        self._shared: Optional[StateBackend] = None
+        self._origin = uuid.uuid4().hex
+        metrics.register_collector("ingest_limits", lambda: {"event_rollups_pending": len(self._rollups)})
+
+    def limit_for(self, service: str) -> ServiceLimit:
+        """Effective limit for a service."""
+        return self._overrides.get(service, self.default)
+
+    def set_limit(self, service: str, limit: ServiceLimit) -> None:
+        """Override a service's limits (takes effect on its next event)."""
+        self._apply(service, limit)
+        self._broadcast(service, limit)
+
+    def clear_limit(self, service: str) -> bool:
+        """Return a service to the default limits."""
+        removed = self._apply(service, None)
+        if removed:
+            self._broadcast(service, None)
+        return removed
+
+    def share(self, state: StateBackend) -> None:
+        """Send runtime limit changes to, and apply them from, every worker using `state`."""
+        self._shared = state
+        state.subscribe(LIMITS_CHANNEL, self._on_change)
+
+    def _apply(self, service: str, limit: Optional[ServiceLimit]) -> bool:
+        with self._lock:
+            if limit is None:
+                changed = self._overrides.pop(service, None) is not None
+            else:
+                self._overrides[service] = limit
+                changed = True
+            state = self._state.get(service)
+            if state is not None:
+                state.bucket, state.seen = None, 0
+        return changed
+
+    def _broadcast(self, service: str, limit: Optional[ServiceLimit]) -> None:
+        if self._shared is not None:
+            self._shared.publish(LIMITS_CHANNEL, json.dumps({
+                "origin": self._origin,
+                "service": service,
+                "limit": asdict(limit) if limit is not None else None,
+            }))
+
+    def _on_change(self, message: str) -> None:
+        change = json.loads(message)
+        if change["origin"] != self._origin:
+            limit = change["limit"]
+            self._apply(change["service"], ServiceLimit(**limit) if limit is not None else None)
+
+    def overrides(self) -> Dict[str, ServiceLimit]:
+        """Services with explicit limits."""
+        with self._lock:
+            return dict(self._overrides)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-service totals since process start."""
+        with self._lock:
+            return {
+                service: {
+                    "received": state.received,
+                    "stored": state.stored,
+                    "sampled": state.sampled,
+                    "dropped": state.dropped,
+                }
+                for service, state in self._state.items()
+            }
+
+    def admit(self, service: str, level: str, timestamp: Optional[datetime] = None) -> str:
+        """
+        Decide what to do with one incoming event and count it.
+
+        Args:
+            service: Event service
+            level: Event level
+            timestamp: Client event time, if any (for the rollup minute)
+
+        Returns:
+            STORE, SAMPLED (counted but not stored) or DROPPED (rate limited)
+        """
+        now = self._clock()
+        error = level == "ERROR"
+        with self._lock:
+            limit = self._overrides.get(service, self.default)
+            state = self._state.get(service)
+            if state is None:
+                state = self._state[service] = _ServiceState()
+
+            if limit.rate > 0 and state.bucket is None:
+                state.bucket = TokenBucket(limit.rate, limit.burst, now)
+            if state.bucket is not None and not state.bucket.take(now) and not error:
+                decision = DROPPED
+            else:
+                decision = self._sample(state, limit, now, error)
+
+            if decision == DROPPED:
+                state.dropped += 1
+            else:
+                state.received += 1
+                if decision == STORE:
+                    state.stored += 1
+                else:
+                    state.sampled += 1
+            self._count(service, level, timestamp, decision)
+
+        if decision != STORE:
+            metrics.inc(_METRICS[decision])
+        return decision
+
+    def retry_after(self, service: str) -> float:
+        """Seconds until a rate-limited service may send again."""
+        with self._lock:
+            state = self._state.get(service)
+            if state is None or state.bucket is None:
+                return 0.0
+            return state.bucket.retry_after()
+
+    def _sample(self, state: _ServiceState, limit: ServiceLimit, now: float, error: bool) -> str:
+        if error or limit.sample_target <= 0:
+            return STORE
+        second = int(now)
+        if second != state.window_start:
+            state.last_rate = state.window_count if second == state.window_start + 1 else 0
+            state.window_start, state.window_count = second, 0
+        state.window_count += 1
+        rate = max(state.last_rate, state.window_count)
+        stride = max(1, math.ceil(rate / limit.sample_target))
+        keep = state.seen % stride == 0  # the first of every `stride` events
+        state.seen += 1
+        return STORE if keep else SAMPLED
+
+    def _count(self, service: str, level: str, timestamp: Optional[datetime], decision: str) -> None:
+        minute = event_time(timestamp).replace(second=0, microsecond=0)
+        counts = self._rollups.get((service, level, minute))
+        if counts is None:
+            counts = self._rollups[(service, level, minute)] = [0, 0, 0]
+        if decision == DROPPED:
+            counts[2] += 1
+        else:
+            counts[0] += 1
+            if decision == STORE:
+                counts[1] += 1
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        Add the pending counts to `event_rollups`.
+
+        Args:
+            db: Session to use (default: a new short-lived session)
+
+        Returns:
+            Number of rollup rows written
+        """
+        with self._lock:
+            batch, self._rollups = self._rollups, {}
+        if not batch:
+            return 0
+
+        rows = [
+            {"service": service, "level": level, "minute": minute,
+             "received": counts[0], "stored": counts[1], "dropped": counts[2]}
+            for (service, level, minute), counts in batch.items()
+        ]
+        try:
+            if db is None:
+                with create_session() as session:
+                    _upsert(session, rows)
+            else:
+                _upsert(db, rows)
+        except Exception:
+            # Merge the batch back so the next flush retries it
+            with self._lock:
+                for row in rows:
+                    key = (row["service"], row["level"], row["minute"])
+                    counts = self._rollups.setdefault(key, [0, 0, 0])
+                    counts[0] += row["received"]
+                    counts[1] += row["stored"]
+                    counts[2] += row["dropped"]
+            raise
+
+        metrics.inc("event_rollup_flushes_total")
+        return len(rows)
+
+
+def _upsert(db: Session, rows: List[dict]) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(EventRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EventRollup.service, EventRollup.level, EventRollup.minute],
+            set_={
+                "received": EventRollup.received + stmt.excluded.received,
+                "stored": EventRollup.stored + stmt.excluded.stored,
+                "dropped": EventRollup.dropped + stmt.excluded.dropped,
+            },
+        )
+        db.execute(stmt, rows)
+    else:
+        for row in rows:
+            result = db.execute(
+                update(EventRollup)
+                .where(
+                    EventRollup.service == row["service"],
+                    EventRollup.level == row["level"],
+                    EventRollup.minute == row["minute"],
+                )
+                .values(
+                    received=EventRollup.received + row["received"],
+                    stored=EventRollup.stored + row["stored"],
+                    dropped=EventRollup.dropped + row["dropped"],
+                )
+            )
+            if result.rowcount == 0:
+                db.add(EventRollup(**row))
+                db.flush()
+    db.commit()
+
+
+def _configured_overrides() -> Dict[str, ServiceLimit]:
+    if not settings.ingest_service_limits:
+        return {}
+    try:
+        raw = json.loads(settings.ingest_service_limits)
+        return {service: ServiceLimit(**values) for service, values in raw.items()}
+    except (ValueError, TypeError) as e:
+        print(f"⚠️  Ignoring invalid INGEST_SERVICE_LIMITS: {e}")
+        return {}
+
+
+@lru_cache()
+def get_ingest_limiter() -> IngestLimiter:
+    """Get the process-wide ingest limiter."""
+    default = ServiceLimit(
+        rate=settings.ingest_rate_limit,
+        burst=settings.ingest_rate_burst,
+        sample_target=settings.ingest_sample_target,
+    )
+    limiter = IngestLimiter(default, _configured_overrides())
+    state = get_state()
+    if state.scope != PROCESS:
+        limiter.share(state)
+    return limiter
+
+
+def flush_event_rollups() -> int:
+    """Flush pending rollup counts (background job entry point)."""
+    return get_ingest_limiter().flush()
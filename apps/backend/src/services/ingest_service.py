@@ -0,0 +1,274 @@
+"""
+Event ingestion service.
+Stores incoming events and runs incident detection for ERROR events.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+from ..core.config import get_settings
+from ..core.metrics import metrics
+from ..models.event import Event
+from ..models.ingest_key import IngestKey
+from ..schemas.event import EventCreate, EventRecord
+from .detection import detect_inline, get_detector
+from .fingerprint import fingerprint
+from .idempotency import get_idempotency_guard, key_digest
+from .incident_service import IncidentService
+
+settings = get_settings()
+
+
+def event_time(timestamp: Optional[datetime], now: Optional[datetime] = None) -> datetime:
+    """
+    Resolve the stored event time for an incoming event.
+    
+    Args:
+        timestamp: Client-supplied event time (naive UTC), if any
+        now: Arrival time (default: current UTC time)
+        
+    Returns:
+        The client timestamp, or the arrival time if none was given or it is
+        more than EVENT_MAX_CLOCK_SKEW seconds in the future
+    """
+    now = now or datetime.utcnow()
+    if timestamp is None:
+        return now
+    if timestamp > now + timedelta(seconds=settings.event_max_clock_skew):
+        metrics.inc("events_clock_skew_total")
+        return now
+    return timestamp
+
+
+class IngestService:
+    """
+    Service for receiving events.
+    
+    Every entry point (HTTP, bulk loaders, receivers) should go through here
+    so that storage and detection behave the same way.
+    
+    Events carrying an idempotency key that was already used within
+    IDEMPOTENCY_WINDOW are dropped (see services/idempotency.py);
+    `duplicates` counts them.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+        self.incidents = IncidentService(db)
+        self.duplicates = 0
+        self.committed = False  # events have been committed (a later error came from detection)
+        self.detection_errors: Dict[int, Exception] = {}  # ingest_each: event id -> its detection failure
+        self._new_keys: List[str] = []  # digests to add to the Bloom filter once committed
+    
+    def ingest(self, event: EventCreate) -> Optional[Event]:
+        """
+        Store an event and run incident detection if it is an ERROR.
+        
+        Args:
+            event: Validated event payload
+            
+        Returns:
+            The stored event (with incident_id set if it was grouped). For a
+            duplicate, the event first stored under its idempotency key, or
+            None if that one is no longer in the database
+        """
+        stored, duplicates = self._add_events([event], datetime.utcnow())
+        if duplicates:
+            self.db.rollback()
+            original = self.db.scalar(select(IngestKey.event_id).where(IngestKey.digest == duplicates[0]))
+            return self.db.get(Event, original) if original is not None else None
+        db_event = stored[0]
+        self._commit()
+        self.db.refresh(db_event)
+        
+        # Only process ERROR events for incident detection
+        if db_event.level == "ERROR":
+            self.detect(db_event)
+            self.db.refresh(db_event)
+        
+        return db_event
+    
+    def ingest_many(self, events: Sequence[Union[EventCreate, EventRecord]]) -> List[Event]:
+        """
+        Store a batch of events in one transaction, then run incident
+        detection for its ERROR events in event-time order.
+        
+        Used by the batch endpoint and the log receivers; the batch is
+        inserted with one multi-row INSERT instead of a commit per event.
+        
+        Args:
+            events: Validated event payloads (or trusted-agent records)
+            
+        Returns:
+            The stored events, in input order (duplicates left out)
+        """
+        db_events, _ = self._store_many(events)
+        return db_events
+    
+    def ingest_each(
+        self, events: Sequence[Union[EventCreate, EventRecord]]
+    ) -> List[Tuple[Optional[Event], bool]]:
+        """
+        Store events from several callers in one transaction, like
+        `ingest_many`, and report back per event (the SQLite single writer,
+        services/event_writer.py).
+        
+        Detection runs per event: if it fails for one, its transaction is
+        rolled back, the error is kept in `detection_errors` under the
+        event's id and the other events are still processed.
+        
+        Args:
+            events: Validated event payloads
+            
+        Returns:
+            (event, duplicate) per input, in input order: the stored event,
+            or for a duplicate the event first stored under its idempotency
+            key (None if that one is no longer in the database)
+        """
+        db_events, duplicates = self._store_many(events, isolate_detection=True)
+        originals = {}
+        if duplicates:
+            originals = dict(self.db.execute(
+                select(IngestKey.digest, IngestKey.event_id)
+                .where(IngestKey.digest.in_(set(duplicates.values())))
+            ).all())
+        stored = iter(db_events)
+        results = []
+        for i in range(len(events)):
+            if i in duplicates:
+                original = originals.get(duplicates[i])
+                results.append((self.db.get(Event, original) if original is not None else None, True))
+            else:
+                results.append((next(stored), False))
+        
+        # Detection commits expire the batch's other events; load them now,
+        # in one query, since callers use them after this session is closed
+        expired = [inspect(event).identity[0] for event, _ in results
+                   if event is not None and inspect(event).expired_attributes]
+        if expired:
+            self.db.execute(select(Event).where(Event.id.in_(expired))).scalars().all()
+        return results
+    
+    def _store_many(
+        self, events: Sequence[Union[EventCreate, EventRecord]], isolate_detection: bool = False
+    ) -> Tuple[List[Event], Dict[int, str]]:
+        db_events, duplicates = self._add_events(events, datetime.utcnow())
+        
+        # Keep the inserted state loaded instead of re-selecting every row
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            self._commit()
+        finally:
+            self.db.expire_on_commit = expire_on_commit
+        
+        errors = sorted(
+            (event for event in db_events if event.level == "ERROR"),
+            key=lambda event: (event.timestamp, event.id)
+        )
+        for event in errors:
+            event_id = event.id
+            try:
+                self.detect(event)
+                self.db.refresh(event)  # pick up incident_id
+            except Exception as e:
+                if not isolate_detection:
+                    raise
+                self.db.rollback()
+                self.detection_errors[event_id] = e
+        
+        return db_events, duplicates
+    
+    def _add_events(
+        self, events: Sequence[Union[EventCreate, EventRecord]], now: datetime
+    ) -> Tuple[List[Event], Dict[int, str]]:
+        """
+        Add events to the session, leaving out duplicates.
+        
+        Keyed events are flushed and their keys inserted in the same
+        transaction; they reach the Bloom filter once `_commit` succeeds.
+        
+        Returns:
+            The added events, and {input index: key digest} of the duplicates
+        """
+        db_events = [self._new_event(event, now) for event in events]
+        digests = {
+            i: key_digest(event.service, event.idempotency_key)
+            for i, event in enumerate(events)
+            if event.idempotency_key and settings.idempotency_window > 0
+        }
+        if not digests:
+            self.db.add_all(db_events)
+            return db_events, {}
+        
+        guard = get_idempotency_guard()
+        duplicates: Dict[int, str] = {}
+        first: Dict[str, int] = {}
+        for i, digest in digests.items():
+            if digest in first:
+                duplicates[i] = digest  # repeated within this batch
+            else:
+                first[digest] = i
+        for digest in guard.seen(self.db, guard.maybe_seen(first), now):
+            duplicates[first.pop(digest)] = digest
+        
+        self.db.add_all(event for i, event in enumerate(db_events) if i not in duplicates)
+        if first:
+            self.db.flush()
+            taken = guard.claim(self.db, {digest: db_events[i].id for digest, i in first.items()}, now)
+            for digest in taken:  # stored by another process, or before a restart
+                i = first.pop(digest)
+                duplicates[i] = digest
+                self.db.delete(db_events[i])
+        self._new_keys = list(first)
+        
+        if duplicates:
+            self.duplicates += len(duplicates)
+            metrics.inc("ingest_duplicates_total", len(duplicates))
+        return [event for i, event in enumerate(db_events) if i not in duplicates], duplicates
+    
+    def _commit(self) -> None:
+        self.db.commit()
+        self.committed = True
+        if self._new_keys:
+            get_idempotency_guard().remember(self._new_keys)
+            self._new_keys = []
+    
+    def _new_event(self, event: Union[EventCreate, EventRecord], now: Optional[datetime] = None) -> Event:
+        return Event(
+            service=event.service,
+            level=event.level,
+            message=event.message,
+            timestamp=event_time(event.timestamp, now),
+            fingerprint=fingerprint(event.message)
+        )
+    
+    def detect(self, event: Event) -> None:
+        """
+        Link an ERROR event to its service's open incident, or open a new
+        incident if the threshold is met.
+        
+        With INGEST_SHARDS > 0 the work runs on the service's shard thread;
+        otherwise it runs here under the per-service detection lock. Either
+        way it is based on the event's event time (see services/detection.py).
+        
+        Args:
+            event: The committed ERROR event
+        """
+        detector = get_detector()
+        if detector is not None:
+            result = detector.submit(event).result()
+        else:
+            result = detect_inline(self.db, event)
+        
+        incident = self.incidents.get_incident_with_events(result.incident_id) if result else None
+        new_incident = incident if result and result.created else None
+        joined_incident = incident if result and not result.created else None
+        
+        if new_incident:
+            print(f"🚨 New incident created: ID={new_incident.id} for service={new_incident.service}")
+            # Analyze outside the detection lock; the LLM call can take seconds
+            self.incidents.auto_analyze_incident(new_incident)
+        elif joined_incident:
+            # Refresh the stored analysis if the incident has materially changed
+            self.incidents.maybe_reanalyze(joined_incident, event)
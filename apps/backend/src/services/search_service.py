@@ -0,0 +1,201 @@
+"""
+Full-text search over event messages.
+Translates a user query into the database's native full-text syntax
+(PostgreSQL tsquery or SQLite FTS5) and returns ranked matches.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import Float, Integer, and_, func, literal, literal_column, select, text, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+
+from ..core.config import get_settings
+from ..models.event import Event
+
+settings = get_settings()
+
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Rank of matches outside the rank window: after every ranked match (ranked
+# values are <= 0 on both backends)
+UNRANKED = 1.0
+
+
+@dataclass
+class SearchTerm:
+    """A single search term: a word, a prefix, or a quoted phrase."""
+    words: List[str]
+    prefix: bool = False
+
+    @property
+    def is_phrase(self) -> bool:
+        return len(self.words) > 1
+
+
+def parse_search_query(q: str) -> List[SearchTerm]:
+    """
+    Parse a search string into terms.
+
+    Supported syntax:
+    - `connection refused` → both words must match
+    - `"connection refused"` → exact phrase
+    - `conn*` → prefix match
+
+    Args:
+        q: Raw query string from the client
+
+    Returns:
+        List of terms (empty if the query has no searchable words)
+    """
+    terms = []
+    for phrase, word in _TOKEN_RE.findall(q or ""):
+        if phrase:
+            words = _WORD_RE.findall(phrase.lower())
+            if words:
+                terms.append(SearchTerm(words=words))
+            continue
+        prefix = word.endswith("*")
+        words = _WORD_RE.findall(word.lower())
+        if not words:
+            continue
+        # Punctuation inside a bare token (e.g. "db.pool") splits into words;
+        # only the last one keeps the prefix marker.
+        for w in words[:-1]:
+            terms.append(SearchTerm(words=[w]))
+        terms.append(SearchTerm(words=[words[-1]], prefix=prefix))
+    return terms
+
+
+def to_fts5_query(terms: List[SearchTerm]) -> str:
+    """Render terms as an SQLite FTS5 MATCH expression."""
+    parts = []
+    for term in terms:
+        part = '"' + " ".join(term.words) + '"'
+        if term.prefix:
+            part += "*"
+        parts.append(part)
+    return " ".join(parts)
+
+
+def to_tsquery(terms: List[SearchTerm]) -> str:
+    """Render terms as a PostgreSQL to_tsquery expression."""
+    parts = []
+    for term in terms:
+        if term.is_phrase:
+            parts.append("(" + " <-> ".join(term.words) + ")")
+        elif term.prefix:
+            parts.append(f"{term.words[0]}:*")
+        else:
+            parts.append(term.words[0])
+    return " & ".join(parts)
+
+
+class SearchService:
+    """
+    Service for ranked full-text search over events.
+
+    Ranks are normalized so that a lower value is a better match on every
+    backend (FTS5 bm25 is already ascending; ts_rank is negated).
+    
+    Ranking cost grows with the number of matches, so only the most recent
+    `search_rank_window` matches are ranked. This keeps common words
+    ("error", "timeout") fast on very large tables. Older matches are still
+    returned, after the ranked ones, with rank `UNRANKED`.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def match_events(self, q: str) -> Optional[Subquery]:
+        """
+        Build a subquery of matching events.
+
+        Args:
+            q: Raw query string
+
+        Returns:
+            Subquery with `event_id` and `rank` columns, or None if the
+            query contains nothing searchable
+        """
+        terms = parse_search_query(q)
+        if not terms:
+            return None
+
+        window = settings.search_rank_window
+
+        if self.dialect == "sqlite":
+            sql = "SELECT rowid AS event_id, bm25(events_fts) AS rank FROM events_fts WHERE events_fts MATCH :fts_query"
+            params = {"fts_query": to_fts5_query(terms)}
+            if window > 0:
+                sql = (
+                    f"SELECT * FROM ({sql} ORDER BY rowid DESC LIMIT :rank_window) "
+                    "UNION ALL "
+                    "SELECT * FROM (SELECT rowid AS event_id, :unranked AS rank FROM events_fts "
+                    "WHERE events_fts MATCH :fts_query ORDER BY rowid DESC LIMIT -1 OFFSET :rank_window)"
+                )
+                params.update(rank_window=window, unranked=UNRANKED)
+            return (
+                text(sql)
+                .bindparams(**params)
+                .columns(event_id=Integer, rank=Float)
+                .subquery("event_matches")
+            )
+
+        if self.dialect == "postgresql":
+            vector = literal_column("events.search_vector")
+            query = func.to_tsquery("english", to_tsquery(terms))
+            ranked = select(
+                Event.id.label("event_id"),
+                (-func.ts_rank(vector, query)).label("rank"),
+            ).where(vector.op("@@")(query))
+            if window <= 0:
+                return ranked.subquery("event_matches")
+            recent = ranked.order_by(Event.id.desc()).limit(window).subquery()
+            older = (
+                select(Event.id.label("event_id"), literal(UNRANKED, Float).label("rank"))
+                .where(vector.op("@@")(query))
+                .order_by(Event.id.desc())
+                .offset(window)
+                .subquery()
+            )
+            return union_all(select(recent), select(older)).subquery("event_matches")
+
+        # Other backends: unranked substring match on every word
+        conditions = [
+            Event.message.ilike(f"%{' '.join(term.words)}%") for term in terms
+        ]
+        return (
+            select(Event.id.label("event_id"), literal(0.0).label("rank"))
+            .where(and_(*conditions))
+            .subquery("event_matches")
+        )
+
+    def match_incidents(self, q: str) -> Optional[Subquery]:
+        """
+        Build a subquery of incidents that contain at least one matching event.
+
+        Args:
+            q: Raw query string
+
+        Returns:
+            Subquery with `incident_id` and `rank` (best event rank) columns,
+            or None if the query contains nothing searchable
+        """
+        matches = self.match_events(q)
+        if matches is None:
+            return None
+
+        return (
+            select(
+                Event.incident_id.label("incident_id"),
+                func.min(matches.c.rank).label("rank"),
+            )
+            .join(matches, matches.c.event_id == Event.id)
+            .where(Event.incident_id.is_not(None))
+            .group_by(Event.incident_id)
+            .subquery("incident_matches")
+        )
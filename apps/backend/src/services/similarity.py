@@ -0,0 +1,243 @@
+"""
+Similar-incident retrieval.
+
+Incidents are embedded locally (no network) as hashed n-gram vectors over
+their message templates: each distinct fingerprint contributes the word
+unigrams and bigrams of its normalized template (services/fingerprint.py),
+weighted by log(1 + events with that template), plus the service name.
+Features are hashed into SIMILAR_INDEX_DIM signed buckets, so the vector
+size is fixed no matter how varied the messages are.
+
+Analyzed incidents store their vector (`incidents.embedding`) and are kept
+in a process-wide VectorIndex, refreshed from the database every
+SIMILAR_INDEX_REFRESH_INTERVAL seconds so analyses done by other processes
+show up too. At the default 256 dimensions the index takes 1 KB per
+incident (~1 GB at a million).
+
+When a new incident's nearest analyzed neighbour scores at least
+SIMILAR_REUSE_THRESHOLD, AIService reuses that neighbour's analysis
+instead of calling the LLM.
+"""
+import math
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.database import create_session
+from ..core.metrics import metrics
+from ..models.event import Event
+from ..models.incident import Incident
+from .fingerprint import normalize_message
+from .vector_index import VectorIndex
+
+settings = get_settings()
+
+_REFRESH_BATCH = 50000
+_REFRESH_MARGIN = timedelta(minutes=5)
+
+
+def _features(template: str) -> Iterable[str]:
+    tokens = template.split()
+    for token in tokens:
+        if not (token.startswith("<") and token.endswith(">")):  # bare placeholders carry no signal
+            yield token
+    for first, second in zip(tokens, tokens[1:]):
+        yield f"{first} {second}"
+
+
+def embed_templates(service: str, templates: Dict[str, int], dim: Optional[int] = None) -> np.ndarray:
+    """
+    Hashed n-gram vector for a set of message templates.
+
+    Args:
+        service: Incident service (added as one feature)
+        templates: Normalized template -> number of events
+        dim: Vector size (default: SIMILAR_INDEX_DIM)
+
+    Returns:
+        Unnormalized float32 vector
+    """
+    dim = dim or settings.similar_index_dim
+    vector = np.zeros(dim, dtype=np.float32)
+    weighted = [(f"service={service}", 1.0)]
+    for template, count in templates.items():
+        weight = math.log1p(count)
+        weighted.extend((feature, weight) for feature in _features(template))
+    for feature, weight in weighted:
+        # crc32 is stable across processes (unlike hash()) and fast
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += weight if h & 0x80000000 else -weight
+    return vector
+
+
+def embed_events(service: str, events: Iterable[Event]) -> np.ndarray:
+    """Vector for an incident from its loaded events (one template per fingerprint)."""
+    counts: Counter = Counter()
+    messages: Dict[str, str] = {}
+    for event in events:
+        key = event.fingerprint or event.message
+        counts[key] += 1
+        messages.setdefault(key, event.message)
+    return embed_templates(service, {normalize_message(messages[key]): n for key, n in counts.items()})
+
+
+def incident_embedding(db: Session, incident: Incident) -> np.ndarray:
+    """Vector for an incident, built from one message per fingerprint in the database."""
+    rows = db.execute(
+        select(Event.fingerprint, func.min(Event.message), func.count(Event.id))
+        .where(Event.incident_id == incident.id)
+        .group_by(Event.fingerprint)
+    ).all()
+    templates: Counter = Counter()
+    for _, message, count in rows:
+        templates[normalize_message(message)] += count
+    return embed_templates(incident.service, templates)
+
+
+def to_blob(vector: np.ndarray) -> bytes:
+    """Serialize a vector for `incidents.embedding`."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_blob(blob: bytes) -> Optional[np.ndarray]:
+    """Deserialize a stored vector (None if it has a different dimension)."""
+    vector = np.frombuffer(blob, dtype=np.float32)
+    return vector if len(vector) == settings.similar_index_dim else None
+
+
+class SimilarityIndex:
+    """VectorIndex of analyzed incidents, kept in sync with `incidents.embedding`."""
+
+    def __init__(self, dim: int):
+        self.index = VectorIndex(dim)
+        self._refresh_lock = threading.Lock()
+        self._synced_until: Optional[datetime] = None
+        metrics.register_collector("similarity", lambda: {"similar_index_size": len(self.index)})
+
+    def add(self, incident_id: int, vector: np.ndarray) -> None:
+        """Insert or replace an incident's vector."""
+        self.index.add([incident_id], vector[None, :])
+
+    def refresh(self) -> int:
+        """
+        Load vectors of incidents analyzed since the last refresh.
+
+        Returns:
+            Number of incidents loaded
+        """
+        with self._refresh_lock:
+            loaded = 0
+            with create_session() as db:
+                last_id = 0
+                since = self._synced_until
+                while True:
+                    query = (
+                        select(Incident.id, Incident.embedding, Incident.analyzed_at)
+                        .where(Incident.embedding.isnot(None), Incident.id > last_id)
+                        .order_by(Incident.id)
+                        .limit(_REFRESH_BATCH)
+                    )
+                    if since is not None:
+                        # Margin for analyses committed after a later one was seen
+                        query = query.where(Incident.analyzed_at >= since - _REFRESH_MARGIN)
+                    rows = db.execute(query).all()
+                    if not rows:
+                        break
+                    ids, vectors = [], []
+                    for incident_id, blob, analyzed_at in rows:
+                        vector = from_blob(blob)
+                        if vector is not None:
+                            ids.append(incident_id)
+                            vectors.append(vector)
+                        if analyzed_at and (self._synced_until is None or analyzed_at > self._synced_until):
+                            self._synced_until = analyzed_at
+                    if ids:
+                        self.index.add(ids, np.stack(vectors))
+                    loaded += len(ids)
+                    last_id = rows[-1][0]
+            return loaded
+
+    def nearest(
+        self, vector: np.ndarray, k: int = 10, exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """Top-k (incident_id, cosine similarity) for one vector."""
+        return self.index.search(vector[None, :], k, exclude=[exclude])[0]
+
+
+@lru_cache()
+def get_similarity_index() -> SimilarityIndex:
+    """Get the process-wide similarity index (filled by `refresh_similarity_index`)."""
+    return SimilarityIndex(settings.similar_index_dim)
+
+
+def refresh_similarity_index() -> int:
+    """Pick up incidents analyzed by other processes (background job entry point)."""
+    return get_similarity_index().refresh()
+
+
+def similar_incidents(
+    db: Session, incident: Incident, k: int = 10, min_score: float = 0.0
+) -> List[Tuple[Incident, float]]:
+    """
+    Past analyzed incidents most similar to an incident.
+
+    Args:
+        db: Database session
+        incident: The incident to compare
+        k: Maximum number of results
+        min_score: Minimum cosine similarity
+
+    Returns:
+        (incident, score) pairs, most similar first
+    """
+    vector = from_blob(incident.embedding) if incident.embedding else None
+    if vector is None:
+        vector = incident_embedding(db, incident)
+    hits = [(i, s) for i, s in get_similarity_index().nearest(vector, k, exclude=incident.id) if s >= min_score]
+    if not hits:
+        return []
+    incidents = {i.id: i for i in db.query(Incident).filter(Incident.id.in_([i for i, _ in hits]))}
+    return [(incidents[i], score) for i, score in hits if i in incidents]
+
+
+def reusable_analysis(incident: Incident) -> Optional[Dict]:
+    """
+    The analysis of a near-identical past incident, if there is one.
+
+    Args:
+        incident: The incident about to be analyzed (with events loaded)
+
+    Returns:
+        Analysis dict (plus `reused_from` and `similarity`), or None if no
+        analyzed neighbour reaches SIMILAR_REUSE_THRESHOLD
+    """
+    threshold = settings.similar_reuse_threshold
+    if threshold <= 0 or not incident.events:
+        return None
+    vector = embed_events(incident.service, incident.events)
+    for neighbour_id, score in get_similarity_index().nearest(vector, k=3, exclude=incident.id):
+        if score < threshold:
+            break
+        with create_session() as db:
+            neighbour = db.get(Incident, neighbour_id)
+            if neighbour is None or neighbour.category is None:
+                continue
+            metrics.inc("analysis_reused_total")
+            print(f"♻️  Reusing analysis of incident #{neighbour.id} for #{incident.id} (similarity {score:.3f})")
+            return {
+                "category": neighbour.category,
+                "severity": neighbour.severity,
+                "summary": neighbour.summary,
+                "recommended_actions": neighbour.recommended_actions,
+                "reused_from": neighbour.id,
+                "similarity": round(score, 4),
+            }
+    return None
@@ -0,0 +1,161 @@
+"""
+Incident summary counters.
+Keeps per-status, per-severity and per-service incident counts up to date
+so the dashboard summary is a read of a few small rows.
+"""
+from typing import Any, Dict
+
+from sqlalchemy import String, case, func, select, type_coerce, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..core.database import create_session
+from ..models.incident import Incident, IncidentStatus
+from ..models.incident_counter import IncidentCounter
+
+# Counter key used for incidents without a severity (not analyzed yet)
+UNASSIGNED = "unassigned"
+
+DIMENSIONS = ("status", "severity", "service")
+
+
+def _key_columns() -> Dict[str, Any]:
+    """Per dimension, the SQL expression giving an incident's counter key (as `_key` does)."""
+    stored_status = type_coerce(Incident.status, String)  # enum member name
+    return {
+        "status": case({status.name: status.value for status in IncidentStatus}, value=stored_status,
+                       else_=UNASSIGNED),
+        "severity": func.coalesce(Incident.severity, UNASSIGNED),
+        "service": func.coalesce(Incident.service, UNASSIGNED),
+    }
+
+
+def _key(value) -> str:
+    """Normalize an incident attribute to a counter key."""
+    if value is None:
+        return UNASSIGNED
+    if isinstance(value, IncidentStatus):
+        return value.value
+    return str(value)
+
+
+class IncidentSummaryService:
+    """
+    Service for maintaining and reading incident counters.
+
+    Counter changes are added to the caller's session and committed with the
+    incident change itself, so counts and incidents stay consistent.
+    `reconcile()` recomputes everything from the incidents table to repair
+    drift (e.g. rows edited outside the API).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_created(self, incident: Incident) -> None:
+        """
+        Count a newly created incident.
+
+        Args:
+            incident: The new incident
+        """
+        self._add("status", _key(incident.status or IncidentStatus.OPEN), 1)
+        self._add("severity", _key(incident.severity), 1)
+        self._add("service", _key(incident.service), 1)
+
+    def record_change(self, dimension: str, old_value, new_value) -> None:
+        """
+        Move one incident from one counter to another.
+
+        Args:
+            dimension: "status" or "severity"
+            old_value: Previous attribute value
+            new_value: New attribute value
+        """
+        old_key, new_key = _key(old_value), _key(new_value)
+        if old_key == new_key:
+            return
+        self._add(dimension, old_key, -1)
+        self._add(dimension, new_key, 1)
+
+    def get_summary(self) -> Dict:
+        """
+        Read the current counts.
+
+        Returns:
+            Dict with `total`, `by_status`, `by_severity` and `by_service`
+            (zero counts omitted)
+        """
+        summary = {f"by_{dimension}": {} for dimension in DIMENSIONS}
+        rows = self.db.execute(
+            select(IncidentCounter.dimension, IncidentCounter.key, IncidentCounter.count)
+            .where(IncidentCounter.count > 0)
+        )
+        for dimension, key, count in rows:
+            if dimension in DIMENSIONS:
+                summary[f"by_{dimension}"][key] = count
+        summary["total"] = sum(summary["by_status"].values())
+        return summary
+
+    def reconcile(self) -> int:
+        """
+        Recompute all counters from the incidents table and commit.
+
+        Each dimension's counters are set by one UPDATE counting incidents
+        in a correlated subquery, so a counter change another transaction
+        commits meanwhile is counted rather than overwritten by a count
+        taken before it.
+
+        Returns:
+            Number of counters whose stored value was wrong
+        """
+        drifted = 0
+        for dimension, key in _key_columns().items():
+            stored = set(self.db.scalars(
+                select(IncidentCounter.key).where(IncidentCounter.dimension == dimension)
+            ))
+            for missing in set(self.db.scalars(select(key).distinct())) - stored:
+                self._add(dimension, missing, 0)
+
+            actual = select(func.count()).select_from(Incident).where(key == IncidentCounter.key).scalar_subquery()
+            result = self.db.execute(
+                update(IncidentCounter)
+                .where(IncidentCounter.dimension == dimension, IncidentCounter.count != actual)
+                .values(count=actual)
+                .execution_options(synchronize_session=False)
+            )
+            drifted += result.rowcount
+
+        self.db.commit()
+        return drifted
+
+    def _add(self, dimension: str, key: str, delta: int) -> None:
+        """Atomically add `delta` to a counter, creating it if needed."""
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(IncidentCounter).values(dimension=dimension, key=key, count=delta)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[IncidentCounter.dimension, IncidentCounter.key],
+                set_={"count": IncidentCounter.count + delta},
+            )
+            self.db.execute(stmt)
+            return
+
+        result = self.db.execute(
+            update(IncidentCounter)
+            .where(IncidentCounter.dimension == dimension, IncidentCounter.key == key)
+            .values(count=IncidentCounter.count + delta)
+        )
+        if result.rowcount == 0:
+            self.db.add(IncidentCounter(dimension=dimension, key=key, count=delta))
+            self.db.flush()
+
+
+def reconcile_counters() -> int:
+    """Reconcile incident counters in a new session (background job entry point)."""
+    with create_session() as db:
+        drifted = IncidentSummaryService(db).reconcile()
+    if drifted:
+        print(f"⚠️  Reconciled {drifted} drifted incident counters")
+    return drifted
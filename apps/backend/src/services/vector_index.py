@@ -0,0 +1,117 @@
+"""
+In-memory cosine-similarity index over fixed-size vectors.
+
+Vectors are L2-normalized on insert and kept in one contiguous float32
+matrix that grows by doubling, so adds are amortized O(1) and a query is a
+single matrix product. Queries are answered in batches: one pass over the
+matrix serves every query in the batch, which is what keeps top-k fast at
+a million rows (the scan is bound by memory bandwidth, not arithmetic).
+"""
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rows scored per block; bounds the temporary score matrix to BLOCK x queries
+_BLOCK_ROWS = 131072
+
+
+class VectorIndex:
+    """Growable matrix of unit vectors keyed by integer id (re-adding an id replaces it)."""
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        """
+        Insert or replace vectors.
+
+        Args:
+            ids: One id per vector
+            vectors: Array of shape (len(ids), dim); normalized here
+        """
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim))
+        with self._lock:
+            for key, vector in zip(ids, vectors):
+                row = self._rows.get(key)
+                if row is None:
+                    if self._size == len(self._ids):
+                        self._grow()
+                    row = self._size
+                    self._rows[key] = row
+                    self._ids[row] = key
+                    self._size += 1
+                self._vectors[row] = vector
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        exclude: Optional[Iterable[Optional[int]]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Batched cosine top-k.
+
+        Args:
+            queries: Array of shape (q, dim) (or one vector of shape (dim,))
+            k: Neighbours per query
+            exclude: Per query, an id to leave out of its results (e.g. itself)
+
+        Returns:
+            For each query, up to k (id, cosine similarity) pairs, best first
+        """
+        queries = _normalize(np.asarray(queries, dtype=np.float32).reshape(-1, self.dim))
+        exclude = list(exclude) if exclude is not None else [None] * len(queries)
+        with self._lock:
+            # Growth swaps in new arrays, so these references stay consistent
+            vectors, ids, size = self._vectors, self._ids, self._size
+        if size == 0 or k <= 0:
+            return [[] for _ in queries]
+
+        want = min(k + 1, size)  # one spare for the excluded id
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, size, _BLOCK_ROWS):
+            block = vectors[start:min(start + _BLOCK_ROWS, size)]
+            scores = queries @ block.T  # (q, block)
+            take = min(want, scores.shape[1])
+            top = np.argpartition(scores, -take, axis=1)[:, -take:]
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            if best_scores.shape[1] > want:
+                keep = np.argpartition(best_scores, -want, axis=1)[:, -want:]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        results = []
+        for query, skip in enumerate(exclude):
+            hits = []
+            for column in order[query]:
+                key = int(ids[best_rows[query, column]])
+                if key != skip:
+                    hits.append((key, float(best_scores[query, column])))
+            results.append(hits[:k])
+        return results
+
+    def _grow(self) -> None:
+        # Caller holds self._lock
+        capacity = max(1024, 2 * len(self._ids))
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._vectors, self._ids = vectors, ids
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
@@ -0,0 +1,14 @@
+"""
+Test configuration: point the app at a throwaway SQLite database and build
+its schema through the real migrations before any test module imports the app.
+"""
+import os
+import tempfile
+
+_test_dir = tempfile.mkdtemp(prefix="ops_assist_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_test_dir, 'test.db')}"
+os.environ["OPENAI_API_KEY"] = ""
+
+from src.cli.migrate import upgrade_database  # noqa: E402
+
+upgrade_database()
@@ -0,0 +1,86 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from src.api.routes import incidents as incidents_routes
+from src.core.database import create_session
+from src.main import app
+from src.services import analysis_coordinator
+from src.services.analysis_coordinator import AnalysisCoordinator
+from src.services.incident_service import IncidentService
+
+client = TestClient(app)
+
+
+class SlowAI:
+    """Stand-in for AIService that takes a while and counts calls."""
+
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def analyze_incident(self, incident):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {"category": "other", "severity": "P3", "summary": "slow", "recommended_actions": []}
+
+
+def _new_incident():
+    with create_session() as db:
+        return IncidentService(db).create_incident(f"analysis-{uuid.uuid4().hex[:8]}", []).id
+
+
+def test_concurrent_analyze_requests_share_one_llm_call(monkeypatch):
+    ai = SlowAI()
+    coordinator = AnalysisCoordinator(max_concurrent=2, max_queue=2)
+    monkeypatch.setattr(analysis_coordinator, "get_ai_service", lambda: ai)
+    monkeypatch.setattr(incidents_routes, "get_analysis_coordinator", lambda: coordinator)
+    incident_id = _new_incident()
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        responses = list(pool.map(lambda _: client.post(f"/api/v1/incidents/{incident_id}/analyze"), range(5)))
+
+    assert [r.status_code for r in responses] == [200] * 5
+    assert ai.calls == 1
+    assert client.get(f"/api/v1/incidents/{incident_id}/analysis").json()["state"] == "completed"
+    coordinator.shutdown()
+
+
+def test_saturated_queue_returns_202_with_status_url(monkeypatch):
+    ai = SlowAI(delay=0.5)
+    coordinator = AnalysisCoordinator(max_concurrent=1, max_queue=1)
+    monkeypatch.setattr(analysis_coordinator, "get_ai_service", lambda: ai)
+    monkeypatch.setattr(incidents_routes, "get_analysis_coordinator", lambda: coordinator)
+    busy, queued = _new_incident(), _new_incident()
+
+    coordinator.submit(busy)
+    response = client.post(f"/api/v1/incidents/{queued}/analyze")
+
+    assert response.status_code == 202
+    status_url = response.json()["status_url"]
+    assert status_url == f"/api/v1/incidents/{queued}/analysis"
+    assert client.get(status_url).json()["state"] in {"queued", "running", "completed"}
+    coordinator.shutdown()
+
+
+def test_full_queue_refuses_new_analyses(monkeypatch):
+    ai = SlowAI(delay=0.5)
+    coordinator = AnalysisCoordinator(max_concurrent=1, max_queue=1)
+    monkeypatch.setattr(analysis_coordinator, "get_ai_service", lambda: ai)
+    monkeypatch.setattr(incidents_routes, "get_analysis_coordinator", lambda: coordinator)
+    running, queued, refused = _new_incident(), _new_incident(), _new_incident()
+
+    coordinator.submit(running)
+    coordinator.submit(queued)
+    response = client.post(f"/api/v1/incidents/{refused}/analyze")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert client.post(f"/api/v1/incidents/{queued}/analyze").status_code == 200  # joins the queued run
+    assert coordinator.get_state(refused) is None
+    coordinator.shutdown()
@@ -0,0 +1,112 @@
+import threading
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from src.api.routes import analysis_jobs as analysis_jobs_routes
+from src.core.database import create_session
+from src.main import app
+from src.models.analysis_job import AnalysisJob
+from src.models.event import Event
+from src.models.incident import Incident
+from src.services.analysis_jobs import AnalysisJobRunner
+from src.services.fingerprint import fingerprint
+from src.services.incident_service import IncidentService
+
+client = TestClient(app)
+
+
+class RecordingAI:
+    def __init__(self, on_call=None):
+        self.calls = []
+        self.on_call = on_call
+        self._lock = threading.Lock()
+
+    def analyze_incident(self, incident):
+        with self._lock:
+            self.calls.append(incident.id)
+            count = len(self.calls)
+        if self.on_call:
+            self.on_call(count)
+        return {"category": "other", "severity": "P3", "summary": f"bulk {incident.id}", "recommended_actions": []}
+
+
+def _incidents(service, count):
+    ids = []
+    with create_session() as db:
+        for i in range(count):
+            message = f"Worker {i} crashed with exit code 137"
+            events = [Event(service=service, level="ERROR", message=message, fingerprint=fingerprint(message))]
+            db.add_all(events)
+            db.commit()
+            ids.append(IncidentService(db).create_incident(service, [e.id for e in events]).id)
+    return ids
+
+
+def _job(job_id):
+    with create_session() as db:
+        return db.get(AnalysisJob, job_id)
+
+
+def test_cancelled_job_resumes_where_it_stopped():
+    service = f"bulk-{uuid.uuid4().hex[:8]}"
+    ids = _incidents(service, 7)
+
+    def cancel_on_third(count):
+        if count == 3:
+            with create_session() as db:
+                runner.cancel(db, job_id)
+
+    ai = RecordingAI(cancel_on_third)
+    runner = AnalysisJobRunner(ai=ai, concurrency=1, batch_size=2)
+    with create_session() as db:
+        job_id = runner.create(db, {"service": service, "status": "open"}).id
+    assert _job(job_id).total == 7
+
+    assert runner.run(job_id) == "cancelled"
+    job = _job(job_id)
+    assert job.processed == len(ai.calls) and job.processed < 7
+    assert job.cursor == max(ai.calls)
+
+    with create_session() as db:
+        runner.resume(db, job_id)
+    deadline = time.monotonic() + 5
+    while runner.running(job_id):
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+    job = _job(job_id)
+    assert job.status == "completed" and job.progress == 1.0
+    assert job.processed == 7 and sorted(ai.calls) == ids
+    with create_session() as db:
+        summaries = {i.id: i.summary for i in db.query(Incident).filter(Incident.service == service)}
+    assert summaries == {i: f"bulk {i}" for i in ids}
+
+
+def test_analysis_job_api(monkeypatch):
+    service = f"bulk-api-{uuid.uuid4().hex[:8]}"
+    _incidents(service, 3)
+    runner = AnalysisJobRunner(ai=RecordingAI(), concurrency=2, batch_size=2)
+    monkeypatch.setattr(analysis_jobs_routes, "get_analysis_job_runner", lambda: runner)
+
+    def run(body):
+        created = client.post("/api/v1/analysis-jobs", json=body)
+        assert created.status_code == 202
+        job_id = created.json()["id"]
+        deadline = time.monotonic() + 5
+        while (job := client.get(f"/api/v1/analysis-jobs/{job_id}").json())["status"] != "completed":
+            assert time.monotonic() < deadline, "timed out"
+            time.sleep(0.02)
+        return job
+
+    job = run({"service": service})
+    assert (job["total"], job["processed"], job["progress"]) == (3, 3, 1.0)
+    assert job["filters"] == {"service": service}
+
+    # Nothing changed since: only skipped when not forced
+    job = run({"service": service, "force": False})
+    assert (job["processed"], job["skipped"]) == (0, 3)
+
+    assert client.post(f"/api/v1/analysis-jobs/{job['id']}/resume").status_code == 409
+    assert client.get("/api/v1/analysis-jobs/999999").status_code == 404
@@ -1,12 +1,325 @@
+import gzip
+import json
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event as sa_event
+from sqlalchemy import text, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from src.api.routes import events as events_routes
+from src.core import decoding, diagnostics
+from src.core.database import create_session, get_engine
+from src.core.metrics import metrics
+from src.core.profiling import SamplingProfiler
 from src.main import app
+from src.models.event import Event
+from src.models.ingest_key import IngestKey
+from src.models.service import get_service_dictionary
+from src.schemas.event import EventCreate, EventResponse
+from src.schemas.incident import IncidentResponse
+from src.services import idempotency, ingest_service
+from src.services.event_writer import EventWriter
 
 client = TestClient(app)
 
+
 def test_health_endpoint():
     """Simple health check to validate API is reachable."""
     response = client.get("/health")
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, dict)
-    assert data.get("status") in {"healthy", "online", "ok", None} or isinstance(data.get("status"), str)
\ No newline at end of file
+    assert data.get("status") in {"healthy", "online", "ok", None} or isinstance(data.get("status"), str)
+
+
+def test_metrics_endpoint_reports_pool_saturation():
+    with TestClient(app) as started:  # runs the lifespan handler (creates the engine)
+        response = started.get("/metrics")
+    assert response.status_code == 200
+    data = response.json()
+    assert "db_pool_primary_saturation" in data
+    assert 0 <= data["db_pool_primary_saturation"] <= 1
+
+
+def test_list_endpoints_match_response_schemas():
+    client.post("/api/v1/events", json={"service": "schema-check", "level": "INFO", "message": "hello"})
+    events = client.get("/api/v1/events", params={"limit": 5}).json()
+    assert events and set(events[0]) == set(EventResponse.model_fields)
+    EventResponse(**events[0])
+
+    for incident in client.get("/api/v1/incidents", params={"limit": 5}).json():
+        assert set(incident) == set(IncidentResponse.model_fields)
+        IncidentResponse(**incident)
+
+    schema = app.openapi()["paths"]["/api/v1/incidents"]["get"]["responses"]["200"]
+    assert schema["content"]["application/json"]["schema"]["items"]["$ref"].endswith("/IncidentResponse")
+
+
+def test_list_fields_and_response_compression():
+    service = f"sparse-{uuid.uuid4().hex[:8]}"
+    for i in range(40):
+        client.post("/api/v1/events", json={"service": service, "level": "INFO", "message": f"request {i} " * 20})
+
+    sparse = client.get("/api/v1/events", params={"service": service, "fields": "timestamp,level"}).json()
+    assert len(sparse) == 40 and set(sparse[0]) == {"id", "level", "timestamp"}
+    incidents = client.get("/api/v1/incidents", params={"fields": "status,service", "limit": 5}).json()
+    assert all(set(i) == {"id", "service", "status"} for i in incidents)
+    assert client.get("/api/v1/events", params={"fields": "id,secret"}).status_code == 400
+
+    full = client.get("/api/v1/events", params={"service": service}, headers={"Accept-Encoding": "gzip"})
+    assert full.headers["content-encoding"] == "gzip"
+    assert int(full.headers["content-length"]) < len(full.content)  # decoded by the client
+    assert len(full.json()) == 40
+    identity = client.get("/api/v1/events", params={"service": service}, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in identity.headers and identity.json() == full.json()
+    # Below COMPRESS_MIN_SIZE
+    assert "content-encoding" not in client.get("/", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_batch_ingest_encodings(monkeypatch):
+    service = f"batch-{uuid.uuid4().hex[:8]}"
+    records = [{"service": service, "level": "INFO", "message": f"line {i}"} for i in range(6)]
+    records.insert(2, {"service": service, "level": "INFO"})  # no message
+
+    response = client.post(
+        "/api/v1/events/batch", content=gzip.compress(json.dumps(records).encode()),
+        headers={"content-type": "application/json", "content-encoding": "gzip"},
+    )
+    assert response.json() == {
+        "accepted": 6, "rejected": 1, "sampled": 0, "dropped": 0, "duplicates": 0,
+        "errors": [{"index": 2, "error": "message: Field required"}],
+    }
+
+    ndjson = "\n".join(json.dumps(r) for r in records[:2]).encode()
+    zstandard = pytest.importorskip("zstandard")
+    response = client.post(
+        "/api/v1/events/batch", content=zstandard.ZstdCompressor().compress(ndjson),
+        headers={"content-type": "application/x-ndjson", "content-encoding": "zstd"},
+    )
+    assert response.json()["accepted"] == 2
+
+    # Trusted agents take the fast path; the single-event endpoint also decompresses
+    monkeypatch.setattr(events_routes.settings, "ingest_trusted_tokens", "agent-secret")
+    response = client.post(
+        "/api/v1/events/batch", json=[{**records[0], "timestamp": "2024-01-15T10:30:00+02:00"}],
+        headers={"x-ingest-token": "agent-secret"},
+    )
+    assert response.json()["accepted"] == 1
+    response = client.post(
+        "/api/v1/events", content=gzip.compress(json.dumps(records[0]).encode()),
+        headers={"content-type": "application/json", "content-encoding": "gzip"},
+    )
+    assert response.status_code == 201
+
+    with create_session() as db:
+        assert db.query(Event).filter(Event.service == service).count() == 10
+        assert db.query(Event).filter(Event.timestamp == datetime(2024, 1, 15, 8, 30)).count() == 1
+
+    assert client.post("/api/v1/events/batch", content=b"x", headers={"content-encoding": "br"}).status_code == 415
+    assert client.post(
+        "/api/v1/events/batch", content=b"not gzip", headers={"content-encoding": "gzip"}
+    ).status_code == 400
+
+
+def test_compressed_bodies_are_not_inflated_past_the_limit(monkeypatch):
+    monkeypatch.setattr(decoding.settings, "ingest_max_body_bytes", 1024 * 1024)
+    bombs = [("gzip", gzip.compress(b"\0" * (64 * 1024 * 1024)))]
+    zstandard = pytest.importorskip("zstandard")
+    bombs.append(("zstd", zstandard.ZstdCompressor(level=19).compress(b"\0" * (256 * 1024 * 1024))))
+
+    for encoding, bomb in bombs:
+        assert len(bomb) < 256 * 1024
+        tracemalloc.start()
+        try:
+            response = client.post(
+                "/api/v1/events/batch", content=bomb,
+                headers={"content-type": "application/x-ndjson", "content-encoding": encoding},
+            )
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert response.status_code == 413, encoding
+        assert peak < 16 * 1024 * 1024, encoding  # never the whole inflated body
+
+
+def test_batch_ingest_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    service = f"msgpack-{uuid.uuid4().hex[:8]}"
+    records = [{"service": service, "level": "INFO", "message": f"line {i}"} for i in range(4)]
+    headers = {"content-type": "application/msgpack"}
+
+    # One map, an array, and concatenated maps
+    response = client.post("/api/v1/events/batch", content=msgpack.packb(records[0]), headers=headers)
+    assert response.json()["accepted"] == 1
+    response = client.post("/api/v1/events/batch", content=msgpack.packb(records), headers=headers)
+    assert response.json()["accepted"] == 4
+    stream = b"".join(msgpack.packb(r) for r in records[:2])
+    response = client.post("/api/v1/events/batch", content=stream, headers=headers)
+    assert response.json()["accepted"] == 2
+
+    with create_session() as db:
+        assert db.query(Event).filter(Event.service == service).count() == 7
+
+    for body in (b"\xc1", msgpack.packb(records)[:-3]):  # reserved byte, truncated array
+        assert client.post("/api/v1/events/batch", content=body, headers=headers).status_code == 400
+
+
+def test_debug_endpoints_record_slow_queries_and_profiles(monkeypatch):
+    assert client.get("/debug/slow-queries").status_code == 404  # DEBUG_TOKEN unset
+
+    monkeypatch.setattr(diagnostics.settings, "debug_token", "debug-secret")
+    monkeypatch.setattr(diagnostics.settings, "slow_query_ms", 0.000001)
+    monkeypatch.setattr(diagnostics.settings, "slow_request_ms", 0.000001)
+    diagnostics.slow_queries.clear()
+    diagnostics.slow_requests.clear()
+    token = {"x-debug-token": "debug-secret"}
+    assert client.get("/debug/slow-queries").status_code == 403
+
+    response = client.get("/api/v1/incidents", params={"limit": 5, "profile": "1"}, headers=token)
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    assert "x-profile-id" not in client.get("/api/v1/incidents", headers={"x-profile": "1"}).headers
+
+    queries = client.get("/debug/slow-queries", headers=token).json()
+    assert any(q["route"] == "GET /api/v1/incidents" and q["statement"].startswith("SELECT") for q in queries)
+    requests = client.get("/debug/slow-requests", headers=token).json()
+    profiled = next(r for r in requests if r["profile_id"] == profile_id)
+    assert profiled["route"] == "GET /api/v1/incidents" and profiled["db_queries"] >= 1
+    assert client.get("/debug/profiles", headers=token).json()[0]["id"] == profile_id
+    stacks = client.get(f"/debug/profiles/{profile_id}", headers=token)
+    assert stacks.status_code == 200 and stacks.headers["content-type"].startswith("text/plain")
+
+    # Only stacks running the target function are sampled, from that frame down
+    def busy():
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+
+    profiler = SamplingProfiler(lambda: busy.__code__, 0.001).start()
+    worker = threading.Thread(target=busy)
+    worker.start()
+    worker.join()
+    profiler.stop()
+    lines = profiler.folded().splitlines()
+    assert profiler.samples > 10
+    root = re.compile(rf"busy \([^)]*test_api\.py:{busy.__code__.co_firstlineno}\)[; ]")
+    assert all(root.match(line) for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+
+
+def test_retried_events_are_stored_once(monkeypatch):
+    service = f"retry-{uuid.uuid4().hex[:8]}"
+    body = {"service": service, "level": "INFO", "message": "payment accepted"}
+
+    first = client.post("/api/v1/events", json=body, headers={"idempotency-key": "agent-1:1"})
+    retry = client.post("/api/v1/events", json=body, headers={"idempotency-key": "agent-1:1"})
+    assert first.status_code == 201
+    assert retry.status_code == 200 and retry.headers["idempotent-replayed"] == "true"
+    assert retry.json()["id"] == first.json()["id"]
+
+    records = [{**body, "idempotency_key": f"agent-1:{seq}"} for seq in (1, 2, 2, 3)] + [body, body]
+    response = client.post("/api/v1/events/batch", json=records).json()
+    assert response["accepted"] == 6 and response["duplicates"] == 2
+
+    # Keys stored by another process (or before a restart) aren't in this
+    # process's Bloom filter; the unique key is the backstop
+    monkeypatch.setattr(idempotency.get_idempotency_guard(), "_current", idempotency.BloomFilter(1000, 0.01))
+    response = client.post("/api/v1/events/batch", json=[{**body, "idempotency_key": "agent-1:3"}]).json()
+    assert response["duplicates"] == 1
+
+    # Keys are scoped to the service and forgotten after the window
+    other = {**body, "service": f"{service}-b", "idempotency_key": "agent-1:1"}
+    assert client.post("/api/v1/events", json=other).status_code == 201
+    with create_session() as db:
+        db.execute(update(IngestKey).values(created_at=datetime.utcnow() - timedelta(days=2)))
+        db.commit()
+    assert client.post("/api/v1/events", json={**body, "idempotency_key": "agent-1:2"}).status_code == 201
+    assert idempotency.purge_ingest_keys() >= 3
+
+    with create_session() as db:
+        assert db.query(Event).filter(Event.service == service).count() == 6
+
+
+def test_concurrent_sqlite_writes_go_through_single_writer():
+    service = f"writer-{uuid.uuid4().hex[:8]}"
+    stored = metrics.snapshot().get("event_writer_events_total", 0)
+
+    def send(i):
+        # Some ERRORs, so detection commits in the middle of mixed batches
+        level = "ERROR" if i % 8 == 0 else "INFO"
+        return client.post("/api/v1/events", json={"service": service, "level": level, "message": f"tick {i}"})
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        responses = list(pool.map(send, range(64)))
+    assert all(r.status_code == 201 for r in responses)
+    assert len({r.json()["id"] for r in responses}) == 64
+    assert all(r.json()["service"] == service for r in responses)
+    assert metrics.snapshot()["event_writer_events_total"] - stored == 64
+
+    listed = client.get("/api/v1/events", params={"service": service, "limit": 100}).json()
+    assert len(listed) == 64
+
+    # Reads use their own query-only pool on the WAL-mode file
+    with create_session(read_only=True) as db:
+        assert db.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        with pytest.raises(OperationalError):
+            db.execute(text("DELETE FROM events WHERE id = -1"))
+
+
+def test_single_writer_detection_failure_fails_only_its_event(monkeypatch):
+    service = f"writer-{uuid.uuid4().hex[:8]}"
+    real_detect = ingest_service.detect_inline
+
+    def detect(db, event):
+        if event.message == "bad":
+            raise RuntimeError("detection down")
+        return real_detect(db, event)
+
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    monkeypatch.setattr(ingest_service, "detect_inline", detect)
+    batch = [
+        (EventCreate(service=service, level=level, message=message), Future())
+        for level, message in [("ERROR", "ok 1"), ("ERROR", "bad"), ("ERROR", "ok 2"), ("INFO", "info")]
+    ]
+    EventWriter(batch_size=10)._write(batch)
+
+    with pytest.raises(RuntimeError, match="detection down"):
+        batch[1][1].result(timeout=0)
+    stored = [future.result(timeout=0)[0] for event, future in batch if event.message != "bad"]
+    assert [event.message for event in stored] == ["ok 1", "ok 2", "info"]
+    assert all(event.id is not None for event in stored)
+
+
+def test_service_dictionary_looks_up_only_what_is_missing():
+    services = get_service_dictionary()
+    unknown = f"never-{uuid.uuid4().hex[:8]}"
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM services" in statement:
+            statements.append(statement)
+
+    sa_event.listen(get_engine(), "before_cursor_execute", record)
+    try:
+        assert services.id_for(unknown, create=False) is None
+        assert services.id_for(unknown, create=False) is None  # remembered miss
+        assert services.name_for(-1) is None
+    finally:
+        sa_event.remove(get_engine(), "before_cursor_execute", record)
+    assert len(statements) == 2
+    assert all("WHERE" in statement for statement in statements)
+
+    # A failed flush doesn't leave its (rolled back) ids to the next one
+    with create_session() as db:
+        db.add(Event(service=f"failed-{uuid.uuid4().hex[:8]}", level="INFO", message=None))
+        with pytest.raises(IntegrityError):
+            db.flush()
+    assert getattr(services._flushing, "ids", None) is None
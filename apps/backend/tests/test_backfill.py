@@ -0,0 +1,67 @@
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from src.cli.backfill import parse_lines, run_backfill
+from src.core.database import create_session
+from src.models.event import Event
+from src.models.incident import Incident, IncidentStatus
+
+BASE = datetime(2024, 1, 15, 10, 0, 0)
+
+
+def _write_logs(tmp_path, service):
+    # Written out of order: detection must replay in event-time order
+    text = tmp_path / "app.log"
+    lines = [
+        f"{(BASE + timedelta(seconds=i * 10)).isoformat()}Z ERROR {service} Connection timeout after {i}ms"
+        for i in reversed(range(6))
+    ]
+    lines.append("not a log line")
+    text.write_text("\n".join(lines) + "\n")
+
+    # Spread over 20 minutes of event time: never a burst
+    compressed = tmp_path / "other.jsonl.gz"
+    with gzip.open(compressed, "wt") as f:
+        for i in range(5):
+            record = {"timestamp": (BASE + timedelta(minutes=i * 5)).isoformat() + "+00:00",
+                      "service": f"{service}-quiet", "level": "error", "message": f"slow query {i}"}
+            f.write(json.dumps(record) + "\n")
+    return [str(text), str(compressed)]
+
+
+def test_parse_lines_accepts_text_and_json_formats():
+    events, skipped = parse_lines([b"2024-01-15T10:00:00Z WARNING [auth-api] token expired", b"oops"], "text")
+    assert skipped == 1
+    assert events[0][:4] == (datetime(2024, 1, 15, 10, 0), "auth-api", "WARN", "token expired")
+
+    events, _ = parse_lines([b'{"ts": 1705312800, "service": "auth-api", "severity": "fatal", "msg": "down"}'], "jsonl")
+    assert events[0][:4] == (datetime(2024, 1, 15, 10, 0), "auth-api", "ERROR", "down")
+
+
+def test_dry_run_reports_incidents_without_writing(tmp_path):
+    service = f"backfill-{uuid.uuid4().hex[:8]}"
+    report = run_backfill(_write_logs(tmp_path, service), workers=2, dry_run=True)
+
+    assert (report.lines_parsed, report.lines_skipped, report.errors) == (11, 1, 11)
+    assert [(i.service, i.opened_at, len(i.event_ids)) for i in report.incidents] == [
+        (service, BASE + timedelta(seconds=40), 6)
+    ]
+    with create_session() as db:
+        assert db.query(Event).filter(Event.service == service).count() == 0
+
+
+def test_backfill_loads_events_and_replayed_incidents(tmp_path):
+    service = f"backfill-{uuid.uuid4().hex[:8]}"
+    report = run_backfill(_write_logs(tmp_path, service), workers=0, batch_size=4, resolve_after=600)
+
+    assert report.events_inserted == 11
+    with create_session() as db:
+        incident = db.query(Incident).filter(Incident.service == service).one()
+        assert incident.created_at == BASE + timedelta(seconds=40)
+        assert incident.last_seen_at == BASE + timedelta(seconds=50)
+        assert incident.event_count == 6
+        assert incident.status == IncidentStatus.RESOLVED  # quiet for 20 minutes before the logs end
+        assert db.query(Event).filter(Event.incident_id == incident.id).count() == 6
+        assert db.query(Incident).filter(Incident.service == f"{service}-quiet").count() == 0
@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.services import ai_service
+from src.services.ai_service import AIService
+from src.services.circuit_breaker import CircuitBreaker
+
+ANALYSIS = {"category": "database", "severity": "P2", "summary": "stub", "recommended_actions": ["check"]}
+
+
+class StubLLM:
+    """Local chat-completions endpoint with injectable latency and errors."""
+
+    def __init__(self):
+        self.delay = 0.0
+        self.status = 200
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.hits += 1
+                time.sleep(stub.delay)
+                body = json.dumps({
+                    "id": "stub", "object": "chat.completion", "created": 0, "model": "gpt-4",
+                    "choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": json.dumps(ANALYSIS)},
+                    }],
+                } if stub.status == 200 else {"error": {"message": "boom"}}).encode()
+                try:
+                    self.send_response(stub.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass  # client already gave up
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    pytest.importorskip("openai")
+    server = StubLLM()
+    monkeypatch.setattr(ai_service.settings, "openai_api_key", "sk-" + "x" * 40)
+    monkeypatch.setattr(ai_service.settings, "openai_base_url", server.url)
+    monkeypatch.setattr(ai_service.settings, "openai_timeout", 0.3)
+    yield server
+    server.close()
+
+
+def _incident():
+    return SimpleNamespace(id=1, service="payments", events=[], created_at=datetime.utcnow())
+
+
+def _service(clock):
+    breaker = CircuitBreaker("llm_test", failure_threshold=2, reset_timeout=30, clock=clock)
+    return AIService(breaker=breaker), breaker
+
+
+def test_errors_open_the_circuit_and_skip_the_api(stub):
+    service, breaker = _service(FakeClock())
+    stub.status = 500
+
+    for _ in range(5):
+        assert service.analyze_incident(_incident())["severity"] in {"P1", "P2", "P3", "P4"}
+
+    assert stub.hits == 2
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_slow_api_times_out_to_local_fallback(stub):
+    service, breaker = _service(FakeClock())
+    stub.delay = 2.0
+
+    started = time.perf_counter()
+    result = service.analyze_incident(_incident())
+
+    assert time.perf_counter() - started < 1.5
+    assert result["summary"] != ANALYSIS["summary"]
+    assert breaker.snapshot()["consecutive_failures"] == 1
+
+
+def test_half_open_probe_closes_circuit_on_recovery(stub):
+    clock = FakeClock()
+    service, breaker = _service(clock)
+    stub.status = 500
+    service.analyze_incident(_incident())
+    service.analyze_incident(_incident())
+    assert breaker.state == CircuitBreaker.OPEN
+
+    stub.status = 200
+    clock.now += 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert service.analyze_incident(_incident()) == ANALYSIS
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_prompt_build_does_not_hold_the_probe(monkeypatch):
+    clock = FakeClock()
+    service, breaker = _service(clock)
+    service.use_mock = False
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    def broken_prompt(*args):
+        raise ValueError("bad event")
+
+    monkeypatch.setattr(service, "_create_analysis_prompt", broken_prompt)
+    with pytest.raises(ValueError):
+        service.analyze_incident(_incident())
+
+    # The probe is still available to the next analysis
+    monkeypatch.undo()
+    monkeypatch.setattr(service, "_complete", lambda prompt: SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(ANALYSIS)))]
+    ))
+    assert service.analyze_incident(_incident()) == ANALYSIS
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,224 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.database import create_session
+from src.core.metrics import metrics
+from src.models.event import Event
+from src.models.incident import Incident
+from src.schemas.event import EventCreate
+from src.services import ingest_service
+from src.services.detection import ShardedDetector, WindowStore, detect_event
+from src.services.incident_touch import IncidentToucher
+from src.services.ingest_service import IngestService
+from src.services import incident_service
+
+
+def _ingest_burst(service, count):
+    def send(i):
+        with create_session() as db:
+            IngestService(db).ingest(EventCreate(service=service, level="ERROR", message=f"boom {i}"))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(send, range(count)))
+
+
+@pytest.mark.parametrize("shards", [0, 3])
+def test_concurrent_error_burst_opens_exactly_one_incident(monkeypatch, shards):
+    detector = ShardedDetector(shards) if shards else None
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: detector)
+    service = f"burst-{uuid.uuid4().hex[:8]}"
+    try:
+        _ingest_burst(service, 20)
+    finally:
+        if detector:
+            detector.stop()
+
+    with create_session() as db:
+        incidents = db.query(Incident).filter(Incident.service == service).all()
+        assert len(incidents) == 1
+        linked = db.query(Event).filter(Event.service == service, Event.incident_id == incidents[0].id).count()
+        assert linked == 20
+
+
+
+def test_workers_count_each_others_errors(monkeypatch):
+    # Two workers' detectors, taking turns: the threshold counts errors from both
+    detectors = [ShardedDetector(1), ShardedDetector(1)]
+    turn = iter(range(100))
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: detectors[next(turn) % 2])
+    service = f"workers-{uuid.uuid4().hex[:8]}"
+    opened_at = []
+    try:
+        for i in range(10):
+            with create_session() as db:
+                IngestService(db).ingest(EventCreate(service=service, level="ERROR", message=f"boom {i}"))
+                if not opened_at and db.query(Incident).filter(Incident.service == service).count():
+                    opened_at.append(i + 1)
+    finally:
+        for detector in detectors:
+            detector.stop()
+    assert opened_at == [5]
+
+def test_events_joining_an_incident_are_counted_by_debounced_flush(monkeypatch):
+    toucher = IncidentToucher()
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    monkeypatch.setattr(incident_service, "get_incident_toucher", lambda: toucher)
+    service = f"touch-{uuid.uuid4().hex[:8]}"
+    _ingest_burst(service, 5)  # opens the incident
+
+    with create_session() as db:
+        incident = db.query(Incident).filter(Incident.service == service).one()
+        created_updated_at = incident.updated_at
+
+    _ingest_burst(service, 30)
+    with create_session() as db:
+        incident = db.query(Incident).filter(Incident.service == service).one()
+        assert incident.event_count == 5
+
+    assert toucher.flush() == 1
+    with create_session() as db:
+        incident = db.query(Incident).filter(Incident.service == service).one()
+        assert incident.event_count == 35
+        assert incident.last_seen_at > created_updated_at
+        assert incident.updated_at >= incident.last_seen_at
+
+
+def _ingest_at(service, offsets, base):
+    for offset in offsets:
+        with create_session() as db:
+            IngestService(db).ingest(EventCreate(
+                service=service, level="ERROR", message="boom", timestamp=base + timedelta(seconds=offset)
+            ))
+    with create_session() as db:
+        return db.query(Incident).filter(Incident.service == service).count()
+
+
+def test_detection_uses_event_time(monkeypatch):
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    base = datetime.utcnow() - timedelta(hours=1)
+
+    # A buffered flush: arrives all at once, but spread over 8 minutes of event time
+    assert _ingest_at(f"spread-{uuid.uuid4().hex[:8]}", [0, 120, 240, 360, 480], base) == 0
+
+    # Out of order, but within the allowed lateness: still one burst
+    assert _ingest_at(f"shuffled-{uuid.uuid4().hex[:8]}", [40, 10, 30, 0, 20], base) == 1
+
+
+def test_events_behind_the_watermark_are_counted_as_late(monkeypatch):
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    base = datetime.utcnow() - timedelta(hours=1)
+    late_before = metrics.snapshot().get("detection_late_events_total", 0)
+
+    # Newest event time is +600s; the rest are more than the lateness behind it
+    assert _ingest_at(f"late-{uuid.uuid4().hex[:8]}", [600, 0, 5, 10, 15], base) == 0
+    assert metrics.snapshot()["detection_late_events_total"] - late_before == 4
+
+
+def test_windows_are_kept_between_events_until_another_worker_changes_them(monkeypatch):
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    service = f"window-{uuid.uuid4().hex[:8]}"
+    base = datetime.utcnow() - timedelta(hours=1)
+    seeds = metrics.snapshot().get("detection_window_seeds_total", 0)
+
+    def seeded():
+        return metrics.snapshot()["detection_window_seeds_total"] - seeds
+
+    assert _ingest_at(service, [0, 10, 20], base) == 0
+    assert seeded() == 1  # later events used the kept window
+
+    # Another worker detects an error for the service with its own windows
+    with create_session() as db:
+        event = Event(service=service, level="ERROR", message="boom", timestamp=base + timedelta(seconds=30))
+        db.add(event)
+        db.commit()
+        assert detect_event(db, event.id, service, event.timestamp, windows=WindowStore()) is None
+    assert seeded() == 2
+
+    # Its error counts toward the threshold here
+    assert _ingest_at(service, [40], base) == 1
+    assert seeded() == 3
+
+
+def test_levels_are_case_insensitive_and_stored_compactly(monkeypatch):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from src.main import app
+    from src.models.service import get_service_dictionary
+
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    service = f"compact-{uuid.uuid4().hex[:8]}"
+    client = TestClient(app)
+    for i, level in enumerate(["error", "Error", "fatal", "err", "ERROR"]):
+        response = client.post("/api/v1/events", json={"service": service, "level": level, "message": f"boom {i}"})
+        assert response.status_code == 201 and response.json()["level"] == "ERROR"
+    assert client.post("/api/v1/events", json={"service": service, "level": "loud", "message": "x"}).status_code == 422
+
+    with create_session() as db:
+        assert db.query(Incident).filter(Incident.service == service).count() == 1
+        raw = db.execute(text("SELECT DISTINCT service_id, level_id FROM events WHERE service_id = "
+                              "(SELECT id FROM services WHERE name = :name)"), {"name": service}).all()
+        assert raw == [(get_service_dictionary().id_for(service), 5)]
+
+    listed = client.get("/api/v1/events", params={"service": service, "level": "err"}).json()
+    assert len(listed) == 5 and {e["service"] for e in listed} == {service}
+    unknown = f"never-{uuid.uuid4().hex[:8]}"
+    assert client.get("/api/v1/events", params={"service": unknown}).json() == []
+    assert get_service_dictionary().id_for(unknown, create=False) is None  # filters don't intern
+
+
+def test_new_service_is_interned_inside_a_writing_transaction():
+    from src.models.service import get_service_dictionary
+
+    known = f"known-{uuid.uuid4().hex[:8]}"
+    service, discarded = f"late-{uuid.uuid4().hex[:8]}", f"gone-{uuid.uuid4().hex[:8]}"
+    get_service_dictionary().intern([known])
+    with create_session() as db:
+        db.add(Event(service=known, level="INFO", message="first"))
+        db.flush()  # this transaction now holds SQLite's write lock
+        db.add(Event(service=service, level="ERROR", message="boom"))
+        db.commit()
+        assert db.query(Event).filter(Event.service == service).one().message == "boom"
+
+        db.add(Event(service=discarded, level="ERROR", message="boom"))
+        db.flush()
+        db.rollback()
+    assert get_service_dictionary().id_for(service, create=False) is not None
+    assert get_service_dictionary().id_for(discarded, create=False) is None
+
+
+def test_incident_timeline_is_maintained_as_events_are_linked(monkeypatch):
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    toucher = IncidentToucher()
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    monkeypatch.setattr(incident_service, "get_incident_toucher", lambda: toucher)
+    service = f"timeline-{uuid.uuid4().hex[:8]}"
+    base = datetime(2024, 3, 1, 12, 0, 10)
+    assert _ingest_at(service, [0, 10, 20, 30, 40], base) == 1  # opens the incident at 12:00
+    _ingest_at(service, [65, 70, 190], base)  # joins it: 12:01 (x2), 12:03
+    toucher.flush()
+
+    with create_session() as db:
+        incident = db.query(Incident).filter(Incident.service == service).one()
+        assert incident.event_count == 8
+    client = TestClient(app)
+    timeline = client.get(f"/api/v1/incidents/{incident.id}/timeline").json()
+    assert timeline["start"] == "2024-03-01T12:00:00"
+    assert timeline["bucket_seconds"] == 60
+    assert timeline["counts"] == [5, 2, 0, 1]
+    assert timeline["total"] == 8
+
+    # A long incident: buckets widen instead of the row growing
+    _ingest_at(service, [60 * 60 * 24 * 3], base)
+    toucher.flush()
+    timeline = client.get(f"/api/v1/incidents/{incident.id}/timeline").json()
+    assert len(timeline["counts"]) <= 120 and timeline["total"] == 9
+    assert timeline["bucket_seconds"] == 60 * 64
+    downsampled = client.get(f"/api/v1/incidents/{incident.id}/timeline", params={"max_buckets": 10}).json()
+    assert len(downsampled["counts"]) <= 10 and downsampled["total"] == 9
+
+    assert client.get("/api/v1/incidents/999999/timeline").status_code == 404
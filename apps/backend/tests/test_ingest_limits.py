@@ -0,0 +1,86 @@
+import uuid
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from src.core.database import create_session
+from src.main import app
+from src.models.event_rollup import EventRollup
+from src.services.ingest_limits import DROPPED, STORE, IngestLimiter, ServiceLimit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_drops_non_errors_only():
+    clock = FakeClock()
+    limiter = IngestLimiter(overrides={"chatty": ServiceLimit(rate=10, burst=10)}, clock=clock)
+
+    decisions = [limiter.admit("chatty", "INFO") for _ in range(15)]
+    assert decisions.count(STORE) == 10 and decisions.count(DROPPED) == 5
+    assert limiter.admit("chatty", "ERROR") == STORE  # bucket empty, still stored
+    assert limiter.admit("quiet", "INFO") == STORE  # default: unlimited
+
+    clock.now += 0.5
+    assert [limiter.admit("chatty", "WARN") for _ in range(6)].count(STORE) == 5
+    assert limiter.stats()["chatty"] == {"received": 16, "stored": 16, "sampled": 0, "dropped": 6}
+
+
+def test_adaptive_sampling_keeps_exact_rollups():
+    clock = FakeClock()
+    limiter = IngestLimiter(ServiceLimit(sample_target=10), clock=clock)
+    service = f"sampled-{uuid.uuid4().hex[:8]}"
+    minute = datetime(2024, 1, 15, 10, 30)
+
+    for second in range(3):
+        clock.now = 1000.0 + second
+        for i in range(100):
+            level = "ERROR" if i % 25 == 0 else "INFO"
+            limiter.admit(service, level, minute.replace(second=second))
+
+    stats = limiter.stats()[service]
+    assert stats["received"] == 300
+    errors_stored, info_stored = 12, stats["stored"] - 12
+    # ~10 INFO rows/second while the rate is learned, ~1 in 10 afterwards
+    assert 20 <= info_stored <= 60
+    assert stats["sampled"] == 300 - stats["stored"]
+
+    assert limiter.flush() == 2
+    with create_session() as db:
+        rows = {r.level: r for r in db.query(EventRollup).filter(EventRollup.service == service)}
+    assert rows["ERROR"].received == rows["ERROR"].stored == errors_stored
+    assert rows["INFO"].received == 288 and rows["INFO"].stored == info_stored
+    assert rows["INFO"].minute == minute
+
+
+def test_limits_api_and_rate_limited_ingest():
+    service = f"limited-{uuid.uuid4().hex[:8]}"
+    event = {"service": service, "level": "INFO", "message": "hello"}
+    with TestClient(app) as client:
+        response = client.put(f"/api/v1/limits/{service}", json={"rate": 0.5, "burst": 2})
+        assert response.json()["overridden"] is True
+
+        codes = [client.post("/api/v1/events", json=event).status_code for _ in range(3)]
+        assert codes == [201, 201, 429]
+        blocked = client.post("/api/v1/events", json=event)
+        assert blocked.headers["retry-after"] == "2"
+        assert client.post("/api/v1/events", json={**event, "level": "ERROR"}).status_code == 201
+
+        limit = client.get(f"/api/v1/limits/{service}").json()
+        assert (limit["received"], limit["stored"], limit["dropped"]) == (3, 3, 2)
+
+        rollups = client.get("/api/v1/events/rollups", params={"service": service}).json()
+        counts = {r["level"]: (r["received"], r["stored"], r["dropped"]) for r in rollups}
+        assert counts == {"INFO": (2, 2, 2), "ERROR": (1, 1, 0)}
+
+        client.put(f"/api/v1/limits/{service}", json={"sample_target": 0.001})
+        assert client.post("/api/v1/events", json=event).status_code == 201  # 1st of the second
+        assert client.post("/api/v1/events", json=event).json() == {"service": service, "level": "INFO", "sampled": True}
+
+        assert client.delete(f"/api/v1/limits/{service}").json()["overridden"] is False
+        assert client.delete(f"/api/v1/limits/{service}").status_code == 404
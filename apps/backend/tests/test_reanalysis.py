@@ -0,0 +1,94 @@
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from src.api.routes import incidents as incidents_routes
+from src.core.database import create_session
+from src.main import app
+from src.models.incident import Incident
+from src.schemas.event import EventCreate
+from src.services import analysis_coordinator, ingest_service
+from src.services.analysis_coordinator import AnalysisCoordinator
+from src.services.fingerprint import fingerprint
+from src.services.ingest_service import IngestService
+
+client = TestClient(app)
+
+
+class CountingAI:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze_incident(self, incident):
+        self.calls += 1
+        return {"category": "other", "severity": "P3", "summary": f"run {self.calls}", "recommended_actions": []}
+
+
+def _setup(monkeypatch):
+    ai = CountingAI()
+    coordinator = AnalysisCoordinator(max_concurrent=1, max_queue=4)
+    monkeypatch.setattr(analysis_coordinator, "get_ai_service", lambda: ai)
+    monkeypatch.setattr(analysis_coordinator, "get_analysis_coordinator", lambda: coordinator)
+    monkeypatch.setattr(incidents_routes, "get_analysis_coordinator", lambda: coordinator)
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    return ai, coordinator
+
+
+def _ingest(service, message):
+    with create_session() as db:
+        return IngestService(db).ingest(EventCreate(service=service, level="ERROR", message=message))
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def _open_analyzed_incident(service, ai):
+    for i in range(5):
+        event = _ingest(service, f"connection timeout after {1000 + i}ms")
+    _wait_for(lambda: ai.calls == 1)
+    _wait_for(lambda: client.get(f"/api/v1/incidents/{event.incident_id}/analysis").json()["state"] == "completed")
+    return event.incident_id
+
+
+def test_fingerprint_ignores_variable_parts():
+    assert fingerprint("Timeout after 3000ms to 10.0.0.12:5432") == fingerprint("timeout after 15ms to 10.1.2.3:6432")
+    assert fingerprint("Timeout after 3000ms") != fingerprint("Disk full on /var")
+
+
+def test_analyze_returns_cached_result_until_forced(monkeypatch):
+    ai, coordinator = _setup(monkeypatch)
+    incident_id = _open_analyzed_incident(f"cache-{uuid.uuid4().hex[:8]}", ai)
+
+    cached = client.post(f"/api/v1/incidents/{incident_id}/analyze").json()
+    assert cached["cached"] is True and cached["summary"] == "run 1"
+    assert ai.calls == 1
+
+    forced = client.post(f"/api/v1/incidents/{incident_id}/analyze?force=true").json()
+    assert forced["cached"] is False and forced["summary"] == "run 2"
+    coordinator.shutdown()
+
+
+def test_only_material_changes_trigger_reanalysis(monkeypatch):
+    ai, coordinator = _setup(monkeypatch)
+    service = f"reanalyze-{uuid.uuid4().hex[:8]}"
+    incident_id = _open_analyzed_incident(service, ai)
+
+    # Same error template again: nothing material
+    _ingest(service, "connection timeout after 4200ms")
+    time.sleep(0.2)
+    assert ai.calls == 1
+
+    # A new kind of error joins the incident: re-analyze in the background
+    _ingest(service, "disk quota exceeded on /var/lib/data")
+    _wait_for(lambda: ai.calls == 2)
+
+    with create_session() as db:
+        incident = db.get(Incident, incident_id)
+        _wait_for(lambda: db.refresh(incident) or incident.analyzed_event_count == 7)
+        assert len(incident.analyzed_fingerprints) == 2
+    coordinator.shutdown()
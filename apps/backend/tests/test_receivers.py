@@ -0,0 +1,129 @@
+import asyncio
+import socket
+import time
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.database import create_session
+from src.main import app
+from src.models.event import Event
+from src.models.incident import Incident
+from src.receivers import parse_syslog, start_syslog_servers
+from src.services import ingest_service
+from src.services.batch_ingestor import BatchIngestor, get_batch_ingestor
+
+
+def test_parse_syslog_formats():
+    event = parse_syslog(
+        "<11>1 2024-05-01T10:00:00.5Z web01 checkout 42 ID47 [exampleSDID@32473 iut=\"3\"] payment failed"
+    )
+    assert (event.service, event.level, event.message) == ("checkout", "ERROR", "payment failed")
+    assert event.timestamp == datetime(2024, 5, 1, 10, 0, 0, 500000)
+
+    event = parse_syslog("<12>May  1 10:00:00 web01 nginx[811]: upstream slow", now=datetime(2024, 6, 1))
+    assert (event.service, event.level, event.message) == ("nginx", "WARN", "upstream slow")
+    assert event.timestamp == datetime(2024, 5, 1, 10, 0, 0)
+
+    assert parse_syslog("not syslog at all") is None
+
+
+def _stored(service):
+    with create_session() as db:
+        events = db.query(Event).filter(Event.service == service).count()
+        incidents = db.query(Incident).filter(Incident.service == service).count()
+    return events, incidents
+
+
+def test_syslog_udp_and_tcp_feed_batched_ingest(monkeypatch):
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    udp_service = f"udp-{uuid.uuid4().hex[:8]}"
+    tcp_service = f"tcp-{uuid.uuid4().hex[:8]}"
+
+    async def scenario():
+        ingestor = BatchIngestor(batch_size=4, batch_delay=0.05, queue_size=2)
+        servers = await start_syslog_servers(ingestor, "127.0.0.1", udp_port=0, tcp_port=0)
+
+        def send():
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+                for i in range(2):
+                    udp.sendto(f"<14>1 - host {udp_service} - - - hello {i}".encode(), ("127.0.0.1", servers.udp_port))
+                    time.sleep(0.1)  # UDP sheds load when the queue is full
+            frames = [f"<11>1 - host {tcp_service} - - - db timeout {i}".encode() for i in range(6)]
+            payload = b"".join(b"%d %s" % (len(f), f) for f in frames[:3])
+            payload += b"".join(f + b"\n" for f in frames[3:])
+            with socket.create_connection(("127.0.0.1", servers.tcp_port)) as tcp:
+                tcp.sendall(payload)
+
+        await asyncio.to_thread(send)
+        await asyncio.sleep(0.2)
+        await ingestor.drain()
+        await servers.close()
+        await ingestor.stop()
+
+    asyncio.run(scenario())
+
+    assert _stored(udp_service) == (2, 0)
+    assert _stored(tcp_service) == (6, 1)
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_syslog_workers_share_ports():
+    async def scenario():
+        ingestor = BatchIngestor(batch_size=4, batch_delay=0.05, queue_size=2)
+        first = await start_syslog_servers(ingestor, "127.0.0.1", udp_port=0, tcp_port=0)
+        try:
+            # A second worker binds the same ports
+            second = await start_syslog_servers(ingestor, "127.0.0.1", udp_port=first.udp_port, tcp_port=first.tcp_port)
+            assert (second.udp_port, second.tcp_port) == (first.udp_port, first.tcp_port)
+            await second.close()
+        finally:
+            await first.close()
+
+    asyncio.run(scenario())
+
+
+def test_otlp_json_logs_endpoint():
+    service = f"otlp-{uuid.uuid4().hex[:8]}"
+    records = [
+        {"timeUnixNano": "1714557600000000000", "severityNumber": 17, "body": {"stringValue": f"query failed {i}"}}
+        for i in range(5)
+    ]
+    records.append({"severityText": "INFO", "body": {"stringValue": "ok"}})
+    records.append({"severityNumber": 9})  # no body
+    payload = {"resourceLogs": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+        "scopeLogs": [{"logRecords": records}],
+    }]}
+
+    with TestClient(app) as client:
+        response = client.post("/v1/logs", json=payload)
+        assert response.status_code == 200
+        assert response.json()["partialSuccess"]["rejectedLogRecords"] == 1
+        client.portal.call(get_batch_ingestor().drain)
+
+        assert client.post("/v1/logs", content=b"\x00", headers={"content-type": "text/plain"}).status_code == 415
+
+    with create_session() as db:
+        events = db.query(Event).filter(Event.service == service).all()
+        assert len(events) == 6
+        assert sum(e.level == "ERROR" for e in events) == 5
+        assert min(e.timestamp for e in events) == datetime(2024, 5, 1, 10, 0, 0)
+
+
+def test_otlp_protobuf_logs_endpoint():
+    logs_service = pytest.importorskip("opentelemetry.proto.collector.logs.v1.logs_service_pb2")
+    request = logs_service.ExportLogsServiceRequest()
+    resource_logs = request.resource_logs.add()
+    attribute = resource_logs.resource.attributes.add()
+    attribute.key, attribute.value.string_value = "service.name", f"otlp-pb-{uuid.uuid4().hex[:8]}"
+    record = resource_logs.scope_logs.add().log_records.add()
+    record.severity_number, record.body.string_value = 17, "boom"
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/v1/logs", content=request.SerializeToString(), headers={"content-type": "application/x-protobuf"}
+        )
+        assert response.status_code == 200
@@ -0,0 +1,50 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from src.main import app
+from src.services.search_service import parse_search_query, to_fts5_query, to_tsquery
+
+client = TestClient(app)
+
+
+def test_parse_search_query_phrases_and_prefixes():
+    terms = parse_search_query('"Connection refused" pool* db.host')
+    assert [t.words for t in terms] == [["connection", "refused"], ["pool"], ["db"], ["host"]]
+    assert terms[1].prefix and not terms[0].prefix
+    assert to_fts5_query(terms) == '"connection refused" "pool"* "db" "host"'
+    assert to_tsquery(terms) == "(connection <-> refused) & pool:* & db & host"
+
+
+def test_search_events_by_phrase_and_prefix():
+    token = f"tok{uuid.uuid4().hex[:10]}"
+    service = f"search-{token}"
+    messages = [
+        f"{token} connection refused by upstream",
+        f"{token} refused connection attempt",
+        f"{token} disk quota exceeded",
+    ]
+    for message in messages:
+        response = client.post("/api/v1/events", json={"service": service, "level": "INFO", "message": message})
+        assert response.status_code == 201
+
+    phrase = client.get("/api/v1/events", params={"q": f'{token} "connection refused"'}).json()
+    assert [e["message"] for e in phrase] == [messages[0]]
+
+    prefix = client.get("/api/v1/events", params={"q": f"{token[:-3]}* quot*"}).json()
+    assert [e["message"] for e in prefix] == [messages[2]]
+
+    assert client.get("/api/v1/events", params={"q": f"{token} connection", "service": service}).json()
+
+
+def test_matches_outside_rank_window_follow_ranked_ones(monkeypatch):
+    from src.services import search_service
+
+    token = f"tok{uuid.uuid4().hex[:10]}"
+    messages = [f"{token} event {i}" for i in range(5)]
+    for message in messages:
+        client.post("/api/v1/events", json={"service": f"search-{token}", "level": "INFO", "message": message})
+
+    monkeypatch.setattr(search_service.settings, "search_rank_window", 2)
+    found = client.get("/api/v1/events", params={"q": token, "limit": 10}).json()
+    assert sorted(e["message"] for e in found) == messages
+    assert {e["message"] for e in found[:2]} == set(messages[3:])  # the ranked window comes first
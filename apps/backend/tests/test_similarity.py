@@ -0,0 +1,82 @@
+import uuid
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import selectinload
+
+from src.core.database import create_session
+from src.main import app
+from src.models.event import Event
+from src.models.incident import Incident
+from src.services.ai_service import AIService
+from src.services.fingerprint import fingerprint
+from src.services.incident_service import IncidentService
+from src.services.vector_index import VectorIndex
+
+client = TestClient(app)
+
+
+def test_vector_index_batched_top_k_matches_brute_force(monkeypatch):
+    from src.services import vector_index
+
+    monkeypatch.setattr(vector_index, "_BLOCK_ROWS", 64)  # exercise the block merge
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(500, 32)).astype(np.float32)
+    index = VectorIndex(32, capacity=16)
+    for start in range(0, 500, 100):
+        index.add(list(range(start, start + 100)), vectors[start:start + 100])
+    index.add([7], vectors[8])  # replace: id 7 now looks like id 8
+    vectors[7] = vectors[8]
+    assert len(index) == 500
+
+    queries = rng.normal(size=(4, 32)).astype(np.float32)
+    results = index.search(queries, k=5, exclude=[None, None, None, 8])
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    for query, hits in zip(queries, results[:3]):
+        expected = np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5]
+        assert [i for i, _ in hits] == list(expected)
+
+    hits = index.search(vectors[8], k=2, exclude=[8])[0]
+    assert hits[0][0] == 7 and abs(hits[0][1] - 1.0) < 1e-5
+
+
+def _incident(service, messages):
+    with create_session() as db:
+        events = [Event(service=service, level="ERROR", message=m, fingerprint=fingerprint(m)) for m in messages]
+        db.add_all(events)
+        db.commit()
+        incident = IncidentService(db).create_incident(service, [e.id for e in events])
+        return db.query(Incident).options(selectinload(Incident.events)).filter(Incident.id == incident.id).one()
+
+
+def test_similar_incident_analysis_is_reused():
+    service = f"similar-{uuid.uuid4().hex[:8]}"
+    timeouts = [f"Database connection timeout after {3000 + i}ms to 10.0.0.{i}:5432" for i in range(5)]
+    analysis = {
+        "category": "database_issue", "severity": "P1",
+        "summary": "Primary database unreachable", "recommended_actions": ["check_db_connections"],
+    }
+    past = _incident(service, timeouts + ["Retrying query 17 of batch a1b2c3d4e5"])
+    with create_session() as db:
+        IncidentService(db).apply_analysis(db.merge(past), analysis)
+
+    llm_calls = []
+    ai = AIService()
+    ai._mock_analysis = lambda incident: llm_calls.append(incident.id) or analysis
+
+    recurring = _incident(service, [f"Database connection timeout after {9000 + i}ms to 10.0.1.{i}:5432" for i in range(8)])
+    result = ai.analyze_incident(recurring)
+    assert result["reused_from"] == past.id and result["similarity"] >= 0.9
+    assert result["recommended_actions"] == ["check_db_connections"]
+    assert llm_calls == []
+
+    unrelated = _incident(service, [f"JWT signature invalid for user {i}" for i in range(5)])
+    assert "reused_from" not in ai.analyze_incident(unrelated)
+    assert llm_calls == [unrelated.id]
+
+    similar = client.get(f"/api/v1/incidents/{recurring.id}/similar", params={"limit": 3}).json()
+    assert similar[0]["incident_id"] == past.id
+    assert similar[0]["category"] == "database_issue"
+    far = client.get(f"/api/v1/incidents/{unrelated.id}/similar", params={"min_score": 0.9}).json()
+    assert past.id not in [s["incident_id"] for s in far]
+    assert client.get("/api/v1/incidents/999999/similar").status_code == 404
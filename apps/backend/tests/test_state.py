@@ -0,0 +1,184 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.database import create_session
+from src.core.metrics import metrics
+from src.core.state import LocalStateBackend, SQLiteStateBackend, load_backend, state_lock
+from src.models.event import Event
+from src.models.incident import Incident, IncidentStatus
+from src.schemas.event import EventCreate
+from src.services import detection, incident_service, ingest_service
+from src.services.incident_service import IncidentService
+from src.services.ingest_limits import IngestLimiter, ServiceLimit
+from src.services.ingest_service import IngestService
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def state(request, tmp_path):
+    backend = LocalStateBackend() if request.param == "local" else SQLiteStateBackend(str(tmp_path / "state.db"), 0.01)
+    yield backend
+    backend.close()
+
+
+def test_state_backend_operations(state):
+    assert state.get("k") is None
+    state.set("k", "v")
+    assert state.get("k") == "v"
+    assert state.delete("k") and not state.delete("k")
+
+    assert [state.incr("n") for _ in range(3)] == [1, 2, 3]
+    assert state.incr("n", -5) == -2
+    state.set("text", "abc")
+    with pytest.raises(ValueError):
+        state.incr("text")
+
+    assert state.compare_and_set("cas", None, "a")
+    assert not state.compare_and_set("cas", None, "b")
+    assert state.compare_and_set("cas", "a", "b") and state.get("cas") == "b"
+    assert state.compare_and_set("cas", "b", None) and state.get("cas") is None
+
+    state.set("short", "x", ttl=0.05)
+    state.incr("ticks", ttl=0.05)
+    time.sleep(0.1)
+    assert state.get("short") is None
+    assert state.incr("ticks") == 1  # expired counters restart
+    assert state.compare_and_set("short", None, "y")
+
+    received = []
+    unsubscribe = state.subscribe("news", received.append)
+    state.publish("news", "one")
+    state.publish("other", "ignored")
+    _wait_for(lambda: received == ["one"])
+    unsubscribe()
+    state.publish("news", "two")
+    time.sleep(0.05)
+    assert received == ["one"]
+
+
+def test_sqlite_state_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    workers = [SQLiteStateBackend(path, 0.01) for _ in range(2)]
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: workers[i % 2].incr("hits"), range(200)))
+        assert workers[0].get("hits") == workers[1].get("hits") == "200"
+
+        received = []
+        workers[1].subscribe("limits", received.append)
+        workers[0].publish("limits", "changed")
+        _wait_for(lambda: received == ["changed"])
+
+        # Only one worker at a time inside the lock
+        inside, overlaps = [], []
+
+        def critical(i):
+            with state_lock(workers[i % 2], "lock:svc", lease=5):
+                inside.append(i)
+                if len(inside) > 1:
+                    overlaps.append(i)
+                time.sleep(0.001)
+                inside.remove(i)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(critical, range(40)))
+        assert not overlaps
+        assert workers[0].get("lock:svc") is None
+        with pytest.raises(TimeoutError):
+            with state_lock(workers[0], "held", lease=5):
+                with state_lock(workers[1], "held", lease=5, timeout=0.05):
+                    pass
+    finally:
+        for worker in workers:
+            worker.close()
+
+    assert isinstance(load_backend("local"), LocalStateBackend)
+    assert isinstance(load_backend("src.core.state:LocalStateBackend"), LocalStateBackend)
+    with pytest.raises(ValueError):
+        load_backend("src.core.config:Settings")
+
+
+def test_detection_with_shared_state(monkeypatch, tmp_path):
+    state = SQLiteStateBackend(str(tmp_path / "state.db"), 0.01)
+    monkeypatch.setattr(detection, "get_state", lambda: state)
+    monkeypatch.setattr(incident_service, "get_state", lambda: state)
+    monkeypatch.setattr(ingest_service, "get_detector", lambda: None)
+    service = f"shared-{uuid.uuid4().hex[:8]}"
+
+    def burst(count):
+        def send(i):
+            with create_session() as db:
+                IngestService(db).ingest(EventCreate(service=service, level="ERROR", message=f"boom {i}"))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(send, range(count)))
+
+    try:
+        hits = metrics.snapshot().get("open_incident_cache_hits_total", 0)
+        burst(20)
+        with create_session() as db:
+            incident = db.query(Incident).filter(Incident.service == service).one()
+            assert db.query(Event).filter(Event.incident_id == incident.id).count() == 20
+            assert state.get(f"open-incident:{service}") == str(incident.id)
+            IncidentService(db).update_status(incident, IncidentStatus.RESOLVED)
+        assert metrics.snapshot()["open_incident_cache_hits_total"] > hits
+        assert state.get(f"open-incident:{service}") is None
+
+        # Resolved: the next burst opens a new incident
+        burst(5)
+        with create_session() as db:
+            incidents = db.query(Incident).filter(Incident.service == service).order_by(Incident.id).all()
+        assert [i.status for i in incidents] == [IncidentStatus.RESOLVED, IncidentStatus.OPEN]
+        assert state.get(f"open-incident:{service}") == str(incidents[1].id)
+    finally:
+        state.close()
+
+
+def test_limit_changes_reach_other_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    states = [SQLiteStateBackend(path, 0.01) for _ in range(2)]
+    limiters = [IngestLimiter() for _ in range(2)]
+    try:
+        for limiter, state in zip(limiters, states):
+            limiter.share(state)
+        limiters[0].set_limit("chatty", ServiceLimit(rate=5, burst=10))
+        _wait_for(lambda: "chatty" in limiters[1].overrides())
+        assert limiters[1].limit_for("chatty") == ServiceLimit(rate=5, burst=10)
+
+        assert limiters[1].clear_limit("chatty")
+        _wait_for(lambda: "chatty" not in limiters[0].overrides())
+    finally:
+        for state in states:
+            state.close()
+
+
+def test_open_incident_lookup_sees_other_hosts(monkeypatch, tmp_path):
+    # Two hosts: one database, each with its own host-local state file
+    hosts = [SQLiteStateBackend(str(tmp_path / f"host-{i}.db"), 0.01) for i in range(2)]
+    current = {"state": hosts[0]}
+    monkeypatch.setattr(incident_service, "get_state", lambda: current["state"])
+    service = f"hosts-{uuid.uuid4().hex[:8]}"
+    try:
+        with create_session() as db:
+            assert IncidentService(db).get_open_incident_for_service(service) is None
+
+            current["state"] = hosts[1]
+            event = IngestService(db).ingest(EventCreate(service=service, level="INFO", message="boom"))
+            incident = IncidentService(db).create_incident(service, [event.id])
+
+            current["state"] = hosts[0]
+            found = IncidentService(db).get_open_incident_for_service(service)
+            assert found is not None and found.id == incident.id
+            assert hosts[0].get(f"open-incident:{service}") == str(incident.id)
+    finally:
+        for host in hosts:
+            host.close()
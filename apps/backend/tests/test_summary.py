@@ -0,0 +1,62 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+
+from src.core.database import create_session, get_engine
+from src.main import app
+from src.models.incident_counter import IncidentCounter
+from src.services.incident_service import IncidentService
+from src.services.summary_service import IncidentSummaryService
+
+client = TestClient(app)
+
+
+def test_summary_counters_follow_incident_lifecycle():
+    service = f"summary-{uuid.uuid4().hex[:8]}"
+    for i in range(5):
+        client.post("/api/v1/events", json={"service": service, "level": "ERROR", "message": f"db timeout {i}"})
+
+    summary = client.get("/api/v1/incidents/summary").json()
+    assert summary["by_service"][service] == 1
+    incident_id = client.get("/api/v1/events", params={"service": service}).json()[0]["incident_id"]
+
+    before = summary["by_status"].get("resolved", 0)
+    client.patch(f"/api/v1/incidents/{incident_id}/status", json={"status": "resolved"})
+    summary = client.get("/api/v1/incidents/summary").json()
+    assert summary["by_status"].get("resolved", 0) == before + 1
+    assert summary["total"] == sum(summary["by_severity"].values())
+
+    # Incrementally maintained counters agree with a full recount
+    with create_session() as db:
+        assert IncidentSummaryService(db).reconcile() == 0
+
+
+def test_reconcile_keeps_counter_changes_committed_meanwhile():
+    service = f"reconcile-{uuid.uuid4().hex[:8]}"
+    with create_session() as db:
+        IncidentService(db).create_incident(service, [])
+        db.execute(update(IncidentCounter).where(IncidentCounter.key == service).values(count=7))  # drifted
+        db.commit()
+
+    interleaved = []
+
+    def open_incident_meanwhile(conn, cursor, statement, *args):
+        # Another request opens an incident for the service right before
+        # reconcile writes its first counter
+        if "incident_counters" in statement and not statement.startswith("SELECT") and not interleaved:
+            interleaved.append(statement)
+            with create_session() as other:
+                IncidentService(other).create_incident(service, [])
+
+    event.listen(get_engine(), "before_cursor_execute", open_incident_meanwhile)
+    try:
+        with create_session() as db:
+            IncidentSummaryService(db).reconcile()
+    finally:
+        event.remove(get_engine(), "before_cursor_execute", open_incident_meanwhile)
+
+    assert interleaved
+    with create_session() as db:
+        assert IncidentSummaryService(db).get_summary()["by_service"][service] == 2
+        assert IncidentSummaryService(db).reconcile() == 0
@@ -41,18 +41,24 @@ export default function Dashboard() {
     try {
       const base = getApiBase()
       console.log('Fetching from:', `${base}/api/v1/incidents`)
-      const response = await axios.get(`${base}/api/v1/incidents`, {
-        timeout: 60000, // 60 second timeout for cold starts
-      })
+      const [response, summaryResponse] = await Promise.all([
+        axios.get(`${base}/api/v1/incidents`, {
+          // Only the columns the table shows (summaries are long and not displayed here)
+          params: { fields: 'service,category,severity,status,event_count,created_at' },
+          timeout: 60000, // 60 second timeout for cold starts
+        }),
+        axios.get(`${base}/api/v1/incidents/summary`, { timeout: 60000 }),
+      ])
       const data = response.data
       setIncidents(data)
       
-      // Calculate stats
+      // Stats come from server-side counters (accurate beyond the first page)
+      const summary = summaryResponse.data
       const statsData = {
-        total: data.length,
-        open: data.filter((i: Incident) => i.status === 'open').length,
-        investigating: data.filter((i: Incident) => i.status === 'investigating').length,
-        resolved: data.filter((i: Incident) => i.status === 'resolved').length,
+        total: summary.total,
+        open: summary.by_status.open || 0,
+        investigating: summary.by_status.investigating || 0,
+        resolved: summary.by_status.resolved || 0,
       }
       setStats(statsData)
       setLoading(false)